@@ -0,0 +1,211 @@
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# ========================
+# 🔹 ADMISSION CONTROL
+# ========================
+# When a big proposal's DMs land, hundreds of votes and tracker refreshes arrive at once.
+# Votes are never dropped: each waits for its guild's token bucket and then for one of a
+# fixed number of write slots, so DB connections stay bounded and one guild cannot starve
+# the rest. Tracker refreshes are recoverable (the next refresh redraws everything), so
+# they are coalesced per proposal, rate limited per guild and shed into a deferred set
+# when over quota or when the bounded queue is full; the worker re-admits deferred
+# refreshes once it has capacity, and only runs a refresh while no vote is waiting.
+
+MAX_CONCURRENT_VOTE_WRITES = 4
+VOTE_RATE_PER_GUILD = 20.0  # Votes per second a guild may start once its burst is spent
+VOTE_BURST_PER_GUILD = 40
+MAX_PENDING_REFRESHES = 256
+REFRESH_RATE_PER_GUILD = 0.5  # Tracker refreshes per second per guild
+REFRESH_BURST_PER_GUILD = 2
+
+RefreshKey = Tuple[Optional[int], int]  # (guild_id, proposal_id)
+
+
+class TokenBucket:
+    """Classic token bucket: ``capacity`` tokens, refilled continuously at ``rate`` per second."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+
+class AdmissionController:
+    """Admits vote writes and tracker refreshes; see the section comment above."""
+
+    def __init__(self,
+                 max_vote_writes: int = MAX_CONCURRENT_VOTE_WRITES,
+                 vote_rate: float = VOTE_RATE_PER_GUILD,
+                 vote_burst: float = VOTE_BURST_PER_GUILD,
+                 max_pending_refreshes: int = MAX_PENDING_REFRESHES,
+                 refresh_rate: float = REFRESH_RATE_PER_GUILD,
+                 refresh_burst: float = REFRESH_BURST_PER_GUILD,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_vote_writes = max_vote_writes
+        self.vote_rate, self.vote_burst = vote_rate, vote_burst
+        self.max_pending_refreshes = max_pending_refreshes
+        self.refresh_rate, self.refresh_burst = refresh_rate, refresh_burst
+        self._clock = clock
+        self._vote_buckets: Dict[Hashable, TokenBucket] = {}
+        self._refresh_buckets: Dict[Hashable, TokenBucket] = {}
+        self._refreshes: "OrderedDict[RefreshKey, None]" = OrderedDict()  # Bounded, coalesced FIFO
+        self._deferred: "OrderedDict[RefreshKey, None]" = OrderedDict()  # Shed refreshes awaiting re-admission
+        self._votes_waiting = 0
+        self._votes_in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.counters = {
+            'votes_admitted': 0,
+            'votes_delayed': 0,  # Waited for their guild's quota
+            'refreshes_queued': 0,
+            'refreshes_coalesced': 0,  # Already pending for the same proposal
+            'refreshes_shed': 0,  # Over quota or queue full; deferred, not lost
+            'refreshes_recovered': 0,  # Deferred refreshes later re-admitted
+            'refreshes_run': 0,
+        }
+
+    def _bind_loop(self) -> None:
+        """(Re)create the asyncio primitives for the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._vote_slots = asyncio.Semaphore(self.max_vote_writes)
+        self._votes_idle = asyncio.Event()
+        self._refresh_wakeup = asyncio.Event()
+        self._votes_waiting = self._votes_in_flight = 0
+        self._votes_idle.set()
+
+    def _bucket(self, buckets: Dict[Hashable, TokenBucket], guild_id: Hashable, rate: float, burst: float) -> TokenBucket:
+        bucket = buckets.get(guild_id)
+        if bucket is None:
+            bucket = buckets[guild_id] = TokenBucket(rate, burst, self._clock)
+        return bucket
+
+    def _update_votes_idle(self) -> None:
+        if self._votes_waiting or self._votes_in_flight:
+            self._votes_idle.clear()
+        else:
+            self._votes_idle.set()
+
+    @contextlib.asynccontextmanager
+    async def vote_slot(self, guild_id: Optional[int]):
+        """Hold a vote write slot; waits for the guild's quota and a free slot but never rejects."""
+        self._bind_loop()
+        self._votes_waiting += 1
+        self._update_votes_idle()
+        try:
+            bucket = self._bucket(self._vote_buckets, guild_id, self.vote_rate, self.vote_burst)
+            if not bucket.try_take():
+                self.counters['votes_delayed'] += 1
+                while not bucket.try_take():
+                    await asyncio.sleep(bucket.wait_time())
+            await self._vote_slots.acquire()
+        except BaseException:
+            self._votes_waiting -= 1
+            self._update_votes_idle()
+            raise
+        self._votes_waiting -= 1
+        self._votes_in_flight += 1
+        self.counters['votes_admitted'] += 1
+        try:
+            yield
+        finally:
+            self._votes_in_flight -= 1
+            self._vote_slots.release()
+            self._update_votes_idle()
+
+    def _try_admit_refresh(self, key: RefreshKey) -> bool:
+        if len(self._refreshes) >= self.max_pending_refreshes:
+            return False
+        if not self._bucket(self._refresh_buckets, key[0], self.refresh_rate, self.refresh_burst).try_take():
+            return False
+        self._refreshes[key] = None
+        return True
+
+    def offer_refresh(self, guild_id: Optional[int], proposal_id: int) -> bool:
+        """Ask for a tracker refresh without waiting. Returns True if it was queued now.
+
+        A refresh already queued or deferred for the proposal absorbs this one. Otherwise it is
+        queued if the guild has quota and the queue has room, or shed into the deferred set.
+        """
+        key = (guild_id, proposal_id)
+        if key in self._refreshes or key in self._deferred:
+            self.counters['refreshes_coalesced'] += 1
+            return False
+        if self._try_admit_refresh(key):
+            self.counters['refreshes_queued'] += 1
+            admitted = True
+        else:
+            self._deferred[key] = None
+            self.counters['refreshes_shed'] += 1
+            admitted = False
+        if self._loop is not None:
+            self._refresh_wakeup.set()
+        return admitted
+
+    def _readmit_deferred(self) -> None:
+        for key in list(self._deferred):
+            if self._try_admit_refresh(key):
+                del self._deferred[key]
+                self.counters['refreshes_recovered'] += 1
+
+    def _deferred_wait(self) -> float:
+        waits = [self._bucket(self._refresh_buckets, guild_id, self.refresh_rate, self.refresh_burst).wait_time()
+                 for guild_id, _ in self._deferred]
+        return max(0.05, min(waits, default=1.0))
+
+    async def next_refresh(self) -> RefreshKey:
+        """Wait for the next tracker refresh to run, once no vote is waiting or writing."""
+        self._bind_loop()
+        while True:
+            self._readmit_deferred()
+            if self._refreshes:
+                await self._votes_idle.wait()
+                if self._refreshes:  # A reset while waiting could have emptied it
+                    break
+                continue
+            if self._deferred:
+                await asyncio.sleep(self._deferred_wait())
+                continue
+            self._refresh_wakeup.clear()
+            await self._refresh_wakeup.wait()
+        key, _ = self._refreshes.popitem(last=False)
+        self.counters['refreshes_run'] += 1
+        return key
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depths and counters, for the !admission command and logs."""
+        return {
+            'votes_waiting': self._votes_waiting,
+            'votes_in_flight': self._votes_in_flight,
+            'refresh_queue_depth': len(self._refreshes),
+            'refreshes_deferred': len(self._deferred),
+            **self.counters,
+        }
+
+
+# Shared by voting.process_vote, the vote views and main.update_tracking_worker.
+controller = AdmissionController()
@@ -0,0 +1,237 @@
+import heapq
+import itertools
+import json
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+import discord
+
+import db
+import voting_utils
+
+# ========================
+# 🔹 VOTING BLOC ANALYTICS
+# ========================
+# The votes table is a sparse member × proposal matrix of ballots. Each proposal, once
+# closed, adds its column to running per-pair totals: for every two members who both cast
+# a ballot, how often they shared a proposal and how closely their ballots agreed. Bloc
+# similarity is the mean agreement over shared proposals, so the totals never need a
+# rebuild; clustering reads them on demand. Pairs grow with the square of the turnout, so
+# big proposals compare a fixed-seed sample of their voters, count the pairs in the tally
+# pool and write them in chunks, off the close path (see voting_utils.close_proposal).
+
+BLOC_MIN_SHARED_PROPOSALS = 3  # Pairs with fewer shared proposals are too noisy to compare
+BLOC_SIMILARITY_THRESHOLD = 0.75  # Average-linkage merges stop below this similarity
+BLOC_TOP_PAIRS = 5
+BLOC_MAX_VOTERS_PER_PROPOSAL = 500  # At most ~125k pairs per proposal; larger turnouts are sampled
+BLOC_POOL_MIN_VOTERS = 150  # Pairs for turnouts this large are computed in the tally pool
+
+
+def ballot_agreement(a: Any, b: Any, ballot_type: str, options: List[str], max_score: int) -> float:
+    """How closely two normalized ballots (see voting_utils.normalize_recount_ballots) agree, in [0, 1].
+
+    Plurality: same option or not. Approval: share of options both approved or both left out.
+    Ranked: share of option pairs both ballots order the same way (unranked options tie last).
+    Cardinal: one minus the mean score gap as a fraction of the score range.
+    """
+    if ballot_type == 'plurality':
+        return 1.0 if a == b else 0.0
+    if not options:
+        return 1.0
+    if ballot_type == 'approval':
+        return 1 - len(set(a) ^ set(b)) / len(options)
+    if ballot_type == 'ranked':
+        if len(options) < 2:
+            return 1.0
+        rank_a = [a.index(opt) if opt in a else len(options) for opt in options]
+        rank_b = [b.index(opt) if opt in b else len(options) for opt in options]
+        pairs = list(itertools.combinations(range(len(options)), 2))
+        same = sum(1 for i, j in pairs if (rank_a[i] > rank_a[j]) - (rank_a[i] < rank_a[j]) == (rank_b[i] > rank_b[j]) - (rank_b[i] < rank_b[j]))
+        return same / len(pairs)
+    return 1 - sum(abs(x - y) for x, y in zip(a, b)) / (len(options) * max_score)
+
+
+def proposal_pair_agreements(positions: Dict[int, Any], ballot_type: str, options: List[str],
+                             max_score: int) -> List[Tuple[int, int, float]]:
+    """Agreement for every pair of voters on one proposal, as ``(member_a, member_b, agreement)``.
+
+    Voters with identical ballots are grouped so each distinct pair of ballots is compared once.
+    Pairs come back sorted, so the same positions always give the same list.
+    """
+    voters_by_ballot: Dict[Any, List[int]] = {}
+    for user_id, ballot in positions.items():
+        voters_by_ballot.setdefault(ballot, []).append(user_id)
+    ballots = list(voters_by_ballot)
+
+    agreements = []
+    for i, ballot_a in enumerate(ballots):
+        for j in range(i, len(ballots)):
+            ballot_b = ballots[j]
+            agreement = ballot_agreement(ballot_a, ballot_b, ballot_type, options, max_score)
+            if i == j:
+                pairs = itertools.combinations(voters_by_ballot[ballot_a], 2)
+            else:
+                pairs = itertools.product(voters_by_ballot[ballot_a], voters_by_ballot[ballot_b])
+            agreements.extend((min(x, y), max(x, y), agreement) for x, y in pairs)
+    agreements.sort()
+    return agreements
+
+
+async def record_closed_proposal(proposal_id: int) -> bool:
+    """Add a closed proposal's ballots to its guild's bloc stats (idempotent).
+
+    Returns True if the proposal was newly recorded. Abstentions, imported paper ballots and
+    ballots the proposal's mechanism would reject are left out; quadratic allocations are not compared.
+    Every voter counts towards participation, but only a sample of BLOC_MAX_VOTERS_PER_PROPOSAL
+    (seeded by the proposal ID) is paired up on larger proposals.
+    """
+    proposal = await db.get_proposal(proposal_id)
+    if not proposal or proposal.get('server_id') is None:
+        return False
+    ballot_type = voting_utils.recount_ballot_type(proposal.get('voting_mechanism'))
+
+    positions = {}
+    options: List[str] = []
+    max_score = voting_utils.CARDINAL_DEFAULT_MAX_SCORE
+    if ballot_type is not None:
+        options = await db.get_proposal_options(proposal_id) or []
+        hyperparameters = proposal.get('hyperparameters')
+        if isinstance(hyperparameters, str):
+            try: hyperparameters = json.loads(hyperparameters)
+            except json.JSONDecodeError: hyperparameters = {}
+        max_score = voting_utils.cardinal_max_score(hyperparameters)
+        for vote in await db.get_proposal_votes(proposal_id) or []:
+            if vote.get('is_abstain') or vote.get('user_id') is None or vote.get('source'):
+                continue  # Imported paper ballots belong to no member
+            normalized = voting_utils.normalize_recount_ballots([vote], options, ballot_type, max_score)
+            if normalized:
+                positions[vote['user_id']] = normalized[0][0]
+
+    compared = positions
+    if len(positions) > BLOC_MAX_VOTERS_PER_PROPOSAL:
+        sampled = random.Random(proposal_id).sample(sorted(positions), BLOC_MAX_VOTERS_PER_PROPOSAL)
+        compared = {user_id: positions[user_id] for user_id in sampled}
+    if len(compared) >= BLOC_POOL_MIN_VOTERS:
+        pair_agreements = await voting_utils.run_in_tally_pool(
+            f"Bloc pairs for P#{proposal_id} ({len(compared)} voters)", proposal_pair_agreements,
+            compared, ballot_type, options, max_score
+        )
+        if pair_agreements is None:
+            return False  # Timed out; catch-up retries it later
+    else:
+        pair_agreements = proposal_pair_agreements(compared, ballot_type, options, max_score) if compared else []
+    # Proposals with nothing to compare are still marked so catch-up does not revisit them.
+    return await db.record_bloc_proposal(proposal['server_id'], proposal_id, list(positions), pair_agreements)
+
+
+async def catch_up_bloc_stats(server_id: int) -> int:
+    """Record any closed proposals the bloc stats have not seen yet (e.g. closed before analytics existed)."""
+    recorded = 0
+    for proposal_id in await db.get_unrecorded_closed_proposals(server_id):
+        if await record_closed_proposal(proposal_id):
+            recorded += 1
+    return recorded
+
+
+def cluster_blocs(similarity: Dict[Tuple[int, int], float], members: List[int],
+                  threshold: float = BLOC_SIMILARITY_THRESHOLD) -> List[List[int]]:
+    """Average-linkage agglomerative clustering over a sparse similarity map.
+
+    Pairs missing from ``similarity`` count as 0. The two clusters with the highest average
+    similarity are merged until no pair reaches ``threshold``. Stale heap entries are skipped
+    lazily, so each merge costs time proportional to the merged clusters' neighbours.
+    Returns clusters of two or more members, largest first.
+    """
+    clusters = {member: [member] for member in members}
+    links: Dict[int, Dict[int, float]] = {member: {} for member in members}  # Summed member-pair similarity
+    for (a, b), value in similarity.items():
+        if a in links and b in links and value:
+            links[a][b] = links[b][a] = value
+
+    heap = [(-value, a, b) for a in links for b, value in links[a].items() if a < b]
+    heapq.heapify(heap)
+    next_id = max(members, default=0) + 1
+    while heap:
+        negative_average, a, b = heapq.heappop(heap)
+        if -negative_average < threshold:
+            break
+        if a not in clusters or b not in clusters:
+            continue
+        merged = next_id
+        next_id += 1
+        clusters[merged] = clusters.pop(a) + clusters.pop(b)
+        links[merged] = {}
+        for old in (a, b):
+            for neighbour, total in links.pop(old).items():
+                if neighbour in (a, b):
+                    continue
+                del links[neighbour][old]
+                links[merged][neighbour] = links[merged].get(neighbour, 0) + total
+        for neighbour, total in links[merged].items():
+            links[neighbour][merged] = total
+            average = total / (len(clusters[merged]) * len(clusters[neighbour]))
+            if average >= threshold:
+                heapq.heappush(heap, (-average, min(merged, neighbour), max(merged, neighbour)))
+
+    blocs = [sorted(cluster) for cluster in clusters.values() if len(cluster) > 1]
+    return sorted(blocs, key=lambda bloc: (-len(bloc), bloc))
+
+
+async def compute_voting_blocs(server_id: int, min_shared: int = BLOC_MIN_SHARED_PROPOSALS,
+                               threshold: float = BLOC_SIMILARITY_THRESHOLD) -> Dict[str, Any]:
+    """Catch the bloc stats up, then cluster members by their mean ballot agreement."""
+    await catch_up_bloc_stats(server_id)
+    pairs = await db.get_bloc_pair_stats(server_id, min_shared)
+    participation = await db.get_bloc_member_stats(server_id)
+
+    similarity = {(p['member_a'], p['member_b']): p['agreement_sum'] / p['shared_proposals'] for p in pairs}
+    members = sorted({member for pair in similarity for member in pair})
+    blocs = []
+    for bloc in cluster_blocs(similarity, members, threshold):
+        internal = [similarity.get(pair, 0.0) for pair in itertools.combinations(bloc, 2)]
+        blocs.append({'members': bloc, 'cohesion': sum(internal) / len(internal)})
+
+    ranked_pairs = sorted(pairs, key=lambda p: (-(p['agreement_sum'] / p['shared_proposals']), -p['shared_proposals']))
+    return {
+        'server_id': server_id,
+        'members_compared': len(members),
+        'members_voting': len(participation),
+        'min_shared': min_shared,
+        'threshold': threshold,
+        'blocs': blocs,
+        'top_pairs': [
+            {'members': (p['member_a'], p['member_b']), 'similarity': p['agreement_sum'] / p['shared_proposals'],
+             'shared_proposals': p['shared_proposals']}
+            for p in ranked_pairs[:BLOC_TOP_PAIRS]
+        ],
+    }
+
+
+def format_blocs_embed(report: Dict[str, Any], guild: Optional[discord.Guild] = None) -> discord.Embed:
+    """Admin summary of voting blocs and the most aligned pairs of members."""
+    def name(user_id: int) -> str:
+        member = guild.get_member(user_id) if guild else None
+        return member.display_name if member else f"User {user_id}"
+
+    embed = discord.Embed(
+        title="🧩 Voting Blocs",
+        description=(
+            f"{report['members_compared']} of {report['members_voting']} voting member(s) share at least "
+            f"{report['min_shared']} closed proposal(s) with someone. Blocs group members whose ballots "
+            f"agree {report['threshold']:.0%} of the time or more on average."
+        ),
+        color=discord.Color.purple()
+    )
+    for index, bloc in enumerate(report['blocs'][:10], start=1):
+        members = ", ".join(name(user_id) for user_id in bloc['members'])
+        embed.add_field(
+            name=f"Bloc {index} ({len(bloc['members'])} members, {bloc['cohesion']:.0%} agreement)",
+            value=members[:1024], inline=False
+        )
+    if not report['blocs']:
+        embed.add_field(name="Blocs", value="No group of members votes together closely enough yet.", inline=False)
+    if report['top_pairs']:
+        lines = [f"• {name(a)} & {name(b)}: {pair['similarity']:.0%} over {pair['shared_proposals']} proposal(s)"
+                 for pair in report['top_pairs'] for a, b in [pair['members']]]
+        embed.add_field(name="Most Aligned Pairs", value="\n".join(lines)[:1024], inline=False)
+    return embed
@@ -0,0 +1,10 @@
+"""Tally benchmarks: seeded synthetic ballots, timing grids and reference cross-checks.
+
+Run ``python -m benchmarks --help`` from the repository root.
+"""
+
+from benchmarks.generators import GENERATORS, generate, to_votes
+from benchmarks.reference import cross_validate
+from benchmarks.run import ENGINES, compare_reports, run_grid
+
+__all__ = ["GENERATORS", "generate", "to_votes", "cross_validate", "ENGINES", "compare_reports", "run_grid"]
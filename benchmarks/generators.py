@@ -0,0 +1,149 @@
+"""Seeded synthetic ballot generators.
+
+Every generator takes ``(num_voters, options, rng)`` and returns ``(rankings, tokens)``:
+one full ranking per voter and one ``tokens_invested`` value per voter (None outside
+token-weighted cultures). ``to_votes`` turns those into vote rows for any ballot type.
+"""
+import math
+import random
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+Rankings = List[List[str]]
+Tokens = List[Optional[int]]
+
+
+def impartial_culture(num_voters: int, options: Sequence[str], rng: random.Random) -> Tuple[Rankings, Tokens]:
+    """Every ranking is equally likely."""
+    rankings = []
+    for _ in range(num_voters):
+        ranking = list(options)
+        rng.shuffle(ranking)
+        rankings.append(ranking)
+    return rankings, [None] * num_voters
+
+
+def _mallows_insertion_weights(num_options: int, phi: float) -> List[List[float]]:
+    """Cumulative insertion weights for the repeated insertion model, one row per step."""
+    rows = []
+    for i in range(num_options):
+        cumulative, total = [], 0.0
+        for j in range(i + 1):
+            total += phi ** (i - j)
+            cumulative.append(total)
+        rows.append(cumulative)
+    return rows
+
+
+def _mallows_rankings(num_voters: int, reference: Sequence[str], phi: float, rng: random.Random) -> Rankings:
+    weights = _mallows_insertion_weights(len(reference), phi)
+    positions = [list(range(i + 1)) for i in range(len(reference))]
+    rankings = []
+    for _ in range(num_voters):
+        ranking: List[str] = []
+        for i, option in enumerate(reference):
+            ranking.insert(rng.choices(positions[i], cum_weights=weights[i])[0], option)
+        rankings.append(ranking)
+    return rankings
+
+
+def mallows(num_voters: int, options: Sequence[str], rng: random.Random, phi: float = 0.5) -> Tuple[Rankings, Tokens]:
+    """Rankings concentrated around ``options`` in order; ``phi`` of 0 is unanimity, 1 is impartial."""
+    return _mallows_rankings(num_voters, list(options), phi, rng), [None] * num_voters
+
+
+def polarized_blocs(num_voters: int, options: Sequence[str], rng: random.Random,
+                    blocs: int = 2, phi: float = 0.3) -> Tuple[Rankings, Tokens]:
+    """Voters split into blocs, each a Mallows model around its own shuffled reference ranking."""
+    references = []
+    for _ in range(blocs):
+        reference = list(options)
+        rng.shuffle(reference)
+        references.append(reference)
+    sizes = [0] * blocs
+    for _ in range(num_voters):
+        sizes[rng.randrange(blocs)] += 1
+    rankings: Rankings = []
+    for reference, size in zip(references, sizes):
+        rankings.extend(_mallows_rankings(size, reference, phi, rng))
+    rng.shuffle(rankings)
+    return rankings, [None] * num_voters
+
+
+def token_weighted(num_voters: int, options: Sequence[str], rng: random.Random,
+                   max_tokens: int = 20, phi: float = 0.7) -> Tuple[Rankings, Tokens]:
+    """Mallows rankings with campaign-style ``tokens_invested`` (including some zero-token ballots)."""
+    rankings, _ = mallows(num_voters, options, rng, phi)
+    return rankings, [rng.randint(0, max_tokens) for _ in range(num_voters)]
+
+
+GENERATORS: Dict[str, Callable[..., Tuple[Rankings, Tokens]]] = {
+    "impartial": impartial_culture,
+    "mallows": mallows,
+    "polarized": polarized_blocs,
+    "token_weighted": token_weighted,
+}
+
+
+def option_names(num_options: int) -> List[str]:
+    return [f"Option {i + 1}" for i in range(num_options)]
+
+
+def generate(culture: str, num_voters: int, options: Sequence[str], seed: int = 0) -> Tuple[Rankings, Tokens]:
+    """Generate ``(rankings, tokens)`` for a named culture; identical seeds give identical ballots."""
+    return GENERATORS[culture](num_voters, options, random.Random(f"{culture}:{num_voters}:{len(options)}:{seed}"))
+
+
+BALLOT_TYPES = ("plurality", "ranked", "approval", "quadratic", "score")
+SCORE_MAX = 5  # The cardinal engines' default max_score
+
+
+def quadratic_allocations(ranking: Sequence[str], credits: int) -> Dict[str, int]:
+    """Spend ``credits`` down a ranking: each option gets the most votes (n votes cost n²) still affordable."""
+    allocations = {}
+    for opt in ranking:
+        n = math.isqrt(credits)
+        if not n:
+            break
+        allocations[opt] = n
+        credits -= n * n
+    return allocations
+
+
+def to_votes(rankings: Rankings, tokens: Tokens, ballot_type: str, seed: int = 0,
+             options: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Build vote rows (as ``voting_utils.normalize_ballots`` produces) for a ballot type.
+
+    ``plurality`` takes each voter's top choice, ``ranked`` the full ranking and ``approval``
+    a seeded, per-voter number of top choices. ``quadratic`` spends each voter's tokens as
+    credits down their ranking (one credit when the culture has no tokens), so it is only
+    more than plurality under ``token_weighted``. ``score`` grades options 0..``SCORE_MAX``
+    by ranking position with seeded ±1 noise, packed in the stored hex form in ``options``
+    order (so it needs ``options``).
+    """
+    if ballot_type == "plurality":
+        return [{'vote_data': {'option': r[0]}, 'tokens_invested': t} for r, t in zip(rankings, tokens)]
+    if ballot_type == "ranked":
+        return [{'vote_data': {'rankings': r}, 'tokens_invested': t} for r, t in zip(rankings, tokens)]
+    if ballot_type == "approval":
+        rng = random.Random(f"approval:{seed}")
+        return [{'vote_data': {'approved': r[:rng.randint(1, max(1, len(r) // 2))]}, 'tokens_invested': t}
+                for r, t in zip(rankings, tokens)]
+    if ballot_type == "quadratic":
+        votes = []
+        for r, t in zip(rankings, tokens):
+            allocations = quadratic_allocations(r, 1 if t is None else t)
+            votes.append({'vote_data': {'allocations': allocations}, 'tokens_invested': sum(n * n for n in allocations.values())})
+        return votes
+    if ballot_type == "score":
+        if options is None:
+            raise ValueError("Score ballots need the option order to pack scores in.")
+        rng = random.Random(f"score:{seed}")
+        votes = []
+        for r, t in zip(rankings, tokens):
+            last = max(1, len(r) - 1)
+            grades = {opt: min(SCORE_MAX, max(0, round((last - i) * SCORE_MAX / last) + rng.randint(-1, 1)))
+                      for i, opt in enumerate(r)}
+            votes.append({'vote_data': {'scores': bytes(grades[opt] for opt in options).hex()},
+                          'tokens_invested': t})
+        return votes
+    raise ValueError(f"Unknown ballot type: {ballot_type}")
@@ -0,0 +1,298 @@
+"""Straightforward reference tallies used to cross-check the optimized engines.
+
+These count one ballot at a time with no grouping, bitmasks or heaps, trading speed
+for obviousness. ``cross_validate`` runs both and lists every disagreement.
+"""
+import itertools
+from fractions import Fraction
+from typing import Any, Dict, List, Optional
+
+import voting_utils
+
+
+def _weight(tokens: Optional[int]) -> int:
+    """Weight rule shared by plurality, Borda, approval, runoff and D'Hondt."""
+    if tokens is None:
+        return 1
+    return tokens if tokens > 0 else 0
+
+
+def _pairwise_weight(tokens: Optional[int]) -> int:
+    """Condorcet-family rule: None or negative counts as 1."""
+    return 1 if tokens is None or tokens < 0 else tokens
+
+
+def reference_plurality(votes: List[Dict], options: List[str]) -> Dict[str, int]:
+    totals = {opt: 0 for opt in options}
+    for vote in votes:
+        totals[vote['vote_data']['option']] += _weight(vote['tokens_invested'])
+    return totals
+
+
+def reference_borda(votes: List[Dict], options: List[str]) -> Dict[str, int]:
+    totals = {opt: 0 for opt in options}
+    for vote in votes:
+        rankings = vote['vote_data']['rankings']
+        for i, opt in enumerate(rankings):
+            totals[opt] += (len(rankings) - 1 - i) * _weight(vote['tokens_invested'])
+    return totals
+
+
+def reference_approval(votes: List[Dict], options: List[str]) -> Dict[str, int]:
+    totals = {opt: 0 for opt in options}
+    for vote in votes:
+        for opt in vote['vote_data']['approved']:
+            totals[opt] += _weight(vote['tokens_invested'])
+    return totals
+
+
+def reference_runoff_winner(votes: List[Dict], options: List[str]) -> Optional[str]:
+    """IRV with the engine's rules: majority of live weight wins, all options tied for last are eliminated."""
+    active = set(options)
+    while active:
+        counts = {opt: 0 for opt in active}
+        for vote in votes:
+            top = next((opt for opt in vote['vote_data']['rankings'] if opt in active), None)
+            if top is not None:
+                counts[top] += _weight(vote['tokens_invested'])
+        live = sum(counts.values())
+        if live == 0:
+            return next(iter(active)) if len(active) == 1 else None
+        leader = max(counts.values())
+        if leader > live / 2.0:
+            return next(opt for opt, c in counts.items() if c == leader)
+        if len(active) == 1:
+            return next(iter(active))
+        lowest = min(counts.values())
+        eliminated = {opt for opt, c in counts.items() if c == lowest}
+        if eliminated == active:
+            return None
+        active -= eliminated
+        if len(active) == 1:
+            return next(iter(active))
+    return None
+
+
+def _harmonic(n: int) -> Fraction:
+    return sum((Fraction(1, k) for k in range(1, n + 1)), Fraction(0))
+
+
+def reference_pav_committee(votes: List[Dict], options: List[str], seats: int) -> List[str]:
+    """Exact PAV: score every committee ballot by ballot; ties go to more weighted approvals, then option order."""
+    seats = min(seats, len(options))
+    if not seats or not any(_weight(vote['tokens_invested']) for vote in votes):
+        return []
+    approvals = reference_approval(votes, options)
+    best_key, best_committee = None, None
+    for committee in itertools.combinations(options, seats):
+        score = sum((_weight(vote['tokens_invested']) * _harmonic(len(set(vote['vote_data']['approved']) & set(committee)))
+                     for vote in votes), Fraction(0))
+        key = (score, sum(approvals[opt] for opt in committee))
+        if best_key is None or key > best_key:
+            best_key, best_committee = key, list(committee)
+    return best_committee
+
+
+def reference_sequential_pav(votes: List[Dict], options: List[str], seats: int) -> List[str]:
+    """Sequential PAV: each seat goes to the largest marginal gain, recomputed from every ballot."""
+    seats = min(seats, len(options))
+    if not seats or not any(_weight(vote['tokens_invested']) for vote in votes):
+        return []
+    approvals = reference_approval(votes, options)
+    committee: List[str] = []
+    for _ in range(seats):
+        gains = {opt: Fraction(0) for opt in options if opt not in committee}
+        for vote in votes:
+            approved = set(vote['vote_data']['approved'])
+            share = Fraction(_weight(vote['tokens_invested']), 1 + len(approved.intersection(committee)))
+            for opt in approved:
+                if opt in gains:
+                    gains[opt] += share
+        committee.append(max(gains, key=lambda opt: (gains[opt], approvals[opt], -options.index(opt))))
+    return committee
+
+
+def reference_quadratic(votes: List[Dict], options: List[str]) -> Dict[str, int]:
+    """Votes allocated per option; the credits were spent when the ballot was cast, so no weighting."""
+    totals = {opt: 0 for opt in options}
+    for vote in votes:
+        for opt, n in vote['vote_data']['allocations'].items():
+            totals[opt] += n
+    return totals
+
+
+def _score_grades(vote: Dict) -> List[int]:
+    return list(bytes.fromhex(vote['vote_data']['scores']))
+
+
+def reference_score(votes: List[Dict], options: List[str]) -> Dict[str, int]:
+    totals = {opt: 0 for opt in options}
+    for vote in votes:
+        for opt, grade in zip(options, _score_grades(vote)):
+            totals[opt] += grade * _weight(vote['tokens_invested'])
+    return totals
+
+
+def reference_star_winner(votes: List[Dict], options: List[str]) -> Optional[str]:
+    """Top two score totals (option order breaks ties) go to a runoff; a runoff tie goes to the higher total."""
+    totals = reference_score(votes, options)
+    if not any(_weight(vote['tokens_invested']) for vote in votes):
+        return None
+    if len(options) == 1:
+        return options[0]
+    first, second = sorted(options, key=lambda opt: (-totals[opt], options.index(opt)))[:2]
+    prefer = {first: 0, second: 0}
+    for vote in votes:
+        grades = dict(zip(options, _score_grades(vote)))
+        if grades[first] != grades[second]:
+            prefer[first if grades[first] > grades[second] else second] += _weight(vote['tokens_invested'])
+    if prefer[first] != prefer[second]:
+        return first if prefer[first] > prefer[second] else second
+    return first if totals[first] != totals[second] else None
+
+
+def reference_majority_grades(votes: List[Dict], options: List[str]) -> Dict[str, int]:
+    """Lower median grade per option, from every grade repeated once per unit of weight."""
+    medians = {}
+    for i, opt in enumerate(options):
+        grades = sorted(g for vote in votes for g in [_score_grades(vote)[i]] * _weight(vote['tokens_invested']))
+        medians[opt] = grades[(len(grades) - 1) // 2] if grades else 0
+    return medians
+
+
+def reference_pairwise_matrix(votes: List[Dict], options: List[str]) -> Dict[str, Dict[str, int]]:
+    matrix = {a: {b: 0 for b in options if b != a} for a in options}
+    for vote in votes:
+        rankings = vote['vote_data']['rankings']
+        weight = _pairwise_weight(vote['tokens_invested'])
+        position = {opt: i for i, opt in enumerate(rankings)}
+        for a in options:
+            for b in options:
+                if a != b and position.get(a, len(options)) < position.get(b, len(options)):
+                    matrix[a][b] += weight
+    return matrix
+
+
+def reference_strongest_paths(matrix: Dict[str, Dict[str, int]], options: List[str]) -> Dict[str, Dict[str, int]]:
+    paths = {a: {b: (matrix[a][b] if matrix[a][b] > matrix[b][a] else 0) for b in options if b != a} for a in options}
+    for k in options:
+        for i in options:
+            for j in options:
+                if len({i, j, k}) == 3:
+                    paths[i][j] = max(paths[i][j], min(paths[i][k], paths[k][j]))
+    return paths
+
+
+def reference_copeland_scores(matrix: Dict[str, Dict[str, int]], options: List[str], tie_points: float = 0.5) -> Dict[str, float]:
+    scores = {opt: 0.0 for opt in options}
+    for a in options:
+        for b in options:
+            if a != b:
+                if matrix[a][b] > matrix[b][a]:
+                    scores[a] += 1
+                elif matrix[a][b] == matrix[b][a]:
+                    scores[a] += tie_points
+    return scores
+
+
+def reference_locked_pairs(matrix: Dict[str, Dict[str, int]], options: List[str]) -> List[List[Any]]:
+    """Tideman locking with a plain graph search for cycles."""
+    order = {opt: i for i, opt in enumerate(options)}
+    victories = sorted(
+        [(a, b) for a in options for b in options if a != b and matrix[a][b] > matrix[b][a]],
+        key=lambda p: (-matrix[p[0]][p[1]], matrix[p[1]][p[0]], order[p[0]], order[p[1]])
+    )
+    edges: Dict[str, List[str]] = {opt: [] for opt in options}
+    locked = []
+    for a, b in victories:
+        stack, seen = [b], set()
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(edges[node])
+        if a not in seen:
+            edges[a].append(b)
+            locked.append([a, b, matrix[a][b] - matrix[b][a]])
+    return locked
+
+
+def reference_dhondt_seats(votes: List[Dict], options: List[str], seats: int) -> Dict[str, int]:
+    totals = reference_plurality(votes, options)
+    won = {opt: 0 for opt in options}
+    if sum(totals.values()) <= 0:
+        return won
+    for _ in range(seats):
+        best = max((opt for opt in options if totals[opt] > 0),
+                   key=lambda opt: (Fraction(totals[opt], won[opt] + 1), totals[opt], -options.index(opt)))
+        won[best] += 1
+    return won
+
+
+def cross_validate(votes_by_type: Dict[str, List[Dict]], options: List[str], seats: int = 3) -> List[str]:
+    """Compare every engine against its reference; returns human-readable mismatches (empty when all agree)."""
+    mismatches = []
+
+    def check(engine: str, expected: Any, actual: Any) -> None:
+        if expected != actual:
+            mismatches.append(f"{engine}: expected {expected!r}, got {actual!r}")
+
+    plurality_votes = votes_by_type['plurality']
+    ranked_votes = votes_by_type['ranked']
+    approval_votes = votes_by_type['approval']
+    quadratic_votes = votes_by_type['quadratic']
+    score_votes = votes_by_type['score']
+
+    result = voting_utils.PluralityVoting.count_votes(plurality_votes, options, {})
+    check('plurality', reference_plurality(plurality_votes, options),
+          {opt: d['weighted_votes'] for opt, d in result['results_detailed']})
+
+    result = voting_utils.BordaCount.count_votes(ranked_votes, options, {})
+    check('borda', reference_borda(ranked_votes, options),
+          {opt: d['weighted_score'] for opt, d in result['results_detailed']})
+
+    result = voting_utils.ApprovalVoting.count_votes(approval_votes, options, {})
+    check('approval', reference_approval(approval_votes, options),
+          {opt: d['weighted_approvals'] for opt, d in result['results_detailed']})
+
+    result = voting_utils.RunoffVoting.count_votes(ranked_votes, options, {})
+    check('runoff', reference_runoff_winner(ranked_votes, options), result['winner'])
+
+    matrix = reference_pairwise_matrix(ranked_votes, options)
+    check('condorcet', matrix, voting_utils.CondorcetMethod.count_votes(ranked_votes, options, {})['pairwise_matrix'])
+
+    result = voting_utils.SchulzeMethod.count_votes(ranked_votes, options, {})
+    if 'strongest_paths' in result:
+        check('schulze', reference_strongest_paths(matrix, options), result['strongest_paths'])
+
+    result = voting_utils.CopelandMethod.count_votes(ranked_votes, options, {})
+    if 'copeland_scores' in result:
+        check('copeland', reference_copeland_scores(matrix, options), result['copeland_scores'])
+
+    result = voting_utils.RankedPairsMethod.count_votes(ranked_votes, options, {})
+    if 'locked_pairs' in result:
+        check('ranked_pairs', reference_locked_pairs(matrix, options), result['locked_pairs'])
+
+    result = voting_utils.DHondtAllocation.count_votes(plurality_votes, options, {'seats': seats})
+    check('dhondt', reference_dhondt_seats(plurality_votes, options, seats), result['seats_allocated'])
+
+    for mode, reference_committee in (('exact', reference_pav_committee), ('sequential', reference_sequential_pav)):
+        result = voting_utils.ProportionalApprovalVoting.count_votes(approval_votes, options, {'seats': seats, 'pav_mode': mode})
+        check(f'pav ({mode})', reference_committee(approval_votes, options, seats), result['winners'])
+
+    result = voting_utils.ScoreVoting.count_votes(score_votes, options, {})
+    check('score', reference_score(score_votes, options),
+          {opt: d['weighted_score'] for opt, d in result['results_detailed']})
+
+    result = voting_utils.STARVoting.count_votes(score_votes, options, {})
+    check('star', reference_star_winner(score_votes, options), result['winner'])
+
+    result = voting_utils.MajorityJudgment.count_votes(score_votes, options, {})
+    check('majority_judgment', reference_majority_grades(score_votes, options),
+          {opt: d['median_grade'] for opt, d in result['results_detailed']})
+
+    result = voting_utils.QuadraticVoting.count_votes(quadratic_votes, options, {})
+    check('quadratic', reference_quadratic(quadratic_votes, options),
+          {opt: d['votes'] for opt, d in result['results_detailed']})
+
+    return mismatches
@@ -0,0 +1,167 @@
+"""Time every tally engine over a grid of voters × options × cultures and report as JSON.
+
+    python -m benchmarks --voters 1000,10000,100000 --options 2,5,10,20,50 --output report.json
+    python -m benchmarks --output new.json --compare report.json --tolerance 0.25
+    python -m benchmarks --check
+
+The 1M-voter row is opt-in (``--voters 1000000``): generating the ballots alone
+needs several GB of memory for 50 options.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import voting_utils
+from benchmarks.generators import BALLOT_TYPES, GENERATORS, generate, option_names, to_votes
+from benchmarks.reference import cross_validate
+
+# Engine name (as accepted by get_voting_mechanism) -> ballot type it consumes.
+ENGINES = {
+    "plurality": "plurality",
+    "borda": "ranked",
+    "approval": "approval",
+    "runoff": "ranked",
+    "condorcet": "ranked",
+    "schulze": "ranked",
+    "ranked_pairs": "ranked",
+    "copeland": "ranked",
+    "stv": "ranked",
+    "dhondt": "plurality",
+    "quadratic": "quadratic",
+    "pav": "approval",
+    "score": "score",
+    "star": "score",
+    "majority_judgment": "score",
+}
+ENGINE_HYPERPARAMETERS = {"stv": {"seats": 3}, "dhondt": {"seats": 5}, "pav": {"seats": 3}}
+
+DEFAULT_VOTERS = [1000, 10000, 100000]
+DEFAULT_OPTIONS = [2, 5, 10, 20, 50]
+
+
+def _parse_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _parse_names(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def time_engine(engine: str, votes: List[Dict], options: List[str], repeat: int = 3) -> float:
+    """Best-of-``repeat`` wall time of one ``count_votes`` call, in seconds."""
+    mechanism = voting_utils.get_voting_mechanism(engine)
+    hyperparameters = ENGINE_HYPERPARAMETERS.get(engine, {})
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Mechanisms print per-ballot warnings
+            mechanism.count_votes(votes, options, hyperparameters)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_grid(voters: Sequence[int], option_counts: Sequence[int], cultures: Sequence[str],
+             engines: Sequence[str], seed: int = 0, repeat: int = 3) -> Dict[str, Any]:
+    """Benchmark each engine on each (culture, voters, options) cell; returns the report dict."""
+    results = []
+    for culture in cultures:
+        for num_voters in voters:
+            for num_options in option_counts:
+                options = option_names(num_options)
+                rankings, tokens = generate(culture, num_voters, options, seed)
+                votes_by_type = {}
+                for engine in engines:
+                    ballot_type = ENGINES[engine]
+                    if ballot_type not in votes_by_type:
+                        votes_by_type[ballot_type] = to_votes(rankings, tokens, ballot_type, seed, options)
+                    seconds = time_engine(engine, votes_by_type[ballot_type], options, repeat)
+                    results.append({
+                        "engine": engine, "culture": culture, "voters": num_voters, "options": num_options,
+                        "seconds": seconds, "ballots_per_second": num_voters / seconds if seconds else None,
+                    })
+                    print(f"{engine:>17} {culture:>14} voters={num_voters:<8} options={num_options:<3} {seconds:.4f}s",
+                          file=sys.stderr)
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": seed, "repeat": repeat,
+                 "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+        "results": results,
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.2) -> List[Dict[str, Any]]:
+    """Cells where ``current`` is more than ``tolerance`` slower than ``baseline`` (cells missing from either are ignored)."""
+    def key(row):
+        return row["engine"], row["culture"], row["voters"], row["options"]
+
+    baseline_rows = {key(row): row for row in baseline.get("results", [])}
+    regressions = []
+    for row in current.get("results", []):
+        before = baseline_rows.get(key(row))
+        if before and before["seconds"] > 0 and row["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append({"engine": row["engine"], "culture": row["culture"], "voters": row["voters"],
+                                "options": row["options"], "baseline_seconds": before["seconds"],
+                                "current_seconds": row["seconds"], "ratio": row["seconds"] / before["seconds"]})
+    return regressions
+
+
+def run_checks(cultures: Sequence[str], seed: int = 0, voters: int = 300, option_counts: Sequence[int] = (2, 3, 5, 8)) -> List[str]:
+    """Cross-validate every engine against the reference tallies on small seeded elections."""
+    mismatches = []
+    for culture in cultures:
+        for num_options in option_counts:
+            options = option_names(num_options)
+            rankings, tokens = generate(culture, voters, options, seed)
+            votes_by_type = {t: to_votes(rankings, tokens, t, seed, options) for t in BALLOT_TYPES}
+            with contextlib.redirect_stdout(io.StringIO()):
+                found = cross_validate(votes_by_type, options)
+            mismatches.extend(f"[{culture}, {num_options} options] {m}" for m in found)
+    return mismatches
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=_parse_ints, default=DEFAULT_VOTERS, help="comma-separated voter counts")
+    parser.add_argument("--options", type=_parse_ints, default=DEFAULT_OPTIONS, help="comma-separated option counts")
+    parser.add_argument("--cultures", type=_parse_names, default=list(GENERATORS), help="comma-separated ballot cultures")
+    parser.add_argument("--engines", type=_parse_names, default=list(ENGINES), help="comma-separated engines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timings per cell; the best is reported")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON report to compare against; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown ratio before flagging (0.2 = 20%%)")
+    parser.add_argument("--check", action="store_true", help="only cross-validate engines against the reference tallies")
+    args = parser.parse_args(argv)
+
+    unknown = [c for c in args.cultures if c not in GENERATORS] + [e for e in args.engines if e not in ENGINES]
+    if unknown:
+        parser.error(f"unknown culture/engine: {', '.join(unknown)}")
+
+    if args.check:
+        mismatches = run_checks(args.cultures, args.seed)
+        for mismatch in mismatches:
+            print(f"MISMATCH {mismatch}")
+        print(f"{len(mismatches)} mismatches")
+        return 1 if mismatches else 0
+
+    report = run_grid(args.voters, args.options, args.cultures, args.engines, args.seed, args.repeat)
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["regressions"] = compare_reports(json.load(f), report, args.tolerance)
+        for regression in report["regressions"]:
+            print(f"REGRESSION {regression['engine']} {regression['culture']} voters={regression['voters']} "
+                  f"options={regression['options']}: {regression['ratio']:.2f}x slower", file=sys.stderr)
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
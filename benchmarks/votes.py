@@ -0,0 +1,124 @@
+"""Measure per-vote latency of the legacy multi-connection vote path against db.cast_vote.
+
+    python -m benchmarks.votes --votes 1000 --concurrency 8 --output votes.json
+
+Both paths write to a throwaway SQLite file initialised with db.init_db, so the numbers
+include connection setup, WAL commits and lock waits but not Discord round trips.
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import db
+
+OPTIONS = ["A", "B", "C"]
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (which must be non-empty)."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    return {"votes": len(samples), "mean_ms": 1000 * sum(samples) / len(samples),
+            "p50_ms": 1000 * percentile(samples, 50), "p99_ms": 1000 * percentile(samples, 99),
+            "max_ms": 1000 * max(samples)}
+
+
+async def legacy_vote(user_id: int, proposal_id: int, vote_data: Dict[str, Any]) -> bool:
+    """The round trips process_vote made before the fast path, one connection each."""
+    proposal = await db.get_proposal(proposal_id)
+    if not proposal or proposal.get('status') != 'Voting':
+        return False
+    await db.get_constitutional_variables(proposal['server_id'])
+    await db.get_user_vote(proposal_id, user_id)
+    success = await db.record_vote(user_id=user_id, proposal_id=proposal_id, vote_data=json.dumps(vote_data))
+    await db.add_voting_invite(proposal_id, user_id)
+    return success
+
+
+async def fast_vote(user_id: int, proposal_id: int, vote_data: Dict[str, Any]) -> bool:
+    return (await db.cast_vote(user_id=user_id, proposal_id=proposal_id, vote_data=json.dumps(vote_data))).ok
+
+
+async def _create_proposal() -> int:
+    async with db.get_db() as conn:
+        cursor = await conn.execute(
+            "INSERT INTO proposals (server_id, proposer_id, title, voting_mechanism, status) VALUES (1, 1, 'Bench', 'plurality', 'Voting')"
+        )
+        await conn.commit()
+        return cursor.lastrowid
+
+
+async def time_path(vote_fn, num_votes: int, concurrency: int) -> List[float]:
+    """Cast ``num_votes`` votes (a tenth of them changes of an earlier vote) with ``concurrency`` in flight."""
+    proposal_id = await _create_proposal()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(index: int) -> None:
+        user_id = 1000 + (index if index % 10 else index // 10)
+        async with semaphore:
+            start = time.perf_counter()
+            if not await vote_fn(user_id, proposal_id, {"option": OPTIONS[index % len(OPTIONS)]}):
+                raise RuntimeError(f"vote {index} was rejected")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(num_votes)))
+    return latencies
+
+
+async def run_benchmark(num_votes: int, concurrency: int = 1, path: Optional[str] = None) -> Dict[str, Any]:
+    """Time both vote paths against a fresh database; returns the report dict."""
+    original_get_db = db.get_db
+    with tempfile.TemporaryDirectory() as tmp:
+        db.get_db = functools.partial(original_get_db, path or os.path.join(tmp, "votes_bench.db"))
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):  # The vote functions print DEBUG lines
+                await db.init_db()
+                legacy = await time_path(legacy_vote, num_votes, concurrency)
+                fast = await time_path(fast_vote, num_votes, concurrency)
+        finally:
+            db.get_db = original_get_db
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "votes": num_votes,
+                 "concurrency": concurrency, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+        "legacy": summarize(legacy),
+        "fast": summarize(fast),
+    }
+    report["p99_speedup"] = report["legacy"]["p99_ms"] / report["fast"]["p99_ms"] if report["fast"]["p99_ms"] else None
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.votes", description=__doc__.splitlines()[0])
+    parser.add_argument("--votes", type=int, default=500, help="votes cast through each path")
+    parser.add_argument("--concurrency", type=int, default=1, help="votes in flight at once")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(args.votes, max(1, args.concurrency)))
+    print(f"legacy p99={report['legacy']['p99_ms']:.2f}ms fast p99={report['fast']['p99_ms']:.2f}ms", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,17 @@
 import aiosqlite
+import asyncio
+import copy
+import hashlib
 import json
-from datetime import datetime, timedelta
+import secrets
+from datetime import datetime, timedelta, timezone
 from functools import lru_cache
 from contextlib import asynccontextmanager
 import sqlite3
-from typing import Optional, Dict, Any, List
+import weakref
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple
+
+import receipts
 
 # Define CREATE_SERVERS_TABLE
 CREATE_SERVERS_TABLE = """
@@ -84,6 +91,8 @@ CREATE TABLE IF NOT EXISTS votes (
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     is_abstain BOOLEAN DEFAULT FALSE,
     tokens_invested INTEGER, -- For weighted/campaign voting
+    idempotency_key TEXT, -- Ballot DM (or command message) that last wrote this vote; repeats of it are no-ops
+    source TEXT, -- NULL for votes cast in Discord; e.g. 'csv:<file>#<ballot>' for imported paper ballots
     UNIQUE (proposal_id, user_id), -- Ensures one vote per user per proposal
     FOREIGN KEY (proposal_id) REFERENCES proposals(proposal_id) ON DELETE CASCADE,
     FOREIGN KEY (user_id) REFERENCES users(user_id) -- Ensured this FK points to users.user_id
@@ -91,6 +100,17 @@ CREATE TABLE IF NOT EXISTS votes (
 """
 
 # Define table for proposal vote identifiers
+CREATE_VOTE_IDEMPOTENCY_KEYS_TABLE = """
+CREATE TABLE IF NOT EXISTS vote_idempotency_keys (
+    proposal_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    idempotency_key TEXT NOT NULL, -- Ballot DM (or command message) that has written this voter's vote
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (proposal_id, user_id, idempotency_key),
+    FOREIGN KEY (proposal_id) REFERENCES proposals(proposal_id) ON DELETE CASCADE
+);
+"""
+
 CREATE_PROPOSAL_VOTE_IDS_TABLE = """
 CREATE TABLE IF NOT EXISTS proposal_vote_ids (
     server_id INTEGER NOT NULL,
@@ -139,6 +159,7 @@ CREATE TABLE IF NOT EXISTS campaigns (
     rejection_timestamp TEXT,
     rejection_reason TEXT,
     control_message_id INTEGER,
+    voting_mode TEXT NOT NULL DEFAULT 'linear', -- 'linear' (tokens multiply a ballot) or 'quadratic' (n votes cost n² credits)
     FOREIGN KEY (approved_by) REFERENCES users(user_id) ON DELETE SET NULL,
     FOREIGN KEY (rejected_by) REFERENCES users(user_id) ON DELETE SET NULL
 );
@@ -200,6 +221,9 @@ CREATE TABLE IF NOT EXISTS proposals (
     results_message_id INTEGER,
     results_channel_id INTEGER,
     vote_tracking_message_id INTEGER, -- Ensured name consistency
+    vote_revision INTEGER DEFAULT 0, -- Bumped on every vote write; keys the tally cache
+    live_standings BOOLEAN DEFAULT FALSE, -- Show provisional ranked standings in the vote tracker
+    topic TEXT, -- Optional subject; topic delegations apply only to proposals with a matching topic
     FOREIGN KEY (server_id) REFERENCES servers(server_id),
     FOREIGN KEY (proposer_id) REFERENCES users(user_id), -- Assuming a users table
     FOREIGN KEY (approved_by) REFERENCES users(user_id), -- Assuming a users table
@@ -217,6 +241,154 @@ CREATE TABLE IF NOT EXISTS proposal_results (
 );
 """
 
+CREATE_TALLY_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS tally_cache (
+    proposal_id INTEGER NOT NULL,
+    vote_revision INTEGER NOT NULL,
+    mechanism TEXT NOT NULL,
+    params_hash TEXT NOT NULL, -- sha256 of the canonical hyperparameters/options JSON
+    results TEXT NOT NULL, -- JSON tally output as returned by calculate_results
+    calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (proposal_id, vote_revision, mechanism, params_hash),
+    FOREIGN KEY (proposal_id) REFERENCES proposals(proposal_id) ON DELETE CASCADE
+);
+"""
+
+CREATE_DELEGATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS delegations (
+    server_id INTEGER NOT NULL,
+    delegator_id INTEGER NOT NULL,
+    topic TEXT NOT NULL DEFAULT '', -- '' covers every proposal; otherwise only proposals with this topic
+    delegate_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (server_id, delegator_id, topic),
+    CHECK (delegator_id != delegate_id)
+);
+"""
+
+CREATE_DELEGATION_REVISIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS delegation_revisions (
+    server_id INTEGER PRIMARY KEY,
+    revision INTEGER NOT NULL DEFAULT 0 -- Bumped on every delegation change; keys resolved weights
+);
+"""
+
+CREATE_RETALLY_CHECKPOINTS_TABLE = """
+CREATE TABLE IF NOT EXISTS retally_checkpoints (
+    job_name TEXT PRIMARY KEY,
+    last_proposal_id INTEGER NOT NULL, -- Highest proposal id whose chunk has been committed
+    corrected INTEGER NOT NULL DEFAULT 0, -- Stored results rewritten so far by this job
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CREATE_VOTE_WEIGHT_SNAPSHOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS vote_weight_snapshots (
+    proposal_id INTEGER PRIMARY KEY,
+    weighting TEXT, -- Guild weighting provider applied at close; NULL for one member, one vote
+    voter_weights TEXT, -- JSON {user_id: weight} resolved at close; NULL when every ballot weighed 1
+    delegation TEXT, -- JSON delegation stats at close; NULL when no delegations applied
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CREATE_BLOC_PAIR_STATS_TABLE = """
+CREATE TABLE IF NOT EXISTS bloc_pair_stats (
+    server_id INTEGER NOT NULL,
+    member_a INTEGER NOT NULL, -- Always the smaller user id of the pair
+    member_b INTEGER NOT NULL,
+    shared_proposals INTEGER NOT NULL DEFAULT 0, -- Closed proposals both members voted on
+    agreement_sum REAL NOT NULL DEFAULT 0, -- Sum of per-proposal ballot agreement in [0, 1]
+    PRIMARY KEY (server_id, member_a, member_b),
+    CHECK (member_a < member_b)
+);
+"""
+
+CREATE_BLOC_MEMBER_STATS_TABLE = """
+CREATE TABLE IF NOT EXISTS bloc_member_stats (
+    server_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    proposals_voted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (server_id, user_id)
+);
+"""
+
+CREATE_BLOC_RECORDED_PROPOSALS_TABLE = """
+CREATE TABLE IF NOT EXISTS bloc_recorded_proposals (
+    proposal_id INTEGER PRIMARY KEY, -- A closed proposal's ballots are folded into the bloc stats exactly once
+    server_id INTEGER NOT NULL,
+    pairs_total INTEGER NOT NULL DEFAULT 0, -- Pair rows the proposal contributes
+    pairs_done INTEGER NOT NULL DEFAULT 0, -- Pair rows applied so far; chunks resume from here
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CREATE_VOTE_IDENTIFIER_SEQUENCES_TABLE = """
+CREATE TABLE IF NOT EXISTS vote_identifier_sequences (
+    scope TEXT PRIMARY KEY, -- 'proposal:<id>' or 'campaign:<id>'
+    next_index INTEGER NOT NULL, -- Allocation counter, permuted into the identifier space
+    permutation_key BLOB NOT NULL -- Random per-scope key for the Feistel permutation
+);
+"""
+
+CREATE_VOTE_EVENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS vote_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT, -- Append-only; the votes table is the projection of these events
+    proposal_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    event_type TEXT NOT NULL CHECK(event_type IN ('cast', 'change', 'retract')),
+    vote_data TEXT, -- The ballot as stored in votes.vote_data; NULL for retract
+    is_abstain BOOLEAN DEFAULT FALSE,
+    tokens_invested INTEGER,
+    source TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CREATE_VOTE_EVENTS_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_vote_events_proposal ON vote_events (proposal_id, event_id);
+"""
+
+CREATE_VOTE_SNAPSHOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS vote_snapshots (
+    proposal_id INTEGER PRIMARY KEY,
+    last_event_id INTEGER NOT NULL, -- Events up to and including this one are folded into ballots
+    ballots TEXT NOT NULL, -- JSON list of [user_id, vote_data, is_abstain, tokens_invested, source]
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CREATE_MERKLE_TREES_TABLE = """
+CREATE TABLE IF NOT EXISTS merkle_trees (
+    proposal_id INTEGER PRIMARY KEY,
+    leaf_count INTEGER NOT NULL DEFAULT 0, -- Vote slots handed out; the next voter gets this index
+    root BLOB, -- Current root; NULL until the first vote
+    published_root TEXT, -- Hex root frozen when the proposal closed, shown with the results
+    published_at TIMESTAMP
+);
+"""
+
+CREATE_MERKLE_LEAVES_TABLE = """
+CREATE TABLE IF NOT EXISTS merkle_leaves (
+    proposal_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    leaf_index INTEGER NOT NULL, -- The voter's slot, kept across changes and retraction
+    salt TEXT, -- Fresh per vote write; NULL while the slot is empty (retracted)
+    PRIMARY KEY (proposal_id, user_id),
+    UNIQUE (proposal_id, leaf_index)
+);
+"""
+
+CREATE_MERKLE_NODES_TABLE = """
+CREATE TABLE IF NOT EXISTS merkle_nodes (
+    proposal_id INTEGER NOT NULL,
+    level INTEGER NOT NULL, -- 0 for leaves, receipts.MERKLE_DEPTH for the root
+    position INTEGER NOT NULL,
+    hash BLOB NOT NULL,
+    PRIMARY KEY (proposal_id, level, position)
+) WITHOUT ROWID;
+"""
+
 CREATE_WARNINGS_TABLE = """
 CREATE TABLE IF NOT EXISTS warnings (
     warning_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -254,7 +426,7 @@ CREATE TABLE IF NOT EXISTS voting_invites (
     invite_id INTEGER PRIMARY KEY AUTOINCREMENT,
     proposal_id INTEGER NOT NULL,
     voter_id INTEGER NOT NULL,
-    status TEXT DEFAULT 'pending', -- e.g., pending, sent, failed, viewed
+    status TEXT DEFAULT 'pending', -- e.g., pending, sent, failed, viewed, voted
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE (proposal_id, voter_id),
     FOREIGN KEY (proposal_id) REFERENCES proposals(proposal_id) ON DELETE CASCADE,
@@ -408,6 +580,26 @@ async def init_constitutional_variables(server_id):
             "value": "public",
             "type": "text",
             "description": "Visibility of voter identities in audits: 'public' or 'anonymous'"
+        },
+        "vote_weighting": {
+            "value": "equal",
+            "type": "text",
+            "description": "How non-campaign votes are weighted: 'equal', 'role' or 'tenure'"
+        },
+        "role_vote_weights": {
+            "value": "{}",
+            "type": "text",
+            "description": "JSON map of role name to vote weight for role weighting, e.g. {\"Core\": 3}"
+        },
+        "tenure_days_per_weight": {
+            "value": "30",
+            "type": "number",
+            "description": "Days of membership that earn one extra vote under tenure weighting"
+        },
+        "tenure_max_weight": {
+            "value": "3",
+            "type": "number",
+            "description": "Largest vote weight tenure weighting can give a member"
         }
     }
     current_time_iso = datetime.utcnow().isoformat() # Get current time
@@ -474,6 +666,117 @@ async def update_constitutional_variable(server_id, variable_name, variable_valu
         await conn.commit()
 
 
+# ========================
+# 🔹 ACTIVE PROPOSAL REGISTRY
+# ========================
+# Proposals in Voting status are read on every vote, tracker refresh and deadline check
+# but rarely change, so once warm_active_proposals has run at startup, get_proposal and
+# get_proposal_options serve them from memory. Every write to a proposal row goes
+# through here: update_proposal_status and update_proposal write the new row through,
+# vote writes bump the cached vote_revision, and leaving Voting evicts the entry.
+# Each write also advances an epoch; a read that raced a write does not cache its row.
+
+_active_proposals: Dict[int, Dict[str, Any]] = {}
+_active_options: Dict[int, List[str]] = {}
+_registry_warm = False
+_registry_epoch = 0
+
+
+def _decode_proposal_row(proposal: Dict[str, Any]) -> Dict[str, Any]:
+    """Deserialize hyperparameters in a proposals row dict, defaulting to {}."""
+    hyperparameters_json = proposal.get('hyperparameters')
+    if hyperparameters_json and isinstance(hyperparameters_json, str):
+        try:
+            proposal['hyperparameters'] = json.loads(hyperparameters_json)
+        except json.JSONDecodeError:
+            print(f"WARNING: Failed to deserialize hyperparameters for proposal {proposal.get('proposal_id')}. Value: {hyperparameters_json}")
+            proposal['hyperparameters'] = {} # Default to empty dict on error
+    elif not hyperparameters_json:
+        proposal['hyperparameters'] = {} # Default to empty dict if None or empty string
+    return proposal
+
+
+def _remember_active_proposal(proposal: Dict[str, Any], epoch: int) -> None:
+    """Cache a freshly read row if it is in Voting and no write happened since ``epoch``; otherwise evict it."""
+    proposal_id = proposal['proposal_id']
+    if _registry_warm and epoch == _registry_epoch and proposal.get('status') == 'Voting':
+        _active_proposals[proposal_id] = copy.deepcopy(proposal)
+    else:
+        discard_active_proposal(proposal_id)
+
+
+def _note_proposal_write() -> int:
+    """Advance the registry epoch before a write; returns the new epoch."""
+    global _registry_epoch
+    _registry_epoch += 1
+    return _registry_epoch
+
+
+def _note_vote_revision_bump(proposal_id: int) -> None:
+    """Mirror a committed SQL_BUMP_VOTE_REVISION in the cached row."""
+    _note_proposal_write()
+    entry = _active_proposals.get(proposal_id)
+    if entry is not None:
+        entry['vote_revision'] = (entry.get('vote_revision') or 0) + 1
+
+
+def discard_active_proposal(proposal_id: int) -> None:
+    """Drop a proposal (and its options) from the registry; the next read reloads it if still active."""
+    _active_proposals.pop(proposal_id, None)
+    _active_options.pop(proposal_id, None)
+
+
+def reset_active_proposals() -> None:
+    """Empty the registry and turn it off until the next warm_active_proposals."""
+    global _registry_warm
+    _registry_warm = False
+    _note_proposal_write()
+    _active_proposals.clear()
+    _active_options.clear()
+
+
+async def warm_active_proposals() -> int:
+    """Load every Voting proposal and its options into the registry; returns how many were loaded."""
+    global _registry_warm
+    epoch = _note_proposal_write()
+    proposals: Dict[int, Dict[str, Any]] = {}
+    options: Dict[int, List[str]] = {}
+    async with get_db() as conn:
+        async with conn.execute("SELECT * FROM proposals WHERE status = 'Voting'") as cursor:
+            async for row in cursor:
+                proposal = _decode_proposal_row(dict(row))
+                proposals[proposal['proposal_id']] = proposal
+                options[proposal['proposal_id']] = []
+        async with conn.execute(
+            "SELECT o.proposal_id, o.option_text FROM proposal_options o "
+            "JOIN proposals p ON p.proposal_id = o.proposal_id WHERE p.status = 'Voting' "
+            "ORDER BY o.proposal_id, o.option_order"
+        ) as cursor:
+            async for proposal_id, option_text in cursor:
+                options[proposal_id].append(option_text)
+    if epoch != _registry_epoch:
+        # A write landed while loading; start cold and let reads fill the registry.
+        proposals, options = {}, {}
+    _active_proposals.clear()
+    _active_proposals.update(proposals)
+    _active_options.clear()
+    _active_options.update(options)
+    _registry_warm = True
+    print(f"DEBUG: Active proposal registry warmed with {len(proposals)} proposal(s).")
+    return len(proposals)
+
+
+async def _write_through_proposal(conn: aiosqlite.Connection, proposal_id: int, epoch: int) -> None:
+    """After a committed proposals write, re-read the row on the same connection into the registry."""
+    if not _registry_warm:
+        return
+    async with conn.execute("SELECT * FROM proposals WHERE proposal_id = ?", (proposal_id,)) as cursor:
+        row = await cursor.fetchone()
+    if row is None:
+        discard_active_proposal(proposal_id)
+        return
+    _remember_active_proposal(_decode_proposal_row(dict(row)), epoch)
+
 # ========================
 # 🔹 PROPOSAL FUNCTIONS
 # ========================
@@ -538,7 +841,11 @@ async def create_proposal(
 
 
 async def get_proposal(proposal_id):
-    """Get a proposal by ID"""
+    """Get a proposal by ID (served from the active proposal registry when possible)"""
+    cached = _active_proposals.get(proposal_id)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    epoch = _registry_epoch
     async with get_db() as conn:
         async with conn.execute(
             "SELECT * FROM proposals WHERE proposal_id = ?", # Removed OR id = ?
@@ -552,17 +859,10 @@ async def get_proposal(proposal_id):
                 # proposal['proposal_id'] = proposal['id']
 
                 # Deserialize hyperparameters
-                hyperparameters_json = proposal.get('hyperparameters')
-                if hyperparameters_json and isinstance(hyperparameters_json, str):
-                    try:
-                        proposal['hyperparameters'] = json.loads(hyperparameters_json)
-                    except json.JSONDecodeError:
-                        print(f"WARNING: Failed to deserialize hyperparameters for proposal {proposal.get('proposal_id')}. Value: {hyperparameters_json}")
-                        proposal['hyperparameters'] = {} # Default to empty dict on error
-                elif not hyperparameters_json:
-                    proposal['hyperparameters'] = {} # Default to empty dict if None or empty string
                 # If it's already a dict (e.g. if somehow loaded as such), leave it.
-
+                _decode_proposal_row(proposal)
+                if _registry_warm:
+                    _remember_active_proposal(proposal, epoch)
                 return proposal
             return None
 
@@ -622,7 +922,8 @@ async def get_proposals_by_status(status):
 
 
 async def update_proposal_status(proposal_id, new_status, approved_by=None):
-    """Update the status of a proposal."""
+    """Update the status of a proposal (written through to the active proposal registry)."""
+    epoch = _note_proposal_write()
     async with get_db() as conn:
         if approved_by:
             await conn.execute(
@@ -635,6 +936,9 @@ async def update_proposal_status(proposal_id, new_status, approved_by=None):
                 (new_status, proposal_id),
             )
         await conn.commit()
+        if new_status != 'Voting':
+            discard_active_proposal(proposal_id)
+        await _write_through_proposal(conn, proposal_id, epoch)
 
 
 async def store_proposal_results(proposal_id, results_dict):
@@ -690,6 +994,63 @@ async def get_proposal_results(proposal_id):
             return None
 
 
+async def get_proposal_vote_revision(proposal_id: int) -> Optional[int]:
+    """Return the current vote revision of a proposal, or None if it does not exist."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT COALESCE(vote_revision, 0) FROM proposals WHERE proposal_id = ?",
+            (proposal_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+
+async def get_cached_tally(proposal_id: int, vote_revision: int, mechanism: str, params_hash: str) -> Optional[Dict[str, Any]]:
+    """Return a cached tally for the exact (proposal, revision, mechanism, params) key, if any."""
+    async with get_db() as conn:
+        async with conn.execute(
+            """
+            SELECT results FROM tally_cache
+            WHERE proposal_id = ? AND vote_revision = ? AND mechanism = ? AND params_hash = ?
+            """,
+            (proposal_id, vote_revision, mechanism, params_hash)
+        ) as cursor:
+            row = await cursor.fetchone()
+            if row:
+                try:
+                    return json.loads(row[0])
+                except json.JSONDecodeError:
+                    print(f"WARNING: Corrupt tally cache entry for P#{proposal_id} rev {vote_revision}. Ignoring.")
+            return None
+
+
+async def store_cached_tally(proposal_id: int, vote_revision: int, mechanism: str, params_hash: str, results_dict: Dict[str, Any]) -> bool:
+    """Persist a tally for its cache key and drop entries for older revisions of the proposal."""
+    try:
+        results_json = json.dumps(results_dict)
+    except (TypeError, ValueError) as e:
+        print(f"WARNING: Tally for P#{proposal_id} is not JSON serializable, not caching: {e}")
+        return False
+
+    async with get_db() as conn:
+        await conn.execute(
+            """
+            INSERT INTO tally_cache (proposal_id, vote_revision, mechanism, params_hash, results)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(proposal_id, vote_revision, mechanism, params_hash) DO UPDATE SET
+                results = excluded.results,
+                calculated_at = CURRENT_TIMESTAMP
+            """,
+            (proposal_id, vote_revision, mechanism, params_hash, results_json)
+        )
+        await conn.execute(
+            "DELETE FROM tally_cache WHERE proposal_id = ? AND vote_revision < ?",
+            (proposal_id, vote_revision)
+        )
+        await conn.commit()
+        return True
+
+
 async def get_expired_proposals():
     """
     Get all proposals that have passed their deadline but are still in 'Voting' status.
@@ -746,7 +1107,8 @@ async def get_expired_proposals():
 
 
 async def update_proposal(proposal_id, update_data):
-    """Update a proposal with arbitrary fields"""
+    """Update a proposal with arbitrary fields (written through to the active proposal registry)"""
+    epoch = _note_proposal_write()
     async with get_db() as conn:
         # Convert boolean values to integers for SQLite
         processed_data = {}
@@ -779,6 +1141,9 @@ async def update_proposal(proposal_id, update_data):
         #     )
 
         await conn.commit()
+        if update_data.get('status', 'Voting') != 'Voting':
+            discard_active_proposal(proposal_id)
+        await _write_through_proposal(conn, proposal_id, epoch)
 
         # Verify the update
         async with conn.execute(
@@ -837,6 +1202,20 @@ async def get_all_active_proposals():
 # 🔹 VOTE FUNCTIONS
 # ========================
 
+# Every vote write bumps the proposal's vote_revision in the same transaction so
+# cached tallies keyed on the revision can never outlive the ballots they counted.
+SQL_BUMP_VOTE_REVISION = (
+    "UPDATE proposals SET vote_revision = COALESCE(vote_revision, 0) + 1 WHERE proposal_id = ?"
+)
+
+# Appends the cast/change event for a vote write; run it on the same connection, in the
+# same transaction and just before the votes upsert, so it can see whether a vote exists.
+SQL_LOG_VOTE_EVENT = (
+    "INSERT INTO vote_events (proposal_id, user_id, event_type, vote_data, is_abstain, tokens_invested, source, created_at) "
+    "VALUES (?1, ?2, CASE WHEN EXISTS (SELECT 1 FROM votes WHERE proposal_id = ?1 AND user_id = ?2) "
+    "THEN 'change' ELSE 'cast' END, ?3, ?4, ?5, ?6, ?7)"
+)
+
 async def add_vote(proposal_id, voter_id, vote_data):
     """Add a vote for a proposal"""
     vote_json = json.dumps(vote_data)
@@ -851,6 +1230,11 @@ async def add_vote(proposal_id, voter_id, vote_data):
                 # Use the proposal_id column if it exists, otherwise use id
                 actual_id = row[0] # MODIFIED: Directly use the fetched proposal_id
 
+                await conn.execute(
+                    SQL_LOG_VOTE_EVENT,
+                    (actual_id, voter_id, vote_json, False, None, None, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f'))
+                )
+                await _set_merkle_leaf(conn, actual_id, voter_id, vote_json)
                 await conn.execute(
                     """
                     INSERT INTO votes (proposal_id, user_id, vote_data)
@@ -858,18 +1242,38 @@ async def add_vote(proposal_id, voter_id, vote_data):
                     """,
                     (actual_id, voter_id, vote_json)
                 )
+                await conn.execute(SQL_BUMP_VOTE_REVISION, (actual_id,))
                 await conn.commit()
+                _note_vote_revision_bump(actual_id)
 
 
 async def update_vote(vote_id, vote_data):
     """Update an existing vote"""
     vote_json = json.dumps(vote_data)
     async with get_db() as conn:
+        await conn.execute(
+            "INSERT INTO vote_events (proposal_id, user_id, event_type, vote_data, is_abstain, tokens_invested, source, created_at) "
+            "SELECT proposal_id, user_id, 'change', ?, is_abstain, tokens_invested, source, ? FROM votes WHERE vote_id = ?",
+            (vote_json, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f'), vote_id)
+        )
+        async with conn.execute("SELECT proposal_id, user_id FROM votes WHERE vote_id = ?", (vote_id,)) as cursor:
+            voter = await cursor.fetchone()
+        if voter:
+            await _set_merkle_leaf(conn, voter[0], voter[1], vote_json)
         await conn.execute(
             "UPDATE votes SET vote_data = ? WHERE vote_id = ?",
             (vote_json, vote_id)
         )
+        await conn.execute(
+            "UPDATE proposals SET vote_revision = COALESCE(vote_revision, 0) + 1 "
+            "WHERE proposal_id = (SELECT proposal_id FROM votes WHERE vote_id = ?)",
+            (vote_id,)
+        )
         await conn.commit()
+        async with conn.execute("SELECT proposal_id FROM votes WHERE vote_id = ?", (vote_id,)) as cursor:
+            row = await cursor.fetchone()
+        if row:
+            _note_vote_revision_bump(row[0])
 
 
 async def get_user_vote(proposal_id, voter_id):
@@ -930,6 +1334,163 @@ async def get_proposal_votes(proposal_id):
                 return results
             return []
 
+async def count_proposal_votes(proposal_id: int) -> int:
+    """Number of vote rows (abstentions included) for a proposal."""
+    try:
+        async with get_db() as conn:
+            async with conn.execute("SELECT COUNT(*) FROM votes WHERE proposal_id = ?", (proposal_id,)) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else 0
+    except Exception as e:
+        print(f"ERROR counting votes for proposal {proposal_id}: {e}")
+        return 0
+
+async def iter_proposal_vote_chunks(proposal_id: int, chunk_size: int = 1000):
+    """Yield a proposal's votes from one cursor in lists of at most ``chunk_size`` rows.
+
+    Rows carry only ``vote_data`` (deserialized as in get_proposal_votes), ``tokens_invested``
+    and ``is_abstain``, so a consumer never holds more than one chunk of ballots at a time.
+    """
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT vote_data, tokens_invested, is_abstain FROM votes WHERE proposal_id = ? ORDER BY vote_id",
+            (proposal_id,)
+        ) as cursor:
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunk = []
+                for vote_data, tokens_invested, is_abstain in rows:
+                    if isinstance(vote_data, str):
+                        try:
+                            vote_data = json.loads(vote_data)
+                        except json.JSONDecodeError:
+                            pass  # Mechanisms skip undecodable ballots themselves
+                    chunk.append({'vote_data': vote_data, 'tokens_invested': tokens_invested, 'is_abstain': is_abstain})
+                yield chunk
+
+# ========================
+# 🔹 SQL PUSHDOWN TALLIES (JSON1)
+# ========================
+# vote_data is stored double-encoded (a JSON string holding the ballot JSON), so the
+# ballot is unwrapped once when the stored value is a JSON string. Every JSON1 call on
+# a value that may be malformed sits behind a CASE on json_valid, since CASE is the only
+# construct SQLite guarantees to evaluate lazily.
+_json1_supported: Optional[bool] = None
+
+SQL_PUSHDOWN_BALLOTS = """
+    SELECT vote_id,
+           CASE WHEN json_valid(vote_data) THEN
+               CASE WHEN json_type(vote_data) = 'text' THEN json_extract(vote_data, '$') ELSE vote_data END
+           END AS ballot,
+           CASE WHEN tokens_invested IS NULL THEN 1 WHEN tokens_invested > 0 THEN tokens_invested ELSE 0 END AS weight
+    FROM votes
+    WHERE proposal_id = ? AND NOT COALESCE(is_abstain, 0)
+"""
+
+SQL_PUSHDOWN_PLURALITY = f"""
+    WITH ballots AS ({SQL_PUSHDOWN_BALLOTS}),
+    choices AS (
+        SELECT weight,
+               CASE WHEN json_valid(ballot) THEN
+                   CASE WHEN json_type(ballot) = 'object' AND json_type(ballot, '$.option') = 'text'
+                        THEN json_extract(ballot, '$.option') END
+               END AS option
+        FROM ballots
+    )
+    SELECT option, COUNT(*), SUM(weight)
+    FROM choices
+    WHERE option IN (SELECT value FROM json_each(?))
+    GROUP BY option
+"""
+
+SQL_PUSHDOWN_APPROVAL = f"""
+    WITH ballots AS ({SQL_PUSHDOWN_BALLOTS}),
+    approvals AS (
+        SELECT b.vote_id, b.weight, a.value AS option
+        FROM ballots AS b,
+             json_each(CASE WHEN json_valid(b.ballot) THEN
+                           CASE WHEN json_type(b.ballot, '$.approved') = 'array' THEN json_extract(b.ballot, '$.approved') END
+                       END) AS a
+        WHERE a.type = 'text' AND a.value IN (SELECT value FROM json_each(?))
+    )
+    SELECT option, COUNT(*), SUM(weight), NULL, NULL FROM approvals GROUP BY option
+    UNION ALL
+    SELECT NULL, NULL, NULL, COUNT(*), SUM(weight) FROM (SELECT DISTINCT vote_id, weight FROM approvals)
+"""
+
+SQL_PUSHDOWN_ABSTAINS = """
+    SELECT COUNT(*), COALESCE(SUM(tokens_invested), 0)
+    FROM votes WHERE proposal_id = ? AND COALESCE(is_abstain, 0)
+"""
+
+
+async def sqlite_json1_available() -> bool:
+    """Whether the linked SQLite has the JSON1 functions (checked once per process)."""
+    global _json1_supported
+    if _json1_supported is None:
+        try:
+            async with get_db() as conn:
+                async with conn.execute("SELECT json_valid('{}'), json_type('[]')") as cursor:
+                    await cursor.fetchone()
+            _json1_supported = True
+        except Exception as e:
+            print(f"WARNING: SQLite JSON1 unavailable, tallies will run in Python: {e}")
+            _json1_supported = False
+    return _json1_supported
+
+
+async def _run_pushdown_tally(sql: str, proposal_id: int, options: List[str]) -> Optional[Tuple[List[Any], Any]]:
+    try:
+        async with get_db() as conn:
+            async with conn.execute(sql, (proposal_id, json.dumps(list(options)))) as cursor:
+                rows = await cursor.fetchall()
+            async with conn.execute(SQL_PUSHDOWN_ABSTAINS, (proposal_id,)) as cursor:
+                abstains = await cursor.fetchone()
+        return rows, abstains
+    except Exception as e:
+        print(f"ERROR running SQL pushdown tally for proposal {proposal_id}: {e}")
+        return None
+
+
+async def get_pushdown_plurality_totals(proposal_id: int, options: List[str]) -> Optional[Dict[str, Any]]:
+    """Per-option ``(raw, weighted)`` plurality totals counted inside SQLite, plus abstentions.
+
+    Applies the same ballot validation and token weighting as PluralityVoting.
+    Returns None if the query fails.
+    """
+    fetched = await _run_pushdown_tally(SQL_PUSHDOWN_PLURALITY, proposal_id, options)
+    if fetched is None:
+        return None
+    rows, abstains = fetched
+    return {
+        'option_totals': {option: (raw, weighted) for option, raw, weighted in rows},
+        'num_abstain_votes': abstains[0],
+        'tokens_in_abstain_votes': abstains[1],
+    }
+
+
+async def get_pushdown_approval_totals(proposal_id: int, options: List[str]) -> Optional[Dict[str, Any]]:
+    """Per-option ``(raw, weighted)`` approval totals counted inside SQLite, plus voter totals and abstentions.
+
+    Applies the same ballot validation and token weighting as ApprovalVoting.
+    Returns None if the query fails.
+    """
+    fetched = await _run_pushdown_tally(SQL_PUSHDOWN_APPROVAL, proposal_id, options)
+    if fetched is None:
+        return None
+    rows, abstains = fetched
+    option_totals = {option: (raw, weighted) for option, raw, weighted, _, _ in rows if option is not None}
+    voters, power = next(((v, p) for option, _, _, v, p in rows if option is None), (0, 0))
+    return {
+        'option_totals': option_totals,
+        'total_raw_voters': voters or 0,
+        'total_weighted_voting_power': power or 0,
+        'num_abstain_votes': abstains[0],
+        'tokens_in_abstain_votes': abstains[1],
+    }
+
 async def get_invited_voters(proposal_id):
     """Get all voters who have been invited to vote on a proposal"""
     async with get_db() as conn:
@@ -990,8 +1551,15 @@ async def record_vote(
 
     try:
         async with get_db() as conn:
+            await conn.execute(
+                SQL_LOG_VOTE_EVENT,
+                (proposal_id, user_id, vote_json, is_abstain, tokens_invested, None, current_time_utc)
+            )
+            await _set_merkle_leaf(conn, proposal_id, user_id, vote_json)
             await conn.execute(sql_insert_vote, params)
+            await conn.execute(SQL_BUMP_VOTE_REVISION, (proposal_id,))
             await conn.commit()
+            _note_vote_revision_bump(proposal_id)
             print(f"DEBUG: Vote recorded/updated for P#{proposal_id} U#{user_id}. Abstain: {is_abstain}, Tokens: {tokens_invested}, Data: {vote_json[:50]}")
             return True
     except Exception as e:
@@ -1001,17 +1569,68 @@ async def record_vote(
 
 
 # --- Anonymous Vote Identifier Helpers ---
-ADJECTIVES = ["Red", "Blue", "Green", "Swift", "Lucky", "Brave", "Bright", "Misty", "Bold", "Sunny"]
-NOUNS = ["Fox", "Bear", "Wolf", "Hawk", "Lion", "Eagle", "Otter", "Panda", "Tiger", "Koala"]
-
-def _generate_identifier() -> str:
-    """Generate a short, human-readable identifier."""
-    import secrets
-
-    adjective = secrets.choice(ADJECTIVES)
-    noun = secrets.choice(NOUNS)
-    number = secrets.randbelow(100)
-    return f"{adjective}{noun}{number:02d}"
+# Each scope (a proposal, or a campaign) hands out identifiers by permuting an allocation
+# counter through a keyed Feistel network over the identifier space, so no two voters in a
+# scope can get the same identifier and nothing needs to be looked up or retried. The
+# 4-digit numbers keep new identifiers distinct from older 2-digit ones.
+ADJECTIVES = ["Red", "Blue", "Green", "Swift", "Lucky", "Brave", "Bright", "Misty", "Bold", "Sunny",
+              "Calm", "Quiet", "Wild", "Gentle", "Silver", "Golden", "Clever", "Happy", "Noble", "Rapid",
+              "Proud", "Jolly", "Keen", "Mellow", "Witty", "Frosty", "Amber", "Crimson", "Ivory", "Jade",
+              "Dusky", "Stormy"]
+NOUNS = ["Fox", "Bear", "Wolf", "Hawk", "Lion", "Eagle", "Otter", "Panda", "Tiger", "Koala",
+         "Heron", "Badger", "Falcon", "Lynx", "Moose", "Raven", "Seal", "Swan", "Whale", "Bison",
+         "Crane", "Dingo", "Gecko", "Ibis", "Lemur", "Marten", "Newt", "Owl", "Puffin", "Robin",
+         "Stoat", "Yak"]
+IDENTIFIER_NUMBERS = 10000
+IDENTIFIER_SPACE = len(ADJECTIVES) * len(NOUNS) * IDENTIFIER_NUMBERS
+_FEISTEL_HALF_BITS = (max(IDENTIFIER_SPACE - 1, 1).bit_length() + 1) // 2
+_FEISTEL_HALF_MASK = (1 << _FEISTEL_HALF_BITS) - 1
+_FEISTEL_ROUNDS = 8
+
+
+def _feistel_round(key: bytes, round_index: int, half: int) -> int:
+    digest = hashlib.blake2b(round_index.to_bytes(1, 'big') + half.to_bytes(4, 'big'), key=key, digest_size=4).digest()
+    return int.from_bytes(digest, 'big') & _FEISTEL_HALF_MASK
+
+
+def permute_identifier_index(index: int, key: bytes) -> int:
+    """Map ``index`` in [0, IDENTIFIER_SPACE) to a distinct value in the same range.
+
+    A balanced Feistel network over 2 * _FEISTEL_HALF_BITS bits is a bijection; cycle walking
+    (re-applying it until the result lands in range) restricts it to IDENTIFIER_SPACE. The
+    bit width is at most 4x the space, so the expected number of walks is a small constant.
+    """
+    if not 0 <= index < IDENTIFIER_SPACE:
+        raise ValueError(f"Identifier index {index} is outside the identifier space.")
+    value = index
+    while True:
+        left, right = value >> _FEISTEL_HALF_BITS, value & _FEISTEL_HALF_MASK
+        for round_index in range(_FEISTEL_ROUNDS):
+            left, right = right, left ^ _feistel_round(key, round_index, right)
+        value = (left << _FEISTEL_HALF_BITS) | right
+        if value < IDENTIFIER_SPACE:
+            return value
+
+
+def format_vote_identifier(value: int) -> str:
+    """Render a point of the identifier space as e.g. ``BraveOtter4821``."""
+    value, adjective = divmod(value, len(ADJECTIVES))
+    number, noun = divmod(value, len(NOUNS))
+    return f"{ADJECTIVES[adjective]}{NOUNS[noun]}{number:04d}"
+
+
+async def _allocate_identifier(conn: aiosqlite.Connection, scope: str) -> str:
+    """Take the next identifier for ``scope`` in one statement on ``conn`` (commit is the caller's)."""
+    async with conn.execute(
+        """
+        INSERT INTO vote_identifier_sequences (scope, next_index, permutation_key) VALUES (?, 1, ?)
+        ON CONFLICT(scope) DO UPDATE SET next_index = next_index + 1
+        RETURNING next_index - 1, permutation_key
+        """,
+        (scope, secrets.token_bytes(16))
+    ) as cursor:
+        index, key = await cursor.fetchone()
+    return format_vote_identifier(permute_identifier_index(index, key))
 
 async def get_or_create_vote_identifier(server_id: int, user_id: int, proposal_id: int, campaign_id: Optional[int] = None) -> str:
     """Return a persistent identifier for a user within a proposal or campaign."""
@@ -1027,7 +1646,9 @@ async def get_or_create_vote_identifier(server_id: int, user_id: int, proposal_i
             if row:
                 return row[0]
 
-        identifier = _generate_identifier()
+        identifier = await _allocate_identifier(
+            conn, f"campaign:{campaign_id}" if campaign_id is not None else f"proposal:{proposal_id}"
+        )
         if campaign_id is not None:
             await conn.execute(
                 "INSERT INTO campaign_vote_ids (server_id, campaign_id, user_id, identifier) VALUES (?, ?, ?, ?)",
@@ -1041,6 +1662,324 @@ async def get_or_create_vote_identifier(server_id: int, user_id: int, proposal_i
         await conn.commit()
         return identifier
 
+# ========================
+# 🔹 DELEGATION FUNCTIONS
+# ========================
+# A member may delegate their vote to another member, either for every proposal in
+# the guild (topic '') or only for proposals tagged with a topic; a topic delegation
+# takes precedence over the member's general one. Every change bumps the guild's
+# delegation revision in the same transaction so resolved weights can be memoized.
+
+SQL_BUMP_DELEGATION_REVISION = (
+    "INSERT INTO delegation_revisions (server_id, revision) VALUES (?, 1) "
+    "ON CONFLICT(server_id) DO UPDATE SET revision = revision + 1"
+)
+
+
+def normalize_topic(topic: Optional[str]) -> str:
+    """Topics are case-insensitive; None or blank means the general (all-proposals) delegation."""
+    return (topic or "").strip().lower()
+
+
+async def set_delegation(server_id: int, delegator_id: int, delegate_id: int, topic: Optional[str] = None) -> bool:
+    """Create or replace ``delegator_id``'s delegation for ``topic``. Self-delegation is rejected."""
+    if delegator_id == delegate_id:
+        return False
+    async with get_db() as conn:
+        await conn.execute(
+            """
+            INSERT INTO delegations (server_id, delegator_id, topic, delegate_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(server_id, delegator_id, topic) DO UPDATE SET
+                delegate_id = excluded.delegate_id,
+                created_at = CURRENT_TIMESTAMP
+            """,
+            (server_id, delegator_id, normalize_topic(topic), delegate_id)
+        )
+        await conn.execute(SQL_BUMP_DELEGATION_REVISION, (server_id,))
+        await conn.commit()
+        return True
+
+
+async def remove_delegation(server_id: int, delegator_id: int, topic: Optional[str] = None) -> bool:
+    """Remove ``delegator_id``'s delegation for ``topic``. Returns False when there was none."""
+    async with get_db() as conn:
+        cursor = await conn.execute(
+            "DELETE FROM delegations WHERE server_id = ? AND delegator_id = ? AND topic = ?",
+            (server_id, delegator_id, normalize_topic(topic))
+        )
+        if cursor.rowcount == 0:
+            return False
+        await conn.execute(SQL_BUMP_DELEGATION_REVISION, (server_id,))
+        await conn.commit()
+        return True
+
+
+async def get_user_delegations(server_id: int, user_id: int) -> List[Dict[str, Any]]:
+    """The delegations ``user_id`` has made in a guild, general delegation first."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT topic, delegate_id, created_at FROM delegations WHERE server_id = ? AND delegator_id = ? ORDER BY topic",
+            (server_id, user_id)
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+
+async def get_delegation_revision(server_id: int) -> int:
+    """The guild's delegation revision; 0 means no delegation has ever been made."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT revision FROM delegation_revisions WHERE server_id = ?", (server_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+
+
+async def get_delegation_edges(server_id: int, topic: Optional[str] = None) -> Dict[int, int]:
+    """Map each delegator to their delegate for a proposal on ``topic``.
+
+    A delegator with both a general and a matching topic delegation follows the topic one.
+    """
+    topic = normalize_topic(topic)
+    edges: Dict[int, int] = {}
+    async with get_db() as conn:
+        async with conn.execute(
+            # '' sorts first, so a topic row overwrites the general row for the same delegator
+            "SELECT delegator_id, delegate_id FROM delegations WHERE server_id = ? AND topic IN ('', ?) ORDER BY topic",
+            (server_id, topic)
+        ) as cursor:
+            async for delegator_id, delegate_id in cursor:
+                edges[delegator_id] = delegate_id
+    return edges
+
+# ========================
+# 🔹 BULK RE-TALLY
+# ========================
+# Closed proposals are walked by keyset (proposal_id > last seen) so a job never holds
+# more than one page of them. Each chunk's corrected results, the eviction of its stale
+# tally-cache rows and the job checkpoint commit in one transaction, so an interrupted
+# job resumes after the last chunk that was written and never rewrites half a chunk.
+
+async def get_closed_proposals_page(after_proposal_id: int, limit: int, server_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Closed proposals with ids above ``after_proposal_id``, oldest first, with their stored results.
+
+    ``results`` is the decoded stored results dict, or None if none were stored.
+    ``has_weight_snapshot`` tells whether the vote weights were frozen when it closed.
+    """
+    query = (
+        "SELECT p.proposal_id, p.server_id, p.campaign_id, p.voting_mechanism, r.results, "
+        "s.proposal_id IS NOT NULL AS has_weight_snapshot FROM proposals p "
+        "LEFT JOIN proposal_results r ON r.proposal_id = p.proposal_id "
+        "LEFT JOIN vote_weight_snapshots s ON s.proposal_id = p.proposal_id "
+        "WHERE p.status = 'Closed' AND p.proposal_id > ?"
+    )
+    params: List[Any] = [after_proposal_id]
+    if server_id is not None:
+        query += " AND p.server_id = ?"
+        params.append(server_id)
+    query += " ORDER BY p.proposal_id LIMIT ?"
+    params.append(limit)
+
+    page = []
+    async with get_db() as conn:
+        async with conn.execute(query, params) as cursor:
+            async for row in cursor:
+                entry = dict(row)
+                try:
+                    entry['results'] = json.loads(entry['results']) if entry['results'] is not None else None
+                except json.JSONDecodeError:
+                    print(f"WARNING: Stored results for P#{entry['proposal_id']} are not valid JSON.")
+                    entry['results'] = None
+                page.append(entry)
+    return page
+
+
+async def store_vote_weight_snapshot(proposal_id: int, weighting: Optional[str], voter_weights: Optional[Dict[int, int]],
+                                     delegation: Optional[Dict[str, Any]]) -> None:
+    """Freeze the vote weights a proposal was closed with, so later recounts ignore newer delegations and roles."""
+    async with get_db() as conn:
+        await conn.execute(
+            "INSERT OR REPLACE INTO vote_weight_snapshots (proposal_id, weighting, voter_weights, delegation) VALUES (?, ?, ?, ?)",
+            (proposal_id, weighting,
+             json.dumps(voter_weights) if voter_weights is not None else None,
+             json.dumps(delegation) if delegation is not None else None)
+        )
+        await conn.commit()
+
+
+async def get_vote_weight_snapshot(proposal_id: int) -> Optional[Dict[str, Any]]:
+    """``{'weighting', 'voter_weights', 'delegation'}`` frozen at close (user IDs as ints), or None."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT weighting, voter_weights, delegation FROM vote_weight_snapshots WHERE proposal_id = ?", (proposal_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+    if row is None:
+        return None
+    voter_weights = {int(user_id): weight for user_id, weight in json.loads(row[1]).items()} if row[1] else None
+    return {'weighting': row[0], 'voter_weights': voter_weights, 'delegation': json.loads(row[2]) if row[2] else None}
+
+
+async def get_retally_checkpoint(job_name: str) -> Optional[Dict[str, Any]]:
+    """The saved progress of a re-tally job, or None if it has not started (or has finished)."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT last_proposal_id, corrected, updated_at FROM retally_checkpoints WHERE job_name = ?", (job_name,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+
+async def apply_retally_chunk(job_name: str, last_proposal_id: int, corrections: List[Tuple[int, Dict[str, Any]]]) -> None:
+    """Store a chunk's corrected results and advance the job checkpoint atomically."""
+    async with get_db() as conn:
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            await conn.executemany(
+                """
+                INSERT INTO proposal_results (proposal_id, results)
+                VALUES (?, ?)
+                ON CONFLICT(proposal_id) DO UPDATE SET
+                    results = excluded.results,
+                    calculated_at = CURRENT_TIMESTAMP
+                """,
+                [(proposal_id, json.dumps(results)) for proposal_id, results in corrections]
+            )
+            await conn.executemany(
+                "DELETE FROM tally_cache WHERE proposal_id = ?", [(proposal_id,) for proposal_id, _ in corrections]
+            )
+            await conn.execute(
+                """
+                INSERT INTO retally_checkpoints (job_name, last_proposal_id, corrected)
+                VALUES (?, ?, ?)
+                ON CONFLICT(job_name) DO UPDATE SET
+                    last_proposal_id = excluded.last_proposal_id,
+                    corrected = corrected + excluded.corrected,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (job_name, last_proposal_id, len(corrections))
+            )
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+
+
+async def clear_retally_checkpoint(job_name: str) -> None:
+    """Forget a re-tally job's progress so the next run starts from the first proposal."""
+    async with get_db() as conn:
+        await conn.execute("DELETE FROM retally_checkpoints WHERE job_name = ?", (job_name,))
+        await conn.commit()
+
+# ========================
+# 🔹 VOTING BLOC STATS
+# ========================
+# Bloc analytics keep running per-pair totals (proposals shared, summed agreement) that
+# each closed proposal adds to once; the recorded-proposals marker is written in the
+# same transaction so a proposal is never counted twice.
+
+BLOC_PAIR_CHUNK_SIZE = 5000  # Pair rows per write transaction, so vote writers are never held up for long
+
+
+async def record_bloc_proposal(server_id: int, proposal_id: int, participants: List[int],
+                               pair_agreements: List[Tuple[int, int, float]],
+                               chunk_size: int = BLOC_PAIR_CHUNK_SIZE) -> bool:
+    """Fold one closed proposal into the guild's bloc stats. Returns False if it was already recorded.
+
+    ``pair_agreements`` holds ``(member_a, member_b, agreement)`` with ``member_a < member_b``,
+    in the same order on every call. Pairs are written ``chunk_size`` per transaction, each
+    advancing the proposal's ``pairs_done``; an interrupted proposal resumes where it stopped,
+    and a chunk another recorder already applied is not applied twice.
+    """
+    async with get_db() as conn:
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = await conn.execute(
+                "INSERT OR IGNORE INTO bloc_recorded_proposals (proposal_id, server_id, pairs_total) VALUES (?, ?, ?)",
+                (proposal_id, server_id, len(pair_agreements))
+            )
+            if cursor.rowcount:
+                await conn.executemany(
+                    """
+                    INSERT INTO bloc_member_stats (server_id, user_id, proposals_voted) VALUES (?, ?, 1)
+                    ON CONFLICT(server_id, user_id) DO UPDATE SET proposals_voted = proposals_voted + 1
+                    """,
+                    [(server_id, user_id) for user_id in participants]
+                )
+                done = 0
+            else:
+                async with conn.execute(
+                    "SELECT pairs_done, pairs_total FROM bloc_recorded_proposals WHERE proposal_id = ?", (proposal_id,)
+                ) as cursor:
+                    done, total = await cursor.fetchone()
+                if done >= total or total != len(pair_agreements):
+                    await conn.rollback()
+                    return False
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+
+        for start in range(done, len(pair_agreements), chunk_size):
+            chunk = pair_agreements[start:start + chunk_size]
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = await conn.execute(
+                    "UPDATE bloc_recorded_proposals SET pairs_done = ? WHERE proposal_id = ? AND pairs_done = ?",
+                    (start + len(chunk), proposal_id, start)
+                )
+                if cursor.rowcount == 0:  # Another recorder got here first
+                    await conn.rollback()
+                    return False
+                await conn.executemany(
+                    """
+                    INSERT INTO bloc_pair_stats (server_id, member_a, member_b, shared_proposals, agreement_sum)
+                    VALUES (?, ?, ?, 1, ?)
+                    ON CONFLICT(server_id, member_a, member_b) DO UPDATE SET
+                        shared_proposals = shared_proposals + 1,
+                        agreement_sum = agreement_sum + excluded.agreement_sum
+                    """,
+                    [(server_id, a, b, agreement) for a, b, agreement in chunk]
+                )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        return True
+
+
+async def get_unrecorded_closed_proposals(server_id: int) -> List[int]:
+    """Closed proposals of a guild not (fully) folded into the bloc stats yet, oldest first."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT p.proposal_id FROM proposals p "
+            "LEFT JOIN bloc_recorded_proposals b ON b.proposal_id = p.proposal_id "
+            "WHERE p.server_id = ? AND p.status = 'Closed' AND (b.proposal_id IS NULL OR b.pairs_done < b.pairs_total) "
+            "ORDER BY p.proposal_id",
+            (server_id,)
+        ) as cursor:
+            return [row[0] for row in await cursor.fetchall()]
+
+
+async def get_bloc_pair_stats(server_id: int, min_shared: int = 1) -> List[Dict[str, Any]]:
+    """Pairs of members who voted on at least ``min_shared`` of the same closed proposals."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT member_a, member_b, shared_proposals, agreement_sum FROM bloc_pair_stats "
+            "WHERE server_id = ? AND shared_proposals >= ?",
+            (server_id, min_shared)
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+
+async def get_bloc_member_stats(server_id: int) -> Dict[int, int]:
+    """How many recorded closed proposals each member voted on."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT user_id, proposals_voted FROM bloc_member_stats WHERE server_id = ?", (server_id,)
+        ) as cursor:
+            return {user_id: count async for user_id, count in cursor}
+
 # ========================
 # 🔹 WARNING SYSTEM
 # ========================
@@ -1283,8 +2222,10 @@ async def init_db() -> None:
         CREATE_PROPOSALS_TABLE, # This will use the updated definition
         CREATE_PROPOSAL_OPTIONS_TABLE,
         CREATE_PROPOSAL_RESULTS_TABLE, # Added
+        CREATE_TALLY_CACHE_TABLE,
         CREATE_PROPOSAL_NOTES_TABLE,
         CREATE_VOTES_TABLE,
+        CREATE_VOTE_IDEMPOTENCY_KEYS_TABLE,
         CREATE_PROPOSAL_VOTE_IDS_TABLE,
         CREATE_CAMPAIGN_VOTE_IDS_TABLE,
         CREATE_WARNINGS_TABLE,
@@ -1293,6 +2234,20 @@ async def init_db() -> None:
         CREATE_CAMPAIGNS_TABLE, # Added Campaign table
         CREATE_USER_CAMPAIGN_PARTICIPATION_TABLE, # Added User Campaign Participation table
         CREATE_VOTING_INVITES_TABLE, # Added
+        CREATE_DELEGATIONS_TABLE,
+        CREATE_DELEGATION_REVISIONS_TABLE,
+        CREATE_RETALLY_CHECKPOINTS_TABLE,
+        CREATE_VOTE_WEIGHT_SNAPSHOTS_TABLE,
+        CREATE_BLOC_PAIR_STATS_TABLE,
+        CREATE_BLOC_MEMBER_STATS_TABLE,
+        CREATE_BLOC_RECORDED_PROPOSALS_TABLE,
+        CREATE_VOTE_IDENTIFIER_SEQUENCES_TABLE,
+        CREATE_VOTE_EVENTS_TABLE,
+        CREATE_VOTE_EVENTS_INDEX,
+        CREATE_VOTE_SNAPSHOTS_TABLE,
+        CREATE_MERKLE_TREES_TABLE,
+        CREATE_MERKLE_LEAVES_TABLE,
+        CREATE_MERKLE_NODES_TABLE,
         # Add other CREATE TABLE statements here in dependency order
     ]
 
@@ -1312,13 +2267,22 @@ async def init_db() -> None:
         await _ensure_column(conn, "proposals", "vote_tracking_message_id INTEGER") # Ensured this column is checked/added
         await _ensure_column(conn, "proposals", "results_message_id INTEGER")
         await _ensure_column(conn, "proposals", "results_channel_id INTEGER")
+        await _ensure_column(conn, "proposals", "vote_revision INTEGER DEFAULT 0")
+        await _ensure_column(conn, "proposals", "live_standings BOOLEAN DEFAULT FALSE")
+        await _ensure_column(conn, "proposals", "topic TEXT")
 
 
         # Ensure columns for votes table
         await _ensure_column(conn, "votes", "user_id INTEGER NOT NULL") # Ensured this column is checked/added
         await _ensure_column(conn, "votes", "is_abstain BOOLEAN DEFAULT FALSE")
         await _ensure_column(conn, "votes", "tokens_invested INTEGER")
+        await _ensure_column(conn, "votes", "idempotency_key TEXT")
+        await _ensure_column(conn, "votes", "source TEXT")
+        await _ensure_column(conn, "campaigns", "voting_mode TEXT NOT NULL DEFAULT 'linear'")
+        await _ensure_column(conn, "bloc_recorded_proposals", "pairs_total INTEGER NOT NULL DEFAULT 0")
+        await _ensure_column(conn, "bloc_recorded_proposals", "pairs_done INTEGER NOT NULL DEFAULT 0")
         # Add other critical _ensure_column calls here if needed for other tables/columns
+        await _snapshot_unlogged_votes(conn)
 
         await conn.commit()
         print("Database initialized and tables created/verified (standardized init_db).")
@@ -1343,6 +2307,8 @@ async def add_proposal_option(proposal_id, option_text, option_order):
             (proposal_id, option_text, option_order)
         )
         await conn.commit()
+        _note_proposal_write()
+        _active_options.pop(proposal_id, None)
         return True
 
 async def add_proposal_options(proposal_id, options):
@@ -1358,10 +2324,16 @@ async def add_proposal_options(proposal_id, options):
                 (proposal_id, option, i)
             )
         await conn.commit()
+        _note_proposal_write()
+        _active_options.pop(proposal_id, None)
         return True
 
 async def get_proposal_options(proposal_id):
-    """Get all options for a proposal, ordered by option_order"""
+    """Get all options for a proposal, ordered by option_order (from the registry for active proposals)"""
+    cached = _active_options.get(proposal_id)
+    if cached is not None:
+        return list(cached)
+    epoch = _registry_epoch
     async with get_db() as conn:
         async with conn.execute(
             """
@@ -1372,7 +2344,10 @@ async def get_proposal_options(proposal_id):
             (proposal_id,)
         ) as cursor:
             rows = await cursor.fetchall()
-            return [row[0] for row in rows] if rows else []
+            options = [row[0] for row in rows] if rows else []
+    if epoch == _registry_epoch and proposal_id in _active_proposals:
+        _active_options[proposal_id] = list(options)
+    return options
 
 
 async def get_proposals_with_pending_announcements():
@@ -1689,6 +2664,10 @@ async def fix_malformed_timestamps():
 
         # Commit all changes
         await conn.commit()
+        # Rewritten created_at/deadline values are not tracked row by row; let reads reload them.
+        _note_proposal_write()
+        _active_proposals.clear()
+        _active_options.clear()
 
     print("Timestamp fixing complete.")
 
@@ -1699,22 +2678,24 @@ async def delete_proposal_data(proposal_id: int):
             # CASCADE should handle options and votes, but explicit deletion can be a safeguard
             # await db.execute("DELETE FROM proposal_options WHERE proposal_id = ?", (proposal_id,))
             # await db.execute("DELETE FROM votes WHERE proposal_id = ?", (proposal_id,))
+            _note_proposal_write()
             await db.execute("DELETE FROM proposals WHERE proposal_id = ?", (proposal_id,))
             await db.commit()
+            discard_active_proposal(proposal_id)
             print(f"DEBUG: Deleted proposal data for P#{proposal_id}")
     except Exception as e:
         print(f"Error deleting proposal data for P#{proposal_id}: {e}")
         # traceback.print_exc() # Re-enable if needed for debugging
 
 # --- Campaign Functions ---
-async def create_campaign(guild_id: int, creator_id: int, title: str, description: Optional[str], total_tokens_per_voter: int, num_expected_scenarios: int) -> Optional[int]:
-    """Creates a new campaign and returns its ID."""
+async def create_campaign(guild_id: int, creator_id: int, title: str, description: Optional[str], total_tokens_per_voter: int, num_expected_scenarios: int, voting_mode: str = 'linear') -> Optional[int]:
+    """Creates a new campaign and returns its ID. ``voting_mode`` is 'linear' or 'quadratic'."""
     current_time_utc = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
     try:
         async with get_db() as db:
             cursor = await db.execute(
-                "INSERT INTO campaigns (guild_id, creator_id, title, description, total_tokens_per_voter, num_expected_scenarios, creation_timestamp, status, current_defined_scenarios) VALUES (?, ?, ?, ?, ?, ?, ?, 'pending_approval', 0)",
-                (guild_id, creator_id, title, description, total_tokens_per_voter, num_expected_scenarios, current_time_utc)
+                "INSERT INTO campaigns (guild_id, creator_id, title, description, total_tokens_per_voter, num_expected_scenarios, creation_timestamp, status, current_defined_scenarios, voting_mode) VALUES (?, ?, ?, ?, ?, ?, ?, 'pending_approval', 0, ?)",
+                (guild_id, creator_id, title, description, total_tokens_per_voter, num_expected_scenarios, current_time_utc, voting_mode)
             )
             await db.commit()
             campaign_id = cursor.lastrowid
@@ -1884,6 +2865,567 @@ async def update_user_remaining_tokens(campaign_id: int, user_id: int, tokens_sp
         # traceback.print_exc()
         return False
 
+class VoteOutcome(NamedTuple):
+    """What cast_vote did: whether the vote landed, why not, and what the caller needs next."""
+    ok: bool
+    message: str
+    server_id: Optional[int] = None
+    vote_tracking_message_id: Optional[int] = None
+    replaced_vote: bool = False  # The voter had already voted; this ballot replaced it
+    remaining_tokens: Optional[int] = None  # Campaign balance after the debit
+    vote_identifier: Optional[str] = None  # Set when the guild's vote privacy is anonymous
+    duplicate: bool = False  # The idempotency key already wrote this voter's vote; nothing was written
+
+
+_vote_write_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def _vote_write_lock() -> asyncio.Lock:
+    """Per-event-loop lock queueing cast_vote writers in-process.
+
+    Waiting on an asyncio lock is FIFO and wakes immediately, whereas concurrent
+    BEGIN IMMEDIATE attempts on separate connections back off in SQLite's busy handler.
+    """
+    loop = asyncio.get_running_loop()
+    lock = _vote_write_locks.get(loop)
+    if lock is None:
+        lock = _vote_write_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def _deadline_passed(deadline_data: Optional[str]) -> bool:
+    """True if an ISO deadline (naive means UTC) is in the past; unparseable deadlines never block a vote."""
+    if not deadline_data:
+        return False
+    try:
+        deadline_dt = datetime.fromisoformat(deadline_data.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        print(f"ERROR: Could not parse deadline string '{deadline_data}' while casting a vote.")
+        return False
+    if deadline_dt.tzinfo is None or deadline_dt.tzinfo.utcoffset(deadline_dt) is None:
+        deadline_dt = deadline_dt.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) > deadline_dt
+
+
+async def cast_vote(
+    user_id: int,
+    proposal_id: int,
+    vote_data: str,
+    is_abstain: bool = False,
+    tokens_invested: Optional[int] = None,
+    campaign_id: Optional[int] = None,
+    idempotency_key: Optional[str] = None
+) -> VoteOutcome:
+    """Validate and record a vote in one BEGIN IMMEDIATE transaction on one connection.
+
+    The proposal status and deadline check, the anonymous identifier, the campaign token
+    debit (when ``campaign_id`` and ``tokens_invested`` are given), the vote upsert with its
+    revision bump and marking the voter's DM invite (if any) as voted all happen or none do.
+    ``vote_data`` is the ballot JSON string, stored double-encoded like record_vote does.
+    ``idempotency_key`` (identifying the ballot DM or command message) is recorded with the vote; if it has
+    written this voter's vote before, even one since replaced from a newer ballot, the call is a replay
+    and returns ``duplicate`` without writing.
+    """
+    vote_json = json.dumps(vote_data)
+    current_time_utc = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+    try:
+        async with _vote_write_lock(), get_db() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                async with conn.execute(
+                    """
+                    SELECT p.server_id, p.status, p.deadline, p.vote_tracking_message_id,
+                           cv.value AS vote_privacy,
+                           v.user_id IS NOT NULL AS has_voted, v.idempotency_key,
+                           EXISTS (SELECT 1 FROM vote_idempotency_keys k
+                                   WHERE k.proposal_id = p.proposal_id AND k.user_id = ? AND k.idempotency_key = ?) AS key_used
+                    FROM proposals p
+                    LEFT JOIN constitutional_variables cv ON cv.server_id = p.server_id AND cv.name = 'vote_privacy'
+                    LEFT JOIN votes v ON v.proposal_id = p.proposal_id AND v.user_id = ?
+                    WHERE p.proposal_id = ?
+                    """,
+                    (user_id, idempotency_key, user_id, proposal_id)
+                ) as cursor:
+                    proposal = await cursor.fetchone()
+                if proposal is None:
+                    await conn.rollback()
+                    return VoteOutcome(False, "Proposal not found.")
+                if idempotency_key is not None and (proposal['key_used'] or proposal['idempotency_key'] == idempotency_key):
+                    await conn.rollback()
+                    print(f"DEBUG: Ignoring replayed vote interaction {idempotency_key} for P#{proposal_id} U#{user_id}.")
+                    return VoteOutcome(True, "Your vote was already recorded.", proposal['server_id'],
+                                       proposal['vote_tracking_message_id'], duplicate=True)
+                if proposal['status'] != 'Voting':
+                    await conn.rollback()
+                    return VoteOutcome(False, f"Voting is not open for this proposal (status: {proposal['status'] or 'Unknown'}).")
+                if _deadline_passed(proposal['deadline']):
+                    await conn.rollback()
+                    return VoteOutcome(False, "Voting has ended for this proposal.")
+
+                vote_identifier = None
+                if proposal['vote_privacy'] == 'anonymous':
+                    if campaign_id is not None:
+                        lookup = ("SELECT identifier FROM campaign_vote_ids WHERE campaign_id = ? AND user_id = ?", (campaign_id, user_id))
+                    else:
+                        lookup = ("SELECT identifier FROM proposal_vote_ids WHERE proposal_id = ? AND user_id = ?", (proposal_id, user_id))
+                    async with conn.execute(*lookup) as cursor:
+                        row = await cursor.fetchone()
+                    if row:
+                        vote_identifier = row[0]
+                    else:
+                        vote_identifier = await _allocate_identifier(
+                            conn, f"campaign:{campaign_id}" if campaign_id is not None else f"proposal:{proposal_id}"
+                        )
+                        if campaign_id is not None:
+                            await conn.execute(
+                                "INSERT INTO campaign_vote_ids (server_id, campaign_id, user_id, identifier) VALUES (?, ?, ?, ?)",
+                                (proposal['server_id'], campaign_id, user_id, vote_identifier)
+                            )
+                        else:
+                            await conn.execute(
+                                "INSERT INTO proposal_vote_ids (server_id, proposal_id, user_id, identifier) VALUES (?, ?, ?, ?)",
+                                (proposal['server_id'], proposal_id, user_id, vote_identifier)
+                            )
+
+                debit = campaign_id is not None and tokens_invested is not None
+                if debit:
+                    cursor = await conn.execute(
+                        "UPDATE user_campaign_participation SET remaining_tokens = remaining_tokens - ?, last_updated_timestamp = ? "
+                        "WHERE campaign_id = ? AND user_id = ? AND remaining_tokens >= ?",
+                        (tokens_invested, current_time_utc, campaign_id, user_id, tokens_invested)
+                    )
+                    if cursor.rowcount != 1:
+                        await conn.rollback()
+                        print(f"ERROR: U#{user_id} in C#{campaign_id} cannot cover {tokens_invested} tokens for P#{proposal_id} (not enrolled or insufficient balance).")
+                        return VoteOutcome(False, "You do not have enough campaign tokens for that investment.",
+                                           proposal['server_id'], proposal['vote_tracking_message_id'])
+
+                await conn.execute(
+                    SQL_LOG_VOTE_EVENT,
+                    (proposal_id, user_id, vote_json, is_abstain, tokens_invested, None, current_time_utc)
+                )
+                await _set_merkle_leaf(conn, proposal_id, user_id, vote_json)
+                await conn.execute(
+                    """
+                    INSERT INTO votes (proposal_id, user_id, vote_data, timestamp, is_abstain, tokens_invested, idempotency_key)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(proposal_id, user_id) DO UPDATE SET
+                        vote_data = excluded.vote_data,
+                        timestamp = excluded.timestamp,
+                        is_abstain = excluded.is_abstain,
+                        tokens_invested = excluded.tokens_invested,
+                        idempotency_key = excluded.idempotency_key
+                    """,
+                    (proposal_id, user_id, vote_json, current_time_utc, is_abstain, tokens_invested, idempotency_key)
+                )
+                if idempotency_key is not None:
+                    await conn.execute(
+                        "INSERT OR IGNORE INTO vote_idempotency_keys (proposal_id, user_id, idempotency_key, created_at) VALUES (?, ?, ?, ?)",
+                        (proposal_id, user_id, idempotency_key, current_time_utc)
+                    )
+                await conn.execute(SQL_BUMP_VOTE_REVISION, (proposal_id,))
+                await conn.execute(
+                    "UPDATE voting_invites SET status = 'voted' WHERE proposal_id = ? AND voter_id = ?",
+                    (proposal_id, user_id)
+                )
+
+                remaining_tokens = None
+                if debit:
+                    async with conn.execute(
+                        "SELECT remaining_tokens FROM user_campaign_participation WHERE campaign_id = ? AND user_id = ?",
+                        (campaign_id, user_id)
+                    ) as cursor:
+                        row = await cursor.fetchone()
+                    remaining_tokens = row[0] if row else None
+                await conn.commit()
+                _note_vote_revision_bump(proposal_id)
+            except Exception:
+                await conn.rollback()
+                raise
+        print(f"DEBUG: Vote cast for P#{proposal_id} U#{user_id}. Abstain: {is_abstain}, Tokens: {tokens_invested}, Replaced: {bool(proposal['has_voted'])}")
+        return VoteOutcome(True, "Vote recorded successfully.", proposal['server_id'], proposal['vote_tracking_message_id'],
+                           bool(proposal['has_voted']), remaining_tokens, vote_identifier)
+    except Exception as e:
+        print(f"ERROR casting vote for P:{proposal_id} U:{user_id}: {e}")
+        return VoteOutcome(False, "Failed to record vote in the database.")
+
+async def import_ballots(proposal_id: int, ballots: List[Tuple[str, str]]) -> Tuple[int, List[str]]:
+    """Insert imported (e.g. paper) ballots for a Voting proposal in one BEGIN IMMEDIATE transaction.
+
+    ``ballots`` are ``(source, vote_data)`` pairs; ``source`` tags the vote for audits and must
+    be new for the proposal, ``vote_data`` is the ballot JSON string (stored like cast_vote).
+    Imported ballots have no Discord member, so each gets the next unused negative user_id.
+    Returns ``(imported, errors)``; on any error nothing is written.
+    """
+    current_time_utc = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+    try:
+        async with _vote_write_lock(), get_db() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                async with conn.execute(
+                    "SELECT p.status, MIN(v.user_id) FROM proposals p LEFT JOIN votes v ON v.proposal_id = p.proposal_id "
+                    "WHERE p.proposal_id = ? GROUP BY p.proposal_id",
+                    (proposal_id,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                if row is None:
+                    await conn.rollback()
+                    return 0, ["Proposal not found."]
+                if row[0] != 'Voting':
+                    await conn.rollback()
+                    return 0, [f"Ballots can only be imported while voting is open (status: {row[0] or 'Unknown'})."]
+                async with conn.execute(
+                    "SELECT source FROM votes WHERE proposal_id = ? AND source IS NOT NULL", (proposal_id,)
+                ) as cursor:
+                    existing = {source for (source,) in await cursor.fetchall()}
+                repeated = [source for source, _ in ballots if source in existing]
+                if repeated:
+                    await conn.rollback()
+                    return 0, [f"Already imported: {source}" for source in repeated]
+
+                next_user_id = min(row[1] or 0, 0) - 1
+                rows = [(proposal_id, next_user_id - i, json.dumps(vote_data), current_time_utc, source)
+                        for i, (source, vote_data) in enumerate(ballots)]
+                await conn.executemany(
+                    "INSERT INTO vote_events (proposal_id, user_id, event_type, vote_data, is_abstain, tokens_invested, source, created_at) "
+                    "VALUES (?1, ?2, 'cast', ?3, 0, NULL, ?5, ?4)",
+                    rows
+                )
+                await conn.executemany(
+                    "INSERT INTO votes (proposal_id, user_id, vote_data, timestamp, is_abstain, tokens_invested, source) "
+                    "VALUES (?, ?, ?, ?, 0, NULL, ?)",
+                    rows
+                )
+                for _, user_id, vote_json, _, _ in rows:
+                    await _set_merkle_leaf(conn, proposal_id, user_id, vote_json)
+                await conn.execute(SQL_BUMP_VOTE_REVISION, (proposal_id,))
+                await conn.commit()
+                _note_vote_revision_bump(proposal_id)
+            except Exception:
+                await conn.rollback()
+                raise
+        print(f"DEBUG: Imported {len(ballots)} ballot(s) into P#{proposal_id}.")
+        return len(ballots), []
+    except Exception as e:
+        print(f"ERROR importing ballots for P:{proposal_id}: {e}")
+        return 0, ["Failed to write the ballots to the database."]
+
+# ========================
+# 🔹 VOTE EVENT LOG
+# ========================
+# Every vote write appends one cast/change/retract row to vote_events in the same
+# transaction, and the votes table is the projection of those events: the latest
+# non-retracted ballot per voter. A snapshot folds a proposal's events up to some event_id
+# into its ballot set, so a replay reads the snapshot plus the events after it, linear in
+# both. Events are never deleted; compaction only moves the snapshot forward.
+
+VoteEvent = Tuple[int, int, str, Optional[str], Any, Optional[int], Optional[str], Optional[str]]
+
+
+def fold_vote_events(ballots: Dict[int, tuple], events: List[VoteEvent]) -> Optional[int]:
+    """Apply ``(event_id, user_id, event_type, vote_data, is_abstain, tokens_invested, source, created_at)``
+    events in order to ``{user_id: (vote_data, is_abstain, tokens_invested, source, timestamp)}``.
+
+    Returns the last event_id applied (None if there were no events).
+    """
+    last_event_id = None
+    for event_id, user_id, event_type, vote_data, is_abstain, tokens_invested, source, created_at in events:
+        if event_type == 'retract':
+            ballots.pop(user_id, None)
+        else:
+            ballots[user_id] = (vote_data, is_abstain, tokens_invested, source, created_at)
+        last_event_id = event_id
+    return last_event_id
+
+
+async def _load_vote_state(conn: aiosqlite.Connection, proposal_id: int) -> Tuple[Dict[int, tuple], int, int]:
+    """Snapshot plus later events for a proposal: ``(ballots, last_event_id, events_after_snapshot)``."""
+    ballots: Dict[int, tuple] = {}
+    last_event_id = 0
+    async with conn.execute(
+        "SELECT last_event_id, ballots FROM vote_snapshots WHERE proposal_id = ?", (proposal_id,)
+    ) as cursor:
+        snapshot = await cursor.fetchone()
+    if snapshot:
+        last_event_id = snapshot[0]
+        ballots = {entry[0]: tuple(entry[1:]) for entry in json.loads(snapshot[1])}
+    async with conn.execute(
+        "SELECT event_id, user_id, event_type, vote_data, is_abstain, tokens_invested, source, CAST(created_at AS TEXT) "
+        "FROM vote_events WHERE proposal_id = ? AND event_id > ? ORDER BY event_id",
+        (proposal_id, last_event_id)
+    ) as cursor:
+        events = [tuple(row) for row in await cursor.fetchall()]
+    folded = fold_vote_events(ballots, events)
+    return ballots, folded if folded is not None else last_event_id, len(events)
+
+
+async def _snapshot_unlogged_votes(conn: aiosqlite.Connection) -> None:
+    """Seed snapshots for proposals whose votes predate the event log, so replays include them."""
+    async with conn.execute(
+        """
+        SELECT v.proposal_id, v.user_id, v.vote_data, v.is_abstain, v.tokens_invested, v.source, CAST(v.timestamp AS TEXT)
+        FROM votes v
+        WHERE NOT EXISTS (SELECT 1 FROM vote_events e WHERE e.proposal_id = v.proposal_id)
+          AND NOT EXISTS (SELECT 1 FROM vote_snapshots s WHERE s.proposal_id = v.proposal_id)
+        ORDER BY v.proposal_id, v.user_id
+        """
+    ) as cursor:
+        rows = await cursor.fetchall()
+    snapshots: Dict[int, List[list]] = {}
+    for proposal_id, *ballot in rows:
+        snapshots.setdefault(proposal_id, []).append(list(ballot))
+    await conn.executemany(
+        "INSERT INTO vote_snapshots (proposal_id, last_event_id, ballots) VALUES (?, 0, ?)",
+        [(proposal_id, json.dumps(ballots)) for proposal_id, ballots in snapshots.items()]
+    )
+    if snapshots:
+        print(f"DEBUG: Seeded vote snapshots for {len(snapshots)} proposal(s) with votes older than the event log.")
+
+
+async def get_vote_events(proposal_id: int, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """A proposal's vote events (optionally one voter's), oldest first."""
+    query = "SELECT * FROM vote_events WHERE proposal_id = ?"
+    params: Tuple[Any, ...] = (proposal_id,)
+    if user_id is not None:
+        query += " AND user_id = ?"
+        params += (user_id,)
+    async with get_db() as conn:
+        async with conn.execute(query + " ORDER BY event_id", params) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+
+async def replay_votes(proposal_id: int) -> List[Dict[str, Any]]:
+    """Rebuild a proposal's votes from its snapshot and event log, shaped like get_proposal_votes rows."""
+    async with get_db() as conn:
+        ballots, _, _ = await _load_vote_state(conn, proposal_id)
+    votes = []
+    for user_id, (vote_data, is_abstain, tokens_invested, source, timestamp) in sorted(ballots.items()):
+        try:
+            vote_data = json.loads(vote_data)
+        except (TypeError, json.JSONDecodeError):
+            pass  # Kept as stored, like get_proposal_votes does
+        votes.append({'proposal_id': proposal_id, 'user_id': user_id, 'vote_data': vote_data, 'is_abstain': is_abstain,
+                      'tokens_invested': tokens_invested, 'source': source, 'timestamp': timestamp})
+    return votes
+
+
+async def compact_vote_events(proposal_id: int) -> int:
+    """Fold the events after a proposal's snapshot into a new snapshot; returns how many were folded."""
+    try:
+        async with get_db() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                ballots, last_event_id, folded = await _load_vote_state(conn, proposal_id)
+                if not folded:
+                    await conn.rollback()
+                    return 0
+                await conn.execute(
+                    """
+                    INSERT INTO vote_snapshots (proposal_id, last_event_id, ballots, created_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(proposal_id) DO UPDATE SET
+                        last_event_id = excluded.last_event_id, ballots = excluded.ballots, created_at = excluded.created_at
+                    """,
+                    (proposal_id, last_event_id, json.dumps([[user_id, *ballot] for user_id, ballot in sorted(ballots.items())]))
+                )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        print(f"DEBUG: Compacted {folded} vote event(s) for P#{proposal_id} into a snapshot at event {last_event_id}.")
+        return folded
+    except Exception as e:
+        print(f"ERROR compacting vote events for P:{proposal_id}: {e}")
+        return 0
+
+
+async def retract_vote(user_id: int, proposal_id: int) -> Tuple[bool, str]:
+    """Withdraw a voter's ballot while voting is open (not for campaign scenarios, whose tokens are spent)."""
+    current_time_utc = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+    try:
+        async with _vote_write_lock(), get_db() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                async with conn.execute(
+                    "SELECT status, campaign_id, deadline FROM proposals WHERE proposal_id = ?", (proposal_id,)
+                ) as cursor:
+                    proposal = await cursor.fetchone()
+                if proposal is None:
+                    await conn.rollback()
+                    return False, "Proposal not found."
+                if proposal['status'] != 'Voting' or _deadline_passed(proposal['deadline']):
+                    await conn.rollback()
+                    return False, "Voting is not open for this proposal."
+                if proposal['campaign_id'] is not None:
+                    await conn.rollback()
+                    return False, "Campaign votes cannot be retracted."
+                cursor = await conn.execute(
+                    "INSERT INTO vote_events (proposal_id, user_id, event_type, created_at) "
+                    "SELECT proposal_id, user_id, 'retract', ? FROM votes WHERE proposal_id = ? AND user_id = ?",
+                    (current_time_utc, proposal_id, user_id)
+                )
+                if cursor.rowcount != 1:
+                    await conn.rollback()
+                    return False, "You have not voted on this proposal."
+                await conn.execute("DELETE FROM votes WHERE proposal_id = ? AND user_id = ?", (proposal_id, user_id))
+                await _set_merkle_leaf(conn, proposal_id, user_id, None)
+                await conn.execute(SQL_BUMP_VOTE_REVISION, (proposal_id,))
+                await conn.commit()
+                _note_vote_revision_bump(proposal_id)
+            except Exception:
+                await conn.rollback()
+                raise
+        print(f"DEBUG: Vote retracted for P#{proposal_id} U#{user_id}.")
+        return True, "Your vote was retracted."
+    except Exception as e:
+        print(f"ERROR retracting vote for P:{proposal_id} U:{user_id}: {e}")
+        return False, "Failed to retract the vote."
+
+
+async def rebuild_votes_projection(proposal_id: int) -> int:
+    """Rewrite a proposal's votes rows from its event log (repair); returns the number of votes.
+
+    Idempotency keys are not part of the log, so rebuilt rows have none; the keys already
+    used stay in vote_idempotency_keys, so replays are still recognized.
+    """
+    async with _vote_write_lock(), get_db() as conn:
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            ballots, _, _ = await _load_vote_state(conn, proposal_id)
+            await conn.execute("DELETE FROM votes WHERE proposal_id = ?", (proposal_id,))
+            await conn.executemany(
+                "INSERT INTO votes (proposal_id, user_id, vote_data, is_abstain, tokens_invested, source, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(proposal_id, user_id, *ballot) for user_id, ballot in sorted(ballots.items())]
+            )
+            await conn.execute(SQL_BUMP_VOTE_REVISION, (proposal_id,))
+            await conn.commit()
+            _note_vote_revision_bump(proposal_id)
+        except Exception:
+            await conn.rollback()
+            raise
+    print(f"DEBUG: Rebuilt {len(ballots)} vote(s) for P#{proposal_id} from the event log.")
+    return len(ballots)
+
+# ========================
+# 🔹 VOTE RECEIPTS (MERKLE TREE)
+# ========================
+# Each proposal keeps a fixed-depth Merkle tree over its votes (see receipts.py). A voter
+# owns one leaf slot for the life of the proposal; every vote write re-hashes that leaf and
+# its MERKLE_DEPTH ancestors in the same transaction, reading the siblings in one query.
+# Only non-empty nodes are stored. Closing a proposal publishes its root with the results.
+
+async def _merkle_siblings(conn: aiosqlite.Connection, proposal_id: int, leaf_index: int) -> List[bytes]:
+    """Sibling hashes along a leaf's path, one per level, from a single query."""
+    pairs = [(level, (leaf_index >> level) ^ 1) for level in range(receipts.MERKLE_DEPTH)]
+    async with conn.execute(
+        f"SELECT level, hash FROM merkle_nodes WHERE proposal_id = ? AND (level, position) IN (VALUES {', '.join(['(?, ?)'] * len(pairs))})",
+        (proposal_id, *[value for pair in pairs for value in pair])
+    ) as cursor:
+        stored = {level: bytes(node) for level, node in await cursor.fetchall()}
+    return [stored.get(level, receipts.EMPTY_HASHES[level]) for level in range(receipts.MERKLE_DEPTH)]
+
+
+async def _set_merkle_leaf(conn: aiosqlite.Connection, proposal_id: int, user_id: int, ballot: Optional[str]) -> None:
+    """Point a voter's leaf at ``ballot`` (the stored vote_data text; None empties it) and re-hash its path.
+
+    Runs on the caller's connection inside its transaction; allocates the voter's slot on first use.
+    """
+    async with conn.execute(
+        "SELECT leaf_index FROM merkle_leaves WHERE proposal_id = ? AND user_id = ?", (proposal_id, user_id)
+    ) as cursor:
+        row = await cursor.fetchone()
+    if row is not None:
+        leaf_index = row[0]
+    elif ballot is None:
+        return
+    else:
+        async with conn.execute(
+            "INSERT INTO merkle_trees (proposal_id, leaf_count) VALUES (?, 1) "
+            "ON CONFLICT(proposal_id) DO UPDATE SET leaf_count = leaf_count + 1 RETURNING leaf_count - 1",
+            (proposal_id,)
+        ) as cursor:
+            leaf_index = (await cursor.fetchone())[0]
+    salt = secrets.token_hex(16) if ballot is not None else None
+    await conn.execute(
+        "INSERT INTO merkle_leaves (proposal_id, user_id, leaf_index, salt) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(proposal_id, user_id) DO UPDATE SET salt = excluded.salt",
+        (proposal_id, user_id, leaf_index, salt)
+    )
+    leaf = receipts.leaf_hash(proposal_id, leaf_index, salt, ballot) if ballot is not None else receipts.EMPTY_LEAF
+    path = receipts.fold_path(leaf, leaf_index, await _merkle_siblings(conn, proposal_id, leaf_index))
+    await conn.executemany(
+        "INSERT INTO merkle_nodes (proposal_id, level, position, hash) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(proposal_id, level, position) DO UPDATE SET hash = excluded.hash",
+        [(proposal_id, level, position, node) for level, (position, node) in enumerate(zip(receipts.path_positions(leaf_index), path))]
+    )
+    await conn.execute("UPDATE merkle_trees SET root = ? WHERE proposal_id = ?", (path[-1], proposal_id))
+
+
+async def publish_merkle_root(proposal_id: int) -> Optional[str]:
+    """Freeze a proposal's tree root (hex) as published; votes stored before receipts existed are added first."""
+    try:
+        async with _vote_write_lock(), get_db() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                async with conn.execute(
+                    "SELECT v.user_id, v.vote_data FROM votes v LEFT JOIN merkle_leaves l "
+                    "ON l.proposal_id = v.proposal_id AND l.user_id = v.user_id "
+                    "WHERE v.proposal_id = ? AND (l.user_id IS NULL OR l.salt IS NULL) ORDER BY v.user_id",
+                    (proposal_id,)
+                ) as cursor:
+                    missing = await cursor.fetchall()
+                for user_id, vote_data in missing:
+                    await _set_merkle_leaf(conn, proposal_id, user_id, vote_data)
+                await conn.execute(
+                    "INSERT INTO merkle_trees (proposal_id, leaf_count) VALUES (?, 0) ON CONFLICT(proposal_id) DO NOTHING",
+                    (proposal_id,)
+                )
+                async with conn.execute("SELECT root FROM merkle_trees WHERE proposal_id = ?", (proposal_id,)) as cursor:
+                    root = (await cursor.fetchone())[0]
+                published = bytes(root).hex() if root is not None else receipts.EMPTY_HASHES[receipts.MERKLE_DEPTH].hex()
+                await conn.execute(
+                    "UPDATE merkle_trees SET published_root = ?, published_at = CURRENT_TIMESTAMP WHERE proposal_id = ?",
+                    (published, proposal_id)
+                )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        print(f"DEBUG: Published Merkle root {published} for P#{proposal_id}.")
+        return published
+    except Exception as e:
+        print(f"ERROR publishing Merkle root for P:{proposal_id}: {e}")
+        return None
+
+
+async def get_merkle_root(proposal_id: int) -> Optional[Dict[str, Any]]:
+    """``{'root', 'published_root', 'leaf_count'}`` for a proposal's tree (hex roots), or None if it has none."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT root, published_root, leaf_count FROM merkle_trees WHERE proposal_id = ?", (proposal_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+    if row is None:
+        return None
+    return {'root': bytes(row[0]).hex() if row[0] is not None else None, 'published_root': row[1], 'leaf_count': row[2]}
+
+
+async def get_vote_receipt(proposal_id: int, user_id: int) -> Optional[str]:
+    """The voter's inclusion-proof receipt against the current tree, or None if they have no counted vote."""
+    async with get_db() as conn:
+        async with conn.execute(
+            "SELECT l.leaf_index, l.salt, v.vote_data FROM merkle_leaves l JOIN votes v "
+            "ON v.proposal_id = l.proposal_id AND v.user_id = l.user_id "
+            "WHERE l.proposal_id = ? AND l.user_id = ? AND l.salt IS NOT NULL",
+            (proposal_id, user_id)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        leaf_index, salt, ballot = row
+        siblings = await _merkle_siblings(conn, proposal_id, leaf_index)
+    return receipts.encode_receipt(proposal_id, leaf_index, salt, ballot, siblings)
+
 async def approve_campaign(campaign_id: int, admin_user_id: int) -> bool:
     """Approves a campaign, setting its status to 'setup'."""
     current_time_utc = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
@@ -2008,5 +3550,23 @@ async def get_enrolled_voter_ids_for_campaign(campaign_id: int) -> List[int]:
         rows = await cursor.fetchall()
         return [row[0] for row in rows]
 
+async def get_campaign_vote_token_totals(campaign_id: int) -> Dict[str, int]:
+    """Aggregate invested tokens and distinct participants across all scenarios of a campaign."""
+    async with get_db() as conn:
+        cursor = await conn.execute(
+            """
+            SELECT COALESCE(SUM(COALESCE(v.tokens_invested, 0)), 0), COUNT(DISTINCT v.user_id)
+            FROM votes v
+            JOIN proposals p ON p.proposal_id = v.proposal_id
+            WHERE p.campaign_id = ?
+            """,
+            (campaign_id,)
+        )
+        row = await cursor.fetchone()
+        return {
+            "total_invested_tokens": row[0] if row else 0,
+            "num_participants": row[1] if row else 0,
+        }
+
 # Ensure all new functions are listed or handled if you have a central registration point.
 # Make sure this file ends with a newline character if that's project convention.
@@ -9,6 +9,9 @@ import traceback
 import voting
 import proposals
 import moderation
+import analytics
+import admission
+import receipts
 import utils  # Add this new import
 import voting_utils
 # Define intents explicitly
@@ -20,8 +23,7 @@ intents.members = True  # Required for role updates & member fetching
 intents.message_content = True  # Required for command handling
 
 bot = commands.Bot(command_prefix="!", intents=intents)
-update_queue = asyncio.Queue()  # Create the queue
-bot.update_queue = update_queue  # Attach queue to bot object
+bot.admission = admission.controller  # Bounded, per-guild rate-limited vote and tracker-refresh admission
 
 # Default Channels and Messages
 CHANNELS = {
@@ -79,6 +81,7 @@ async def on_command_error(ctx, error):
 async def on_ready():
     print(f"🤖 Bot is online as {bot.user}")
     await db.init_db()  # Ensure database is initialized
+    await db.warm_active_proposals()  # Serve hot reads of Voting proposals from memory
 
     for guild in bot.guilds:
         print(f"📌 Setting up in {guild.name}")
@@ -122,7 +125,7 @@ async def on_ready():
 
     bot.loop.create_task(pending_results_loop(bot))
     bot.loop.create_task(expired_moderations_loop(bot))
-    bot.loop.create_task(update_tracking_worker(bot, update_queue))
+    bot.loop.create_task(update_tracking_worker(bot, bot.admission))
 
     # Maybe a separate task to periodically update tracking messages?
     # bot.loop.create_task(update_all_voting_tracking_task(bot)) # Example task
@@ -131,19 +134,17 @@ async def on_ready():
     print("✅ All servers are set up and ready!\n")
 
 
-async def update_tracking_worker(bot: commands.Bot, queue: asyncio.Queue):
+async def update_tracking_worker(bot: commands.Bot, controller: admission.AdmissionController):
     await bot.wait_until_ready()
     print("TASK: Update tracking worker started.")
     while not bot.is_closed():
         try:
-            # Wait for an item from the queue
-            item = await queue.get()
-            guild_id = item.get('guild_id')
-            proposal_id = item.get('proposal_id')
+            # Waits for a refresh the controller has admitted and for in-flight votes to finish;
+            # the per-guild refresh quota replaces the old fixed sleep between updates.
+            guild_id, proposal_id = await controller.next_refresh()
 
             if guild_id is None or proposal_id is None:
-                print(f"WARNING: Received invalid item from queue: {item}")
-                queue.task_done()
+                print(f"WARNING: Received invalid tracker refresh: {(guild_id, proposal_id)}")
                 continue
 
             guild = bot.get_guild(guild_id)
@@ -166,15 +167,11 @@ async def update_tracking_worker(bot: commands.Bot, queue: asyncio.Queue):
                 print(
                     f"WARNING: Guild {guild_id} not found for tracker update.")
 
-            # Mark the task as done
-            queue.task_done()
-
         except Exception as e:
             print(f"CRITICAL ERROR in update_tracking_worker: {e}")
             import traceback
             traceback.print_exc()
-        # Keep the sleep
-        await asyncio.sleep(5)
+            await asyncio.sleep(5)
 
 async def check_proposal_deadlines_task(bot):
     from voting_utils import check_expired_proposals  # Import only necessary function
@@ -184,7 +181,7 @@ async def check_proposal_deadlines_task(bot):
            print("TASK: Checking for expired proposals...")
            # check_expired_proposals now handles closing and setting pending flag
            # Returns list of proposals *just* closed
-           closed_proposals = await check_expired_proposals()
+           closed_proposals = await check_expired_proposals(bot)
 
            # The pending_results_loop will handle the announcements from here
 
@@ -325,7 +322,7 @@ async def set_setting(ctx, key: str, value: str):
         "admission_method": ["admin", "vote", "anyone"],
         "removal_method": ["admin", "some_roles", "vote", "anyone"],
         "immutable_rule_change_method": ["3-step", "harder_majority"],
-        "default_voting_protocol": ["plurality", "borda", "approval", "copeland", "runoff", "condorcet"]
+        "default_voting_protocol": ["plurality", "borda", "approval", "copeland", "runoff", "condorcet", "schulze", "ranked_pairs", "stv", "dhondt", "pav", "score", "star", "majority_judgment"]
     }
 
     # Check if the key might be a constitutional variable instead of a setting
@@ -458,8 +455,8 @@ async def vote(ctx, proposal_id: int, *args):
     """Cast a vote on a proposal.
 
     Usage depends on the voting mechanism:
-    - Plurality: !vote <proposal_id> <option>
-    - Borda/Runoff/Condorcet: !vote <proposal_id> rank option1,option2,option3,...
+    - Plurality/D'Hondt: !vote <proposal_id> <option>
+    - Borda/Runoff/Condorcet/Schulze/Ranked Pairs/Copeland/STV: !vote <proposal_id> rank option1,option2,option3,...
     - Approval: !vote <proposal_id> approve option1,option2,...
     """
     # Delete the command message for privacy
@@ -502,11 +499,11 @@ async def vote(ctx, proposal_id: int, *args):
     voting_mechanism = proposal['voting_mechanism'].lower()
 
     vote_data = {}
-    if voting_mechanism == "plurality":
+    if voting_mechanism in voting_utils.PLURALITY_BALLOT_MECHANISMS:
         # Single option vote
         vote_data = {"option": args[0]}
 
-    elif voting_mechanism in ["borda", "runoff", "condorcet"]:
+    elif voting_mechanism in voting_utils.RANKED_BALLOT_MECHANISMS:
         # Ranked vote
         if len(args) < 2 or args[0].lower() != "rank":
             await ctx.send("❌ For ranked voting, use: `!vote <proposal_id> rank option1,option2,option3,...`")
@@ -515,7 +512,7 @@ async def vote(ctx, proposal_id: int, *args):
         rankings = args[1].split(',')
         vote_data = {"rankings": rankings}
 
-    elif voting_mechanism == "approval":
+    elif voting_mechanism in voting_utils.APPROVAL_BALLOT_MECHANISMS:
         # Multiple option vote
         if len(args) < 2 or args[0].lower() != "approve":
             await ctx.send("❌ For approval voting, use: `!vote <proposal_id> approve option1,option2,...`")
@@ -524,9 +521,32 @@ async def vote(ctx, proposal_id: int, *args):
         approved = args[1].split(',')
         vote_data = {"approved": approved}
 
+    elif voting_mechanism in voting_utils.CARDINAL_BALLOT_MECHANISMS:
+        # Scored vote: option=score pairs, unscored options count as 0
+        if len(args) < 2 or args[0].lower() != "score":
+            await ctx.send("❌ For score voting, use: `!vote <proposal_id> score option1=5,option2=3,...`")
+            return
+
+        scores = {}
+        for pair in args[1].split(','):
+            option, _, value = pair.partition('=')
+            try:
+                scores[option.strip()] = int(value)
+            except ValueError:
+                await ctx.send(f"❌ Invalid score in `{pair}`. Use `option=score` with a whole number.")
+                return
+
+        options = await db.get_proposal_options(proposal_id)
+        max_score = voting_utils.cardinal_max_score(proposal.get('hyperparameters'))
+        if voting_utils.score_ballot_vector({"scores": scores}, options, max_score) is None:
+            await ctx.send(f"❌ Scores must be whole numbers from 0 to {max_score} for this proposal's options.")
+            return
+        vote_data = {"scores": voting_utils.encode_score_ballot(scores, options)}
+
     # Record the vote
-    success, message = await voting.process_vote(ctx.author.id, proposal_id, vote_data)
-    await ctx.send(message)
+    outcome = await voting.process_vote(ctx.author.id, proposal_id, vote_data, False, None,
+                                        idempotency_key=str(ctx.message.id))
+    await ctx.send(outcome.message)
 
 
 @bot.command(name="proposals")
@@ -925,7 +945,7 @@ async def see_settings(ctx, category: str = None):
         },
         "default_voting_protocol": {
             "description": "Sets the default voting mechanism for proposals",
-            "values": ["plurality", "borda", "approval", "copeland", "runoff", "condorcet"],
+            "values": ["plurality", "borda", "approval", "copeland", "runoff", "condorcet", "schulze", "ranked_pairs", "stv", "dhondt", "pav", "score", "star", "majority_judgment"],
             "example": "!set_setting default_voting_protocol plurality",
             "current": None
         }
@@ -1165,6 +1185,230 @@ async def terminate_proposal(ctx, proposal_id: int):
         traceback.print_exc()  # Print full stack trace for debugging
         await ctx.send(f"❌ Error terminating proposal: {e}")
 
+@bot.command(name="standings")
+@commands.has_permissions(administrator=True)
+async def live_standings(ctx, proposal_id: int, mode: str = "on"):
+    """Show (on) or hide (off) provisional ranked-choice standings in a proposal's vote tracker"""
+    try:
+        proposal = await db.get_proposal(proposal_id)
+        if not proposal or proposal.get('server_id') != ctx.guild.id:
+            await ctx.send(f"❌ Proposal #{proposal_id} not found.")
+            return
+
+        mode = mode.lower()
+        if mode not in ("on", "off"):
+            await ctx.send("❌ Usage: `!standings <proposal_id> [on|off]`")
+            return
+        if (proposal.get('voting_mechanism') or '').lower() not in voting_utils.RANKED_BALLOT_MECHANISMS:
+            await ctx.send(f"❌ Live standings are only available for ranked mechanisms ({', '.join(voting_utils.RANKED_BALLOT_MECHANISMS)}).")
+            return
+
+        await db.update_proposal(proposal_id, {'live_standings': mode == "on"})
+        if proposal['status'] == "Voting":
+            await voting_utils.update_vote_tracking(ctx.guild, proposal_id)
+        await ctx.send(f"✅ Live standings for proposal #{proposal_id} turned {mode}.")
+
+    except Exception as e:
+        print(f"Error toggling live standings: {e}")
+        await ctx.send(f"❌ Error toggling live standings: {e}")
+
+@bot.command(name="delegate")
+async def delegate_vote(ctx, member: discord.Member, *, topic: str = None):
+    """Delegate your vote to another member, for every proposal or only for one topic"""
+    try:
+        if member.id == ctx.author.id:
+            await ctx.send("❌ You cannot delegate to yourself.")
+            return
+        if member.bot:
+            await ctx.send("❌ You cannot delegate to a bot.")
+            return
+
+        await db.set_delegation(ctx.guild.id, ctx.author.id, member.id, topic)
+        scope = f"proposals on **{db.normalize_topic(topic)}**" if db.normalize_topic(topic) else "all proposals"
+        await ctx.send(f"✅ {member.display_name} now votes for you on {scope} whenever you don't vote yourself.")
+
+    except Exception as e:
+        print(f"Error setting delegation: {e}")
+        await ctx.send(f"❌ Error setting delegation: {e}")
+
+@bot.command(name="undelegate")
+async def undelegate_vote(ctx, *, topic: str = None):
+    """Remove your general delegation, or the one for a topic"""
+    try:
+        if await db.remove_delegation(ctx.guild.id, ctx.author.id, topic):
+            await ctx.send("✅ Delegation removed.")
+        else:
+            await ctx.send("❌ You have no delegation for that scope. See `!delegations`.")
+
+    except Exception as e:
+        print(f"Error removing delegation: {e}")
+        await ctx.send(f"❌ Error removing delegation: {e}")
+
+@bot.command(name="delegations")
+async def list_delegations(ctx):
+    """List the delegations you have made in this server"""
+    try:
+        delegations = await db.get_user_delegations(ctx.guild.id, ctx.author.id)
+        if not delegations:
+            await ctx.send("You have not delegated your vote. Use `!delegate @member [topic]`.")
+            return
+
+        lines = []
+        for delegation in delegations:
+            delegate = ctx.guild.get_member(delegation['delegate_id'])
+            name = delegate.display_name if delegate else f"User {delegation['delegate_id']}"
+            lines.append(f"• {delegation['topic'] or 'All proposals'} → {name}")
+        await ctx.send("**Your delegations:**\n" + "\n".join(lines))
+
+    except Exception as e:
+        print(f"Error listing delegations: {e}")
+        await ctx.send(f"❌ Error listing delegations: {e}")
+
+@bot.command(name="topic")
+@commands.has_permissions(administrator=True)
+async def set_proposal_topic(ctx, proposal_id: int, *, topic: str):
+    """Tag a proposal with a topic so topic delegations apply to it ('none' clears it)"""
+    try:
+        proposal = await db.get_proposal(proposal_id)
+        if not proposal or proposal.get('server_id') != ctx.guild.id:
+            await ctx.send(f"❌ Proposal #{proposal_id} not found.")
+            return
+
+        topic = db.normalize_topic(topic)
+        await db.update_proposal(proposal_id, {'topic': None if topic in ("", "none") else topic})
+        await ctx.send(f"✅ Proposal #{proposal_id} topic {'cleared' if topic in ('', 'none') else f'set to **{topic}**'}.")
+
+    except Exception as e:
+        print(f"Error setting proposal topic: {e}")
+        await ctx.send(f"❌ Error setting proposal topic: {e}")
+
+@bot.command(name="recount")
+@commands.has_permissions(administrator=True)
+async def recount_votes(ctx, proposal_id: int, resamples: int = voting_utils.RECOUNT_DEFAULT_RESAMPLES):
+    """Recount a proposal's ballots under every compatible method and report how robust the winner is"""
+    try:
+        proposal = await db.get_proposal(proposal_id)
+        if not proposal or proposal.get('server_id') != ctx.guild.id:
+            await ctx.send(f"❌ Proposal #{proposal_id} not found.")
+            return
+        if voting_utils.recount_ballot_type(proposal.get('voting_mechanism')) is None:
+            await ctx.send(f"❌ Proposals using {proposal.get('voting_mechanism')} cannot be recounted.")
+            return
+        if not 0 <= resamples <= voting_utils.RECOUNT_MAX_RESAMPLES:
+            await ctx.send(f"❌ Resamples must be between 0 and {voting_utils.RECOUNT_MAX_RESAMPLES}.")
+            return
+
+        report = await voting_utils.recount_proposal(proposal_id, resamples, guild=ctx.guild)
+        if report is None:
+            await ctx.send(f"❌ Could not recount proposal #{proposal_id}.")
+            return
+        await ctx.send(embed=voting_utils.format_recount_embed(report), file=voting_utils.recount_report_file(report))
+
+    except Exception as e:
+        print(f"Error recounting proposal: {e}")
+        await ctx.send(f"❌ Error recounting proposal: {e}")
+
+@bot.command(name="retally")
+@commands.has_permissions(administrator=True)
+async def retally_results(ctx, *flags: str):
+    """Recount closed proposals after a mechanism fix; dry run unless 'apply' is given ('restart' ignores saved progress)"""
+    try:
+        flags = {flag.lower() for flag in flags}
+        if not flags <= {"apply", "restart"}:
+            await ctx.send("❌ Usage: `!retally [apply] [restart]`")
+            return
+
+        dry_run = "apply" not in flags
+        await ctx.send(f"⏳ Re-tallying closed proposals{' (dry run)' if dry_run else ''}...")
+        report = await voting_utils.retally_closed_proposals(
+            server_id=ctx.guild.id, dry_run=dry_run, restart="restart" in flags, guild=ctx.guild
+        )
+        await ctx.send(embed=voting_utils.format_retally_embed(report))
+
+    except Exception as e:
+        print(f"Error re-tallying proposals: {e}")
+        await ctx.send(f"❌ Error re-tallying proposals: {e}")
+
+@bot.command(name="importballots")
+@commands.has_permissions(administrator=True)
+async def import_ballots(ctx, proposal_id: int):
+    """Import paper ballots for a proposal from an attached CSV"""
+    try:
+        if not ctx.message.attachments:
+            await ctx.send("❌ Attach a CSV of ballots. Plurality: an `option` column. Approval, ranked or score: "
+                           "one column per option holding a mark, a rank or a score. An optional `ballot` column numbers the papers.")
+            return
+        attachment = ctx.message.attachments[0]
+        if attachment.size > 1_000_000:
+            await ctx.send("❌ The CSV is too large (limit 1 MB).")
+            return
+        proposal = await db.get_proposal(proposal_id)
+        if not proposal or proposal.get('server_id') != ctx.guild.id:
+            await ctx.send(f"❌ Proposal #{proposal_id} not found.")
+            return
+
+        try:
+            text = (await attachment.read()).decode('utf-8-sig')
+        except UnicodeDecodeError:
+            await ctx.send("❌ The CSV must be UTF-8 text.")
+            return
+        imported, errors = await voting_utils.import_ballot_csv(proposal_id, text, attachment.filename)
+        if errors:
+            shown = "\n".join(errors[:15])
+            more = f"\n…and {len(errors) - 15} more." if len(errors) > 15 else ""
+            await ctx.send(f"❌ No ballots were imported for proposal #{proposal_id}:\n{shown}{more}"[:2000])
+            return
+
+        bot.admission.offer_refresh(ctx.guild.id, proposal_id)
+        await ctx.send(f"✅ Imported {imported} ballot(s) from `{attachment.filename}` into proposal #{proposal_id}. "
+                       f"They are tagged `csv:{attachment.filename}#<ballot>` in `!audit`.")
+
+    except Exception as e:
+        print(f"Error importing ballots: {e}")
+        await ctx.send(f"❌ Error importing ballots: {e}")
+
+@bot.command(name="admission")
+@commands.has_permissions(administrator=True)
+async def admission_stats(ctx):
+    """Show vote and tracker-refresh queue depths and shed counters"""
+    try:
+        stats = bot.admission.stats()
+        embed = discord.Embed(
+            title="🚦 Admission Control",
+            description="Bot-wide. Votes are never shed; shed tracker refreshes are deferred and re-run later.",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Votes", value=(
+            f"Waiting: {stats['votes_waiting']}\n"
+            f"Writing: {stats['votes_in_flight']}\n"
+            f"Admitted: {stats['votes_admitted']}\n"
+            f"Delayed by quota: {stats['votes_delayed']}"
+        ), inline=True)
+        embed.add_field(name="Tracker Refreshes", value=(
+            f"Queued now: {stats['refresh_queue_depth']}\n"
+            f"Deferred now: {stats['refreshes_deferred']}\n"
+            f"Run: {stats['refreshes_run']}\n"
+            f"Coalesced: {stats['refreshes_coalesced']}\n"
+            f"Shed: {stats['refreshes_shed']} (recovered {stats['refreshes_recovered']})"
+        ), inline=True)
+        await ctx.send(embed=embed)
+
+    except Exception as e:
+        print(f"Error showing admission stats: {e}")
+        await ctx.send(f"❌ Error showing admission stats: {e}")
+
+@bot.command(name="blocs")
+@commands.has_permissions(administrator=True)
+async def voting_blocs(ctx):
+    """Show which members tend to vote together across closed proposals"""
+    try:
+        report = await analytics.compute_voting_blocs(ctx.guild.id)
+        await ctx.send(embed=analytics.format_blocs_embed(report, ctx.guild))
+
+    except Exception as e:
+        print(f"Error computing voting blocs: {e}")
+        await ctx.send(f"❌ Error computing voting blocs: {e}")
+
 @bot.command(name="track")
 async def track_votes(ctx, proposal_id: int):
     """Display vote tracking information for a proposal"""
@@ -1209,7 +1453,9 @@ async def audit(ctx, proposal_id: int):
     for vote in votes:
         user_id = vote["user_id"]
         vote_data = vote.get("vote_data")
-        if privacy == "anonymous":
+        if vote.get("source"):
+            voter = f"📄 {vote['source']}"  # Imported ballot, not a member
+        elif privacy == "anonymous":
             voter = await db.get_or_create_vote_identifier(ctx.guild.id, user_id, proposal_id, proposal.get("campaign_id"))
         else:
             member = ctx.guild.get_member(user_id)
@@ -1219,6 +1465,109 @@ async def audit(ctx, proposal_id: int):
     await ctx.send(f"**Vote Audit for Proposal #{proposal_id}**\n" + "\n".join(lines))
 
 
+@bot.command(name="votehistory")
+@commands.has_permissions(administrator=True)
+async def vote_history(ctx, proposal_id: int):
+    """Show every cast, change and retraction for a proposal, respecting vote privacy"""
+    try:
+        proposal = await db.get_proposal(proposal_id)
+        if not proposal or proposal.get('server_id') != ctx.guild.id:
+            await ctx.send(f"❌ Proposal #{proposal_id} not found.")
+            return
+        events = await db.get_vote_events(proposal_id)
+        if not events:
+            await ctx.send("No vote events recorded.")
+            return
+
+        const_vars = await db.get_constitutional_variables(ctx.guild.id)
+        privacy = const_vars.get("vote_privacy", {}).get("value", "public")
+        labels = {}
+        lines = []
+        for event in events:
+            user_id = event["user_id"]
+            if user_id not in labels:
+                if event.get("source"):
+                    labels[user_id] = f"📄 {event['source']}"
+                elif privacy == "anonymous":
+                    labels[user_id] = await db.get_or_create_vote_identifier(ctx.guild.id, user_id, proposal_id, proposal.get("campaign_id"))
+                else:
+                    member = ctx.guild.get_member(user_id)
+                    labels[user_id] = member.display_name if member else str(user_id)
+            ballot = "" if event["event_type"] == "retract" else f": {event.get('vote_data')}"
+            lines.append(f"`#{event['event_id']}` {event.get('created_at')} {event['event_type']} by {labels[user_id]}{ballot}")
+
+        text = f"**Vote History for Proposal #{proposal_id}**\n" + "\n".join(lines)
+        for start in range(0, len(text), 1900):
+            await ctx.send(text[start:start + 1900])
+
+    except Exception as e:
+        print(f"Error showing vote history: {e}")
+        await ctx.send(f"❌ Error showing vote history: {e}")
+
+
+@bot.command(name="retract")
+async def retract_vote(ctx, proposal_id: int):
+    """Withdraw your vote on a proposal while voting is open"""
+    try:
+        success, message = await db.retract_vote(ctx.author.id, proposal_id)
+        if success:
+            voting_utils.discard_provisional_standings(proposal_id)  # Rebuilt from the votes on the next refresh
+            proposal = await db.get_proposal(proposal_id)
+            if proposal and proposal.get('server_id'):
+                bot.admission.offer_refresh(proposal['server_id'], proposal_id)
+        await ctx.send(f"{'✅' if success else '❌'} {message}")
+
+    except Exception as e:
+        print(f"Error retracting vote: {e}")
+        await ctx.send(f"❌ Error retracting vote: {e}")
+
+
+@bot.command(name="receipt")
+async def receipt_command(ctx, proposal_id: int):
+    """DM yourself a receipt proving your vote is counted in the proposal's ballot tree"""
+    try:
+        receipt = await db.get_vote_receipt(proposal_id, ctx.author.id)
+        if not receipt:
+            await ctx.send(f"❌ You have no counted vote on Proposal #{proposal_id}.")
+            return
+        tree = await db.get_merkle_root(proposal_id)
+        published_root = tree['published_root'] if tree else None
+        try:
+            await ctx.author.send(voting_utils.format_receipt_message(proposal_id, receipt, published_root))
+        except discord.Forbidden:
+            await ctx.send("❌ I couldn't DM you. Please enable direct messages from server members.")
+            return
+        await ctx.send("📬 Sent your vote receipt by DM.")
+
+    except Exception as e:
+        print(f"Error sending vote receipt: {e}")
+        await ctx.send(f"❌ Error sending vote receipt: {e}")
+
+
+@bot.command(name="verifyreceipt")
+async def verify_receipt_command(ctx, receipt: str):
+    """Check a vote receipt against the proposal's published ballot tree root"""
+    try:
+        decoded = receipts.decode_receipt(receipt)
+        if decoded is None:
+            await ctx.send("❌ That is not a valid vote receipt.")
+            return
+        proposal_id = decoded['proposal_id']
+        tree = await db.get_merkle_root(proposal_id)
+        if not tree or not tree['published_root']:
+            await ctx.send(f"❌ Proposal #{proposal_id} has no published ballot tree root yet.")
+            return
+        if receipts.verify_receipt(receipt, tree['published_root']):
+            await ctx.send(f"✅ Receipt verified: ballot `{decoded['ballot']}` is counted in Proposal #{proposal_id} "
+                           f"(root `{tree['published_root']}`).")
+        else:
+            await ctx.send(f"❌ Receipt does NOT match the published root of Proposal #{proposal_id}.")
+
+    except Exception as e:
+        print(f"Error verifying vote receipt: {e}")
+        await ctx.send(f"❌ Error verifying vote receipt: {e}")
+
+
 @bot.command(name="announce_results")
 @commands.has_permissions(administrator=True)
 async def announce_results_command(ctx, proposal_id: int = None):
@@ -1314,13 +1663,34 @@ async def help_guide(ctx):
         name="🗳️ Voting",
         value=(
             "• `!vote <proposal_id> <option>` - Vote on a plurality proposal\n"
-            "• `!vote <proposal_id> rank option1,option2,...` - Vote on a Borda/Runoff/Condorcet proposal\n"
+            "• `!vote <proposal_id> rank option1,option2,...` - Vote on a ranked (Borda/Runoff/Condorcet-family) proposal\n"
             "• `!vote <proposal_id> approve option1,option2,...` - Vote on an approval proposal\n"
+            "• `!vote <proposal_id> score option1=5,option2=3,...` - Vote on a Score/STAR/Majority Judgment proposal\n"
+            "• `!delegate @member [topic]` - Let a member vote for you when you don't (`!undelegate [topic]`, `!delegations`)\n"
+            "• `!retract <id>` - Withdraw your vote while voting is open\n"
+            "• `!receipt <id>` - DM yourself a receipt proving your vote is counted\n"
+            "• `!verifyreceipt <receipt>` - Check a vote receipt against the published ballot tree root\n"
             "Note: Voting is best done via DM for privacy"
         ),
         inline=False
     )
 
+    # Tallies and audits (kept apart so no field passes Discord's 1024-character limit)
+    embed.add_field(
+        name="📊 Tallies & Audits (admin only)",
+        value=(
+            "• `!standings <id> [on|off]` - Toggle provisional ranked standings in the tracker\n"
+            "• `!topic <id> <topic|none>` - Tag a proposal so topic delegations apply\n"
+            "• `!recount <id> [resamples]` - Compare winners across voting methods with a bootstrap robustness check\n"
+            "• `!retally [apply] [restart]` - Recount closed proposals and correct stored results (dry run unless `apply`)\n"
+            "• `!blocs` - Show voting blocs of members who vote alike\n"
+            "• `!importballots <id>` - Import paper ballots from an attached CSV\n"
+            "• `!admission` - Show vote and tracker-refresh queue depths and shed counts\n"
+            "• `!votehistory <id>` - Show every cast, change and retraction on a proposal"
+        ),
+        inline=False
+    )
+
     # Moderation
     embed.add_field(
         name="🛡️ Moderation",
@@ -1487,9 +1857,22 @@ async def create_and_send_server_guide(guild: discord.Guild, bot_instance: comma
         inline=True
     )
 
+    # Section 8b: Schulze & Ranked Pairs
+    embed.add_field(
+        name="🧭 Schulze & Ranked Pairs (Cycle-Proof Condorcet)",
+        value=(
+            "**How it works:** Same head-to-head matchups as Condorcet. Schulze compares the strongest chain of wins between options; Ranked Pairs locks in the biggest wins first and skips any that would form a cycle.\n"
+            "**Analogy:** A tournament where upsets can't leave the trophy unclaimed.\n"
+            "**Pros:** Elects the Condorcet winner when there is one, and still produces a winner when there isn't.\n"
+            "**Cons:** Harder to explain than a simple count."
+        ),
+        inline=True
+    )
+
     # Make sure the next fields are not inline to take full width
     # Add an empty field if the number of inline fields is odd, to prevent the next non-inline field from appearing next to the last inline one.
-    # Current inline fields = 6 (Plurality, Borda, Approval, Runoff, Condorcet, Copeland) - which is even. So no empty field needed.
+    # Current inline fields = 7 (Plurality, Borda, Approval, Runoff, Condorcet, Copeland, Schulze/Ranked Pairs) - odd, so pad with an empty inline field.
+    embed.add_field(name="\u200b", value="\u200b", inline=True)
 
 
     # Section 8: How to Use Bot Commands
@@ -1532,7 +1915,7 @@ async def check_proposal_deadlines(bot):
         try:
             # Use imported function from voting_utils to avoid circular imports
             from voting_utils import check_expired_proposals, close_and_announce_results
-            closed_proposals = await check_expired_proposals()
+            closed_proposals = await check_expired_proposals(bot)
 
             # Announce results for each closed proposal
             for proposal, results in closed_proposals:
@@ -1638,4 +2021,7 @@ async def announce_pending_results(bot):
 
 if __name__ == "__main__":
     bot_token = open("bot_token.txt", "r").readline().strip()
-    bot.run(bot_token)
+    try:
+        bot.run(bot_token)
+    finally:
+        voting_utils.shutdown_tally_executor()
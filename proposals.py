@@ -70,6 +70,16 @@ class CampaignSetupModal(discord.ui.Modal, title="Create New Weighted Campaign")
         )
         self.add_item(self.num_scenarios_input)
 
+        self.voting_mode_input = discord.ui.TextInput(
+            label="Token Mode (linear / quadratic)",
+            placeholder="linear: tokens multiply a ballot; quadratic: n votes cost n² tokens",
+            default="linear",
+            required=False,
+            max_length=9,
+            style=discord.TextStyle.short
+        )
+        self.add_item(self.voting_mode_input)
+
     async def on_submit(self, interaction: discord.Interaction):
         try:
             await interaction.response.defer(thinking=True, ephemeral=True)
@@ -102,13 +112,19 @@ class CampaignSetupModal(discord.ui.Modal, title="Create New Weighted Campaign")
                 await interaction.followup.send("Invalid input for number of scenarios. Please enter a number.", ephemeral=True)
                 return
 
+            voting_mode = (self.voting_mode_input.value or "linear").strip().lower()
+            if voting_mode not in ("linear", "quadratic"):
+                await interaction.followup.send("Invalid token mode. Please use 'linear' or 'quadratic'.", ephemeral=True)
+                return
+
             campaign_id = await db.create_campaign(
                 guild_id=interaction.guild_id,
                 creator_id=interaction.user.id,
                 title=title,
                 description=description,
                 total_tokens_per_voter=total_tokens,
-                num_expected_scenarios=num_scenarios
+                num_expected_scenarios=num_scenarios,
+                voting_mode=voting_mode
             )
 
             if campaign_id:
@@ -329,7 +345,17 @@ class ProposalMechanismSelectionView(discord.ui.View):
             ("Approval Voting", "approval", "👍"),
             ("Runoff Voting", "runoff", "🔄"),
             ("Condorcet Method", "condorcet", "⚔️"),
+            ("Schulze Method", "schulze", "🧭"),
+            ("Ranked Pairs", "ranked_pairs", "🔗"),
+            ("Copeland Method", "copeland", "🏟️"),
+            ("STV (Multi-Winner)", "stv", "🪑"),
+            ("D'Hondt / Sainte-Laguë", "dhondt", "🏛️"),
+            ("PAV (Committee)", "pav", "🧩"),
+            ("Score Voting", "score", "🔢"),
+            ("STAR Voting", "star", "⭐"),
+            ("Majority Judgment", "majority_judgment", "🎓"),
         ]
+        buttons_per_row = 4  # Discord allows 5 rows of up to 5 buttons; the last row is kept for the campaign button
 
         # Add Weighted Campaign creation button ONLY if not already in a campaign definition flow
         if not self.campaign_id:
@@ -338,11 +364,11 @@ class ProposalMechanismSelectionView(discord.ui.View):
                 style=discord.ButtonStyle.success,
                 custom_id="select_mechanism_weighted_campaign",
                 emoji="⚖️",
-                row = (len(mechanisms) // 2) # Place it after standard mechanisms
+                row = (len(mechanisms) // buttons_per_row) # Place it after standard mechanisms
             )
             # Ensure row calculation is safe if mechanisms list is short
-            button_row = (len(mechanisms) // 2)
-            if len(mechanisms) % 2 != 0: # If odd number of mechanisms, last one is on a new row
+            button_row = (len(mechanisms) // buttons_per_row)
+            if len(mechanisms) % buttons_per_row != 0: # If the last mechanism row is partial, start a new row
                  button_row +=1
             wc_button.row = button_row
 
@@ -355,7 +381,7 @@ class ProposalMechanismSelectionView(discord.ui.View):
                 style=discord.ButtonStyle.secondary,
                 custom_id=f"select_mechanism_{custom_id_suffix}",
                 emoji=emoji,
-                row=i // 2
+                row=i // buttons_per_row
             )
             button.callback = self.mechanism_button_callback
             self.add_item(button)
@@ -405,8 +431,18 @@ class ProposalMechanismSelectionView(discord.ui.View):
             modal = ApprovalProposalModal(interaction, mechanism_name, campaign_id=self.campaign_id, scenario_order=self.scenario_order, title_prefix=modal_title_prefix)
         elif mechanism_name == "runoff":
             modal = RunoffProposalModal(interaction, mechanism_name, campaign_id=self.campaign_id, scenario_order=self.scenario_order, title_prefix=modal_title_prefix)
-        elif mechanism_name == "condorcet":
+        elif mechanism_name in ("condorcet", "schulze", "ranked_pairs", "copeland"):
+            # All Condorcet-family methods share the same ranked ballot and settings
             modal = CondorcetProposalModal(interaction, mechanism_name, campaign_id=self.campaign_id, scenario_order=self.scenario_order, title_prefix=modal_title_prefix)
+        elif mechanism_name == "stv":
+            modal = STVProposalModal(interaction, mechanism_name, campaign_id=self.campaign_id, scenario_order=self.scenario_order, title_prefix=modal_title_prefix)
+        elif mechanism_name == "dhondt":
+            modal = DHondtProposalModal(interaction, mechanism_name, campaign_id=self.campaign_id, scenario_order=self.scenario_order, title_prefix=modal_title_prefix)
+        elif mechanism_name == "pav":
+            modal = PAVProposalModal(interaction, mechanism_name, campaign_id=self.campaign_id, scenario_order=self.scenario_order, title_prefix=modal_title_prefix)
+        elif mechanism_name in voting_utils.CARDINAL_BALLOT_MECHANISMS:
+            # Score, STAR and Majority Judgment share the cardinal ballot and its score range
+            modal = CardinalProposalModal(interaction, mechanism_name, campaign_id=self.campaign_id, scenario_order=self.scenario_order, title_prefix=modal_title_prefix)
 
         if modal:
             await interaction.response.send_modal(modal)
@@ -704,6 +740,200 @@ class CondorcetProposalModal(BaseProposalModal):
             traceback.print_exc()
             await interaction.followup.send("An error occurred in the Condorcet submission.", ephemeral=True)
 
+class STVProposalModal(BaseProposalModal):
+    def __init__(self, interaction: discord.Interaction, mechanism_name: str, campaign_id: Optional[int] = None, scenario_order: Optional[int] = None, title_prefix: str = "New"):
+        super().__init__(interaction, mechanism_name, title_prefix=title_prefix, campaign_id=campaign_id, scenario_order=scenario_order)
+        self.seats_input = discord.ui.TextInput(
+            label="Number of Seats to Fill",
+            placeholder="e.g., 3 (must be fewer than the number of options)",
+            default="2",
+            required=True,
+            max_length=3
+        )
+        self.add_item(self.seats_input)
+        self.allow_abstain_input = discord.ui.TextInput(
+            label="Allow Abstain Votes? (yes/no/blank for yes)",
+            default="yes",
+            required=False,
+            max_length=3
+        )
+        self.add_item(self.allow_abstain_input)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            hyperparameters = {}
+            allow_abstain_str = self.allow_abstain_input.value.strip().lower()
+            if allow_abstain_str in ["yes", "y", ""]:
+                hyperparameters["allow_abstain"] = True
+            elif allow_abstain_str in ["no", "n"]:
+                hyperparameters["allow_abstain"] = False
+            else:
+                await interaction.followup.send("Invalid input for 'Allow Abstain'. Please use 'yes' or 'no'.", ephemeral=True)
+                return
+
+            try:
+                seats = int(self.seats_input.value.strip())
+            except ValueError:
+                await interaction.followup.send("Invalid input for seats. Please enter a whole number.", ephemeral=True)
+                return
+            options_count = len([opt for opt in self.options_input.value.split('\n') if opt.strip()]) or 2
+            if not (1 <= seats < options_count):
+                await interaction.followup.send(f"Seats must be at least 1 and fewer than the number of options ({options_count}).", ephemeral=True)
+                return
+            hyperparameters["seats"] = seats
+
+            await self.common_on_submit(interaction, hyperparameters)
+        except Exception as e:
+            print(f"Error in STVProposalModal on_submit: {e}")
+            traceback.print_exc()
+            await interaction.followup.send("An error occurred in the STV submission.", ephemeral=True)
+
+class DHondtProposalModal(BaseProposalModal):
+    def __init__(self, interaction: discord.Interaction, mechanism_name: str, campaign_id: Optional[int] = None, scenario_order: Optional[int] = None, title_prefix: str = "New"):
+        super().__init__(interaction, mechanism_name, title_prefix=title_prefix, campaign_id=campaign_id, scenario_order=scenario_order)
+        # Only two mechanism-specific inputs fit in a modal, so abstaining stays allowed by default.
+        self.seats_input = discord.ui.TextInput(
+            label="Number of Seats to Allocate",
+            placeholder="e.g., 10",
+            default="5",
+            required=True,
+            max_length=4
+        )
+        self.add_item(self.seats_input)
+        self.divisor_method_input = discord.ui.TextInput(
+            label="Divisor Method (dhondt / sainte-lague)",
+            default="dhondt",
+            required=False,
+            max_length=20
+        )
+        self.add_item(self.divisor_method_input)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            hyperparameters = {"allow_abstain": True}
+
+            try:
+                seats = int(self.seats_input.value.strip())
+            except ValueError:
+                await interaction.followup.send("Invalid input for seats. Please enter a whole number.", ephemeral=True)
+                return
+            if not (1 <= seats <= 1000):
+                await interaction.followup.send("Seats must be between 1 and 1000.", ephemeral=True)
+                return
+            hyperparameters["seats"] = seats
+
+            divisor_method = voting_utils.DHondtAllocation.normalize_divisor_method(self.divisor_method_input.value)
+            if not divisor_method:
+                await interaction.followup.send("Invalid divisor method. Please use 'dhondt' or 'sainte-lague'.", ephemeral=True)
+                return
+            hyperparameters["divisor_method"] = divisor_method
+
+            await self.common_on_submit(interaction, hyperparameters)
+        except Exception as e:
+            print(f"Error in DHondtProposalModal on_submit: {e}")
+            traceback.print_exc()
+            await interaction.followup.send("An error occurred in the D'Hondt submission.", ephemeral=True)
+
+class PAVProposalModal(BaseProposalModal):
+    def __init__(self, interaction: discord.Interaction, mechanism_name: str, campaign_id: Optional[int] = None, scenario_order: Optional[int] = None, title_prefix: str = "New"):
+        super().__init__(interaction, mechanism_name, title_prefix=title_prefix, campaign_id=campaign_id, scenario_order=scenario_order)
+        # Only two mechanism-specific inputs fit in a modal, so abstaining stays allowed by default.
+        self.seats_input = discord.ui.TextInput(
+            label="Committee Size (seats)",
+            placeholder="e.g., 3 (must be fewer than the number of options)",
+            default="2",
+            required=True,
+            max_length=3
+        )
+        self.add_item(self.seats_input)
+        self.pav_mode_input = discord.ui.TextInput(
+            label="Method (auto / sequential / exact)",
+            placeholder="auto: exact for small elections, sequential otherwise",
+            default="auto",
+            required=False,
+            max_length=10
+        )
+        self.add_item(self.pav_mode_input)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            hyperparameters = {"allow_abstain": True}
+
+            try:
+                seats = int(self.seats_input.value.strip())
+            except ValueError:
+                await interaction.followup.send("Invalid input for seats. Please enter a whole number.", ephemeral=True)
+                return
+            options_count = len([opt for opt in self.options_input.value.split('\n') if opt.strip()]) or 2
+            if not (1 <= seats < options_count):
+                await interaction.followup.send(f"Seats must be at least 1 and fewer than the number of options ({options_count}).", ephemeral=True)
+                return
+            hyperparameters["seats"] = seats
+
+            pav_mode = (self.pav_mode_input.value or "auto").strip().lower()
+            if pav_mode not in voting_utils.ProportionalApprovalVoting.MODES:
+                await interaction.followup.send("Invalid method. Please use 'auto', 'sequential' or 'exact'.", ephemeral=True)
+                return
+            hyperparameters["pav_mode"] = pav_mode
+
+            await self.common_on_submit(interaction, hyperparameters)
+        except Exception as e:
+            print(f"Error in PAVProposalModal on_submit: {e}")
+            traceback.print_exc()
+            await interaction.followup.send("An error occurred in the PAV submission.", ephemeral=True)
+
+class CardinalProposalModal(BaseProposalModal):
+    def __init__(self, interaction: discord.Interaction, mechanism_name: str, campaign_id: Optional[int] = None, scenario_order: Optional[int] = None, title_prefix: str = "New"):
+        super().__init__(interaction, mechanism_name, title_prefix=title_prefix, campaign_id=campaign_id, scenario_order=scenario_order)
+        self.max_score_input = discord.ui.TextInput(
+            label=f"Maximum Score (1-{voting_utils.CARDINAL_MAX_SCORE_LIMIT})",
+            placeholder="e.g., 5 (voters score each option from 0 to this)",
+            default=str(voting_utils.CARDINAL_DEFAULT_MAX_SCORE),
+            required=True,
+            max_length=2
+        )
+        self.add_item(self.max_score_input)
+        self.allow_abstain_input = discord.ui.TextInput(
+            label="Allow Abstain Votes? (yes/no/blank for yes)",
+            default="yes",
+            required=False,
+            max_length=3
+        )
+        self.add_item(self.allow_abstain_input)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            hyperparameters = {}
+
+            try:
+                max_score = int(self.max_score_input.value.strip())
+            except ValueError:
+                await interaction.followup.send("Invalid input for maximum score. Please enter a whole number.", ephemeral=True)
+                return
+            if not (1 <= max_score <= voting_utils.CARDINAL_MAX_SCORE_LIMIT):
+                await interaction.followup.send(f"Maximum score must be between 1 and {voting_utils.CARDINAL_MAX_SCORE_LIMIT}.", ephemeral=True)
+                return
+            hyperparameters["max_score"] = max_score
+
+            allow_abstain_str = self.allow_abstain_input.value.strip().lower()
+            if allow_abstain_str in ["yes", "y", ""]:
+                hyperparameters["allow_abstain"] = True
+            elif allow_abstain_str in ["no", "n"]:
+                hyperparameters["allow_abstain"] = False
+            else:
+                await interaction.followup.send("Invalid input for 'Allow Abstain'. Please use 'yes' or 'no'.", ephemeral=True)
+                return
+
+            await self.common_on_submit(interaction, hyperparameters)
+        except Exception as e:
+            print(f"Error in CardinalProposalModal on_submit: {e}")
+            traceback.print_exc()
+            await interaction.followup.send("An error occurred in the score voting submission.", ephemeral=True)
+
 # Helper function to be called by BaseProposalModal (Now _create_new_proposal_entry)
 async def _create_new_proposal_entry(interaction: discord.Interaction, title: str, description: str, mechanism_name: str, options: List[str], deadline_db_str: str, hyperparameters: Optional[Dict[str, Any]] = None, campaign_id: Optional[int] = None, scenario_order: Optional[int] = None) -> Optional[int]:
     """
@@ -0,0 +1,123 @@
+"""Merkle-tree vote receipts, using only the standard library.
+
+Each proposal's votes are leaves of a fixed-depth binary Merkle tree (SHA-256). A leaf
+commits to the proposal, the voter's slot, a fresh random salt and the ballot exactly as
+stored, so the published root changes if any counted ballot is altered, and leaves reveal
+nothing about ballots without the salt. Unused slots hold the empty-leaf hash, so a
+subtree with no votes has a known hash and is never stored.
+
+Check a receipt against a published root without the bot:
+
+    python receipts.py <receipt> <root>
+"""
+import base64
+import hashlib
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+MERKLE_DEPTH = 20  # 2**20 vote slots per proposal
+RECEIPT_PREFIX = "rt1:"
+
+EMPTY_LEAF = hashlib.sha256(b"\x02").digest()
+# EMPTY_HASHES[level] is the hash of a subtree of that height with no votes in it
+EMPTY_HASHES = [EMPTY_LEAF]
+for _ in range(MERKLE_DEPTH):
+    EMPTY_HASHES.append(hashlib.sha256(b"\x01" + EMPTY_HASHES[-1] + EMPTY_HASHES[-1]).digest())
+
+
+def leaf_hash(proposal_id: int, leaf_index: int, salt: str, ballot: str) -> bytes:
+    """Hash of one vote slot holding ``ballot`` (the stored vote_data text)."""
+    return hashlib.sha256(b"\x00" + f"{proposal_id}:{leaf_index}:{salt}:{ballot}".encode("utf-8")).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def path_positions(leaf_index: int) -> List[int]:
+    """Position of the leaf's ancestor at each level 0..MERKLE_DEPTH (the root is position 0)."""
+    return [leaf_index >> level for level in range(MERKLE_DEPTH + 1)]
+
+
+def fold_path(leaf: bytes, leaf_index: int, siblings: List[bytes]) -> List[bytes]:
+    """Hashes along the path from ``leaf`` to the root, given one sibling per level."""
+    path = [leaf]
+    for level, sibling in enumerate(siblings):
+        if (leaf_index >> level) & 1:
+            path.append(node_hash(sibling, path[-1]))
+        else:
+            path.append(node_hash(path[-1], sibling))
+    return path
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def encode_receipt(proposal_id: int, leaf_index: int, salt: str, ballot: str, siblings: List[bytes]) -> str:
+    """Pack an inclusion proof into one copyable string; empty-subtree siblings are left out."""
+    mask = 0
+    kept = []
+    for level, sibling in enumerate(siblings):
+        if sibling != EMPTY_HASHES[level]:
+            mask |= 1 << level
+            kept.append(_b64(sibling))
+    payload = {"p": proposal_id, "i": leaf_index, "s": salt, "b": ballot, "m": mask, "h": kept}
+    return RECEIPT_PREFIX + _b64(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_receipt(receipt: str) -> Optional[Dict[str, Any]]:
+    """The receipt's fields plus its full sibling list, or None if it is malformed."""
+    receipt = receipt.strip().strip("`")
+    if not receipt.startswith(RECEIPT_PREFIX):
+        return None
+    try:
+        payload = json.loads(_unb64(receipt[len(RECEIPT_PREFIX):]))
+        hashes = iter(_unb64(h) for h in payload["h"])
+        siblings = [next(hashes) if (payload["m"] >> level) & 1 else EMPTY_HASHES[level] for level in range(MERKLE_DEPTH)]
+        if next(hashes, None) is not None or not 0 <= payload["i"] < 2 ** MERKLE_DEPTH:
+            return None
+        return {"proposal_id": int(payload["p"]), "leaf_index": int(payload["i"]), "salt": str(payload["s"]),
+                "ballot": str(payload["b"]), "siblings": siblings}
+    except (ValueError, KeyError, TypeError, StopIteration):
+        return None
+
+
+def receipt_root(receipt: str) -> Optional[str]:
+    """The root (hex) a receipt proves inclusion under, or None if it is malformed."""
+    decoded = decode_receipt(receipt)
+    if decoded is None:
+        return None
+    leaf = leaf_hash(decoded["proposal_id"], decoded["leaf_index"], decoded["salt"], decoded["ballot"])
+    return fold_path(leaf, decoded["leaf_index"], decoded["siblings"])[-1].hex()
+
+
+def verify_receipt(receipt: str, root: str) -> bool:
+    """True if the receipt's ballot is a leaf of the tree with this published root."""
+    computed = receipt_root(receipt)
+    return computed is not None and computed == root.strip().lower()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python receipts.py <receipt> <root>", file=sys.stderr)
+        return 2
+    decoded = decode_receipt(argv[0])
+    if decoded is None:
+        print("Malformed receipt.")
+        return 1
+    if verify_receipt(argv[0], argv[1]):
+        print(f"OK: ballot {decoded['ballot']} is counted in proposal #{decoded['proposal_id']} under this root.")
+        return 0
+    print("MISMATCH: this receipt does not match the root.")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+import io
+import os
+import sys
+import json
+import random
+import asyncio
+import contextlib
+import functools
+import sqlite3
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+
+STATUSES = ['Voting', 'Voting', 'Pending Approval', 'Closed', 'Cancelled']
+
+
+def make_db(path):
+    asyncio.run(db.init_db())
+    conn = sqlite3.connect(path)
+    for proposal_id, status in [(1, 'Voting'), (2, 'Closed'), (3, 'Voting')]:
+        conn.execute(
+            "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status, hyperparameters) "
+            "VALUES (?, 7, 1, 'T', 'plurality', ?, ?)", (proposal_id, status, json.dumps({'allow_abstain': True}))
+        )
+        conn.executemany("INSERT INTO proposal_options (proposal_id, option_text, option_order) VALUES (?, ?, ?)",
+                         [(proposal_id, 'A', 0), (proposal_id, 'B', 1)])
+    conn.commit()
+    conn.close()
+
+
+def connect(path):
+    # Same type detection as db.get_db, so timestamps compare as datetimes
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def assert_registry_matches(path):
+    conn = connect(path)
+    for proposal_id, cached in db._active_proposals.items():
+        row = conn.execute("SELECT * FROM proposals WHERE proposal_id = ?", (proposal_id,)).fetchone()
+        assert row is not None, proposal_id
+        expected = db._decode_proposal_row(dict(row))
+        assert expected['status'] == 'Voting'
+        assert cached == expected, proposal_id
+    for proposal_id, options in db._active_options.items():
+        assert proposal_id in db._active_proposals
+        rows = conn.execute("SELECT option_text FROM proposal_options WHERE proposal_id = ? ORDER BY option_order",
+                            (proposal_id,)).fetchall()
+        assert options == [r[0] for r in rows], proposal_id
+    conn.close()
+
+
+def test_warmup_loads_only_voting_proposals(monkeypatch, tmp_path):
+    path = str(tmp_path / "registry.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+    try:
+        loaded = asyncio.run(db.warm_active_proposals())
+        assert loaded == 2
+        assert sorted(db._active_proposals) == [1, 3]
+        assert db._active_options[1] == ['A', 'B']
+        assert db._active_proposals[1]['hyperparameters'] == {'allow_abstain': True}
+        assert_registry_matches(path)
+
+        # Reads are served from memory and hand out copies
+        os.rename(path, path + ".moved")
+        proposal = asyncio.run(db.get_proposal(1))
+        proposal['title'] = 'mutated'
+        assert db._active_proposals[1]['title'] == 'T'
+        assert asyncio.run(db.get_proposal_options(3)) == ['A', 'B']
+    finally:
+        db.reset_active_proposals()
+
+
+def test_random_writes_keep_registry_consistent(monkeypatch, tmp_path):
+    path = str(tmp_path / "registry.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+    rng = random.Random(44)
+
+    async def runner():
+        await db.warm_active_proposals()
+        proposal_ids = [1, 2, 3]
+        for step in range(300):
+            proposal_id = rng.choice(proposal_ids)
+            action = rng.randrange(8)
+            if action == 0:
+                new_id = await db.create_proposal(7, 1, f"P{step}", "", 'plurality', None,
+                                                  requires_approval=rng.random() < 0.5)
+                proposal_ids.append(new_id)
+            elif action == 1:
+                await db.update_proposal_status(proposal_id, rng.choice(STATUSES))
+            elif action == 2:
+                await db.update_proposal(proposal_id, {'title': f"Title {step}",
+                                                       'hyperparameters': json.dumps({'step': step})})
+            elif action == 3:
+                await db.record_vote(rng.randint(100, 110), proposal_id, json.dumps({'option': 'A'}))
+            elif action == 4:
+                await db.cast_vote(rng.randint(100, 110), proposal_id, json.dumps({'option': 'B'}))
+            elif action == 5:
+                await db.add_proposal_option(proposal_id, f"O{step}", step + 2)
+            elif action == 6 and len(proposal_ids) > 3:
+                proposal_ids.remove(proposal_id)
+                await db.delete_proposal_data(proposal_id)
+            else:
+                await db.get_proposal(proposal_id)
+                await db.get_proposal_options(proposal_id)
+            assert_registry_matches(path)
+
+        # Every read agrees with the database, cached or not
+        for proposal_id in proposal_ids:
+            conn = connect(path)
+            row = conn.execute("SELECT * FROM proposals WHERE proposal_id = ?", (proposal_id,)).fetchone()
+            conn.close()
+            assert await db.get_proposal(proposal_id) == db._decode_proposal_row(dict(row))
+        return proposal_ids
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(runner())
+        assert_registry_matches(path)
+    finally:
+        db.reset_active_proposals()
@@ -0,0 +1,77 @@
+import asyncio
+
+import admission
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    bucket = admission.TokenBucket(rate=2.0, capacity=2, clock=clock)
+    assert bucket.try_take() and bucket.try_take()
+    assert not bucket.try_take()
+    assert bucket.wait_time() == 0.5
+    clock.now = 0.5
+    assert bucket.try_take()
+    clock.now = 100
+    assert bucket.try_take() and bucket.try_take() and not bucket.try_take()  # Capped at capacity
+
+
+def test_refreshes_coalesce_shed_and_recover():
+    clock = FakeClock()
+    controller = admission.AdmissionController(max_pending_refreshes=2, refresh_rate=1.0, refresh_burst=2, clock=clock)
+    assert controller.offer_refresh(1, 10)
+    assert not controller.offer_refresh(1, 10)  # Coalesced into the queued refresh
+    assert controller.offer_refresh(1, 11)
+    assert not controller.offer_refresh(1, 12)  # Guild over quota: deferred
+    assert not controller.offer_refresh(2, 20)  # Queue full: deferred
+    assert not controller.offer_refresh(1, 12)  # Coalesced into the deferred refresh
+
+    async def drain():
+        keys = [await controller.next_refresh(), await controller.next_refresh(), await controller.next_refresh()]
+        clock.now = 1.0  # Guild 1 earns another token
+        keys.append(await controller.next_refresh())
+        return keys
+
+    keys = asyncio.run(drain())
+    assert keys == [(1, 10), (1, 11), (2, 20), (1, 12)]
+    stats = controller.stats()
+    assert stats['refresh_queue_depth'] == 0 and stats['refreshes_deferred'] == 0
+    assert (stats['refreshes_queued'], stats['refreshes_coalesced'], stats['refreshes_shed'],
+            stats['refreshes_recovered'], stats['refreshes_run']) == (2, 2, 2, 2, 4)
+
+
+def test_votes_are_bounded_never_shed_and_beat_refreshes():
+    controller = admission.AdmissionController(max_vote_writes=2, vote_rate=200.0, vote_burst=3)
+    order = []
+    in_flight = []
+
+    async def vote(index):
+        async with controller.vote_slot(7):
+            in_flight.append(controller.stats()['votes_in_flight'])
+            await asyncio.sleep(0.01)
+            order.append(f"vote{index}")
+
+    async def refresh_worker():
+        await controller.next_refresh()
+        order.append("refresh")
+
+    async def runner():
+        votes = [asyncio.create_task(vote(i)) for i in range(6)]
+        await asyncio.sleep(0)
+        controller.offer_refresh(7, 1)
+        await asyncio.gather(refresh_worker(), *votes)
+
+    asyncio.run(runner())
+    assert order[-1] == "refresh"
+    assert sorted(order[:-1]) == [f"vote{i}" for i in range(6)]
+    assert max(in_flight) <= 2
+    stats = controller.stats()
+    assert stats['votes_admitted'] == 6 and stats['votes_delayed'] == 3
+    assert stats['votes_waiting'] == 0 and stats['votes_in_flight'] == 0
@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import random
+import asyncio
+import functools
+import itertools
+import sqlite3
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import analytics
+import db
+
+
+def test_ballot_agreement_per_ballot_type():
+    options = ['A', 'B', 'C', 'D']
+    assert analytics.ballot_agreement('A', 'A', 'plurality', options, 5) == 1.0
+    assert analytics.ballot_agreement('A', 'B', 'plurality', options, 5) == 0.0
+    assert analytics.ballot_agreement(('A', 'B'), ('A', 'C'), 'approval', options, 5) == 0.5
+    assert analytics.ballot_agreement(('A', 'B', 'C', 'D'), ('D', 'C', 'B', 'A'), 'ranked', options, 5) == 0.0
+    assert analytics.ballot_agreement(('A', 'B'), ('A', 'B'), 'ranked', options, 5) == 1.0
+    assert analytics.ballot_agreement(bytes([5, 0, 0, 0]), bytes([0, 0, 0, 0]), 'cardinal', options, 5) == 0.75
+
+
+def test_cluster_blocs_separates_two_groups():
+    similarity = {}
+    for a, b in itertools.combinations([1, 2, 3], 2):
+        similarity[(a, b)] = 0.9
+    for a, b in itertools.combinations([4, 5], 2):
+        similarity[(a, b)] = 0.8
+    for a in [1, 2, 3]:
+        for b in [4, 5]:
+            similarity[(a, b)] = 0.2
+    assert analytics.cluster_blocs(similarity, [1, 2, 3, 4, 5, 6], 0.75) == [[1, 2, 3], [4, 5]]
+    # 6 agrees strongly with 3 alone: they pair first, and the average link to {1, 2} then falls short
+    similarity[(3, 6)] = 0.95
+    assert analytics.cluster_blocs(similarity, [1, 2, 3, 4, 5, 6], 0.75) == [[1, 2], [3, 6], [4, 5]]
+    assert analytics.cluster_blocs({}, [1, 2], 0.5) == []
+
+
+def make_db(path, proposals):
+    conn = sqlite3.connect(path)
+    for ddl in (db.CREATE_PROPOSALS_TABLE, db.CREATE_PROPOSAL_OPTIONS_TABLE, db.CREATE_VOTES_TABLE,
+                db.CREATE_BLOC_PAIR_STATS_TABLE, db.CREATE_BLOC_MEMBER_STATS_TABLE, db.CREATE_BLOC_RECORDED_PROPOSALS_TABLE):
+        conn.execute(ddl)
+    for proposal_id, ballots in proposals.items():
+        conn.execute(
+            "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status) "
+            "VALUES (?, 7, 1, 'T', 'borda', 'Closed')", (proposal_id,)
+        )
+        for order, option in enumerate(['A', 'B', 'C']):
+            conn.execute("INSERT INTO proposal_options (proposal_id, option_text, option_order) VALUES (?, ?, ?)",
+                         (proposal_id, option, order))
+        for user_id, rankings in ballots.items():
+            conn.execute("INSERT INTO votes (proposal_id, user_id, vote_data, is_abstain) VALUES (?, ?, ?, ?)",
+                         (proposal_id, user_id, json.dumps(json.dumps({'rankings': rankings})), rankings is None))
+    conn.commit()
+    conn.close()
+
+
+def test_incremental_stats_match_full_recomputation(monkeypatch, tmp_path):
+    rng = random.Random(42)
+    orders = [['A', 'B', 'C'], ['C', 'B', 'A']]
+    proposals = {}
+    for proposal_id in range(1, 7):
+        ballots = {}
+        for user_id in range(1, 9):
+            if rng.random() < 0.15:
+                continue  # Did not vote
+            if rng.random() < 0.1:
+                ballots[user_id] = None  # Abstained
+            else:
+                # Members 1-4 and 5-8 each mostly follow their own line
+                order = orders[user_id > 4] if rng.random() < 0.9 else rng.sample(['A', 'B', 'C'], 3)
+                ballots[user_id] = order
+        proposals[proposal_id] = ballots
+    path = str(tmp_path / "blocs.db")
+    make_db(path, proposals)
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+
+    async def runner():
+        first = await analytics.record_closed_proposal(1)
+        again = await analytics.record_closed_proposal(1)
+        report = await analytics.compute_voting_blocs(7, min_shared=2, threshold=0.7)
+        caught_up = await analytics.catch_up_bloc_stats(7)
+        return first, again, report, caught_up, await db.get_bloc_pair_stats(7), await db.get_bloc_member_stats(7)
+
+    first, again, report, caught_up, pairs, members = asyncio.run(runner())
+    assert first and not again and caught_up == 0
+
+    expected = {}
+    for ballots in proposals.values():
+        voted = {u: tuple(r) for u, r in ballots.items() if r is not None}
+        for a, b in itertools.combinations(sorted(voted), 2):
+            shared, total = expected.get((a, b), (0, 0.0))
+            expected[(a, b)] = (shared + 1, total + analytics.ballot_agreement(voted[a], voted[b], 'ranked', ['A', 'B', 'C'], 5))
+    assert {(p['member_a'], p['member_b']): p['shared_proposals'] for p in pairs} == {k: v[0] for k, v in expected.items()}
+    for p in pairs:
+        assert abs(p['agreement_sum'] - expected[(p['member_a'], p['member_b'])][1]) < 1e-9
+    assert members == {u: sum(1 for b in proposals.values() if b.get(u) is not None) for u in range(1, 9) if any(b.get(u) for b in proposals.values())}
+    # Each bloc stays on one side of the line, and most of each side is found
+    for bloc in report['blocs']:
+        assert max(bloc['members']) <= 4 or min(bloc['members']) > 4
+        assert bloc['cohesion'] >= 0.7
+    assert sum(len(bloc['members']) for bloc in report['blocs']) >= 6
+
+
+def test_large_turnout_is_sampled_pooled_and_chunked(monkeypatch, tmp_path):
+    import voting_utils
+
+    rng = random.Random(7)
+    proposals = {1: {user_id: rng.sample(['A', 'B', 'C'], 3) for user_id in range(1, 41)}}
+    path = str(tmp_path / "blocs.db")
+    make_db(path, proposals)
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    monkeypatch.setattr(analytics, "BLOC_MAX_VOTERS_PER_PROPOSAL", 12)
+    monkeypatch.setattr(analytics, "BLOC_POOL_MIN_VOTERS", 10)
+
+    async def runner():
+        try:
+            recorded = await analytics.record_closed_proposal(1)
+        finally:
+            voting_utils.shutdown_tally_executor()
+        return recorded, await db.get_bloc_pair_stats(7), await db.get_bloc_member_stats(7)
+
+    recorded, pairs, members = asyncio.run(runner())
+    assert recorded
+    assert len(members) == 40  # Everyone's participation counts
+    sampled = {member for p in pairs for member in (p['member_a'], p['member_b'])}
+    assert len(sampled) == 12 and len(pairs) == 66  # Only the sample is paired up
+
+
+def test_interrupted_pair_chunks_resume_without_double_counting(monkeypatch, tmp_path):
+    path = str(tmp_path / "blocs.db")
+    make_db(path, {1: {}})
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    pairs = [(a, b, 0.5) for a, b in itertools.combinations(range(1, 6), 2)]  # 10 pairs
+    broken = pairs[:4] + [(9, 8, 0.5)] + pairs[5:]  # Fails the member_a < member_b check in the second chunk
+
+    async def runner():
+        try:
+            await db.record_bloc_proposal(7, 1, [1, 2, 3, 4, 5], broken, chunk_size=3)
+        except sqlite3.IntegrityError:
+            pass
+        unfinished = await db.get_unrecorded_closed_proposals(7)
+        resumed = await db.record_bloc_proposal(7, 1, [1, 2, 3, 4, 5], pairs, chunk_size=3)
+        again = await db.record_bloc_proposal(7, 1, [1, 2, 3, 4, 5], pairs, chunk_size=3)
+        return unfinished, resumed, again, await db.get_bloc_pair_stats(7), await db.get_bloc_member_stats(7)
+
+    unfinished, resumed, again, stats, members = asyncio.run(runner())
+    assert unfinished == [1] and resumed and not again
+    assert sorted((p['member_a'], p['member_b'], p['shared_proposals']) for p in stats) == [(a, b, 1) for a, b, _ in pairs]
+    assert members == {u: 1 for u in range(1, 6)}
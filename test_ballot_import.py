@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import asyncio
+import functools
+import sqlite3
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+import voting_utils
+
+OPTIONS = ['Alpha', 'Beta', 'Gamma']
+parse = voting_utils.parse_ballot_csv
+
+
+def test_parses_each_ballot_family():
+    ballots, errors = parse("ballot,option\n7,alpha\n8, Gamma \n", OPTIONS, 'plurality')
+    assert errors == [] and ballots == [('7', {'option': 'Alpha'}), ('8', {'option': 'Gamma'})]
+
+    ballots, errors = parse("Alpha,Beta,Gamma\nx,,1\n,yes,\n", OPTIONS, 'approval')
+    assert errors == [] and ballots == [('line2', {'approved': ['Alpha', 'Gamma']}), ('line3', {'approved': ['Beta']})]
+
+    ballots, errors = parse("gamma,alpha,beta\n1,3,\n2,1,3\n", OPTIONS, 'ranked')
+    assert errors == [] and [b for _, b in ballots] == [{'rankings': ['Gamma', 'Alpha']}, {'rankings': ['Alpha', 'Gamma', 'Beta']}]
+
+    ballots, errors = parse("Alpha,Beta,Gamma\n5,,2\n", OPTIONS, 'cardinal', max_score=5)
+    assert errors == [] and ballots == [('line2', {'scores': '050002'})]
+
+
+def test_reports_every_bad_row():
+    text = "ballot,Alpha,Beta,Gamma\n1,1,1,\n1,4,,\n2,,,\n3,1,two,\n4,1,2,3,9\n"
+    ballots, errors = parse(text, OPTIONS, 'ranked')
+    assert errors == [
+        "Line 2: two options share a rank.",
+        "Line 3: ballot `1` repeats line 2.",
+        "Line 3: rank `4` under Alpha must be a whole number from 1 to 3.",
+        "Line 4: no options ranked.",
+        "Line 5: rank `two` under Beta must be a whole number from 1 to 3.",
+        "Line 6: more cells than columns.",
+    ]
+    assert parse("Alpha,Delta\n1,1\n", OPTIONS, 'approval')[1][0].startswith("Line 1: unknown column(s) Delta")
+    assert parse("choice\nAlpha\n", OPTIONS, 'plurality')[1][0].startswith("Line 1: unknown column(s) choice")
+    assert parse("option\nDelta\n\n", OPTIONS, 'plurality')[1] == ["Line 2: `Delta` is not an option."]
+
+
+def make_db(path, status='Voting'):
+    asyncio.run(db.init_db())
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status) "
+        "VALUES (1, 7, 1, 'T', 'borda', ?)", (status,)
+    )
+    conn.executemany("INSERT INTO proposal_options (proposal_id, option_text, option_order) VALUES (1, ?, ?)",
+                     [(opt, i) for i, opt in enumerate(OPTIONS)])
+    conn.execute("INSERT INTO votes (proposal_id, user_id, vote_data) VALUES (1, 55, ?)",
+                 (json.dumps(json.dumps({'rankings': ['Beta']})),))
+    conn.commit()
+    conn.close()
+
+
+def test_import_writes_tagged_ballots_in_one_transaction(monkeypatch, tmp_path):
+    path = str(tmp_path / "import.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+    text = "ballot,Alpha,Beta,Gamma\n101,1,2,3\n102,,1,2\n"
+
+    async def runner():
+        first = await voting_utils.import_ballot_csv(1, text, "paper.csv")
+        again = await voting_utils.import_ballot_csv(1, text, "paper.csv")
+        bad = await voting_utils.import_ballot_csv(1, "Alpha,Beta,Gamma\n1,1,\n", "more.csv")
+        votes = await db.get_proposal_votes(1)
+        return first, again, bad, votes
+
+    first, again, bad, votes = asyncio.run(runner())
+    assert first == (2, [])
+    assert again == (0, ["Already imported: csv:paper.csv#101", "Already imported: csv:paper.csv#102"])
+    assert bad == (0, ["Line 2: two options share a rank."])
+
+    imported = sorted((v['user_id'], v['source']) for v in votes if v['source'])
+    assert imported == [(-2, 'csv:paper.csv#102'), (-1, 'csv:paper.csv#101')]
+    ballots = voting_utils.normalize_recount_ballots(votes, OPTIONS, 'ranked')
+    assert sorted(ballots) == [(('Alpha', 'Beta', 'Gamma'), 1), (('Beta',), 1), (('Beta', 'Gamma'), 1)]
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT vote_revision FROM proposals").fetchone()[0] == 1
+    conn.close()
+
+
+def test_import_refuses_closed_proposals(monkeypatch, tmp_path):
+    path = str(tmp_path / "import.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path, status='Closed')
+    db.reset_active_proposals()
+    result = asyncio.run(voting_utils.import_ballot_csv(1, "Alpha,Beta,Gamma\n1,2,3\n", "paper.csv"))
+    assert result == (0, ["Ballots can only be imported while voting is open (status: Closed)."])
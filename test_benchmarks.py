@@ -0,0 +1,81 @@
+import os
+import sys
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import voting_utils
+from benchmarks import generators, reference, run
+
+
+def test_generators_are_seeded_and_complete():
+    options = generators.option_names(6)
+    for culture in generators.GENERATORS:
+        first = generators.generate(culture, 50, options, seed=3)
+        assert first == generators.generate(culture, 50, options, seed=3)
+        assert first != generators.generate(culture, 50, options, seed=4)
+        rankings, tokens = first
+        assert len(rankings) == len(tokens) == 50
+        assert all(sorted(r) == sorted(options) for r in rankings)
+
+
+def test_mallows_with_zero_dispersion_is_unanimous():
+    import random
+    options = generators.option_names(5)
+    rankings, _ = generators.mallows(20, options, random.Random(0), phi=0.0)
+    assert all(r == options for r in rankings)
+
+
+def test_engines_agree_with_reference_tallies():
+    assert run.run_checks(list(generators.GENERATORS), seed=7, voters=120) == []
+
+
+def test_cross_validation_reports_disagreement(monkeypatch):
+    options = generators.option_names(3)
+    rankings, tokens = generators.generate("impartial", 40, options, seed=1)
+    votes_by_type = {t: generators.to_votes(rankings, tokens, t, options=options) for t in generators.BALLOT_TYPES}
+    original = voting_utils.BordaCount.count_votes
+
+    def skewed(votes, opts, hyperparameters=None):
+        return original(votes[1:], opts, hyperparameters)
+
+    monkeypatch.setattr(voting_utils.BordaCount, "count_votes", staticmethod(skewed))
+    mismatches = reference.cross_validate(votes_by_type, options)
+    assert [m.split(":")[0] for m in mismatches] == ["borda"]
+
+
+def test_quadratic_ballots_spend_tokens_as_credits():
+    assert generators.quadratic_allocations(["A", "B", "C"], 14) == {"A": 3, "B": 2, "C": 1}
+    assert generators.quadratic_allocations(["A", "B"], 0) == {}
+    votes = generators.to_votes([["B", "A"], ["A", "B"]], [5, None], "quadratic")
+    assert [(v['vote_data']['allocations'], v['tokens_invested']) for v in votes] == [({"B": 2, "A": 1}, 5), ({"A": 1}, 1)]
+    assert run.ENGINES["quadratic"] == "quadratic"
+
+
+def test_score_ballots_follow_rankings_in_option_order():
+    import pytest
+    options = generators.option_names(3)
+    votes = generators.to_votes([["Option 3", "Option 1", "Option 2"]], [None], "score", seed=2, options=options)
+    grades = list(bytes.fromhex(votes[0]['vote_data']['scores']))
+    assert len(grades) == 3 and all(0 <= g <= generators.SCORE_MAX for g in grades)
+    assert grades[2] >= generators.SCORE_MAX - 1 and grades[1] <= 1  # Top and bottom of the ranking
+    with pytest.raises(ValueError):
+        generators.to_votes([options], [None], "score")
+
+
+def test_grid_report_and_regression_comparison():
+    report = run.run_grid([30], [3], ["impartial"], ["plurality", "schulze"], repeat=1)
+    assert [(r["engine"], r["voters"], r["options"]) for r in report["results"]] == [("plurality", 30, 3), ("schulze", 30, 3)]
+    slower = {"results": [dict(r, seconds=r["seconds"] * 2 + 1) for r in report["results"]]}
+    assert run.compare_reports(report, report) == []
+    regressions = run.compare_reports(report, slower, tolerance=0.5)
+    assert [r["engine"] for r in regressions] == ["plurality", "schulze"]
+
+
+def test_vote_latency_benchmark_reports_both_paths(tmp_path):
+    import asyncio
+    from benchmarks import votes
+    report = asyncio.run(votes.run_benchmark(20, concurrency=4, path=str(tmp_path / "bench.db")))
+    assert report["legacy"]["votes"] == report["fast"]["votes"] == 20
+    assert report["fast"]["p50_ms"] <= report["fast"]["p99_ms"] <= report["fast"]["max_ms"]
+    assert votes.percentile([1, 2, 3, 4], 50) == 2 and votes.percentile([1, 2, 3, 4], 99) == 4
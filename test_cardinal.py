@@ -0,0 +1,143 @@
+import json
+import random
+import types
+import sys
+
+# Stub out heavy dependencies from voting_utils
+db_stub = types.ModuleType("db")
+db_stub.get_proposal_options = lambda *args, **kwargs: []
+sys.modules.setdefault("db", db_stub)
+
+# Minimal stub for discord module used during imports
+class _DiscordStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_stub = _DiscordStub("discord")
+
+class _CommandsStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_ext_stub = types.ModuleType("discord.ext")
+discord_commands_stub = _CommandsStub("discord.ext.commands")
+discord_stub.ext = discord_ext_stub
+discord_ext_stub.commands = discord_commands_stub
+
+sys.modules.setdefault("discord", discord_stub)
+sys.modules.setdefault("discord.ext", discord_ext_stub)
+sys.modules.setdefault("discord.ext.commands", discord_commands_stub)
+
+import voting_utils
+
+OPTIONS = ['A', 'B', 'C']
+
+
+def scored(scores, tokens=None, options=OPTIONS):
+    return {'vote_data': json.dumps({'scores': voting_utils.encode_score_ballot(scores, options)}), 'tokens_invested': tokens}
+
+
+def test_compact_encoding_round_trips():
+    encoded = voting_utils.encode_score_ballot({'A': 5, 'C': 2}, OPTIONS)
+    assert encoded == '050002'
+    assert list(voting_utils.score_ballot_vector({'scores': encoded}, OPTIONS, 5)) == [5, 0, 2]
+    assert list(voting_utils.score_ballot_vector({'scores': {'B': 3}}, OPTIONS, 5)) == [0, 3, 0]
+
+
+def test_invalid_ballots_are_rejected():
+    vector = voting_utils.score_ballot_vector
+    assert vector({'scores': '0500'}, OPTIONS, 5) is None  # wrong length
+    assert vector({'scores': '050009'}, OPTIONS, 5) is None  # above max_score
+    assert vector({'scores': 'zz0000'}, OPTIONS, 5) is None
+    assert vector({'scores': {'Z': 1}}, OPTIONS, 5) is None
+    assert vector({'scores': {'A': True}}, OPTIONS, 5) is None
+    assert vector({'approved': ['A']}, OPTIONS, 5) is None
+    result = voting_utils.ScoreVoting.count_votes([{'vote_data': 'not json', 'tokens_invested': None}, scored({'B': 1})], OPTIONS)
+    assert result['total_raw_ballots'] == 1
+    assert result['winner'] == 'B'
+
+
+def test_score_voting_weights_and_ties():
+    votes = [scored({'A': 5, 'B': 4}), scored({'A': 0, 'B': 4}, tokens=2), scored({'A': 5}, tokens=0)]
+    result = voting_utils.ScoreVoting.count_votes(votes, OPTIONS)
+    assert result['winner'] == 'B'
+    assert dict(result['results_detailed'])['B'] == {'weighted_score': 12, 'average_score': 4.0}
+    assert result['total_weighted_ballot_power'] == 3
+    tie = voting_utils.ScoreVoting.count_votes([scored({'A': 3, 'B': 3})], OPTIONS)
+    assert tie['winner'] is None
+    assert tie['reason_for_no_winner'] == "Tie for highest score among 2 options."
+
+
+def test_star_runoff_can_overturn_score_leader():
+    # A leads on total score, but more voters prefer B to A.
+    votes = [scored({'A': 5, 'B': 0})] * 2 + [scored({'A': 3, 'B': 4})] * 3 + [scored({'C': 1})]
+    result = voting_utils.STARVoting.count_votes(votes, OPTIONS)
+    assert result['finalists'] == ['A', 'B']
+    assert result['runoff'] == {'A': 2, 'B': 3, 'no_preference': 1}
+    assert result['winner'] == 'B'
+
+
+def test_star_runoff_tie_falls_back_to_score():
+    votes = [scored({'A': 5, 'B': 0}), scored({'A': 3, 'B': 4})]
+    result = voting_utils.STARVoting.count_votes(votes, OPTIONS)
+    assert result['winner'] == 'A'
+    assert result['runoff_tiebreak'] == 'score'
+
+
+def test_majority_judgment_median_and_gauge():
+    votes = ([scored({'A': 4, 'B': 3, 'C': 5})] * 2
+             + [scored({'A': 3, 'B': 3, 'C': 0})] * 2
+             + [scored({'A': 3, 'B': 3, 'C': 3})])
+    result = voting_utils.MajorityJudgment.count_votes(votes, OPTIONS)
+    details = dict(result['results_detailed'])
+    assert details['A']['median_grade'] == 3 and details['B']['median_grade'] == 3
+    assert details['C']['median_label'] == 'Good'
+    # A and C share the median; A has more weight above it than below, C is split evenly.
+    assert result['winner'] == 'A'
+    assert [opt for opt, _ in result['results_detailed']] == ['A', 'B', 'C']
+    assert details['A']['grade_distribution'] == [0, 0, 0, 3, 2, 0]
+
+
+def test_majority_judgment_matches_repeated_median_removal():
+    rng = random.Random(37)
+    for _ in range(30):
+        votes = [scored({opt: rng.randint(0, 5) for opt in OPTIONS}, rng.choice([None, 1, 3])) for _ in range(rng.randint(1, 12))]
+        result = voting_utils.MajorityJudgment.count_votes(votes, OPTIONS)
+
+        def grades(opt):
+            out = []
+            for vote in votes:
+                weight = vote['tokens_invested'] or 1
+                vector = voting_utils.score_ballot_vector(json.loads(vote['vote_data']), OPTIONS, 5)
+                out += [vector[OPTIONS.index(opt)]] * weight
+            return sorted(out)
+
+        def beats(x, y):
+            gx, gy = grades(x), grades(y)
+            while gx:
+                mx, my = gx[(len(gx) - 1) // 2], gy[(len(gy) - 1) // 2]
+                if mx != my:
+                    return mx > my
+                gx.remove(mx)
+                gy.remove(my)
+            return None
+
+        if result['winner']:
+            for other in OPTIONS:
+                if other != result['winner']:
+                    assert beats(result['winner'], other) is not False
+
+
+def test_max_score_and_registration():
+    assert voting_utils.cardinal_max_score({'max_score': 10}) == 10
+    assert voting_utils.cardinal_max_score({'max_score': 99}) == voting_utils.CARDINAL_MAX_SCORE_LIMIT
+    assert voting_utils.cardinal_max_score(None) == 5
+    result = voting_utils.ScoreVoting.count_votes([scored({'A': 9})], OPTIONS, {'max_score': 10})
+    assert result['winner'] == 'A'
+    assert voting_utils.get_voting_mechanism('star') is voting_utils.STARVoting
+    assert voting_utils.get_voting_mechanism('majority_judgment') is voting_utils.MajorityJudgment
+    assert set(voting_utils.CARDINAL_BALLOT_MECHANISMS) == {'score', 'star', 'majority_judgment'}
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import asyncio
+import functools
+import sqlite3
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+
+
+def make_db(path):
+    asyncio.run(db.init_db())
+    conn = sqlite3.connect(path)
+    proposals = [(1, 'Voting', None), (2, 'Closed', None), (3, 'Voting', '2000-01-01T00:00:00'), (4, 'Voting', None)]
+    for proposal_id, status, deadline in proposals:
+        conn.execute(
+            "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status, deadline, campaign_id) "
+            "VALUES (?, 7, 1, 'T', 'plurality', ?, ?, ?)", (proposal_id, status, deadline, 9 if proposal_id == 4 else None)
+        )
+    conn.execute("INSERT INTO voting_invites (proposal_id, voter_id, status) VALUES (1, 100, 'sent')")
+    conn.execute("INSERT INTO user_campaign_participation (campaign_id, user_id, remaining_tokens, last_updated_timestamp) VALUES (9, 100, 5, '')")
+    conn.execute("INSERT INTO constitutional_variables (server_id, name, value, type) VALUES (7, 'vote_privacy', 'anonymous', 'text')")
+    conn.commit()
+    conn.close()
+
+
+def test_cast_vote_validates_and_writes_in_one_transaction(monkeypatch, tmp_path):
+    path = str(tmp_path / "votes.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    ballot = json.dumps({'option': 'A'})
+
+    async def runner():
+        return [
+            await db.cast_vote(100, 1, ballot),
+            await db.cast_vote(100, 1, json.dumps({'option': 'B'})),
+            await db.cast_vote(100, 2, ballot),
+            await db.cast_vote(100, 3, ballot),
+            await db.cast_vote(100, 99, ballot),
+            await db.cast_vote(100, 4, ballot, tokens_invested=3, campaign_id=9),
+            await db.cast_vote(100, 4, ballot, tokens_invested=3, campaign_id=9),
+        ]
+
+    first, change, closed, expired, missing, debit, overdraft = asyncio.run(runner())
+    assert first.ok and not first.replaced_vote and first.server_id == 7
+    assert first.vote_identifier and change.vote_identifier == first.vote_identifier
+    assert change.ok and change.replaced_vote
+    assert (closed.ok, closed.message) == (False, "Voting is not open for this proposal (status: Closed).")
+    assert (expired.ok, expired.message) == (False, "Voting has ended for this proposal.")
+    assert (missing.ok, missing.message) == (False, "Proposal not found.")
+    assert debit.ok and debit.remaining_tokens == 2
+    assert not overdraft.ok
+
+    conn = sqlite3.connect(path)
+    votes = conn.execute("SELECT proposal_id, vote_data, tokens_invested FROM votes ORDER BY proposal_id").fetchall()
+    revisions = dict(conn.execute("SELECT proposal_id, vote_revision FROM proposals").fetchall())
+    invite = conn.execute("SELECT status FROM voting_invites WHERE proposal_id = 1 AND voter_id = 100").fetchone()[0]
+    balance = conn.execute("SELECT remaining_tokens FROM user_campaign_participation").fetchone()[0]
+    conn.close()
+    assert [(p, json.loads(json.loads(v)), t) for p, v, t in votes] == [(1, {'option': 'B'}, None), (4, {'option': 'A'}, 3)]
+    assert revisions == {1: 2, 2: 0, 3: 0, 4: 1}  # Rejected votes leave no trace
+    assert invite == 'voted'
+    assert balance == 2
+
+
+def test_replayed_interaction_is_a_no_op(monkeypatch, tmp_path):
+    path = str(tmp_path / "votes.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    ballot = json.dumps({'option': 'A'})
+
+    async def runner():
+        return [
+            await db.cast_vote(100, 4, ballot, tokens_invested=2, campaign_id=9, idempotency_key='111'),
+            await db.cast_vote(100, 4, ballot, tokens_invested=2, campaign_id=9, idempotency_key='111'),
+            await db.cast_vote(100, 4, json.dumps({'option': 'B'}), tokens_invested=1, campaign_id=9, idempotency_key='222'),
+            # A late replay from the older ballot DM must not overwrite the newer vote
+            await db.cast_vote(100, 4, ballot, tokens_invested=2, campaign_id=9, idempotency_key='111'),
+        ]
+
+    first, replay, change, late_replay = asyncio.run(runner())
+    assert first.ok and not first.duplicate
+    assert replay.ok and replay.duplicate and replay.message == "Your vote was already recorded."
+    assert change.ok and not change.duplicate and change.remaining_tokens == 2
+    assert late_replay.ok and late_replay.duplicate
+
+    conn = sqlite3.connect(path)
+    key, revision, vote_data = conn.execute(
+        "SELECT v.idempotency_key, p.vote_revision, v.vote_data FROM votes v JOIN proposals p USING (proposal_id)"
+    ).fetchone()
+    balance = conn.execute("SELECT remaining_tokens FROM user_campaign_participation").fetchone()[0]
+    conn.close()
+    assert (key, revision, json.loads(json.loads(vote_data))) == ('222', 2, {'option': 'B'})
+    assert balance == 2
+
+
+def test_concurrent_submissions_are_serialized_per_voter(monkeypatch, tmp_path):
+    import voting
+
+    path = str(tmp_path / "votes.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    active = {}
+    overlapped = []
+    real_cast_vote = db.cast_vote
+
+    async def tracking_cast_vote(**kwargs):
+        key = (kwargs['proposal_id'], kwargs['user_id'])
+        if active.get(key):
+            overlapped.append(key)
+        active[key] = True
+        await asyncio.sleep(0.01)
+        try:
+            return await real_cast_vote(**kwargs)
+        finally:
+            active[key] = False
+
+    monkeypatch.setattr(db, "cast_vote", tracking_cast_vote)
+
+    async def runner():
+        results = await asyncio.gather(*(
+            voting.process_vote(user_id, 1, {'option': 'A'}, False, None, idempotency_key=str(key))
+            for user_id, key in [(100, 1), (100, 1), (100, 2), (101, 3), (101, 3)]
+        ))
+        return results, len(voting.vote_locks)
+
+    results, locks_left = asyncio.run(runner())
+    assert all(outcome.ok for outcome in results)
+    assert [outcome.duplicate for outcome in results].count(True) == 2
+    assert overlapped == []
+    assert locks_left == 0
+
+
+def test_double_submit_from_one_ballot_debits_once(monkeypatch, tmp_path):
+    from types import SimpleNamespace
+    import voting
+
+    path = str(tmp_path / "votes.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+
+    class FakeInteraction:
+        # A double click or a second device: same DM message, a new interaction each time
+        def __init__(self, interaction_id):
+            self.id = interaction_id
+            self.message = SimpleNamespace(id=555)
+            self.response = SimpleNamespace(is_done=lambda: True)
+            self.client = SimpleNamespace(get_guild=lambda guild_id: None)
+            self.content = None
+
+        async def edit_original_response(self, content=None, view=None):
+            self.content = content
+
+    async def runner():
+        view = voting.PluralityVoteView(4, ['A', 'B'], 100, campaign_id=9, user_remaining_tokens=5)
+        view.selected_option = 'A'
+        clicks = [FakeInteraction(1001), FakeInteraction(1002)]
+        await asyncio.gather(*(view.finalize_vote(click, 2) for click in clicks))
+        return view, [click.content for click in clicks]
+
+    try:
+        view, contents = asyncio.run(runner())
+    finally:
+        db.reset_active_proposals()
+    assert all(content.startswith("✅") for content in contents)
+    assert sum("already recorded" in content for content in contents) == 1
+    assert view.user_remaining_tokens == 3
+
+    conn = sqlite3.connect(path)
+    balance = conn.execute("SELECT remaining_tokens FROM user_campaign_participation").fetchone()[0]
+    revision = conn.execute("SELECT vote_revision FROM proposals WHERE proposal_id = 4").fetchone()[0]
+    conn.close()
+    assert (balance, revision) == (3, 1)
+
+
+def test_concurrent_campaign_votes_report_the_balance_after_each_debit(monkeypatch, tmp_path):
+    from types import SimpleNamespace
+    import voting
+
+    path = str(tmp_path / "votes.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status, campaign_id) "
+        "VALUES (5, 7, 1, 'T', 'plurality', 'Voting', 9)"
+    )
+    conn.commit()
+    conn.close()
+    db.reset_active_proposals()
+
+    class FakeInteraction:
+        def __init__(self, message_id):
+            self.id = message_id
+            self.message = SimpleNamespace(id=message_id)
+            self.response = SimpleNamespace(is_done=lambda: True)
+            self.client = SimpleNamespace(get_guild=lambda guild_id: None)
+            self.content = None
+
+        async def edit_original_response(self, content=None, view=None):
+            self.content = content
+
+    async def runner():
+        # Two scenario DMs from the same campaign, both opened with 5 tokens
+        views = [voting.PluralityVoteView(proposal_id, ['A', 'B'], 100, campaign_id=9, user_remaining_tokens=5)
+                 for proposal_id in (4, 5)]
+        for view in views:
+            view.selected_option = 'A'
+        clicks = [FakeInteraction(601), FakeInteraction(602)]
+        await asyncio.gather(*(view.finalize_vote(click, 2) for view, click in zip(views, clicks)))
+        return sorted(view.user_remaining_tokens for view in views), [click.content for click in clicks]
+
+    try:
+        balances, contents = asyncio.run(runner())
+    finally:
+        db.reset_active_proposals()
+    assert balances == [1, 3]
+    assert sorted(content.rsplit("You have ", 1)[1] for content in contents) == ["1 left for this campaign.", "3 left for this campaign."]
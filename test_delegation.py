@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import random
+import asyncio
+import functools
+import sqlite3
+from unittest.mock import AsyncMock, patch
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+import voting_utils
+
+resolve = voting_utils.resolve_delegation_weights
+
+
+def naive_weights(edges, voters):
+    """Follow each member's chain until it reaches a voter, a dead end or a repeat."""
+    weights = {voter: 0 for voter in voters}
+    members = set(edges) | set(edges.values()) | set(voters)
+    for member in members:
+        seen = set()
+        while member not in voters and member in edges and member not in seen:
+            seen.add(member)
+            member = edges[member]
+        if member in voters:
+            weights[member] += 1
+    return weights
+
+
+def test_chains_flow_to_direct_voters():
+    # 1 -> 2 -> 3 (votes); 4 -> 3; 5 -> 6 (does not vote)
+    weights, stats = resolve({1: 2, 2: 3, 4: 3, 5: 6}, [3])
+    assert weights == {3: 4}
+    assert stats['delegated_weight'] == 3
+    assert stats['stranded_weight'] == 1
+    assert stats['cycles'] == []
+
+
+def test_direct_vote_overrides_delegation():
+    weights, _ = resolve({1: 2, 2: 3}, [2, 3])
+    assert weights == {2: 2, 3: 1}
+
+
+def test_cycles_are_detected_and_broken():
+    # 1 -> 2 -> 3 -> 1 with 4 feeding in; nobody in the cycle votes
+    weights, stats = resolve({1: 2, 2: 3, 3: 1, 4: 1, 5: 6}, [6])
+    assert weights == {6: 2}
+    assert len(stats['cycles']) == 1 and sorted(stats['cycles'][0]) == [1, 2, 3]
+    assert stats['cycle_weight'] == 4
+    # A direct vote inside the loop breaks it: everyone else reaches the voter
+    weights, stats = resolve({1: 2, 2: 3, 3: 1, 4: 1}, [3])
+    assert weights == {3: 4}
+    assert stats['cycles'] == []
+
+
+def test_matches_naive_chain_walk_on_random_graphs():
+    rng = random.Random(38)
+    for _ in range(50):
+        members = list(range(40))
+        edges = {m: rng.choice(members) for m in rng.sample(members, 30)}
+        edges = {d: t for d, t in edges.items() if d != t}
+        voters = rng.sample(members, rng.randint(0, 8))
+        weights, _ = resolve(edges, voters)
+        assert weights == naive_weights(edges, voters)
+
+
+def test_deep_chain_resolves_without_recursion():
+    n = 10000
+    weights, stats = resolve({i: i + 1 for i in range(n)}, [n])
+    assert weights == {n: n + 1}
+    assert stats['delegated_weight'] == n
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute(db.CREATE_DELEGATIONS_TABLE)
+    conn.execute(db.CREATE_DELEGATION_REVISIONS_TABLE)
+    conn.commit()
+    conn.close()
+
+
+def test_topic_delegation_overrides_general(monkeypatch, tmp_path):
+    path = str(tmp_path / "delegations.db")
+    make_db(path)
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+
+    async def runner():
+        assert await db.get_delegation_revision(7) == 0
+        assert await db.set_delegation(7, 1, 2)
+        assert await db.set_delegation(7, 1, 3, topic=" Budget ")
+        assert not await db.set_delegation(7, 4, 4)
+        assert await db.set_delegation(8, 1, 9)
+        general = await db.get_delegation_edges(7)
+        budget = await db.get_delegation_edges(7, "budget")
+        removed = await db.remove_delegation(7, 1, "BUDGET")
+        missing = await db.remove_delegation(7, 1, "budget")
+        return general, budget, removed, missing, await db.get_delegation_revision(7), await db.get_user_delegations(7, 1)
+
+    general, budget, removed, missing, revision, remaining = asyncio.run(runner())
+    assert general == {1: 2}
+    assert budget == {1: 3}
+    assert removed and not missing
+    assert revision == 3
+    assert [(d['topic'], d['delegate_id']) for d in remaining] == [('', 2)]
+
+
+def test_calculate_results_applies_and_memoizes_delegated_weight():
+    votes = [
+        {'user_id': 1, 'vote_data': json.dumps({'option': 'A'}), 'tokens_invested': None, 'is_abstain': 0},
+        {'user_id': 2, 'vote_data': json.dumps({'option': 'B'}), 'tokens_invested': None, 'is_abstain': 0},
+        {'user_id': 3, 'vote_data': json.dumps({'choice': 'abstain'}), 'tokens_invested': None, 'is_abstain': 1},
+    ]
+    proposal = {'proposal_id': 902, 'server_id': 7, 'voting_mechanism': 'plurality', 'description': '',
+                'hyperparameters': {}, 'vote_revision': 1}
+    edges = AsyncMock(return_value={10: 1, 11: 10, 12: 2, 13: 3})
+
+    async def runner():
+        voting_utils.clear_tally_cache()
+        voting_utils._delegation_memo.clear()
+        with patch('voting_utils.db.get_proposal', new=AsyncMock(return_value=proposal)), \
+             patch('voting_utils.db.get_proposal_votes', new=AsyncMock(return_value=votes)), \
+             patch('voting_utils.db.get_proposal_options', new=AsyncMock(return_value=['A', 'B'])), \
+             patch('voting_utils.db.get_delegation_revision', new=AsyncMock(return_value=5)), \
+             patch('voting_utils.db.get_constitutional_variables', new=AsyncMock(return_value={})), \
+             patch('voting_utils.db.get_delegation_edges', new=edges), \
+             patch('voting_utils.db.get_cached_tally', new=AsyncMock(return_value=None)), \
+             patch('voting_utils.db.store_cached_tally', new=AsyncMock(return_value=True)):
+            first = await voting_utils.calculate_results(902, use_cache=False)
+            second = await voting_utils.calculate_results(902, use_cache=False)
+        return first, second
+
+    first, second = asyncio.run(runner())
+    assert first['winner'] == 'A'
+    assert dict(first['results_detailed'])['A']['weighted_votes'] == 3
+    assert first['delegation'] == {'delegated_weight': 4, 'stranded_weight': 0, 'cycle_weight': 0, 'cycles_broken': 0}
+    assert first['num_abstain_votes'] == 1
+    assert second == first
+    assert edges.await_count == 1
@@ -0,0 +1,80 @@
+import json
+import types
+import sys
+
+# Stub out heavy dependencies from voting_utils
+db_stub = types.ModuleType("db")
+db_stub.get_proposal_options = lambda *args, **kwargs: []
+sys.modules.setdefault("db", db_stub)
+
+# Minimal stub for discord module used during imports
+class _DiscordStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_stub = _DiscordStub("discord")
+
+class _CommandsStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_ext_stub = types.ModuleType("discord.ext")
+discord_commands_stub = _CommandsStub("discord.ext.commands")
+discord_stub.ext = discord_ext_stub
+discord_ext_stub.commands = discord_commands_stub
+
+sys.modules.setdefault("discord", discord_stub)
+sys.modules.setdefault("discord.ext", discord_ext_stub)
+sys.modules.setdefault("discord.ext.commands", discord_commands_stub)
+
+import voting_utils
+
+
+def plurality(option, tokens=None):
+    return {'vote_data': json.dumps({'option': option}), 'tokens_invested': tokens}
+
+
+PARTIES = ['A', 'B', 'C', 'D']
+# Textbook example: 100k / 80k / 30k / 20k votes for 8 seats, expressed as token weights.
+TEXTBOOK = [plurality('A', 100000), plurality('B', 80000), plurality('C', 30000), plurality('D', 20000)]
+
+
+def test_dhondt_textbook_allocation():
+    result = voting_utils.DHondtAllocation.count_votes(TEXTBOOK, PARTIES, {'seats': 8})
+    assert result['seats_allocated'] == {'A': 4, 'B': 3, 'C': 1, 'D': 0}
+    assert result['winner'] == 'A (4), B (3), C (1)'
+    assert result['total_weighted_vote_power'] == 230000
+    assert [r[1] for r in result['allocation_rounds']][:3] == ['A', 'B', 'A']
+
+
+def test_sainte_lague_variant():
+    result = voting_utils.DHondtAllocation.count_votes(TEXTBOOK, PARTIES, {'seats': 8, 'divisor_method': 'Sainte-Laguë'})
+    assert result['divisor_method'] == 'sainte_lague'
+    assert result['seats_allocated'] == {'A': 3, 'B': 3, 'C': 1, 'D': 1}
+
+
+def test_equal_quotients_prefer_more_votes_then_option_order():
+    # A: 6 votes, B: 3 votes -> A's second quotient (3) ties B's first; B has fewer votes so A wins it.
+    votes = [plurality('A', 6), plurality('B', 3), plurality('C', 3)]
+    result = voting_utils.DHondtAllocation.count_votes(votes, ['A', 'B', 'C'], {'seats': 3})
+    assert [r[1] for r in result['allocation_rounds']] == ['A', 'A', 'B']
+
+
+def test_raw_counts_and_zero_tokens():
+    votes = [plurality('A'), plurality('A'), plurality('B', 0)]
+    result = voting_utils.DHondtAllocation.count_votes(votes, ['A', 'B'], {'seats': 2})
+    assert result['party_totals_raw'] == {'A': 2, 'B': 1}
+    assert result['seats_allocated'] == {'A': 2, 'B': 0}
+    empty = voting_utils.DHondtAllocation.count_votes([], ['A', 'B'], {'seats': 2})
+    assert empty['winner'] is None
+    assert empty['reason_for_no_winner'] == 'No effective votes cast.'
+
+
+def test_dhondt_registered_under_aliases():
+    for name in ('dhondt', "d'hondt", "D’Hondt"):
+        assert voting_utils.get_voting_mechanism(name) is voting_utils.DHondtAllocation
+    assert 'dhondt' in voting_utils.PLURALITY_BALLOT_MECHANISMS
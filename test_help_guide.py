@@ -0,0 +1,24 @@
+import os
+import sys
+import asyncio
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import main
+
+
+class FakeContext:
+    embed = None
+
+    async def send(self, content=None, embed=None):
+        self.embed = embed
+
+
+def test_help_guide_fits_discord_embed_limits():
+    ctx = FakeContext()
+    asyncio.run(main.help_guide.callback(ctx))
+    assert ctx.embed is not None
+    for field in ctx.embed.fields:
+        assert len(field.name) <= 256 and len(field.value) <= 1024, field.name
+    assert len(ctx.embed.fields) <= 25 and len(ctx.embed) <= 6000
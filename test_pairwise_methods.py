@@ -0,0 +1,131 @@
+import json
+import random
+import types
+import sys
+
+# Stub out heavy dependencies from voting_utils
+db_stub = types.ModuleType("db")
+db_stub.get_proposal_options = lambda *args, **kwargs: []
+sys.modules.setdefault("db", db_stub)
+
+# Minimal stub for discord module used during imports
+class _DiscordStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_stub = _DiscordStub("discord")
+
+class _CommandsStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_ext_stub = types.ModuleType("discord.ext")
+discord_commands_stub = _CommandsStub("discord.ext.commands")
+discord_stub.ext = discord_ext_stub
+discord_ext_stub.commands = discord_commands_stub
+
+sys.modules.setdefault("discord", discord_stub)
+sys.modules.setdefault("discord.ext", discord_ext_stub)
+sys.modules.setdefault("discord.ext.commands", discord_commands_stub)
+
+import voting_utils
+
+
+def ranked(rankings, tokens=None):
+    return {'vote_data': json.dumps({'rankings': rankings}), 'tokens_invested': tokens}
+
+
+# Classic Schulze example (Wikipedia): 45 voters, 5 options, Condorcet cycle, Schulze winner E.
+WIKI_BALLOTS = (
+    [(['A', 'C', 'B', 'E', 'D'], 5), (['A', 'D', 'E', 'C', 'B'], 5), (['B', 'E', 'D', 'A', 'C'], 8),
+     (['C', 'A', 'B', 'E', 'D'], 3), (['C', 'A', 'E', 'B', 'D'], 7), (['C', 'B', 'A', 'D', 'E'], 2),
+     (['D', 'C', 'E', 'B', 'A'], 7), (['E', 'B', 'A', 'D', 'C'], 8)]
+)
+WIKI_OPTIONS = ['A', 'B', 'C', 'D', 'E']
+
+
+def wiki_votes(grouped_as_tokens):
+    if grouped_as_tokens:
+        return [ranked(r, tokens=n) for r, n in WIKI_BALLOTS]
+    return [ranked(r) for r, n in WIKI_BALLOTS for _ in range(n)]
+
+
+def test_condorcet_reports_cycle_on_wiki_example():
+    result = voting_utils.CondorcetMethod.count_votes(wiki_votes(False), WIKI_OPTIONS)
+    assert result['winner'] is None
+    assert result['pairwise_matrix']['A']['B'] == 20
+    assert result['pairwise_matrix']['B']['A'] == 25
+
+
+def test_schulze_resolves_cycle_and_matches_token_weighting():
+    per_voter = voting_utils.SchulzeMethod.count_votes(wiki_votes(False), WIKI_OPTIONS)
+    weighted = voting_utils.SchulzeMethod.count_votes(wiki_votes(True), WIKI_OPTIONS)
+    assert per_voter['winner'] == 'E'
+    assert per_voter['strongest_paths']['E']['A'] == 25
+    assert per_voter['strongest_paths'] == weighted['strongest_paths']
+    assert weighted['winner'] == 'E'
+    assert weighted['total_weighted_ballot_power'] == 45
+
+
+def test_ranked_pairs_skips_cycle_closing_pair():
+    votes = [ranked(['A', 'B', 'C'], 40), ranked(['B', 'C', 'A'], 35), ranked(['C', 'A', 'B'], 25)]
+    result = voting_utils.RankedPairsMethod.count_votes(votes, ['A', 'B', 'C'])
+    # B>C (75) and A>B (65) lock; C>A (60) would close the cycle.
+    assert [pair[:2] for pair in result['locked_pairs']] == [['B', 'C'], ['A', 'B']]
+    assert [pair[:2] for pair in result['skipped_pairs']] == [['C', 'A']]
+    assert result['winner'] == 'A'
+
+
+def test_copeland_scores_and_tie():
+    votes = [ranked(['A', 'B', 'C']), ranked(['B', 'A', 'C'])]
+    result = voting_utils.CopelandMethod.count_votes(votes, ['A', 'B', 'C'])
+    assert result['copeland_scores'] == {'A': 1.5, 'B': 1.5, 'C': 0.0}
+    assert result['winner'] is None
+    assert result['tied_winners'] == ['A', 'B']
+
+
+def test_zero_token_ballots_are_inert():
+    votes = [ranked(['A', 'B'], 0), ranked(['B', 'A'], 2)]
+    for mechanism in (voting_utils.SchulzeMethod, voting_utils.RankedPairsMethod, voting_utils.CopelandMethod):
+        result = mechanism.count_votes(votes, ['A', 'B'])
+        assert result['winner'] == 'B'
+        assert result['total_raw_ballots'] == 2
+
+
+def _reference_strongest_paths(matrix, options):
+    d = {a: {b: matrix[a][b] for b in options if b != a} for a in options}
+    p = {a: {b: (d[a][b] if d[a][b] > d[b][a] else 0) for b in options if b != a} for a in options}
+    for k in options:
+        for i in options:
+            if i == k:
+                continue
+            for j in options:
+                if j in (i, k):
+                    continue
+                p[i][j] = max(p[i][j], min(p[i][k], p[k][j]))
+    return p
+
+
+def test_strongest_paths_match_reference_on_random_ballots():
+    rng = random.Random(27)
+    options = [f"O{i}" for i in range(7)]
+    for _ in range(20):
+        votes = []
+        for _ in range(rng.randint(1, 60)):
+            prefs = options[:]
+            rng.shuffle(prefs)
+            votes.append(ranked(prefs[:rng.randint(1, len(options))], rng.choice([None, 1, 2, 5])))
+        result = voting_utils.SchulzeMethod.count_votes(votes, options)
+        if result['total_weighted_ballot_power'] == 0:
+            continue
+        assert result['strongest_paths'] == _reference_strongest_paths(result['pairwise_matrix'], options)
+
+
+def test_pairwise_mechanisms_registered():
+    for name in ('schulze', 'ranked_pairs', 'copeland'):
+        assert voting_utils.get_voting_mechanism(name) is not None
+        assert name in voting_utils.RANKED_BALLOT_MECHANISMS
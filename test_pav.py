@@ -0,0 +1,105 @@
+import json
+import random
+import itertools
+import types
+import sys
+from fractions import Fraction
+
+# Stub out heavy dependencies from voting_utils
+db_stub = types.ModuleType("db")
+db_stub.get_proposal_options = lambda *args, **kwargs: []
+sys.modules.setdefault("db", db_stub)
+
+# Minimal stub for discord module used during imports
+class _DiscordStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_stub = _DiscordStub("discord")
+
+class _CommandsStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_ext_stub = types.ModuleType("discord.ext")
+discord_commands_stub = _CommandsStub("discord.ext.commands")
+discord_stub.ext = discord_ext_stub
+discord_ext_stub.commands = discord_commands_stub
+
+sys.modules.setdefault("discord", discord_stub)
+sys.modules.setdefault("discord.ext", discord_ext_stub)
+sys.modules.setdefault("discord.ext.commands", discord_commands_stub)
+
+import voting_utils
+
+PAV = voting_utils.ProportionalApprovalVoting
+
+
+def approve(options, tokens=None):
+    return {'vote_data': json.dumps({'approved': options}), 'tokens_invested': tokens}
+
+
+def test_sequential_pav_is_proportional():
+    votes = [approve(['A', 'B', 'C'])] * 6 + [approve(['D'])] * 3
+    result = PAV.count_votes(votes, ['A', 'B', 'C', 'D'], {'seats': 3, 'pav_mode': 'sequential'})
+    assert result['winners'] == ['A', 'B', 'D']
+    assert result['winner'] == 'A, B, D'
+    second, third = result['rounds_detailed'][1:]
+    assert second['tied_options'] == ['C', 'D']  # B, C and D all gain 3; B wins on approvals, then option order
+    assert third['marginal_gains'] == {'C': 2.0, 'D': 3.0}
+    assert result['committee_score'] == 6 * 1.5 + 3
+
+
+def brute_force_best_score(votes, options, seats):
+    best = None
+    for combo in itertools.combinations(options, seats):
+        score = Fraction(0)
+        for vote in votes:
+            approved = set(json.loads(vote['vote_data'])['approved'])
+            tokens = vote['tokens_invested']
+            weight = 1 if tokens is None else max(tokens, 0)
+            score += weight * sum(Fraction(1, n) for n in range(1, len(approved & set(combo)) + 1))
+        best = score if best is None else max(best, score)
+    return best
+
+
+def test_exact_mode_finds_optimal_committee():
+    rng = random.Random(36)
+    options = ['A', 'B', 'C', 'D', 'E', 'F']
+    for _ in range(15):
+        votes = [approve(rng.sample(options, rng.randint(1, 4)), rng.choice([None, 0, 2, 5])) for _ in range(25)]
+        seats = rng.randint(1, 4)
+        exact = PAV.count_votes(votes, options, {'seats': seats, 'pav_mode': 'exact'})
+        sequential = PAV.count_votes(votes, options, {'seats': seats, 'pav_mode': 'sequential'})
+        if exact['winner'] is None:
+            continue
+        assert exact['pav_mode'] == 'exact'
+        assert abs(exact['committee_score'] - float(brute_force_best_score(votes, options, seats))) < 1e-9
+        assert sequential['committee_score'] <= exact['committee_score'] + 1e-9
+        assert len(exact['winners']) == seats
+
+
+def test_exact_falls_back_when_too_many_committees():
+    options = [f"O{i}" for i in range(30)]
+    votes = [approve(options[:3]), approve(options[5:9])]
+    result = PAV.count_votes(votes, options, {'seats': 10, 'pav_mode': 'exact'})
+    assert result['pav_mode'] == 'sequential'
+    assert len(result['winners']) == 10
+
+
+def test_zero_token_ballots_and_empty_elections():
+    result = PAV.count_votes([approve(['A'], 0), approve(['B'], 2)], ['A', 'B'], {'seats': 1})
+    assert result['winners'] == ['B']
+    assert result['total_raw_voters'] == 2
+    empty = PAV.count_votes([approve(['Z'])], ['A', 'B'], {'seats': 1})
+    assert empty['winner'] is None
+    assert empty['reason_for_no_winner'] == "No effective votes cast."
+
+
+def test_pav_registered():
+    assert voting_utils.get_voting_mechanism('pav') is PAV
+    assert 'pav' in voting_utils.APPROVAL_BALLOT_MECHANISMS
@@ -0,0 +1,86 @@
+import json
+import random
+import types
+import sys
+
+# Stub out heavy dependencies from voting_utils
+db_stub = types.ModuleType("db")
+db_stub.get_proposal_options = lambda *args, **kwargs: []
+sys.modules.setdefault("db", db_stub)
+
+# Minimal stub for discord module used during imports
+class _DiscordStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_stub = _DiscordStub("discord")
+
+class _CommandsStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_ext_stub = types.ModuleType("discord.ext")
+discord_commands_stub = _CommandsStub("discord.ext.commands")
+discord_stub.ext = discord_ext_stub
+discord_ext_stub.commands = discord_commands_stub
+
+sys.modules.setdefault("discord", discord_stub)
+sys.modules.setdefault("discord.ext", discord_ext_stub)
+sys.modules.setdefault("discord.ext.commands", discord_commands_stub)
+
+import voting_utils
+
+OPTIONS = ['A', 'B', 'C', 'D']
+
+
+def test_incremental_updates_match_full_recount():
+    rng = random.Random(35)
+    standings = voting_utils.ProvisionalStandings(OPTIONS)
+    current = {}
+    for _ in range(400):
+        user_id = rng.randint(1, 40)
+        prefs = OPTIONS[:]
+        rng.shuffle(prefs)
+        vote_data = json.dumps({'rankings': prefs[:rng.randint(1, 4)]})
+        tokens = rng.choice([None, 0, 3, -1])
+        is_abstain = rng.random() < 0.1
+        standings.set_ballot(user_id, vote_data, tokens, is_abstain)
+        current[user_id] = {'vote_data': vote_data, 'tokens_invested': tokens, 'is_abstain': is_abstain}
+
+    effective = [v for v in current.values() if not v['is_abstain']]
+    matrix = voting_utils.CondorcetMethod.count_votes(effective, OPTIONS)['pairwise_matrix']
+    assert standings.pairwise == [[matrix[a][b] if a != b else 0 for b in OPTIONS] for a in OPTIONS]
+
+    rounds = voting_utils.RunoffVoting.count_votes(effective, OPTIONS)['rounds_detailed']
+    assert standings.summary()['first_preferences'] == {opt: rounds[0]['weighted_votes_per_option'][opt] for opt in OPTIONS}
+
+
+def test_summary_reports_leaders():
+    standings = voting_utils.ProvisionalStandings(['A', 'B', 'C'])
+    standings.set_ballot(1, {'rankings': ['A', 'B', 'C']}, None)
+    standings.set_ballot(2, {'rankings': ['B', 'A', 'C']}, None)
+    standings.set_ballot(3, {'rankings': ['C', 'A', 'B']}, None)
+    summary = standings.summary()
+    assert summary['condorcet_winner'] == 'A'
+    assert summary['first_preference_leaders'] == ['A', 'B', 'C']
+    assert 'Condorcet winner so far:** A' in voting_utils.format_provisional_standings(summary)
+
+    standings.set_ballot(3, None, None, is_abstain=True)
+    assert standings.summary()['ballots'] == 2
+    assert standings.summary()['condorcet_winner'] is None
+
+
+def test_note_vote_only_touches_built_state():
+    voting_utils.discard_provisional_standings(8)
+    voting_utils.note_vote_for_standings(8, 1, {'rankings': ['A']}, None, False)
+    assert 8 not in voting_utils._provisional_standings
+
+    voting_utils._provisional_standings[8] = voting_utils.ProvisionalStandings(OPTIONS, vote_revision=4)
+    voting_utils.note_vote_for_standings(8, 1, {'rankings': ['B', 'A']}, None, False)
+    assert voting_utils._provisional_standings[8].vote_revision == 5
+    assert voting_utils._provisional_standings[8].summary()['first_preference_leaders'] == ['B']
+    voting_utils.discard_provisional_standings(8)
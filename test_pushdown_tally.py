@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import random
+import asyncio
+import functools
+import sqlite3
+from unittest.mock import AsyncMock, patch
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+import voting_utils
+
+OPTIONS = ['A', 'B', 'C', "D'Quote"]
+PROPOSAL_ID = 55
+
+
+def random_vote_data(rng):
+    """A mix of well-formed (double- and single-encoded) and malformed ballots."""
+    ranking = OPTIONS + ['Z']
+    rng.shuffle(ranking)
+    ballot = {'option': ranking[0], 'approved': ranking[:rng.randint(0, 4)] + rng.choice([[], [ranking[0]], [7]])}
+    kind = rng.random()
+    if kind < 0.7:
+        return json.dumps(json.dumps(ballot))
+    if kind < 0.8:
+        return json.dumps(ballot)
+    return rng.choice([
+        '{broken', json.dumps('{broken'), json.dumps(json.dumps([1, 2])), json.dumps({'option': 3}),
+        json.dumps(json.dumps({'approved': 'A'})), json.dumps(json.dumps(json.dumps(ballot))), 'null',
+    ])
+
+
+def make_db(path, num_votes=1500, seed=34):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute(db.CREATE_VOTES_TABLE)
+    for user_id in range(num_votes):
+        conn.execute(
+            "INSERT INTO votes (proposal_id, user_id, vote_data, is_abstain, tokens_invested) VALUES (?, ?, ?, ?, ?)",
+            (PROPOSAL_ID, user_id, random_vote_data(rng), rng.choice([0, 0, 0, 1, None]), rng.choice([None, -2, 0, 1, 4]))
+        )
+    conn.execute("INSERT INTO votes (proposal_id, user_id, vote_data) VALUES (?, ?, ?)",
+                 (PROPOSAL_ID + 1, 1, json.dumps(json.dumps({'option': 'A'}))))
+    conn.commit()
+    conn.close()
+
+
+def use_db(monkeypatch, tmp_path):
+    path = str(tmp_path / "votes.db")
+    make_db(path)
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+
+
+def test_pushdown_matches_python_tally(monkeypatch, tmp_path):
+    use_db(monkeypatch, tmp_path)
+
+    async def runner():
+        assert await db.sqlite_json1_available()
+        all_votes = await db.get_proposal_votes(PROPOSAL_ID)
+        effective = [v for v in all_votes if not v['is_abstain']]
+        abstains = [v for v in all_votes if v['is_abstain']]
+        for name in voting_utils.PUSHDOWN_TALLY_MECHANISMS:
+            for hyperparameters in ({}, {'winning_threshold_percentage': 20}):
+                pushed, num_abstain, abstain_tokens = await voting_utils.pushdown_tally(PROPOSAL_ID, name, OPTIONS, hyperparameters)
+                expected = voting_utils.get_voting_mechanism(name).count_votes(effective, OPTIONS, hyperparameters)
+                assert pushed == expected, name
+                assert num_abstain == len(abstains)
+                assert abstain_tokens == sum(v['tokens_invested'] or 0 for v in abstains)
+    asyncio.run(runner())
+
+
+def test_pushdown_falls_back_without_json1(monkeypatch, tmp_path):
+    use_db(monkeypatch, tmp_path)
+    monkeypatch.setattr(db, "_json1_supported", False)
+    assert asyncio.run(voting_utils.pushdown_tally(PROPOSAL_ID, 'plurality', OPTIONS, {})) is None
+    assert asyncio.run(voting_utils.pushdown_tally(PROPOSAL_ID, 'borda', OPTIONS, {})) is None
+
+
+def test_calculate_results_uses_pushdown(monkeypatch, tmp_path):
+    use_db(monkeypatch, tmp_path)
+    monkeypatch.setattr(voting_utils, "PUSHDOWN_TALLY_THRESHOLD", 100)
+    proposal = {'proposal_id': PROPOSAL_ID, 'voting_mechanism': 'plurality', 'description': '', 'hyperparameters': {}}
+    get_votes = AsyncMock(return_value=[])
+
+    async def runner():
+        with patch('voting_utils.db.get_proposal', new=AsyncMock(return_value=proposal)), \
+             patch('voting_utils.db.get_proposal_options', new=AsyncMock(return_value=OPTIONS)), \
+             patch('voting_utils.db.get_proposal_votes', new=get_votes):
+            return await voting_utils.calculate_results(PROPOSAL_ID)
+    results = asyncio.run(runner())
+    assert get_votes.await_count == 0
+    assert results['mechanism'] == 'plurality'
+    assert results['total_raw_votes'] > 0
+    assert results['num_abstain_votes'] > 0
@@ -0,0 +1,82 @@
+import json
+import types
+import sys
+
+# Stub out heavy dependencies from voting_utils
+db_stub = types.ModuleType("db")
+db_stub.get_proposal_options = lambda *args, **kwargs: []
+sys.modules.setdefault("db", db_stub)
+
+# Minimal stub for discord module used during imports
+class _DiscordStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_stub = _DiscordStub("discord")
+
+class _CommandsStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_ext_stub = types.ModuleType("discord.ext")
+discord_commands_stub = _CommandsStub("discord.ext.commands")
+discord_stub.ext = discord_ext_stub
+discord_ext_stub.commands = discord_commands_stub
+
+sys.modules.setdefault("discord", discord_stub)
+sys.modules.setdefault("discord.ext", discord_ext_stub)
+sys.modules.setdefault("discord.ext.commands", discord_commands_stub)
+
+import voting_utils
+
+OPTIONS = ['A', 'B', 'C']
+
+
+def qv(allocations, tokens=None):
+    return {'vote_data': json.dumps({'allocations': allocations}), 'tokens_invested': tokens}
+
+
+def test_cost_is_sum_of_squares():
+    ok, cost, error = voting_utils.validate_quadratic_allocation({'A': 3, 'B': 1}, OPTIONS, 10)
+    assert ok and cost == 10 and error == ""
+
+
+def test_overspend_is_rejected_with_cost():
+    ok, cost, error = voting_utils.validate_quadratic_allocation({'A': 4}, OPTIONS, 10)
+    assert not ok
+    assert cost == 16
+    assert "16" in error
+
+
+def test_invalid_allocations_are_rejected():
+    for allocations in ({'Z': 1}, {'A': -1}, {'A': 1.5}, {'A': True}, ['A'], {}):
+        ok, _, _ = voting_utils.validate_quadratic_allocation(allocations, OPTIONS, 100)
+        assert not ok
+
+
+def test_tally_sums_votes_and_credits():
+    votes = [qv({'A': 3}, 9), qv({'B': 2, 'C': 2}, 8), qv({'B': 2}, 4)]
+    result = voting_utils.QuadraticVoting.count_votes(votes, OPTIONS)
+    detailed = dict(result['results_detailed'])
+    assert result['winner'] == 'B'
+    assert detailed['B'] == {'votes': 4, 'credits_spent': 8, 'supporters': 2}
+    assert detailed['A']['votes'] == 3
+    assert result['total_votes_cast'] == 9
+    assert result['total_credits_spent'] == 21
+    assert result['total_raw_ballots'] == 3
+
+
+def test_tie_and_invalid_ballots():
+    votes = [qv({'A': 2}), qv({'B': 2}), qv({'Z': 5}), {'vote_data': 'not json'}]
+    result = voting_utils.QuadraticVoting.count_votes(votes, OPTIONS)
+    assert result['winner'] is None
+    assert result['total_raw_ballots'] == 2
+    assert 'Tie' in result['reason_for_no_winner']
+
+
+def test_quadratic_registered():
+    assert voting_utils.get_voting_mechanism('quadratic') is voting_utils.QuadraticVoting
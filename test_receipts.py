@@ -0,0 +1,121 @@
+import io
+import os
+import sys
+import json
+import random
+import asyncio
+import contextlib
+import functools
+import sqlite3
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+import receipts
+
+
+def make_db(path):
+    asyncio.run(db.init_db())
+    conn = sqlite3.connect(path)
+    for proposal_id in (1, 2):
+        conn.execute(
+            "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status) "
+            "VALUES (?, 7, 1, 'T', 'plurality', 'Voting')", (proposal_id,)
+        )
+    conn.commit()
+    conn.close()
+
+
+def recomputed_root(path, proposal_id):
+    """Root rebuilt from scratch out of the stored votes and leaf slots, level by level."""
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        "SELECT l.leaf_index, l.salt, v.vote_data FROM merkle_leaves l LEFT JOIN votes v "
+        "ON v.proposal_id = l.proposal_id AND v.user_id = l.user_id WHERE l.proposal_id = ?", (proposal_id,)
+    ).fetchall()
+    conn.close()
+    level = {index: receipts.leaf_hash(proposal_id, index, salt, ballot) if ballot is not None else receipts.EMPTY_LEAF
+             for index, salt, ballot in rows}
+    for height in range(receipts.MERKLE_DEPTH):
+        empty = receipts.EMPTY_HASHES[height]
+        level = {parent: receipts.node_hash(level.get(2 * parent, empty), level.get(2 * parent + 1, empty))
+                 for parent in {index >> 1 for index in level}}
+    return level.get(0, receipts.EMPTY_HASHES[receipts.MERKLE_DEPTH]).hex()
+
+
+def test_incremental_tree_matches_recomputation(monkeypatch, tmp_path):
+    path = str(tmp_path / "receipts.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+    rng = random.Random(50)
+
+    async def runner():
+        for _ in range(120):
+            proposal_id = rng.choice([1, 2])
+            user_id = rng.randint(100, 115)
+            ballot = json.dumps({'option': rng.choice('ABC')})
+            action = rng.randrange(5)
+            if action == 0:
+                await db.record_vote(user_id, proposal_id, ballot)
+            elif action == 1:
+                try:
+                    await db.add_vote(proposal_id, user_id, {'option': rng.choice('ABC')})
+                except sqlite3.IntegrityError:
+                    pass  # add_vote refuses a second vote; its leaf update must roll back with it
+            elif action == 2:
+                await db.retract_vote(user_id, proposal_id)
+            elif action == 3:
+                await db.import_ballots(proposal_id, [(f"csv:paper.csv#{rng.randrange(1000)}", ballot)])
+            else:
+                await db.cast_vote(user_id, proposal_id, ballot)
+            tree = await db.get_merkle_root(proposal_id)
+            assert tree['root'] == recomputed_root(path, proposal_id)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(runner())
+    finally:
+        db.reset_active_proposals()
+
+
+def test_receipts_verify_against_published_root(monkeypatch, tmp_path, capsys):
+    path = str(tmp_path / "receipts.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+
+    async def runner():
+        for user_id in range(100, 110):
+            await db.cast_vote(user_id, 1, json.dumps({'option': 'A' if user_id % 2 else 'B'}))
+        await db.retract_vote(103, 1)
+        early = await db.get_vote_receipt(1, 100)
+        root = await db.publish_merkle_root(1)
+        return early, root, {u: await db.get_vote_receipt(1, u) for u in range(100, 110)}
+
+    try:
+        early, root, issued = asyncio.run(runner())
+    finally:
+        db.reset_active_proposals()
+    assert root == recomputed_root(path, 1)
+    assert issued[103] is None  # Retracted votes have no receipt
+    assert receipts.verify_receipt(early, root)  # No vote changed between issuing it and publishing
+    for user_id, receipt in issued.items():
+        if receipt:
+            assert receipts.verify_receipt(receipt, root), user_id
+            assert json.loads(json.loads(receipts.decode_receipt(receipt)['ballot'])) == {'option': 'A' if user_id % 2 else 'B'}
+
+    # Changing the ballot or the salt breaks the proof
+    decoded = receipts.decode_receipt(issued[100])
+    for field, value in (('ballot', json.dumps(json.dumps({'option': 'A'}))), ('salt', '0' * 32)):
+        forged = dict(decoded, **{field: value})
+        forged_receipt = receipts.encode_receipt(forged['proposal_id'], forged['leaf_index'], forged['salt'],
+                                                 forged['ballot'], forged['siblings'])
+        assert not receipts.verify_receipt(forged_receipt, root)
+    assert receipts.decode_receipt("rt1:not-base64!") is None
+
+    capsys.readouterr()
+    assert receipts.main([issued[101], root]) == 0
+    assert "OK" in capsys.readouterr().out
+    assert receipts.main([issued[101], receipts.EMPTY_HASHES[-1].hex()]) == 1
@@ -0,0 +1,123 @@
+import json
+import random
+import itertools
+import types
+import sys
+from fractions import Fraction
+
+# Stub out heavy dependencies from voting_utils
+db_stub = types.ModuleType("db")
+db_stub.get_proposal_options = lambda *args, **kwargs: []
+sys.modules.setdefault("db", db_stub)
+
+# Minimal stub for discord module used during imports
+class _DiscordStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_stub = _DiscordStub("discord")
+
+class _CommandsStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_ext_stub = types.ModuleType("discord.ext")
+discord_commands_stub = _CommandsStub("discord.ext.commands")
+discord_stub.ext = discord_ext_stub
+discord_ext_stub.commands = discord_commands_stub
+
+sys.modules.setdefault("discord", discord_stub)
+sys.modules.setdefault("discord.ext", discord_ext_stub)
+sys.modules.setdefault("discord.ext.commands", discord_commands_stub)
+
+import voting_utils
+
+
+def rank(*options, tokens=None):
+    return {'vote_data': json.dumps({'rankings': list(options)}), 'tokens_invested': tokens}
+
+
+def test_recount_matches_each_mechanism_run_directly():
+    rng = random.Random(40)
+    options = ['A', 'B', 'C', 'D']
+    for _ in range(10):
+        votes = [rank(*rng.sample(options, rng.randint(1, 4)), tokens=rng.choice([None, 0, 2, 3])) for _ in range(30)]
+        ballots = voting_utils.normalize_recount_ballots(votes, options, 'ranked')
+        results = voting_utils.evaluate_recount(voting_utils._group_recount_ballots(ballots), 'ranked', options)
+        for name in ['borda', 'runoff', 'schulze', 'ranked_pairs', 'copeland']:
+            direct = voting_utils.get_voting_mechanism(name).count_votes(votes, options)
+            assert results[name]['winner'] == direct['winner'], name
+        first_prefs = [{'vote_data': {'option': json.loads(v['vote_data'])['rankings'][0]}, 'tokens_invested': v['tokens_invested']} for v in votes]
+        assert results['plurality']['winner'] == voting_utils.PluralityVoting.count_votes(first_prefs, options)['winner']
+
+
+def test_report_flags_disagreement_and_is_reproducible():
+    # A leads on first preferences without a majority, runoff elects C, yet B beats both head to head.
+    votes = [rank('A', 'B', 'C')] * 4 + [rank('C', 'B', 'A')] * 3 + [rank('B', 'C', 'A')] * 2
+    ballots = voting_utils.normalize_recount_ballots(votes, ['A', 'B', 'C'], 'ranked')
+    report = voting_utils.compute_recount_report(ballots, 'ranked', ['A', 'B', 'C'], resamples=50, seed=7)
+    assert report['mechanisms']['plurality']['winner'] is None
+    assert report['mechanisms']['runoff']['winner'] == 'C'
+    assert report['mechanisms']['condorcet']['winner'] == 'B'
+    assert report['winners_agree'] is False
+    assert report['total_ballots'] == 9 and report['distinct_ballots'] == 3
+    for entry in report['mechanisms'].values():
+        assert 0 <= entry['stability'] <= 1
+        assert sum(entry['resample_winners'].values()) == 50
+    again = voting_utils.compute_recount_report(ballots, 'ranked', ['A', 'B', 'C'], resamples=50, seed=7)
+    assert again == report
+    json.dumps(report)
+
+
+def test_unanimous_ballots_are_fully_stable():
+    votes = [{'vote_data': json.dumps({'scores': {'A': 5, 'B': 1}}), 'tokens_invested': None}] * 5
+    ballots = voting_utils.normalize_recount_ballots(votes, ['A', 'B'], 'cardinal', 5)
+    report = voting_utils.compute_recount_report(ballots, 'cardinal', ['A', 'B'], {'max_score': 5}, resamples=20)
+    assert set(report['mechanisms']) == {'score', 'star', 'majority_judgment'}
+    assert report['winners_agree'] is True
+    assert all(entry['stability'] == 1.0 for entry in report['mechanisms'].values())
+
+
+def test_recount_ballot_types():
+    assert voting_utils.recount_ballot_type('stv') == 'ranked'
+    assert voting_utils.recount_ballot_type('pav') == 'approval'
+    assert voting_utils.recount_ballot_type('quadratic') is None
+    empty = voting_utils.compute_recount_report([], 'approval', ['A', 'B'])
+    assert empty['mechanisms']['approval']['winner'] is None
+    assert empty['mechanisms']['approval']['stability'] is None
+
+
+def test_resampled_recounts_leave_the_event_loop(monkeypatch):
+    import asyncio
+
+    votes = [dict(rank('A', 'B', 'C'), user_id=i, is_abstain=0) for i in range(40)]
+
+    async def get_proposal(proposal_id):
+        return {'proposal_id': proposal_id, 'title': 'T', 'voting_mechanism': 'borda', 'server_id': None, 'hyperparameters': {}}
+
+    async def get_proposal_options(proposal_id):
+        return ['A', 'B', 'C']
+
+    async def get_proposal_votes(proposal_id):
+        return votes
+
+    pooled = []
+
+    async def run_in_tally_pool(label, func, *args, timeout=None):
+        pooled.append(args[4])  # resamples
+        return func(*args)
+
+    monkeypatch.setattr(voting_utils.db, "get_proposal", get_proposal, raising=False)
+    monkeypatch.setattr(voting_utils.db, "get_proposal_options", get_proposal_options, raising=False)
+    monkeypatch.setattr(voting_utils.db, "get_proposal_votes", get_proposal_votes, raising=False)
+    monkeypatch.setattr(voting_utils, "run_in_tally_pool", run_in_tally_pool)
+
+    quick = asyncio.run(voting_utils.recount_proposal(1, resamples=0))
+    resampled = asyncio.run(voting_utils.recount_proposal(1, resamples=200))
+    # 40 ballots counted once stays inline; 40 x 201 passes go to the pool
+    assert pooled == [200]
+    assert quick['mechanisms']['borda']['winner'] == resampled['mechanisms']['borda']['winner'] == 'A'
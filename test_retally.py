@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import asyncio
+import functools
+import sqlite3
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+import voting_utils
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    for ddl in (db.CREATE_PROPOSALS_TABLE, db.CREATE_PROPOSAL_OPTIONS_TABLE, db.CREATE_VOTES_TABLE,
+                db.CREATE_PROPOSAL_RESULTS_TABLE, db.CREATE_TALLY_CACHE_TABLE, db.CREATE_CONSTITUTIONAL_VARIABLES_TABLE,
+                db.CREATE_DELEGATION_REVISIONS_TABLE, db.CREATE_RETALLY_CHECKPOINTS_TABLE, db.CREATE_VOTE_WEIGHT_SNAPSHOTS_TABLE):
+        conn.execute(ddl)
+    for proposal_id, server_id, status, ballots in [(1, 7, 'Closed', 'AAB'), (2, 7, 'Closed', 'ABB'), (3, 7, 'Voting', 'A'),
+                                                      (4, 8, 'Closed', 'B'), (5, 7, 'Closed', 'BBA')]:
+        conn.execute(
+            "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status, hyperparameters) "
+            "VALUES (?, ?, 1, 'T', 'plurality', ?, '{}')", (proposal_id, server_id, status)
+        )
+        for order, option in enumerate(['A', 'B']):
+            conn.execute("INSERT INTO proposal_options (proposal_id, option_text, option_order) VALUES (?, ?, ?)",
+                         (proposal_id, option, order))
+        for user_id, option in enumerate(ballots, start=1):
+            conn.execute("INSERT INTO votes (proposal_id, user_id, vote_data, is_abstain) VALUES (?, ?, ?, 0)",
+                         (proposal_id, user_id, json.dumps(json.dumps({'option': option}))))
+    conn.commit()
+    conn.close()
+
+
+def stored_results(path):
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute("SELECT proposal_id, results FROM proposal_results").fetchall())
+    conn.close()
+    return {pid: json.loads(results) for pid, results in rows.items()}
+
+
+def test_diff_results_ignores_json_round_trip_noise():
+    fresh = {'winner': 'A', 'results_detailed': [('A', {'votes': 2})], 'counts': {1: 2}}
+    assert voting_utils.diff_results(json.loads(json.dumps(fresh)), fresh) == []
+    assert voting_utils.diff_results({'winner': 'B', 'extra': 1}, fresh) == ['counts', 'extra', 'results_detailed', 'winner']
+    assert voting_utils.diff_results(None, {'winner': 'A'}) == ['winner']
+
+
+def test_retally_dry_run_then_apply_with_resume(monkeypatch, tmp_path):
+    path = str(tmp_path / "retally.db")
+    make_db(path)
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+
+    async def runner():
+        voting_utils.clear_tally_cache()
+        # Proposal 1 was stored correctly, 2 with a wrong winner, 5 never had results stored.
+        await db.store_proposal_results(1, await voting_utils.calculate_results(1, use_cache=False))
+        await db.store_proposal_results(2, {'winner': 'A', 'mechanism': 'plurality'})
+        dry = await voting_utils.retally_closed_proposals(server_id=7, dry_run=True, chunk_size=2)
+        after_dry = stored_results(path)
+        # Pretend an earlier run committed the first chunk and then died.
+        await db.apply_retally_chunk("retally:7", 1, [])
+        applied = await voting_utils.retally_closed_proposals(server_id=7, dry_run=False, chunk_size=1)
+        return dry, after_dry, applied, await db.get_retally_checkpoint("retally:7")
+
+    try:
+        dry, after_dry, applied, checkpoint = asyncio.run(runner())
+    finally:
+        voting_utils.shutdown_tally_executor()
+
+    assert dry['scanned'] == 3  # Voting and other-guild proposals are skipped
+    assert [c['proposal_id'] for c in dry['changes']] == [2, 5]
+    assert dry['changes'][0]['old_winner'] == 'A' and dry['changes'][0]['new_winner'] == 'B'
+    assert set(after_dry) == {1, 2} and after_dry[2]['winner'] == 'A'
+
+    assert applied['resumed_after'] == 1 and applied['scanned'] == 2
+    assert [c['proposal_id'] for c in applied['changes']] == [2, 5]
+    assert checkpoint is None
+    final = stored_results(path)
+    assert final[2]['winner'] == 'B' and final[5]['winner'] == 'B'
+    assert voting_utils.diff_results(final[2], final[2]) == []
+
+
+def test_retally_leaves_proposal_closed_by_close_proposal_alone(monkeypatch, tmp_path):
+    path = str(tmp_path / "retally.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    asyncio.run(db.init_db())
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status, hyperparameters) "
+        "VALUES (1, 7, 1, 'T', 'plurality', 'Voting', '{}')"
+    )
+    conn.executemany("INSERT INTO proposal_options (proposal_id, option_text, option_order) VALUES (1, ?, ?)",
+                     [('A', 0), ('B', 1)])
+    conn.commit()
+    conn.close()
+    db.reset_active_proposals()
+
+    async def runner():
+        voting_utils.clear_tally_cache()
+        for user_id, option in enumerate('AAB', start=100):
+            await db.cast_vote(user_id, 1, json.dumps({'option': option}))
+        await voting_utils.close_proposal(1)
+        root = (await db.get_merkle_root(1))['published_root']
+        dry = await voting_utils.retally_closed_proposals(server_id=7, dry_run=True)
+        applied = await voting_utils.retally_closed_proposals(server_id=7, dry_run=False)
+        return root, dry, applied, await db.get_merkle_root(1)
+
+    try:
+        root, dry, applied, tree = asyncio.run(runner())
+    finally:
+        voting_utils.shutdown_tally_executor()
+        db.reset_active_proposals()
+
+    assert root and dry['changes'] == [] and applied['changes'] == []
+    assert tree['published_root'] == root
+    assert 'merkle_root' not in stored_results(path)[1]
+
+
+def test_retally_uses_weights_frozen_at_close(monkeypatch, tmp_path):
+    path = str(tmp_path / "retally.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    asyncio.run(db.init_db())
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status, hyperparameters) "
+        "VALUES (1, 7, 1, 'T', 'plurality', 'Voting', '{}')"
+    )
+    conn.executemany("INSERT INTO proposal_options (proposal_id, option_text, option_order) VALUES (1, ?, ?)",
+                     [('A', 0), ('B', 1)])
+    conn.commit()
+    conn.close()
+    db.reset_active_proposals()
+
+    async def runner():
+        voting_utils.clear_tally_cache()
+        for user_id, option in enumerate('ABB', start=100):
+            await db.cast_vote(user_id, 1, json.dumps({'option': option}))
+        closed = await voting_utils.close_proposal(1)
+        # Delegations made after the vote closed must not reach back into it
+        for delegator in (200, 201, 202):
+            await db.set_delegation(7, delegator, 100)
+        frozen = await voting_utils.retally_closed_proposals(server_id=7, dry_run=True)
+        sqlite3.connect(path).execute("DELETE FROM vote_weight_snapshots").connection.commit()
+        voting_utils.clear_tally_cache()
+        live = await voting_utils.calculate_results(1, use_cache=False)
+        legacy = await voting_utils.retally_closed_proposals(server_id=7, dry_run=False)
+        return closed, frozen, live, legacy
+
+    try:
+        closed, frozen, live, legacy = asyncio.run(runner())
+    finally:
+        voting_utils.shutdown_tally_executor()
+        db.reset_active_proposals()
+
+    assert closed['winner'] == 'B'
+    assert frozen['changes'] == [] and frozen['skipped'] == []
+    assert live['winner'] == 'A'  # What an unfrozen recount would have written
+    assert legacy['skipped'] == [1] and legacy['changes'] == []
+    assert stored_results(path)[1]['winner'] == 'B'
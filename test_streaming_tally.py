@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import random
+import asyncio
+import functools
+import sqlite3
+from unittest.mock import AsyncMock, patch
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+import voting_utils
+
+OPTIONS = ['A', 'B', 'C', 'D']
+PROPOSAL_ID = 77
+
+
+def make_db(path, num_votes=2500, seed=33):
+    """Votes table with double-encoded vote_data, as process_vote/record_vote store it."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute(db.CREATE_VOTES_TABLE)
+    for user_id in range(num_votes):
+        ranking = OPTIONS[:]
+        rng.shuffle(ranking)
+        data = {'option': ranking[0], 'approved': ranking[:rng.randint(1, 3)], 'rankings': ranking[:rng.randint(1, 4)]}
+        conn.execute(
+            "INSERT INTO votes (proposal_id, user_id, vote_data, is_abstain, tokens_invested) VALUES (?, ?, ?, ?, ?)",
+            (PROPOSAL_ID, user_id, json.dumps(json.dumps(data)), rng.random() < 0.1, rng.choice([None, 0, 2, 5]))
+        )
+    conn.commit()
+    conn.close()
+
+
+def use_db(monkeypatch, tmp_path):
+    path = str(tmp_path / "votes.db")
+    make_db(path)
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+
+
+def test_stream_matches_full_count(monkeypatch, tmp_path):
+    use_db(monkeypatch, tmp_path)
+
+    async def runner():
+        all_votes = await db.get_proposal_votes(PROPOSAL_ID)
+        effective = [v for v in all_votes if not v['is_abstain']]
+        for name, mechanism in voting_utils.STREAMING_TALLY_MECHANISMS.items():
+            streamed, abstains, abstain_tokens = await voting_utils.stream_tally(PROPOSAL_ID, name, OPTIONS, {}, chunk_size=128)
+            expected = mechanism.count_votes(effective, OPTIONS, {})
+            if name == 'borda':
+                assert sorted(streamed.pop('options_ranked')) == sorted(expected.pop('options_ranked'))
+            assert streamed == expected, name
+            assert abstains == len(all_votes) - len(effective)
+            assert abstain_tokens == sum(v['tokens_invested'] or 0 for v in all_votes if v['is_abstain'])
+    asyncio.run(runner())
+
+
+def test_chunks_are_bounded(monkeypatch, tmp_path):
+    use_db(monkeypatch, tmp_path)
+
+    async def runner():
+        return [len(chunk) async for chunk in db.iter_proposal_vote_chunks(PROPOSAL_ID, chunk_size=300)]
+    sizes = asyncio.run(runner())
+    assert sum(sizes) == 2500
+    assert max(sizes) == 300
+
+
+def test_calculate_results_streams_above_threshold(monkeypatch, tmp_path):
+    use_db(monkeypatch, tmp_path)
+    monkeypatch.setattr(voting_utils, "STREAM_TALLY_THRESHOLD", 1000)
+    monkeypatch.setattr(voting_utils, "PUSHDOWN_TALLY_THRESHOLD", 10 ** 9)
+    proposal = {'proposal_id': PROPOSAL_ID, 'voting_mechanism': 'approval', 'description': '', 'hyperparameters': {}}
+    get_votes = AsyncMock(return_value=[])
+
+    async def runner():
+        with patch('voting_utils.db.get_proposal', new=AsyncMock(return_value=proposal)), \
+             patch('voting_utils.db.get_proposal_options', new=AsyncMock(return_value=OPTIONS)), \
+             patch('voting_utils.db.get_proposal_votes', new=get_votes):
+            return await voting_utils.calculate_results(PROPOSAL_ID)
+    results = asyncio.run(runner())
+    assert get_votes.await_count == 0
+    assert results['total_raw_voters'] + results['num_abstain_votes'] <= 2500
+    assert results['num_abstain_votes'] > 0
+    assert results['winner'] is not None or results['reason_for_no_winner']
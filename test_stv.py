@@ -0,0 +1,95 @@
+import json
+import types
+import sys
+
+# Stub out heavy dependencies from voting_utils
+db_stub = types.ModuleType("db")
+db_stub.get_proposal_options = lambda *args, **kwargs: []
+sys.modules.setdefault("db", db_stub)
+
+# Minimal stub for discord module used during imports
+class _DiscordStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_stub = _DiscordStub("discord")
+
+class _CommandsStub(types.ModuleType):
+    def __getattr__(self, name):
+        attr = type(name, (), {})
+        setattr(self, name, attr)
+        return attr
+
+discord_ext_stub = types.ModuleType("discord.ext")
+discord_commands_stub = _CommandsStub("discord.ext.commands")
+discord_stub.ext = discord_ext_stub
+discord_ext_stub.commands = discord_commands_stub
+
+sys.modules.setdefault("discord", discord_stub)
+sys.modules.setdefault("discord.ext", discord_ext_stub)
+sys.modules.setdefault("discord.ext.commands", discord_commands_stub)
+
+import voting_utils
+
+
+def ranked(rankings, tokens=None):
+    return {'vote_data': json.dumps({'rankings': rankings}), 'tokens_invested': tokens}
+
+
+# "Food at a party" example: 20 voters, 3 seats, Droop quota 6.
+FOOD_OPTIONS = ['Orange', 'Pear', 'Chocolate', 'Strawberry', 'Bonbon']
+FOOD_BALLOTS = [
+    (['Orange'], 4), (['Pear', 'Orange'], 2), (['Chocolate', 'Strawberry'], 8),
+    (['Chocolate', 'Bonbon'], 4), (['Strawberry'], 1), (['Bonbon'], 1),
+]
+
+
+def food_votes():
+    return [ranked(r) for r, n in FOOD_BALLOTS for _ in range(n)]
+
+
+def test_stv_elects_food_example_with_gregory_transfers():
+    result = voting_utils.STVVoting.count_votes(food_votes(), FOOD_OPTIONS, {'seats': 3})
+    assert result['quota'] == 6
+    assert result['winners'] == ['Chocolate', 'Orange', 'Strawberry']
+    assert result['winner'] == 'Chocolate, Orange, Strawberry'
+    first, second = result['rounds_detailed'][0], result['rounds_detailed'][1]
+    assert first['elected_this_round'] == ['Chocolate']
+    assert first['transfer_values'] == {'Chocolate': 0.5}
+    assert second['weighted_votes_per_option']['Strawberry'] == 5
+    assert second['weighted_votes_per_option']['Bonbon'] == 3
+    assert second['eliminated_this_round'] == ['Pear']
+
+
+def test_stv_token_weight_matches_repeated_ballots():
+    grouped = [ranked(r, tokens=n) for r, n in FOOD_BALLOTS]
+    expanded = voting_utils.STVVoting.count_votes(food_votes(), FOOD_OPTIONS, {'seats': 3})
+    weighted = voting_utils.STVVoting.count_votes(grouped, FOOD_OPTIONS, {'seats': 3})
+    assert weighted['winners'] == expanded['winners']
+    assert [r['weighted_votes_per_option'] for r in weighted['rounds_detailed']] == \
+        [r['weighted_votes_per_option'] for r in expanded['rounds_detailed']]
+    assert weighted['total_raw_ballots'] == len(FOOD_BALLOTS)
+
+
+def test_stv_thirds_transfer_exactly():
+    # 2 seats over 9 ballots: quota floor(9/3)+1 = 4, so A's surplus of 5 moves on at 5/9.
+    votes = [ranked(['A', 'B'])] * 3 + [ranked(['A', 'C'])] * 6
+    result = voting_utils.STVVoting.count_votes(votes, ['A', 'B', 'C'], {'seats': 2})
+    assert result['winners'][0] == 'A'
+    second = result['rounds_detailed'][1]['weighted_votes_per_option']
+    assert abs(second['B'] - 15 / 9) < 1e-12
+    assert abs(second['C'] - 30 / 9) < 1e-12
+    assert result['winners'] == ['A', 'C']
+
+
+def test_stv_zero_tokens_and_no_ballots():
+    result = voting_utils.STVVoting.count_votes([ranked(['A'], 0)], ['A', 'B'], {'seats': 1})
+    assert result['winner'] is None
+    assert result['reason_for_no_winner'] == 'No valid ballots cast.'
+
+
+def test_stv_registered_as_ranked_mechanism():
+    assert voting_utils.get_voting_mechanism('stv') is voting_utils.STVVoting
+    assert 'stv' in voting_utils.RANKED_BALLOT_MECHANISMS
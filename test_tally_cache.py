@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import voting_utils
+
+VOTES = [
+    {'user_id': 1, 'vote_data': json.dumps({'option': 'A'}), 'tokens_invested': None, 'is_abstain': 0},
+    {'user_id': 2, 'vote_data': json.dumps({'option': 'B'}), 'tokens_invested': 3, 'is_abstain': 0},
+]
+
+
+def run_twice(revisions, hyperparameters=None):
+    """Run calculate_results once per revision and report how often ballots were fetched."""
+    async def runner():
+        voting_utils.clear_tally_cache()
+        proposals = [
+            {'proposal_id': 901, 'voting_mechanism': 'plurality', 'description': '',
+             'hyperparameters': hyperparameters or {}, 'vote_revision': rev}
+            for rev in revisions
+        ]
+        get_votes = AsyncMock(return_value=VOTES)
+        store = AsyncMock(return_value=True)
+        with patch('voting_utils.db.get_proposal', new=AsyncMock(side_effect=proposals)), \
+             patch('voting_utils.db.get_proposal_votes', new=get_votes), \
+             patch('voting_utils.db.get_proposal_options', new=AsyncMock(return_value=['A', 'B'])), \
+             patch('voting_utils.db.get_cached_tally', new=AsyncMock(return_value=None)), \
+             patch('voting_utils.db.store_cached_tally', new=store):
+            results = [await voting_utils.calculate_results(901) for _ in revisions]
+        return results, get_votes.await_count, store.await_count
+    return asyncio.run(runner())
+
+
+def test_same_revision_served_from_cache():
+    results, fetches, stores = run_twice([4, 4])
+    assert fetches == 1
+    assert stores == 1
+    assert results[0] == results[1]
+    assert results[1]['winner'] == 'B'
+
+
+def test_revision_bump_forces_recount():
+    _, fetches, stores = run_twice([4, 5])
+    assert fetches == 2
+    assert stores == 2
+
+
+def test_cached_result_is_not_shared_by_reference():
+    results, _, _ = run_twice([7, 7])
+    results[1]['winner'] = 'tampered'
+    again, _, _ = run_twice([7])
+    assert again[0]['winner'] == 'B'
+
+
+def test_params_hash_tracks_hyperparameters_and_options():
+    base = voting_utils._tally_params_hash({'allow_abstain': True}, ['A', 'B'])
+    assert base == voting_utils._tally_params_hash({'allow_abstain': True}, ['A', 'B'])
+    assert base != voting_utils._tally_params_hash({'allow_abstain': False}, ['A', 'B'])
+    assert base != voting_utils._tally_params_hash({'allow_abstain': True}, ['B', 'A'])
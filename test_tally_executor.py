@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import random
+import asyncio
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import voting_utils
+
+OPTIONS = ['A', 'B', 'C', 'D']
+
+
+def random_votes(mechanism, count, seed):
+    rng = random.Random(seed)
+    votes = []
+    for _ in range(count):
+        prefs = OPTIONS[:]
+        rng.shuffle(prefs)
+        if mechanism == 'plurality':
+            data = {'option': prefs[0]}
+        elif mechanism == 'approval':
+            data = {'approved': prefs[:rng.randint(1, 3)]}
+        else:
+            data = {'rankings': prefs[:rng.randint(1, 4)]}
+        votes.append({'vote_data': json.dumps(data), 'tokens_invested': rng.choice([None, 1, 3]),
+                      'user_id': rng.randint(1, 10 ** 6)})
+    return votes
+
+
+def test_pool_and_in_process_results_are_identical():
+    async def runner():
+        try:
+            for i, mechanism in enumerate(['plurality', 'approval', 'borda', 'runoff', 'schulze', 'stv']):
+                votes = random_votes(mechanism, 300, seed=i)
+                local = await voting_utils.run_tally(mechanism, votes, OPTIONS, {'seats': 2}, threshold=10 ** 9)
+                pooled = await voting_utils.run_tally(mechanism, votes, OPTIONS, {'seats': 2}, threshold=0)
+                # json.dumps keeps key order and exact float reprs, so equal dumps mean bit-identical results.
+                assert local == pooled, mechanism
+                assert json.dumps(local, default=repr) == json.dumps(pooled, default=repr), mechanism
+        finally:
+            voting_utils.shutdown_tally_executor()
+    asyncio.run(runner())
+
+
+def test_normalized_ballots_match_raw_tally():
+    votes = random_votes('runoff', 200, seed=31)
+    raw = voting_utils.RunoffVoting.count_votes(votes, OPTIONS, {})
+    normalized = voting_utils.RunoffVoting.count_votes(voting_utils.normalize_ballots(votes), OPTIONS, {})
+    assert raw == normalized
+
+
+def test_undecodable_vote_data_is_still_skipped():
+    votes = [{'vote_data': '{broken', 'tokens_invested': None},
+             {'vote_data': json.dumps({'option': 'A'}), 'tokens_invested': None}]
+    ballots = voting_utils.normalize_ballots(votes)
+    assert ballots[0]['vote_data'] == '{broken'
+    result = asyncio.run(voting_utils.run_tally('plurality', votes, OPTIONS, threshold=10 ** 9))
+    assert result['winner'] == 'A'
+    assert result['total_raw_votes'] == 1
+
+
+def test_timeout_returns_none():
+    async def runner():
+        try:
+            return await voting_utils.run_tally('plurality', random_votes('plurality', 50, 1), OPTIONS,
+                                                threshold=0, timeout=0)
+        finally:
+            voting_utils.shutdown_tally_executor()
+    assert asyncio.run(runner()) is None
+
+
+def test_timeout_recycles_pool_and_kills_runaway_worker():
+    import time
+
+    async def runner():
+        try:
+            task = asyncio.ensure_future(voting_utils.run_in_tally_pool("runaway", time.sleep, 60, timeout=0.5))
+            await asyncio.sleep(0.2)
+            workers = list(voting_utils._tally_executor._processes.values())
+            result = await task
+            recycled = voting_utils._tally_executor is None
+            for worker in workers:
+                worker.join(timeout=5)
+            after = await voting_utils.run_tally('plurality', random_votes('plurality', 20, 2), OPTIONS, threshold=0)
+            return result, recycled, workers, after
+        finally:
+            voting_utils.shutdown_tally_executor()
+
+    result, recycled, workers, after = asyncio.run(runner())
+    assert result is None and recycled
+    assert workers and not any(worker.is_alive() for worker in workers)
+    assert after['total_raw_votes'] == 20  # A fresh pool serves the next tally
+
+
+def test_queued_work_does_not_time_out_waiting_for_a_worker():
+    import subprocess
+
+    async def runner():
+        try:
+            # Eight 0.3 s jobs on two workers take ~1.2 s in all, but none runs for 0.6 s
+            return await asyncio.gather(*(
+                voting_utils.run_in_tally_pool("sleep", subprocess.call, ['sleep', '0.3'], timeout=0.6) for _ in range(8)
+            ))
+        finally:
+            voting_utils.shutdown_tally_executor()
+
+    assert asyncio.run(runner()) == [0] * 8
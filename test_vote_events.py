@@ -0,0 +1,133 @@
+import io
+import os
+import sys
+import json
+import random
+import asyncio
+import contextlib
+import functools
+import sqlite3
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+
+
+def make_db(path):
+    asyncio.run(db.init_db())
+    conn = sqlite3.connect(path)
+    for proposal_id in (1, 2):
+        conn.execute(
+            "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status) "
+            "VALUES (?, 7, 1, 'T', 'plurality', 'Voting')", (proposal_id,)
+        )
+    conn.commit()
+    conn.close()
+
+
+def projection(path, proposal_id):
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        "SELECT user_id, vote_data, is_abstain, tokens_invested, source FROM votes WHERE proposal_id = ? ORDER BY user_id",
+        (proposal_id,)
+    ).fetchall()
+    conn.close()
+    return [(u, json.loads(v), bool(a), t, s) for u, v, a, t, s in rows]
+
+
+async def replayed(proposal_id):
+    return [(v['user_id'], v['vote_data'], bool(v['is_abstain']), v['tokens_invested'], v['source'])
+            for v in await db.replay_votes(proposal_id)]
+
+
+def test_events_record_cast_change_and_retract(monkeypatch, tmp_path):
+    path = str(tmp_path / "events.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+
+    async def runner():
+        await db.cast_vote(100, 1, json.dumps({'option': 'A'}))
+        await db.cast_vote(100, 1, json.dumps({'option': 'B'}))
+        retracted = await db.retract_vote(100, 1)
+        again = await db.retract_vote(100, 1)
+        await db.record_vote(101, 1, json.dumps({'option': 'A'}))
+        return retracted, again, await db.get_vote_events(1)
+
+    retracted, again, events = asyncio.run(runner())
+    assert retracted == (True, "Your vote was retracted.")
+    assert again == (False, "You have not voted on this proposal.")
+    assert [(e['user_id'], e['event_type']) for e in events] == [(100, 'cast'), (100, 'change'), (100, 'retract'), (101, 'cast')]
+    assert json.loads(json.loads(events[1]['vote_data'])) == {'option': 'B'}
+    assert projection(path, 1) == [(101, json.dumps({'option': 'A'}), False, None, None)]
+
+
+def test_random_writes_replay_to_the_projection(monkeypatch, tmp_path):
+    path = str(tmp_path / "events.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+    rng = random.Random(49)
+
+    async def runner():
+        writes = 0
+        for step in range(250):
+            proposal_id = rng.choice([1, 2])
+            user_id = rng.randint(100, 115)
+            ballot = json.dumps({'option': rng.choice('ABC')})
+            action = rng.randrange(6)
+            if action == 0:
+                writes += (await db.retract_vote(user_id, proposal_id))[0]
+            elif action == 1:
+                writes += await db.record_vote(user_id, proposal_id, ballot, is_abstain=rng.random() < 0.2)
+            elif action == 2:
+                imported, _ = await db.import_ballots(proposal_id, [(f"csv:s{step}#1", ballot), (f"csv:s{step}#2", ballot)])
+                writes += imported
+            elif action == 3:
+                folded = await db.compact_vote_events(proposal_id)
+                assert folded >= 0
+            else:
+                writes += (await db.cast_vote(user_id, proposal_id, ballot)).ok
+            for pid in (1, 2):
+                assert await replayed(pid) == projection(path, pid), step
+        return writes
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        writes = asyncio.run(runner())
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM vote_events").fetchone()[0] == writes  # One event per write
+    assert conn.execute("SELECT COUNT(*) FROM vote_snapshots").fetchone()[0] == 2
+    conn.close()
+
+    # The projection can be rebuilt from the log alone
+    before = projection(path, 1)
+    conn = sqlite3.connect(path)
+    conn.execute("DELETE FROM votes WHERE proposal_id = 1")
+    conn.commit()
+    conn.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(db.rebuild_votes_projection(1))
+    assert projection(path, 1) == before
+
+
+def test_votes_older_than_the_log_are_snapshotted(monkeypatch, tmp_path):
+    path = str(tmp_path / "events.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    db.reset_active_proposals()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO votes (proposal_id, user_id, vote_data) VALUES (2, 300, ?)", (json.dumps('{"option": "C"}'),))
+    conn.commit()
+    conn.close()
+
+    async def runner():
+        await db.init_db()
+        await db.init_db()  # Seeding happens once
+        await db.cast_vote(301, 2, json.dumps({'option': 'A'}))
+        return await replayed(2)
+
+    assert asyncio.run(runner()) == projection(path, 2)
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM vote_snapshots").fetchone()[0] == 1
+    conn.close()
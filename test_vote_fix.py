@@ -75,8 +75,8 @@ async def test_vote_fix():
 
     # 3. Process the vote to trigger the result calculation and announcement
     print("Processing vote to trigger result calculation...")
-    success, message = await voting.process_vote(user_id, proposal_id, vote_data)
-    print(f"Vote processing result: {success}, Message: {message}")
+    outcome = await voting.process_vote(user_id, proposal_id, vote_data)
+    print(f"Vote processing result: {outcome.ok}, Message: {outcome.message}")
 
     # 4. Check if the results_pending_announcement flag was set
     proposal = await db.get_proposal(proposal_id)
@@ -0,0 +1,63 @@
+import os
+import sys
+import json
+import asyncio
+import functools
+import sqlite3
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import db
+
+
+def test_permutation_is_collision_free_and_keyed():
+    key = b'k' * 16
+    sample = [db.permute_identifier_index(i, key) for i in range(50000)]
+    assert len(set(sample)) == len(sample)
+    assert all(0 <= value < db.IDENTIFIER_SPACE for value in sample)
+    assert sample[:100] == [db.permute_identifier_index(i, key) for i in range(100)]
+    assert sample[:100] != [db.permute_identifier_index(i, b'j' * 16) for i in range(100)]
+    assert db.permute_identifier_index(db.IDENTIFIER_SPACE - 1, key) < db.IDENTIFIER_SPACE
+
+    names = {db.format_vote_identifier(value) for value in sample}
+    assert len(names) == len(sample)
+    assert db.format_vote_identifier(0) == "RedFox0000"
+    assert db.format_vote_identifier(db.IDENTIFIER_SPACE - 1) == "StormyYak9999"
+
+
+def make_db(path):
+    asyncio.run(db.init_db())
+    conn = sqlite3.connect(path)
+    for proposal_id in (1, 2):
+        conn.execute(
+            "INSERT INTO proposals (proposal_id, server_id, proposer_id, title, voting_mechanism, status) "
+            "VALUES (?, 7, 1, 'T', 'plurality', 'Voting')", (proposal_id,)
+        )
+    conn.execute("INSERT INTO constitutional_variables (server_id, name, value, type) VALUES (7, 'vote_privacy', 'anonymous', 'text')")
+    conn.commit()
+    conn.close()
+
+
+def test_identifiers_are_allocated_per_proposal(monkeypatch, tmp_path):
+    path = str(tmp_path / "identifiers.db")
+    monkeypatch.setattr(db, "get_db", functools.partial(db.get_db, path))
+    make_db(path)
+    ballot = json.dumps({'option': 'A'})
+
+    async def runner():
+        first = [(await db.cast_vote(user_id, 1, ballot)).vote_identifier for user_id in range(300)]
+        again = (await db.cast_vote(5, 1, ballot)).vote_identifier
+        other = [await db.get_or_create_vote_identifier(7, user_id, 2) for user_id in range(3)]
+        repeat = await db.get_or_create_vote_identifier(7, 0, 2)
+        return first, again, other, repeat
+
+    first, again, other, repeat = asyncio.run(runner())
+    assert len(set(first)) == 300
+    assert again == first[5]
+    assert repeat == other[0] and len(set(other)) == 3
+
+    conn = sqlite3.connect(path)
+    sequences = dict(conn.execute("SELECT scope, next_index FROM vote_identifier_sequences").fetchall())
+    conn.close()
+    assert sequences == {'proposal:1': 300, 'proposal:2': 3}
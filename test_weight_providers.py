@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+# Ensure bundled dependencies like discord are available
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages'))
+
+import voting_utils
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def member(*roles, days=0):
+    return SimpleNamespace(roles=[SimpleNamespace(name=r) for r in roles], joined_at=NOW - timedelta(days=days))
+
+
+class FakeGuild:
+    def __init__(self, members):
+        self.members = members
+        self.lookups = 0
+
+    def get_member(self, user_id):
+        self.lookups += 1
+        return self.members.get(user_id)
+
+
+def const_vars(**values):
+    return {name: {'value': value} for name, value in values.items()}
+
+
+def test_role_weights_take_heaviest_role():
+    provider = voting_utils.RoleWeightProvider({'Core': 3, 'member': 2, 'Muted': 0})
+    guild = FakeGuild({1: member('core', 'Member'), 2: member('Member'), 3: member('Guest'), 4: member('Muted')})
+    assert provider.resolve([1, 2, 3, 4, 5], {}, guild) == {1: 3, 2: 2, 3: 1, 4: 0, 5: 1}
+
+
+def test_tenure_weights_grow_with_membership_and_cap():
+    provider = voting_utils.TenureWeightProvider(30, 3, NOW)
+    guild = FakeGuild({1: member(days=0), 2: member(days=45), 3: member(days=400), 4: SimpleNamespace(joined_at=None)})
+    assert provider.resolve([1, 2, 3, 4], {}, guild) == {1: 1, 2: 2, 3: 3, 4: 1}
+
+
+def test_campaign_tokens_provider_follows_token_rule():
+    provider = voting_utils.CampaignTokenWeightProvider()
+    votes = {1: {'tokens_invested': 5}, 2: {'tokens_invested': 0}, 3: {'tokens_invested': None}}
+    assert provider.resolve([1, 2, 3], votes, None) == {1: 5, 2: 0, 3: 1}
+
+
+def test_provider_selection_from_constitutional_variables():
+    async def pick(proposal, variables):
+        with patch('voting_utils.db.get_constitutional_variables', new=AsyncMock(return_value=variables)):
+            return await voting_utils.get_weight_provider(proposal)
+
+    proposal = {'proposal_id': 1, 'server_id': 9, 'created_at': '2025-12-01T00:00:00'}
+    role = asyncio.run(pick(proposal, const_vars(vote_weighting='role', role_vote_weights='{"Core": 2}')))
+    assert isinstance(role, voting_utils.RoleWeightProvider) and role.role_weights == {'core': 2}
+    tenure = asyncio.run(pick(proposal, const_vars(vote_weighting='Tenure', tenure_days_per_weight='7', tenure_max_weight='5')))
+    assert isinstance(tenure, voting_utils.TenureWeightProvider)
+    assert (tenure.days_per_weight, tenure.max_weight) == (7, 5)
+    assert tenure.as_of == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    broken = asyncio.run(pick(proposal, const_vars(vote_weighting='role', role_vote_weights='not json')))
+    assert broken.name == 'equal'
+    assert asyncio.run(pick(proposal, {})).name == 'equal'
+    campaign = asyncio.run(pick(dict(proposal, campaign_id=4), {}))
+    assert isinstance(campaign, voting_utils.CampaignTokenWeightProvider)
+
+
+def test_delegation_passes_on_provider_weights():
+    weights, stats = voting_utils.resolve_delegation_weights({1: 2, 3: 2}, [2], {1: 3, 2: 2})
+    assert weights == {2: 6}
+    assert stats['delegated_weight'] == 4
+
+
+def test_calculate_results_resolves_weights_once_per_proposal():
+    votes = [
+        {'user_id': 1, 'vote_data': json.dumps({'option': 'A'}), 'tokens_invested': None, 'is_abstain': 0},
+        {'user_id': 2, 'vote_data': json.dumps({'option': 'B'}), 'tokens_invested': None, 'is_abstain': 0},
+        {'user_id': 3, 'vote_data': json.dumps({'option': 'B'}), 'tokens_invested': None, 'is_abstain': 0},
+    ]
+    proposal = {'proposal_id': 903, 'server_id': 9, 'voting_mechanism': 'plurality', 'description': '',
+                'hyperparameters': {}, 'vote_revision': 2}
+    guild = FakeGuild({1: member('Core'), 2: member(), 3: member()})
+    variables = const_vars(vote_weighting='role', role_vote_weights='{"Core": 3}')
+
+    async def runner():
+        voting_utils.clear_tally_cache()
+        voting_utils._vote_weight_memo.clear()
+        with patch('voting_utils.db.get_proposal', new=AsyncMock(return_value=proposal)), \
+             patch('voting_utils.db.get_proposal_votes', new=AsyncMock(return_value=votes)), \
+             patch('voting_utils.db.get_proposal_options', new=AsyncMock(return_value=['A', 'B'])), \
+             patch('voting_utils.db.get_constitutional_variables', new=AsyncMock(return_value=variables)), \
+             patch('voting_utils.db.get_delegation_revision', new=AsyncMock(return_value=0)):
+            first = await voting_utils.calculate_results(903, use_cache=False, guild=guild)
+            second = await voting_utils.calculate_results(903, use_cache=False, guild=guild)
+        return first, second
+
+    first, second = asyncio.run(runner())
+    assert first['winner'] == 'A'
+    assert first['vote_weighting'] == 'role'
+    assert dict(first['results_detailed'])['A']['weighted_votes'] == 3
+    assert second == first
+    assert guild.lookups == 3  # One member lookup per voter, not per tally
+
+
+def test_guildless_tally_does_not_poison_later_guild_results():
+    votes = [
+        {'user_id': 1, 'vote_data': json.dumps({'option': 'A'}), 'tokens_invested': None, 'is_abstain': 0},
+        {'user_id': 2, 'vote_data': json.dumps({'option': 'B'}), 'tokens_invested': None, 'is_abstain': 0},
+        {'user_id': 3, 'vote_data': json.dumps({'option': 'B'}), 'tokens_invested': None, 'is_abstain': 0},
+    ]
+    proposal = {'proposal_id': 904, 'server_id': 9, 'voting_mechanism': 'plurality', 'description': '',
+                'hyperparameters': {}, 'vote_revision': 2, 'status': 'Voting'}
+    guild = FakeGuild({1: member('Core'), 2: member(), 3: member()})
+    variables = const_vars(vote_weighting='role', role_vote_weights='{"Core": 3}')
+    store_snapshot = AsyncMock()
+
+    async def runner():
+        voting_utils.clear_tally_cache()
+        voting_utils._vote_weight_memo.clear()
+        with patch('voting_utils.db.get_proposal', new=AsyncMock(return_value=proposal)), \
+             patch('voting_utils.db.get_proposal_votes', new=AsyncMock(return_value=votes)), \
+             patch('voting_utils.db.get_proposal_options', new=AsyncMock(return_value=['A', 'B'])), \
+             patch('voting_utils.db.get_constitutional_variables', new=AsyncMock(return_value=variables)), \
+             patch('voting_utils.db.get_delegation_revision', new=AsyncMock(return_value=0)), \
+             patch('voting_utils.db.get_vote_weight_snapshot', new=AsyncMock(return_value=None)), \
+             patch('voting_utils.db.store_vote_weight_snapshot', new=store_snapshot), \
+             patch('voting_utils.db.get_cached_tally', new=AsyncMock(return_value=None)), \
+             patch('voting_utils.db.store_cached_tally', new=AsyncMock()), \
+             patch('voting_utils.db.update_proposal_status', new=AsyncMock()) as update_status:
+            guildless = await voting_utils.calculate_results(904)
+            weights = await voting_utils.resolve_vote_weights(
+                proposal, await voting_utils.get_weight_provider(proposal), [1, 2, 3], votes)
+            deferred = await voting_utils.close_proposal(904)
+            with_guild = await voting_utils.calculate_results(904, guild=guild)
+        return guildless, weights, deferred, with_guild, update_status
+
+    guildless, weights, deferred, with_guild, update_status = asyncio.run(runner())
+    assert guildless is None
+    assert weights == {1: 1, 2: 1, 3: 1}
+    assert deferred is None
+    update_status.assert_not_called()  # Left open until the guild is available
+    store_snapshot.assert_not_called()
+    assert with_guild['winner'] == 'A'
+    assert dict(with_guild['results_detailed'])['A']['weighted_votes'] == 3
@@ -3,11 +3,13 @@ from discord.ext import commands
 import asyncio
 from datetime import datetime, timedelta, timezone
 import json
+import admission
 import db
 import random
 import re  # Need re for parse_duration fallback if not using utils
-from typing import List, Dict, Any, Optional, Union, Tuple
+from typing import List, Dict, Any, Optional, Union, Tuple, Hashable
 import traceback
+import weakref
 
 # Import functions/classes from voting_utils and utils
 import voting_utils  # Import the module to access its functions
@@ -29,74 +31,75 @@ import utils  # Import the module to access its functions
 # ... (ensure all necessary imports are at the top, including db, voting_utils, utils, discord) ...
 
 
-async def process_vote(user_id: int, proposal_id: int, vote_data_dict: Dict[str, Any], is_abstain: bool, tokens_invested: Optional[int]) -> Tuple[bool, str]:
-    """Process and record a vote using db.record_vote."""
+class KeyedLocks:
+    """asyncio.Locks handed out per key, held weakly.
+
+    A key's lock stays in the map only while some coroutine holds or awaits it (their
+    frames keep it alive), so idle keys cost nothing and need no explicit cleanup.
+    """
+
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[Hashable, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def lock(self, key: Hashable) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+# Serializes concurrent submissions by one voter on one proposal (double clicks, two devices).
+vote_locks = KeyedLocks()
+
+
+async def process_vote(user_id: int, proposal_id: int, vote_data_dict: Dict[str, Any], is_abstain: bool, tokens_invested: Optional[int], campaign_id: Optional[int] = None, idempotency_key: Optional[str] = None) -> db.VoteOutcome:
+    """Process and record a vote using db.cast_vote, returning its ``VoteOutcome``.
+
+    Validation, the vote upsert, the campaign token debit (when ``campaign_id`` is given)
+    and the invite bookkeeping run in one transaction on one connection. Calls for the same
+    (proposal, voter) run one at a time, and ``idempotency_key`` (the ballot DM's message ID) makes a
+    repeated submit a no-op, reported as ``duplicate``, that debits and refreshes nothing.
+    """
     try:
         print(
             f"DEBUG: process_vote called for Proposal #{proposal_id} U#{user_id}. Abstain: {is_abstain}, Tokens: {tokens_invested}")
-        # Basic proposal and status checks (can be expanded)
-        proposal = await db.get_proposal(proposal_id)
-        if not proposal:
-            return False, "Proposal not found."
-        if proposal.get('status') != 'Voting':
-            return False, f"Voting is not open for this proposal (status: {proposal.get('status', 'Unknown')})."
-
-        # Deadline check (simplified, more robust checks can be added here or in calling function)
-        deadline_data = proposal.get('deadline')
-        if deadline_data:
-            try:
-                # Assuming deadline_data is an ISO format string from the database
-                deadline_dt = datetime.fromisoformat(deadline_data.replace(
-                    'Z', '+00:00')) if 'Z' in deadline_data else datetime.fromisoformat(deadline_data)
-                # Ensure deadline_dt is timezone-aware for comparison with timezone-aware datetime.now()
-                if deadline_dt.tzinfo is None or deadline_dt.tzinfo.utcoffset(deadline_dt) is None:
-                    deadline_dt = deadline_dt.replace(
-                        tzinfo=timezone.utc)  # Assume UTC if naive
-
-                if datetime.now(timezone.utc) > deadline_dt:
-                    return False, "Voting has ended for this proposal."
-            except ValueError:
-                print(
-                    f"ERROR: Could not parse deadline string '{deadline_data}' in process_vote for Proposal #{proposal_id}")
-                # Decide handling: either let vote proceed or return error
-                # return False, "Error processing proposal deadline."
-                pass  # Or let it proceed if parsing fails, though this might be too lenient
-
-        const_vars = await db.get_constitutional_variables(proposal['server_id'])
-        privacy = const_vars.get('vote_privacy', {}).get('value', 'public')
-        if privacy == 'anonymous':
-            await db.get_or_create_vote_identifier(
-                proposal['server_id'], user_id, proposal_id, proposal.get(
-                    'campaign_id')
-            )
-
         # vote_data_dict is the mechanism-specific data (e.g., {'option': 'A'} or {'rankings': ['A', 'B']})
         # It should already be validated by the view/modal before this stage.
-        vote_json_str = json.dumps(vote_data_dict)
-
-        success = await db.record_vote(
-            user_id=user_id,
-            proposal_id=proposal_id,
-            vote_data=vote_json_str,  # This is the mechanism-specific part
-            is_abstain=is_abstain,
-            tokens_invested=tokens_invested
-        )
-
-        if success:
-            # Trigger update of the public tracking message asynchronously
-            # Ensure proposal object has server_id for fetching guild
-            if proposal.get('server_id') and proposal.get('vote_tracking_message_id'):
-                asyncio.create_task(update_voting_message(
-                    proposal))  # Fire and forget
-            return True, "Vote recorded successfully."
-        else:
-            return False, "Failed to record vote in the database."
+        # Take the per-voter lock first so submissions run in arrival order.
+        async with vote_locks.lock((proposal_id, user_id)):
+            # The registry serves Voting proposals from memory, so finding the guild is cheap.
+            proposal = await db.get_proposal(proposal_id)
+            guild_id = proposal.get('server_id') if proposal else None
+            async with admission.controller.vote_slot(guild_id):
+                outcome = await db.cast_vote(
+                    user_id=user_id,
+                    proposal_id=proposal_id,
+                    vote_data=json.dumps(vote_data_dict),
+                    is_abstain=is_abstain,
+                    tokens_invested=tokens_invested,
+                    campaign_id=campaign_id,
+                    idempotency_key=idempotency_key
+                )
+        if not outcome.ok or outcome.duplicate:
+            return outcome
+
+        voting_utils.note_vote_for_standings(proposal_id, user_id, vote_data_dict, tokens_invested, is_abstain)
+        # Trigger update of the public tracking message asynchronously
+        if outcome.server_id and outcome.vote_tracking_message_id:
+            asyncio.create_task(update_voting_message({
+                'proposal_id': proposal_id, 'server_id': outcome.server_id,
+                'vote_tracking_message_id': outcome.vote_tracking_message_id,
+            }))  # Fire and forget
+        return outcome
 
     except Exception as e:
         print(
             f"CRITICAL ERROR in process_vote for Proposal #{proposal_id} U#{user_id}: {e}")
         traceback.print_exc()
-        return False, "An internal error occurred while processing your vote."
+        return db.VoteOutcome(False, "An internal error occurred while processing your vote.")
 
 
 class AbstainButton(discord.ui.Button):
@@ -298,6 +301,17 @@ class BaseVoteView(discord.ui.View):
                 await interaction.response.defer(ephemeral=True, thinking=True)
             await self.finalize_vote(interaction, tokens_invested_this_scenario=None)
 
+    @staticmethod
+    def submission_key(interaction: discord.Interaction) -> str:
+        """Idempotency key for a submit from this ballot.
+
+        Keyed on the DM's message, not the interaction: a double click or a second device sends
+        a new interaction for the same ballot, and both pass the ``is_submitted`` check before
+        either vote lands. A modal submit carries the message it was opened from.
+        """
+        message = getattr(interaction, 'message', None)
+        return f"msg:{message.id}" if message is not None else str(interaction.id)
+
     async def finalize_vote(self, interaction: discord.Interaction, tokens_invested_this_scenario: Optional[int]):
         """
         Finalizes the vote recording process after all selections (including tokens) are made.
@@ -349,7 +363,7 @@ class BaseVoteView(discord.ui.View):
 
         # Campaign-specific token validation and update
         if self.campaign_id is not None and tokens_invested_this_scenario is not None:
-            # Re-fetch current tokens for atomicity BEFORE recording the vote.
+            # Early check for a friendly message; cast_vote re-checks the balance inside the debit transaction.
             current_db_tokens = await db.get_user_remaining_tokens(self.campaign_id, self.user_id)
 
             if current_db_tokens is None:  # User not enrolled or error
@@ -357,32 +371,35 @@ class BaseVoteView(discord.ui.View):
             elif tokens_invested_this_scenario > current_db_tokens:
                 message = f"❌ Error: You tried to invest {tokens_invested_this_scenario} tokens, but you only have {current_db_tokens} left."
             else:
-                # Proceed with vote recording and token update
-                success, message = await process_vote(
-                    self.user_id, self.proposal_id, actual_vote_data, self.is_abstain_vote, tokens_invested_this_scenario
+                # Vote recording and token debit happen in one transaction, so neither can land without the other.
+                outcome = await process_vote(
+                    self.user_id, self.proposal_id, actual_vote_data, self.is_abstain_vote, tokens_invested_this_scenario,
+                    campaign_id=self.campaign_id, idempotency_key=self.submission_key(interaction)
                 )
-                if success:
-                    token_update_success = await db.update_user_remaining_tokens(
-                        self.campaign_id, self.user_id, tokens_invested_this_scenario
-                    )
-                    if token_update_success:
-                        new_remaining_tokens = current_db_tokens - tokens_invested_this_scenario
-                        message = f"✅ Vote recorded for P#{self.proposal_id} with {tokens_invested_this_scenario} tokens. You have {new_remaining_tokens} tokens left for this campaign."
-                        # Also update the view's token count for immediate display if necessary (though DM is usually ephemeral)
-                        self.user_remaining_tokens = new_remaining_tokens
+                success = outcome.ok
+                if outcome.duplicate:
+                    # A replay of this ballot: nothing was debited, so the balance shown stays as it was.
+                    message = f"✅ Your vote for P#{self.proposal_id} was already recorded. No further tokens were spent."
+                elif success:
+                    # Read inside the debit transaction, so concurrent votes in the campaign cannot make it stale.
+                    new_remaining_tokens = outcome.remaining_tokens
+                    spent_label = "credits" if isinstance(self, QuadraticVoteView) else "tokens"
+                    message = f"✅ Vote recorded for P#{self.proposal_id} with {tokens_invested_this_scenario} {spent_label}. You have {new_remaining_tokens} left for this campaign."
+                    # Also update the view's token count for immediate display if necessary (though DM is usually ephemeral)
+                    self.user_remaining_tokens = new_remaining_tokens
                 else:
-                    # Vote recorded, but token update failed. This is a critical state.
-                    message = f"⚠️ Your vote for P#{self.proposal_id} was recorded, but updating your token balance failed. Please contact an admin."
-                    print(
-                        f"CRITICAL: Vote recorded for P#{self.proposal_id} U#{self.user_id} but token update failed for C#{self.campaign_id}.")
-                    # Consider if the vote should be reversed or flagged. For now, alert user.
-                    success = False  # Mark as overall failure for UI purposes.
+                    message = f"❌ {outcome.message} Your token balance was not changed."
         else:
             # Non-campaign vote
-            success, message = await process_vote(
-                self.user_id, self.proposal_id, actual_vote_data, self.is_abstain_vote, None
+            outcome = await process_vote(
+                self.user_id, self.proposal_id, actual_vote_data, self.is_abstain_vote, None,
+                idempotency_key=self.submission_key(interaction)
             )
-            message = f"✅ Vote recorded for P#{self.proposal_id}." if success else f"❌ {message}"
+            success = outcome.ok
+            if outcome.duplicate:
+                message = f"✅ Your vote for P#{self.proposal_id} was already recorded."
+            else:
+                message = f"✅ Vote recorded for P#{self.proposal_id}." if success else f"❌ {outcome.message}"
 
         # --- Unified Message Content & View Update ---
         # This will be used for the interaction response.
@@ -439,17 +456,10 @@ class BaseVoteView(discord.ui.View):
                 guild = interaction.client.get_guild(
                     proposal_data['server_id'])
                 if guild:
-                    # Update the queue in main.py instead of direct call
-                    if hasattr(interaction.client, 'update_queue'):
-                        await interaction.client.update_queue.put({
-                            'guild_id': guild.id,
-                            'proposal_id': self.proposal_id
-                        })
-                        print(
-                            f"DEBUG: Queued tracker update for P#{self.proposal_id} after vote in finalize_vote.")
-                    else:
-                        print(
-                            f"WARNING: Bot has no update_queue. Cannot queue tracker update for P#{self.proposal_id}.")
+                    # main.update_tracking_worker runs it; over quota it is deferred, not lost
+                    queued = admission.controller.offer_refresh(guild.id, self.proposal_id)
+                    print(
+                        f"DEBUG: Tracker update for P#{self.proposal_id} after vote in finalize_vote {'queued' if queued else 'coalesced or deferred'}.")
 
                 else:
                     print(
@@ -800,6 +810,237 @@ class ApprovalVoteView(BaseVoteView):
         # Proceed to the general submit callback
         await self.submit_vote_callback(interaction)
 
+class QuadraticVoteView(BaseVoteView):
+    """Interactive UI for quadratic campaigns: each click adds one vote to an option, n votes cost n² credits."""
+
+    def add_mechanism_items(self):
+        self._allocations: Dict[str, int] = {}
+        max_option_buttons = 20  # Rows 0-3; row 4 holds Reset/Submit (and Abstain)
+        for i, option in enumerate(self.options[:max_option_buttons]):
+            button_label = option if len(option) <= 70 else option[:67] + "..."
+            button = discord.ui.Button(
+                label=button_label,
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"quadratic_{self.proposal_id}_{i}",
+                row=i // 5
+            )
+            button.callback = self.option_callback
+            self.add_item(button)
+
+        self.reset_button = discord.ui.Button(
+            label="Reset",
+            style=discord.ButtonStyle.danger,
+            custom_id=f"reset_quadratic_{self.proposal_id}",
+            row=4
+        )
+        self.reset_button.callback = self.reset_button_callback
+        self.add_item(self.reset_button)
+
+        self.submit_button = discord.ui.Button(
+            label="Submit Vote",
+            style=discord.ButtonStyle.success,
+            custom_id=f"submit_quadratic_{self.proposal_id}",
+            disabled=True,
+            row=4
+        )
+        self.submit_button.callback = self.submit_button_callback
+        self.add_item(self.submit_button)
+
+    def has_selection(self):
+        return any(self._allocations.values())
+
+    def get_mechanism_vote_data(self) -> Dict[str, Any]:
+        return {"allocations": {opt: n for opt, n in self._allocations.items() if n}}
+
+    def _allocation_cost(self, allocations: Dict[str, int]) -> int:
+        return sum(n * n for n in allocations.values())
+
+    def _refresh_buttons(self):
+        for i, option in enumerate(self.options[:20]):
+            button = discord.utils.get(self.children, custom_id=f"quadratic_{self.proposal_id}_{i}")
+            if not button:
+                continue
+            votes = self._allocations.get(option, 0)
+            base_label = option if len(option) <= 70 else option[:67] + "..."
+            button.label = f"{base_label} ({votes})" if votes else base_label
+            button.style = discord.ButtonStyle.primary if votes else discord.ButtonStyle.secondary
+        cost = self._allocation_cost(self._allocations)
+        self.submit_button.disabled = not self.has_selection()
+        self.submit_button.label = f"Submit Vote ({cost} credits)" if cost else "Submit Vote"
+
+    async def option_callback(self, interaction: discord.Interaction):
+        try:
+            option_index = int(interaction.data["custom_id"].split("_")[-1])
+            option = self.options[option_index]
+        except (ValueError, IndexError):
+            await interaction.response.send_message("Error processing option selection.", ephemeral=True)
+            return
+
+        credits = self.user_remaining_tokens or 0
+        proposed = dict(self._allocations)
+        proposed[option] = proposed.get(option, 0) + 1
+        cost = self._allocation_cost(proposed)
+        if cost > credits:
+            await interaction.response.send_message(
+                f"❌ A vote #{proposed[option]} on '{option}' would bring this ballot to {cost} credits; you have {credits}.",
+                ephemeral=True
+            )
+            return
+
+        self._allocations = proposed
+        self.selected_mechanism_vote_data = self.get_mechanism_vote_data()
+        self._refresh_buttons()
+        await interaction.response.edit_message(
+            content=f"Allocating {sum(self._allocations.values())} vote(s) for {cost} of {credits} credits.",
+            view=self
+        )
+
+    async def reset_button_callback(self, interaction: discord.Interaction):
+        self._allocations = {}
+        self.selected_mechanism_vote_data = {}
+        self._refresh_buttons()
+        await interaction.response.edit_message(content="Allocation cleared.", view=self)
+
+    async def submit_button_callback(self, interaction: discord.Interaction):
+        """Validate the allocation against the live balance, then finalize with its quadratic cost."""
+        if self.is_submitted:
+            await interaction.response.send_message("You have already submitted your vote for this proposal.", ephemeral=True)
+            return
+        if self.campaign_id is None:
+            await interaction.response.send_message("Quadratic voting is only available in campaigns.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        credits = await db.get_user_remaining_tokens(self.campaign_id, self.user_id)
+        ok, cost, error = voting_utils.validate_quadratic_allocation(
+            self.get_mechanism_vote_data()["allocations"], self.options, credits or 0
+        )
+        if not ok:
+            await interaction.followup.send(f"❌ {error}", ephemeral=True)
+            return
+
+        self.selected_mechanism_vote_data = self.get_mechanism_vote_data()
+        await self.finalize_vote(interaction, tokens_invested_this_scenario=cost)
+
+
+class CardinalVoteView(BaseVoteView):
+    """Interactive UI for cardinal ballots (Score/STAR/Majority Judgment): pick an option, then pick its score."""
+
+    def __init__(self, proposal_id: int, options: List[str], user_id: int, allow_abstain: bool = True, campaign_id: Optional[int] = None, campaign_details: Optional[Dict[str, Any]] = None, user_remaining_tokens: Optional[int] = None, max_score: int = voting_utils.CARDINAL_DEFAULT_MAX_SCORE):
+        self.max_score = max_score  # Needed by add_mechanism_items, which the base __init__ calls
+        super().__init__(proposal_id, options, user_id, allow_abstain,
+                         campaign_id, campaign_details, user_remaining_tokens)
+
+    def add_mechanism_items(self):
+        self._scores: Dict[str, int] = {}
+        self._current_index = 0
+
+        self.option_select = discord.ui.Select(
+            placeholder="Choose an option to score",
+            custom_id=f"score_option_{self.proposal_id}",
+            min_values=1,
+            max_values=1,
+            row=0
+        )
+        self.option_select.callback = self.option_select_callback
+        self.add_item(self.option_select)
+
+        self.score_select = discord.ui.Select(
+            placeholder="Choose a score",
+            custom_id=f"score_value_{self.proposal_id}",
+            min_values=1,
+            max_values=1,
+            options=[discord.SelectOption(label=str(s), value=str(s)) for s in range(self.max_score, -1, -1)],
+            row=1
+        )
+        self.score_select.callback = self.score_select_callback
+        self.add_item(self.score_select)
+
+        self.submit_button = discord.ui.Button(
+            label="Submit Vote",
+            style=discord.ButtonStyle.success,
+            custom_id=f"submit_score_{self.proposal_id}",
+            disabled=True,
+            row=4
+        )
+        self.submit_button.callback = self.submit_button_callback
+        self.add_item(self.submit_button)
+        self._refresh_option_select()
+
+    def _refresh_option_select(self):
+        """Rebuild the option picker so each entry shows its current score and the current option is preselected."""
+        select_options = []
+        for i, option in enumerate(self.options[:25]):  # Select menus hold at most 25 entries
+            label = option if len(option) <= 90 else option[:87] + "..."
+            score = self._scores.get(option)
+            select_options.append(discord.SelectOption(
+                label=label,
+                value=str(i),
+                description=f"Score: {score}" if score is not None else "Not scored (counts as 0)",
+                default=(i == self._current_index)
+            ))
+        self.option_select.options = select_options
+
+    def _status_text(self) -> str:
+        current = self.options[self._current_index]
+        lines = [f"Scoring **{current}** (0–{self.max_score}). Options you skip score 0."]
+        for option in self.options:
+            if option in self._scores:
+                lines.append(f"• {option}: {self._scores[option]}")
+        status = "\n".join(lines)
+        return status if len(status) <= 2000 else status[:1997] + "..."
+
+    def has_selection(self):
+        return bool(self._scores)
+
+    def get_mechanism_vote_data(self) -> Dict[str, Any]:
+        return {"scores": voting_utils.encode_score_ballot(self._scores, self.options)}
+
+    async def option_select_callback(self, interaction: discord.Interaction):
+        try:
+            option_index = int(interaction.data["values"][0])
+        except (ValueError, IndexError, KeyError):
+            option_index = -1
+        if not 0 <= option_index < min(len(self.options), 25):
+            await interaction.response.send_message("Error processing option selection.", ephemeral=True)
+            return
+        self._current_index = option_index
+        self._refresh_option_select()
+        await interaction.response.edit_message(content=self._status_text(), view=self)
+
+    async def score_select_callback(self, interaction: discord.Interaction):
+        try:
+            score = int(interaction.data["values"][0])
+        except (ValueError, IndexError, KeyError):
+            await interaction.response.send_message("Error processing score selection.", ephemeral=True)
+            return
+        if not 0 <= score <= self.max_score:
+            await interaction.response.send_message(f"Scores must be between 0 and {self.max_score}.", ephemeral=True)
+            return
+
+        self._scores[self.options[self._current_index]] = score
+        # Move on to the next option that has not been scored yet, if any
+        scorable = min(len(self.options), 25)
+        for step in range(1, scorable + 1):
+            candidate = (self._current_index + step) % scorable
+            if self.options[candidate] not in self._scores:
+                self._current_index = candidate
+                break
+
+        self.selected_mechanism_vote_data = self.get_mechanism_vote_data()
+        self.submit_button.disabled = False
+        self.submit_button.label = f"Submit Vote ({len(self._scores)}/{len(self.options)} scored)"
+        self._refresh_option_select()
+        await interaction.response.edit_message(content=self._status_text(), view=self)
+
+    async def submit_button_callback(self, interaction: discord.Interaction):
+        if not self.has_selection():
+            await interaction.response.send_message("Please score at least one option before submitting.", ephemeral=True)
+            return
+
+        self.selected_mechanism_vote_data = self.get_mechanism_vote_data()
+        await self.submit_vote_callback(interaction)
+
 # Keep EarlyTerminationView and ConfirmTerminationView classes if they are here
 # They should inherit from discord.ui.View and handle their own checks/callbacks
 
@@ -857,7 +1098,10 @@ async def send_voting_dm(member: discord.Member, proposal: Dict, options: List[s
 
                 embed_content += f"**Campaign:** {campaign_details.get('title', 'N/A')}\n"
                 embed_content += f"**Total Scenarios in Campaign:** {campaign_details.get('num_expected_scenarios', 'N/A')}\n"
-                embed_content += f"**Your Remaining Campaign Tokens:** {user_remaining_tokens if user_remaining_tokens is not None else 'N/A'}\n\n"
+                embed_content += f"**Your Remaining Campaign Tokens:** {user_remaining_tokens if user_remaining_tokens is not None else 'N/A'}\n"
+                if campaign_details.get('voting_mode') == 'quadratic':
+                    embed_content += "**Quadratic Voting:** click an option once per vote; n votes on one option cost n² tokens.\n"
+                embed_content += "\n"
             else:
                 embed_content += "**Campaign:** Error fetching campaign details.\n\n"
 
@@ -915,17 +1159,21 @@ async def send_voting_dm(member: discord.Member, proposal: Dict, options: List[s
         }
 
         vote_view: BaseVoteView
-        if mechanism == 'plurality':
+        if campaign_details and campaign_details.get('voting_mode') == 'quadratic':
+            vote_view = QuadraticVoteView(**view_args)
+        elif mechanism in voting_utils.PLURALITY_BALLOT_MECHANISMS:
             vote_view = PluralityVoteView(**view_args)
-        elif mechanism in ['borda', 'runoff', 'condorcet']:
+        elif mechanism in voting_utils.RANKED_BALLOT_MECHANISMS:
             # Assuming RankedVoteView handles ranked mechanisms based on a hyperparameter or internal logic if needed,
             # or we might need BordaVoteView and RunoffVoteView subclasses.
             # For now, RankedVoteView is a general placeholder.
             # Add specific hyperparams if needed by RankedVoteView
             # Add specific hyperparams if needed by RankedVoteView
             vote_view = RankedVoteView(**view_args)
-        elif mechanism == 'approval':
+        elif mechanism in voting_utils.APPROVAL_BALLOT_MECHANISMS:
             vote_view = ApprovalVoteView(**view_args)
+        elif mechanism in voting_utils.CARDINAL_BALLOT_MECHANISMS:
+            vote_view = CardinalVoteView(**view_args, max_score=voting_utils.cardinal_max_score(hyperparameters))
         else:
             # Fallback or error for unsupported mechanisms in DM voting
             print(
@@ -1047,6 +1295,7 @@ async def send_campaign_scenario_dms_to_user(member: discord.Member, scenarios_d
             else:
                 embed_content += "\n**Deadline:** Not set.\n"
 
+            campaign_details = await db.get_campaign(campaign_id)
             view_args = {
                 "proposal_id": proposal_id,
                 "options": options,
@@ -1054,18 +1303,22 @@ async def send_campaign_scenario_dms_to_user(member: discord.Member, scenarios_d
                 "allow_abstain": allow_abstain,
                 "campaign_id": campaign_id,
                 # Potentially pass this in scenario_info if fetched once
-                "campaign_details": await db.get_campaign(campaign_id),
+                "campaign_details": campaign_details,
                 # CRITICAL: pass the batch-consistent token count
                 "user_remaining_tokens": user_tokens_for_this_dm_view
             }
 
             vote_view: BaseVoteView
-            if mechanism == 'plurality':
+            if campaign_details and campaign_details.get('voting_mode') == 'quadratic':
+                vote_view = QuadraticVoteView(**view_args)
+            elif mechanism in voting_utils.PLURALITY_BALLOT_MECHANISMS:
                 vote_view = PluralityVoteView(**view_args)
-            elif mechanism in ['borda', 'runoff', 'condorcet']:
+            elif mechanism in voting_utils.RANKED_BALLOT_MECHANISMS:
                 vote_view = RankedVoteView(**view_args)
-            elif mechanism == 'approval':
+            elif mechanism in voting_utils.APPROVAL_BALLOT_MECHANISMS:
                 vote_view = ApprovalVoteView(**view_args)
+            elif mechanism in voting_utils.CARDINAL_BALLOT_MECHANISMS:
+                vote_view = CardinalVoteView(**view_args, max_score=voting_utils.cardinal_max_score(hyperparameters))
             else:
                 print(
                     f"Warning: Unsupported mechanism '{mechanism}' for DM view for P#{proposal_id}. Defaulting.")
@@ -1,8 +1,20 @@
 import asyncio
+import concurrent.futures
+import copy
+import csv
 import datetime
+import hashlib
+import heapq
+import io
+import itertools
 import json
+import math
+import random
+import sys
 import traceback
+import weakref
 from datetime import datetime, timezone
+from fractions import Fraction
 from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING, Union
 
 import discord
@@ -50,9 +62,20 @@ class PluralityVoting:
     @staticmethod
     def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
         """Counts votes for Plurality voting, considering token investments and hyperparameters."""
-        if hyperparameters is None: hyperparameters = {}
+        tally = PluralityVoting.new_tally(options)
+        PluralityVoting.accumulate(tally, votes)
+        return PluralityVoting.finalize(tally, options, hyperparameters)
+
+    @staticmethod
+    def new_tally(options: List[str]) -> Dict[str, Any]:
+        """Empty running totals; feed chunks of votes to ``accumulate`` then call ``finalize``."""
+        return {'results': {option: {'raw_votes': 0, 'weighted_votes': 0} for option in options},
+                'total_raw_votes': 0, 'total_weighted_votes': 0}
 
-        results = {option: {'raw_votes': 0, 'weighted_votes': 0} for option in options}
+    @staticmethod
+    def accumulate(tally: Dict[str, Any], votes: List[Dict]) -> None:
+        """Adds a chunk of votes to the running totals in ``tally``."""
+        results = tally['results']
         total_raw_votes = 0
         total_weighted_votes = 0
 
@@ -71,7 +94,7 @@ class PluralityVoting:
 
             chosen_option = vote_data.get('option')
             if chosen_option is None or not isinstance(chosen_option, str) or chosen_option not in results:
-                print(f"WARNING: Invalid or missing option in vote_data: {chosen_option}. Valid: {options}. Vote: {vote_record}")
+                print(f"WARNING: Invalid or missing option in vote_data: {chosen_option}. Valid: {list(results)}. Vote: {vote_record}")
                 continue
 
             # Determine vote weight based on tokens_invested
@@ -88,6 +111,17 @@ class PluralityVoting:
             total_raw_votes += 1
             total_weighted_votes += vote_weight
 
+        tally['total_raw_votes'] += total_raw_votes
+        tally['total_weighted_votes'] += total_weighted_votes
+
+    @staticmethod
+    def finalize(tally: Dict[str, Any], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Determines the winner from accumulated totals."""
+        if hyperparameters is None: hyperparameters = {}
+        results = tally['results']
+        total_raw_votes = tally['total_raw_votes']
+        total_weighted_votes = tally['total_weighted_votes']
+
         # Sort by weighted_votes for winner determination
         # Results structure: {option: {'raw_votes': X, 'weighted_votes': Y}}
         # Convert to list of tuples for sorting: (option, {'raw_votes': X, 'weighted_votes': Y})
@@ -184,11 +218,26 @@ class BordaCount:
     @staticmethod
     def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
         """Counts Borda votes, applying token weighting."""
+        tally = BordaCount.new_tally(options)
+        BordaCount.accumulate(tally, votes)
+        return BordaCount.finalize(tally, options, hyperparameters)
+
+    @staticmethod
+    def new_tally(options: List[str]) -> Dict[str, Any]:
+        """Empty running totals; feed chunks of votes to ``accumulate`` then call ``finalize``."""
         # options provided by calculate_results are the definitive list of valid options for the proposal
-        points = {option: {'raw_score': 0, 'weighted_score': 0} for option in options}
-        all_options_actually_ranked = set() # To track options that received any ranking
-        total_raw_ranking_sets = 0 # Number of voters who submitted valid rankings
-        total_weighted_ranking_power = 0 # Sum of tokens from voters who submitted valid rankings
+        return {'points': {option: {'raw_score': 0, 'weighted_score': 0} for option in options},
+                'options_ranked': set(), # To track options that received any ranking
+                'total_raw_ranking_sets': 0, # Number of voters who submitted valid rankings
+                'total_weighted_ranking_power': 0} # Sum of tokens from voters who submitted valid rankings
+
+    @staticmethod
+    def accumulate(tally: Dict[str, Any], votes: List[Dict]) -> None:
+        """Adds a chunk of votes to the running totals in ``tally``."""
+        points = tally['points']
+        all_options_actually_ranked = tally['options_ranked']
+        total_raw_ranking_sets = 0
+        total_weighted_ranking_power = 0
 
         for vote_record in votes:
             vote_data_str = vote_record.get('vote_data')
@@ -202,7 +251,7 @@ class BordaCount:
                 print(f"WARNING: Borda: Invalid vote_data structure or missing rankings. Vote: {vote_record}")
                 continue
 
-            rankings = [r for r in vote_data['rankings'] if isinstance(r, str) and r in options]
+            rankings = [r for r in vote_data['rankings'] if isinstance(r, str) and r in points]
             if not rankings: # Skip if no valid rankings provided for known options
                 continue
 
@@ -230,6 +279,17 @@ class BordaCount:
                 points[ranked_option]['weighted_score'] += score_for_this_rank * vote_weight
                 all_options_actually_ranked.add(ranked_option)
 
+        tally['total_raw_ranking_sets'] += total_raw_ranking_sets
+        tally['total_weighted_ranking_power'] += total_weighted_ranking_power
+
+    @staticmethod
+    def finalize(tally: Dict[str, Any], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Determines the winner from accumulated totals."""
+        points = tally['points']
+        all_options_actually_ranked = tally['options_ranked']
+        total_raw_ranking_sets = tally['total_raw_ranking_sets']
+        total_weighted_ranking_power = tally['total_weighted_ranking_power']
+
         # Ensure all official options are in the results, even if they got 0 score.
         # The initial `points` dict already does this.
 
@@ -283,9 +343,23 @@ class ApprovalVoting:
     @staticmethod
     def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
         """Counts approval votes, applying token weighting."""
-        results = {option: {'raw_approvals': 0, 'weighted_approvals': 0} for option in options}
-        total_raw_voters = 0 # Number of unique voters who cast effective (approval) votes
-        total_weighted_voting_power = 0 # Sum of tokens from these voters
+        tally = ApprovalVoting.new_tally(options)
+        ApprovalVoting.accumulate(tally, votes)
+        return ApprovalVoting.finalize(tally, options, hyperparameters)
+
+    @staticmethod
+    def new_tally(options: List[str]) -> Dict[str, Any]:
+        """Empty running totals; feed chunks of votes to ``accumulate`` then call ``finalize``."""
+        return {'results': {option: {'raw_approvals': 0, 'weighted_approvals': 0} for option in options},
+                'total_raw_voters': 0, # Number of unique voters who cast effective (approval) votes
+                'total_weighted_voting_power': 0} # Sum of tokens from these voters
+
+    @staticmethod
+    def accumulate(tally: Dict[str, Any], votes: List[Dict]) -> None:
+        """Adds a chunk of votes to the running totals in ``tally``."""
+        results = tally['results']
+        total_raw_voters = 0
+        total_weighted_voting_power = 0
 
         for vote_record in votes:
             vote_data_str = vote_record.get('vote_data')
@@ -299,7 +373,7 @@ class ApprovalVoting:
                 print(f"WARNING: Approval: Invalid vote_data structure or missing approved list. Vote: {vote_record}")
                 continue
 
-            approved_options_by_voter = [opt for opt in vote_data['approved'] if isinstance(opt, str) and opt in options]
+            approved_options_by_voter = [opt for opt in vote_data['approved'] if isinstance(opt, str) and opt in results]
             if not approved_options_by_voter: # Skip if voter approved no valid options
                 continue
 
@@ -318,6 +392,16 @@ class ApprovalVoting:
                 results[approved_option]['raw_approvals'] += 1
                 results[approved_option]['weighted_approvals'] += vote_weight
 
+        tally['total_raw_voters'] += total_raw_voters
+        tally['total_weighted_voting_power'] += total_weighted_voting_power
+
+    @staticmethod
+    def finalize(tally: Dict[str, Any], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Determines the winner from accumulated totals."""
+        results = tally['results']
+        total_raw_voters = tally['total_raw_voters']
+        total_weighted_voting_power = tally['total_weighted_voting_power']
+
         sorted_results_detailed = sorted(results.items(), key=lambda item: item[1]['weighted_approvals'], reverse=True)
 
         winner = None # Approval voting often doesn't declare a single winner unless specific rules (e.g. fixed number of winners)
@@ -521,124 +605,1916 @@ class RunoffVoting:
 
 
 
-class CondorcetMethod:
-    """Condorcet method based on pairwise comparisons"""
+def build_weighted_pairwise_matrix(votes: List[Dict], options: List[str], label: str = "Pairwise") -> Tuple[Dict[str, Dict[str, Any]], int, Any]:
+    """Builds the weighted pairwise matrix shared by all Condorcet-family mechanisms.
+
+    ``matrix[a][b]`` is the total weight of ballots ranking ``a`` above ``b``; unranked
+    options tie with each other below every ranked option. Identical rankings are grouped
+    first, so the O(k²) comparison runs once per distinct ballot rather than per voter.
+
+    Vote weights: ``tokens`` None or negative counts as 1, otherwise ``tokens`` (0 is inert).
+    Returns ``(matrix, total_raw_ballots, total_weighted_ballot_power)``.
+    """
+    pairwise_matrix = {a: {b: 0 for b in options if b != a} for a in options}
+    total_raw_ballots = 0
+    total_weighted_ballot_power = 0
+    grouped_rankings: Dict[Tuple[str, ...], Any] = {}
+
+    for vote_record in votes:
+        vote_data_str = vote_record.get('vote_data')
+        try:
+            vote_data = json.loads(vote_data_str) if isinstance(vote_data_str, str) else vote_data_str
+        except json.JSONDecodeError:
+            print(f"WARNING: {label}: Could not decode vote_data JSON: {vote_data_str}. Vote: {vote_record}")
+            continue
+
+        if not isinstance(vote_data, dict) or not isinstance(vote_data.get('rankings'), list):
+            print(f"WARNING: {label}: Invalid vote_data structure or missing rankings. Vote: {vote_record}")
+            continue
+
+        rankings = tuple(r for r in vote_data['rankings'] if isinstance(r, str) and r in options)
+        if not rankings:
+            continue
+
+        weight = vote_record.get('tokens_invested', 1)
+        if weight is None or weight < 0:
+            weight = 1
+
+        total_raw_ballots += 1
+        total_weighted_ballot_power += weight
+        grouped_rankings[rankings] = grouped_rankings.get(rankings, 0) + weight
+
+    default_rank = len(options)
+    for rankings, weight in grouped_rankings.items():
+        if not weight:
+            continue
+        rank_order = {opt: idx for idx, opt in enumerate(rankings)}
+        for i in range(len(options)):
+            for j in range(i + 1, len(options)):
+                a = options[i]
+                b = options[j]
+                rank_a = rank_order.get(a, default_rank)
+                rank_b = rank_order.get(b, default_rank)
+                if rank_a < rank_b:
+                    pairwise_matrix[a][b] += weight
+                elif rank_b < rank_a:
+                    pairwise_matrix[b][a] += weight
+                # Ties contribute nothing
+
+    return pairwise_matrix, total_raw_ballots, total_weighted_ballot_power
+
+
+class CondorcetMethod:
+    """Condorcet method based on pairwise comparisons"""
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Counts Condorcet votes using weighted pairwise comparisons."""
+        pairwise_matrix, total_raw_ballots, total_weighted_ballot_power = build_weighted_pairwise_matrix(
+            votes, options, "Condorcet"
+        )
+        return CondorcetMethod.from_pairwise(pairwise_matrix, options, hyperparameters, total_raw_ballots, total_weighted_ballot_power)
+
+    @staticmethod
+    def from_pairwise(pairwise_matrix: Dict[str, Dict[str, Any]], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None,
+                      total_raw_ballots: int = 0, total_weighted_ballot_power: Any = 0):
+        """Finds the Condorcet winner of an already-built weighted pairwise matrix."""
+        winner = None
+        for option in options:
+            beats_all = True
+            for opponent in options:
+                if option == opponent:
+                    continue
+                if pairwise_matrix[option].get(opponent, 0) <= pairwise_matrix[opponent].get(option, 0):
+                    beats_all = False
+                    break
+            if beats_all:
+                winner = option
+                break
+
+        reason_for_no_winner = None if winner else "No Condorcet winner (cycle or tie)."
+
+        return {
+            'mechanism': 'condorcet',
+            'pairwise_matrix': pairwise_matrix,
+            'winner': winner,
+            'reason_for_no_winner': reason_for_no_winner if not winner else None,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': total_weighted_ballot_power
+        }
+
+    @staticmethod
+    def get_description():
+        return "Compares options head-to-head; an option that beats every other wins."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+def schulze_strongest_paths(pairwise_matrix: Dict[str, Dict[str, Any]], options: List[str]) -> List[List[Any]]:
+    """Widest (strongest) path strengths between every pair of options.
+
+    Direct links use winning votes: ``d[a][b]`` if it beats ``d[b][a]``, otherwise 0.
+    Floyd–Warshall relaxes whole rows per intermediate option, so the cost is O(k³)
+    list operations on top of the single ballot pass that built the matrix.
+    """
+    n = len(options)
+    d = [[pairwise_matrix[a].get(b, 0) if a != b else 0 for b in options] for a in options]
+    paths = [[d[i][j] if i != j and d[i][j] > d[j][i] else 0 for j in range(n)] for i in range(n)]
+
+    for k in range(n):
+        row_k = paths[k]
+        for i in range(n):
+            p_ik = paths[i][k]
+            if i == k or not p_ik:
+                continue
+            paths[i] = [p_ij if p_ij >= p_kj or p_ij >= p_ik else (p_kj if p_kj < p_ik else p_ik)
+                        for p_ij, p_kj in zip(paths[i], row_k)]
+    for i in range(n):
+        paths[i][i] = 0
+    return paths
+
+
+def _pairwise_no_ballots_result(mechanism: str, pairwise_matrix: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        'mechanism': mechanism,
+        'pairwise_matrix': pairwise_matrix,
+        'winner': None,
+        'reason_for_no_winner': "No effective votes cast.",
+        'total_raw_ballots': 0,
+        'total_weighted_ballot_power': 0,
+    }
+
+
+class SchulzeMethod:
+    """Schulze (beatpath) method: always picks a Condorcet winner when one exists and
+    resolves cycles by comparing the strongest path between each pair of options.
+
+    Vote weights follow the Condorcet rules (see ``build_weighted_pairwise_matrix``).
+    """
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Counts Schulze votes from the weighted pairwise matrix."""
+        pairwise_matrix, total_raw_ballots, total_weighted_ballot_power = build_weighted_pairwise_matrix(
+            votes, options, "Schulze"
+        )
+        return SchulzeMethod.from_pairwise(pairwise_matrix, options, hyperparameters, total_raw_ballots, total_weighted_ballot_power)
+
+    @staticmethod
+    def from_pairwise(pairwise_matrix: Dict[str, Dict[str, Any]], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None,
+                      total_raw_ballots: int = 0, total_weighted_ballot_power: Any = 0):
+        """Runs Schulze on an already-built weighted pairwise matrix."""
+        if total_weighted_ballot_power <= 0:
+            return _pairwise_no_ballots_result('schulze', pairwise_matrix)
+
+        paths = schulze_strongest_paths(pairwise_matrix, options)
+        n = len(options)
+        # Number of options each option beats on strongest paths; the Schulze order sorts by it.
+        beat_counts = [sum(1 for j in range(n) if j != i and paths[i][j] > paths[j][i]) for i in range(n)]
+        winners = [options[i] for i in range(n)
+                   if all(paths[i][j] >= paths[j][i] for j in range(n) if j != i)]
+
+        winner = winners[0] if len(winners) == 1 else None
+        reason_for_no_winner = None
+        if not winner:
+            reason_for_no_winner = f"Tie between {len(winners)} options on strongest paths." if winners else "No Schulze winner."
+
+        return {
+            'mechanism': 'schulze',
+            'pairwise_matrix': pairwise_matrix,
+            'strongest_paths': {options[i]: {options[j]: paths[i][j] for j in range(n) if j != i} for i in range(n)},
+            'results_detailed': sorted(
+                [(options[i], {'paths_won': beat_counts[i]}) for i in range(n)],
+                key=lambda item: item[1]['paths_won'], reverse=True
+            ),
+            'winner': winner,
+            'tied_winners': winners if len(winners) > 1 else [],
+            'reason_for_no_winner': reason_for_no_winner,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': total_weighted_ballot_power
+        }
+
+    @staticmethod
+    def get_description():
+        return "Head-to-head comparisons; cycles are resolved by the strongest chain of pairwise wins."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+class RankedPairsMethod:
+    """Ranked Pairs (Tideman): locks pairwise victories from strongest to weakest,
+    skipping any that would create a cycle. The option nobody is locked above wins.
+
+    Vote weights follow the Condorcet rules (see ``build_weighted_pairwise_matrix``).
+    """
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Counts Ranked Pairs votes from the weighted pairwise matrix."""
+        pairwise_matrix, total_raw_ballots, total_weighted_ballot_power = build_weighted_pairwise_matrix(
+            votes, options, "Ranked Pairs"
+        )
+        return RankedPairsMethod.from_pairwise(pairwise_matrix, options, hyperparameters, total_raw_ballots, total_weighted_ballot_power)
+
+    @staticmethod
+    def from_pairwise(pairwise_matrix: Dict[str, Dict[str, Any]], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None,
+                      total_raw_ballots: int = 0, total_weighted_ballot_power: Any = 0):
+        """Runs Ranked Pairs on an already-built weighted pairwise matrix."""
+        if total_weighted_ballot_power <= 0:
+            return _pairwise_no_ballots_result('ranked_pairs', pairwise_matrix)
+
+        index = {opt: i for i, opt in enumerate(options)}
+        victories = []
+        for a in options:
+            for b in options:
+                if a != b and pairwise_matrix[a][b] > pairwise_matrix[b][a]:
+                    victories.append((a, b, pairwise_matrix[a][b], pairwise_matrix[b][a]))
+        # Strongest winning votes first, then largest margin, then option order for determinism.
+        victories.sort(key=lambda v: (-v[2], v[3], index[v[0]], index[v[1]]))
+
+        # reach[i] is a bitmask of options reachable from i through locked edges, kept
+        # transitively closed so each cycle check is a single bit test.
+        reach = [0] * len(options)
+        has_incoming = [False] * len(options)
+        locked_pairs = []
+        skipped_pairs = []
+        for a, b, for_a, for_b in victories:
+            ia, ib = index[a], index[b]
+            if reach[ib] >> ia & 1:
+                skipped_pairs.append([a, b, for_a - for_b])
+                continue
+            locked_pairs.append([a, b, for_a - for_b])
+            has_incoming[ib] = True
+            gained = reach[ib] | (1 << ib)
+            bit_a = 1 << ia
+            for x in range(len(options)):
+                if x == ia or reach[x] & bit_a:
+                    reach[x] |= gained
+
+        sources = [opt for opt in options if not has_incoming[index[opt]]]
+        winner = sources[0] if len(sources) == 1 else None
+        reason_for_no_winner = None
+        if not winner:
+            reason_for_no_winner = f"Tie between {len(sources)} unbeaten options after locking pairs." if sources else "No Ranked Pairs winner."
+
+        return {
+            'mechanism': 'ranked_pairs',
+            'pairwise_matrix': pairwise_matrix,
+            'locked_pairs': locked_pairs,
+            'skipped_pairs': skipped_pairs,
+            'winner': winner,
+            'tied_winners': sources if len(sources) > 1 else [],
+            'reason_for_no_winner': reason_for_no_winner,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': total_weighted_ballot_power
+        }
+
+    @staticmethod
+    def get_description():
+        return "Locks in the strongest head-to-head wins first, skipping any that would form a cycle."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+class CopelandMethod:
+    """Copeland method: one point per pairwise victory and ``copeland_tie_points``
+    (default 0.5) per pairwise tie. The highest score wins.
+
+    Vote weights follow the Condorcet rules (see ``build_weighted_pairwise_matrix``).
+    """
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Counts Copeland scores from the weighted pairwise matrix."""
+        pairwise_matrix, total_raw_ballots, total_weighted_ballot_power = build_weighted_pairwise_matrix(
+            votes, options, "Copeland"
+        )
+        return CopelandMethod.from_pairwise(pairwise_matrix, options, hyperparameters, total_raw_ballots, total_weighted_ballot_power)
+
+    @staticmethod
+    def from_pairwise(pairwise_matrix: Dict[str, Dict[str, Any]], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None,
+                      total_raw_ballots: int = 0, total_weighted_ballot_power: Any = 0):
+        """Scores Copeland on an already-built weighted pairwise matrix."""
+        if hyperparameters is None:
+            hyperparameters = {}
+
+        try:
+            tie_points = float(hyperparameters.get('copeland_tie_points', 0.5))
+        except (TypeError, ValueError):
+            tie_points = 0.5
+
+        if total_weighted_ballot_power <= 0:
+            return _pairwise_no_ballots_result('copeland', pairwise_matrix)
+
+        copeland_scores = {}
+        for a in options:
+            score = 0.0
+            for b in options:
+                if a == b:
+                    continue
+                if pairwise_matrix[a][b] > pairwise_matrix[b][a]:
+                    score += 1
+                elif pairwise_matrix[a][b] == pairwise_matrix[b][a]:
+                    score += tie_points
+            copeland_scores[a] = score
+
+        top_score = max(copeland_scores.values()) if copeland_scores else 0
+        top_options = [opt for opt in options if copeland_scores[opt] == top_score]
+        winner = top_options[0] if len(top_options) == 1 else None
+        reason_for_no_winner = None if winner else f"Tie for highest Copeland score among {len(top_options)} options."
+
+        return {
+            'mechanism': 'copeland',
+            'pairwise_matrix': pairwise_matrix,
+            'copeland_scores': copeland_scores,
+            'results_detailed': sorted(
+                [(opt, {'copeland_score': copeland_scores[opt]}) for opt in options],
+                key=lambda item: item[1]['copeland_score'], reverse=True
+            ),
+            'winner': winner,
+            'tied_winners': top_options if len(top_options) > 1 else [],
+            'reason_for_no_winner': reason_for_no_winner,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': total_weighted_ballot_power
+        }
+
+    @staticmethod
+    def get_description():
+        return "Head-to-head round robin; the option with the most pairwise wins is elected."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+class STVVoting:
+    """Single Transferable Vote for electing ``seats`` winners from ranked ballots.
+
+    - Droop quota: ``floor(total_weight / (seats + 1)) + 1``.
+    - Surplus transfer uses the Gregory method: every ballot in an elected option's pile
+      moves on at ``surplus / pile_value``, computed with exact ``Fraction`` arithmetic.
+    - Ballots with identical rankings always travel together, so they are grouped once up
+      front and each round costs O(distinct ballots) instead of O(voters).
+
+    Vote weights follow these rules:
+    - ``tokens`` > 0: weight equals ``tokens``
+    - ``tokens`` == 0: weight is 0 (vote has no effect)
+    - ``tokens`` is ``None``: weight defaults to 1 (non-campaign context)
+    """
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Counts STV votes round by round, applying token weighting."""
+        if hyperparameters is None:
+            hyperparameters = {}
+
+        try:
+            seats = int(hyperparameters.get('seats', 1))
+        except (TypeError, ValueError):
+            seats = 1
+        seats = max(1, min(seats, len(options))) if options else 0
+
+        # ranking tuple -> [raw ballot count, current value (Fraction), index of current preference]
+        groups: Dict[Tuple[str, ...], List[Any]] = {}
+        for vote_record in votes:
+            vote_data_str = vote_record.get('vote_data')
+            try:
+                vote_data = json.loads(vote_data_str) if isinstance(vote_data_str, str) else vote_data_str
+            except json.JSONDecodeError:
+                print(f"WARNING: STV: Could not decode vote_data JSON: {vote_data_str}. Vote: {vote_record}")
+                continue
+
+            if not isinstance(vote_data, dict) or not isinstance(vote_data.get('rankings'), list):
+                print(f"WARNING: STV: Invalid vote_data or missing rankings. Vote: {vote_record}")
+                continue
+
+            rankings = []
+            for opt in vote_data['rankings']:
+                if isinstance(opt, str) and opt in options and opt not in rankings:
+                    rankings.append(opt)
+            if not rankings:
+                continue
+
+            tokens = vote_record.get('tokens_invested')
+            if tokens is None:
+                vote_weight = 1
+            elif tokens > 0:
+                vote_weight = tokens
+            else:
+                vote_weight = 0
+
+            group = groups.setdefault(tuple(rankings), [0, Fraction(0), 0])
+            group[0] += 1
+            group[1] += Fraction(vote_weight)
+
+        total_raw_ballots = sum(g[0] for g in groups.values())
+        total_weight = sum((g[1] for g in groups.values()), Fraction(0))
+        if not groups or total_weight <= 0 or seats == 0:
+            return {'mechanism': 'stv', 'winner': None, 'winners': [], 'seats': seats,
+                    'reason_for_no_winner': 'No valid ballots cast.', 'rounds_detailed': [],
+                    'total_raw_ballots': total_raw_ballots, 'total_weighted_ballot_power': float(total_weight)}
+
+        quota = Fraction(total_weight.numerator // (total_weight.denominator * (seats + 1)) + 1)
+        continuing = [opt for opt in options]
+        elected: List[str] = []
+        rounds_detailed = []
+        history: List[Dict[str, Fraction]] = []
+
+        while len(elected) < seats and continuing:
+            continuing_set = set(continuing)
+            tallies = {opt: Fraction(0) for opt in continuing}
+            raw_counts = {opt: 0 for opt in continuing}
+            piles: Dict[str, List[Tuple[str, ...]]] = {opt: [] for opt in continuing}
+            exhausted_value = Fraction(0)
+            exhausted_raw = 0
+            for ranking, group in groups.items():
+                # Options only ever leave the continuing set, so the pointer never moves backwards.
+                position = group[2]
+                while position < len(ranking) and ranking[position] not in continuing_set:
+                    position += 1
+                group[2] = position
+                if position >= len(ranking):
+                    exhausted_value += group[1]
+                    exhausted_raw += group[0]
+                    continue
+                top = ranking[position]
+                tallies[top] += group[1]
+                raw_counts[top] += group[0]
+                piles[top].append(ranking)
+            history.append(tallies)
+
+            round_summary = {
+                'round_number': len(rounds_detailed) + 1,
+                'weighted_votes_per_option': {opt: float(v) for opt, v in tallies.items()},
+                'raw_ballots_per_option': dict(raw_counts),
+                'active_options_in_round': list(continuing),
+                'exhausted_ballots_this_round': exhausted_raw,
+                'exhausted_weight': float(exhausted_value),
+                'elected_this_round': [],
+                'eliminated_this_round': [],
+                'transfer_values': {},
+            }
+            rounds_detailed.append(round_summary)
+
+            reached = sorted([opt for opt in continuing if tallies[opt] >= quota],
+                             key=lambda opt: (-tallies[opt], options.index(opt)))
+            if reached:
+                for opt in reached[:seats - len(elected)]:
+                    elected.append(opt)
+                    continuing.remove(opt)
+                    round_summary['elected_this_round'].append(opt)
+                    pile_value = tallies[opt]
+                    transfer_value = (pile_value - quota) / pile_value if pile_value else Fraction(0)
+                    round_summary['transfer_values'][opt] = float(transfer_value)
+                    for ranking in piles[opt]:
+                        groups[ranking][1] *= transfer_value
+                continue
+
+            if len(continuing) <= seats - len(elected):
+                remaining = sorted(continuing, key=lambda opt: (-tallies[opt], options.index(opt)))
+                elected.extend(remaining)
+                round_summary['elected_this_round'].extend(remaining)
+                continuing = []
+                break
+
+            # Eliminate the lowest option; ties go back through earlier rounds, then to the later-listed option.
+            lowest_value = min(tallies.values())
+            tied_lowest = [opt for opt in continuing if tallies[opt] == lowest_value]
+            for earlier in reversed(history[:-1]):
+                if len(tied_lowest) == 1:
+                    break
+                earlier_min = min(earlier.get(opt, Fraction(0)) for opt in tied_lowest)
+                tied_lowest = [opt for opt in tied_lowest if earlier.get(opt, Fraction(0)) == earlier_min]
+            eliminated = max(tied_lowest, key=options.index)
+            continuing.remove(eliminated)
+            round_summary['eliminated_this_round'].append(eliminated)
+
+        winner = ", ".join(elected) if elected else None
+        return {
+            'mechanism': 'stv',
+            'seats': seats,
+            'quota': float(quota),
+            'winners': elected,
+            'winner': winner,
+            'reason_for_no_winner': None if elected else 'No options could be elected.',
+            'rounds_detailed': rounds_detailed,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': float(total_weight)
+        }
+
+    @staticmethod
+    def get_description():
+        return "Multi-winner: options reaching the Droop quota are elected and surplus votes transfer fractionally to next preferences."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+class DHondtAllocation:
+    """Proportional seat allocation from plurality-style ballots (``{'option': ...}``).
+
+    ``seats`` seats are handed out one at a time to the option with the highest
+    quotient ``votes / divisor(seats_won)``, kept in a heap so the whole allocation is
+    O(seats·log options). ``divisor_method`` selects the variant:
+    - ``dhondt`` (default): divisors 1, 2, 3, ...
+    - ``sainte_lague``: divisors 1, 3, 5, ...
+    Equal quotients go to the option with more weighted votes, then the earlier option.
+
+    Vote weights follow these rules:
+    - ``tokens`` > 0: weight equals ``tokens``
+    - ``tokens`` == 0: weight is 0 (vote has no effect)
+    - ``tokens`` is ``None``: weight defaults to 1 (non-campaign context)
+    """
+
+    DIVISOR_METHODS = {
+        'dhondt': lambda seats_won: seats_won + 1,
+        'sainte_lague': lambda seats_won: 2 * seats_won + 1,
+    }
+
+    @staticmethod
+    def normalize_divisor_method(value: Any) -> Optional[str]:
+        """Map user-facing spellings (D'Hondt, Sainte-Laguë, webster, ...) to a DIVISOR_METHODS key."""
+        key = str(value or 'dhondt').strip().lower().replace("’", "'")
+        key = key.replace("'", "").replace("-", "_").replace(" ", "_").replace("ë", "e")
+        aliases = {'dhondt': 'dhondt', 'jefferson': 'dhondt', 'sainte_lague': 'sainte_lague',
+                   'saintelague': 'sainte_lague', 'webster': 'sainte_lague'}
+        return aliases.get(key)
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Allocates seats proportionally to weighted plurality votes."""
+        if hyperparameters is None:
+            hyperparameters = {}
+
+        try:
+            seats = max(0, int(hyperparameters.get('seats', 1)))
+        except (TypeError, ValueError):
+            seats = 1
+        divisor_method = DHondtAllocation.normalize_divisor_method(hyperparameters.get('divisor_method')) or 'dhondt'
+        divisor = DHondtAllocation.DIVISOR_METHODS[divisor_method]
+
+        party_totals_weighted = {option: 0 for option in options}
+        party_totals_raw = {option: 0 for option in options}
+        for vote_record in votes:
+            vote_data = vote_record.get('vote_data')
+            if isinstance(vote_data, str):
+                try:
+                    vote_data = json.loads(vote_data)
+                except json.JSONDecodeError:
+                    print(f"WARNING: D'Hondt: Could not decode vote_data JSON: {vote_data}. Skipping vote.")
+                    continue
+
+            if not isinstance(vote_data, dict):
+                print(f"WARNING: D'Hondt: Expected dict for parsed vote_data. Got {type(vote_data)}. Vote: {vote_record}")
+                continue
+
+            chosen_option = vote_data.get('option')
+            if not isinstance(chosen_option, str) or chosen_option not in party_totals_weighted:
+                print(f"WARNING: D'Hondt: Invalid or missing option in vote_data: {chosen_option}. Vote: {vote_record}")
+                continue
+
+            tokens = vote_record.get('tokens_invested')
+            if tokens is None:
+                vote_weight = 1
+            elif tokens > 0:
+                vote_weight = tokens
+            else:
+                vote_weight = 0
+
+            party_totals_raw[chosen_option] += 1
+            party_totals_weighted[chosen_option] += vote_weight
+
+        total_raw_ballots = sum(party_totals_raw.values())
+        total_weighted = sum(party_totals_weighted.values())
+        seats_allocated = {option: 0 for option in options}
+        allocation_rounds = []
+
+        if total_weighted > 0:
+            index = {option: i for i, option in enumerate(options)}
+            # Heap of (-quotient, -votes, option order, option); Fractions keep equal quotients exactly equal.
+            heap = [(-Fraction(party_totals_weighted[opt], divisor(0)), -party_totals_weighted[opt], index[opt], opt)
+                    for opt in options if party_totals_weighted[opt] > 0]
+            heapq.heapify(heap)
+            for seat_number in range(1, seats + 1):
+                neg_quotient, neg_votes, order, option = heapq.heappop(heap)
+                seats_allocated[option] += 1
+                allocation_rounds.append([seat_number, option, float(-neg_quotient)])
+                next_quotient = Fraction(-neg_votes, divisor(seats_allocated[option]))
+                heapq.heappush(heap, (-next_quotient, neg_votes, order, option))
+
+        winners = sorted([opt for opt in options if seats_allocated[opt] > 0],
+                         key=lambda opt: (-seats_allocated[opt], options.index(opt)))
+        winner = ", ".join(f"{opt} ({seats_allocated[opt]})" for opt in winners) if winners else None
+        reason_for_no_winner = None
+        if not winner:
+            reason_for_no_winner = "No effective votes cast." if total_weighted <= 0 else "No seats to allocate."
+
+        return {
+            'mechanism': 'dhondt',
+            'divisor_method': divisor_method,
+            'seats': seats,
+            'seats_allocated': seats_allocated,
+            'allocation_rounds': allocation_rounds,
+            'party_totals_weighted': party_totals_weighted,
+            'party_totals_raw': party_totals_raw,
+            'winners': winners,
+            'winner': winner,
+            'reason_for_no_winner': reason_for_no_winner,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': total_weighted,
+            'total_weighted_vote_power': total_weighted
+        }
+
+    @staticmethod
+    def get_description():
+        return "Seats are shared out in proportion to each option's votes (D'Hondt or Sainte-Laguë divisors)."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+def quadratic_allocation_vector(allocations: Any, options: List[str]) -> Optional[List[int]]:
+    """Turn a ``{'option': votes}`` allocation into a per-option vote vector aligned with ``options``.
+
+    Returns None when the allocation names unknown options or uses non-integer/negative votes.
+    """
+    if not isinstance(allocations, dict):
+        return None
+    if any(opt not in options for opt in allocations):
+        return None
+    vector = [allocations.get(opt, 0) for opt in options]
+    if any(isinstance(n, bool) or not isinstance(n, int) or n < 0 for n in vector):
+        return None
+    return vector
+
+
+def validate_quadratic_allocation(allocations: Any, options: List[str], available_credits: int) -> Tuple[bool, int, str]:
+    """Check a quadratic ballot against the voter's credits. Returns ``(ok, cost, error_message)``.
+
+    Casting ``n`` votes on an option costs ``n²`` credits; the cost of a ballot is the sum over options.
+    """
+    vector = quadratic_allocation_vector(allocations, options)
+    if vector is None:
+        return False, 0, "Allocations must be whole, non-negative vote counts for this scenario's options."
+    cost = sum(n * n for n in vector)
+    if cost == 0:
+        return False, 0, "Allocate at least one vote (or abstain)."
+    if cost > available_credits:
+        return False, cost, f"That allocation costs {cost} credits but you only have {available_credits} left."
+    return True, cost, ""
+
+
+class QuadraticVoting:
+    """Quadratic voting for campaigns in ``quadratic`` mode.
+
+    Each ballot is ``{'allocations': {option: votes}}``; ``votes`` on an option cost ``votes²``
+    credits, already debited when the ballot was cast (and recorded in ``tokens_invested``).
+    An option's total is the sum of the votes allocated to it, accumulated as one per-option
+    vector across ballots. The option with the most votes wins.
+    """
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Sums per-option quadratic vote allocations."""
+        if hyperparameters is None:
+            hyperparameters = {}
+
+        vote_totals = [0] * len(options)
+        credit_totals = [0] * len(options)
+        supporter_totals = [0] * len(options)
+        total_raw_ballots = 0
+
+        for vote_record in votes:
+            vote_data = vote_record.get('vote_data')
+            if isinstance(vote_data, str):
+                try:
+                    vote_data = json.loads(vote_data)
+                except json.JSONDecodeError:
+                    print(f"WARNING: Quadratic: Could not decode vote_data JSON: {vote_data}. Skipping vote.")
+                    continue
+
+            vector = quadratic_allocation_vector(vote_data.get('allocations') if isinstance(vote_data, dict) else None, options)
+            if vector is None:
+                print(f"WARNING: Quadratic: Invalid or missing allocations. Vote: {vote_record}")
+                continue
+
+            vote_totals = [total + n for total, n in zip(vote_totals, vector)]
+            credit_totals = [total + n * n for total, n in zip(credit_totals, vector)]
+            supporter_totals = [total + (1 if n else 0) for total, n in zip(supporter_totals, vector)]
+            total_raw_ballots += 1
+
+        total_votes_cast = sum(vote_totals)
+        results_detailed = sorted(
+            [(opt, {'votes': vote_totals[i], 'credits_spent': credit_totals[i], 'supporters': supporter_totals[i]})
+             for i, opt in enumerate(options)],
+            key=lambda item: item[1]['votes'], reverse=True
+        )
+
+        winner = None
+        reason_for_no_winner = None
+        if total_votes_cast <= 0:
+            reason_for_no_winner = "No effective votes cast."
+        else:
+            top_votes = results_detailed[0][1]['votes']
+            top_options = [opt for opt, details in results_detailed if details['votes'] == top_votes]
+            if len(top_options) == 1:
+                winner = top_options[0]
+            else:
+                reason_for_no_winner = f"Tie for most quadratic votes among {len(top_options)} options."
+
+        return {
+            'mechanism': 'quadratic',
+            'results_detailed': results_detailed,
+            'winner': winner,
+            'reason_for_no_winner': reason_for_no_winner,
+            'total_raw_ballots': total_raw_ballots,
+            'total_votes_cast': total_votes_cast,
+            'total_credits_spent': sum(credit_totals)
+        }
+
+    @staticmethod
+    def get_description():
+        return "Voters spread credits across options; n votes on one option cost n² credits."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+class ProportionalApprovalVoting:
+    """Proportional Approval Voting (PAV): elects a ``seats``-member committee from approval ballots.
+
+    A committee scores, per ballot, ``weight × H(n)`` where ``n`` is how many of the ballot's
+    approved options were elected and ``H(n) = 1 + 1/2 + ... + 1/n``. ``pav_mode`` selects
+    how the committee is found:
+    - ``sequential``: seats are filled one at a time by the largest marginal gain, i.e. the
+      sum of ``weight / (1 + approved members already elected)`` over ballots approving the option.
+    - ``exact``: every committee is scored and the best one wins (at most
+      ``PAV_EXACT_MAX_COMMITTEES`` committees; larger elections fall back to sequential).
+    - ``auto`` (default): exact when it fits that limit, sequential otherwise.
+    Identical approval sets are grouped into option bitsets first, so a round costs
+    O(distinct ballots × options). Ties go to more weighted approvals, then option order.
+
+    Vote weights follow these rules:
+    - ``tokens`` > 0: weight equals ``tokens``
+    - ``tokens`` == 0: weight is 0 (vote has no effect)
+    - ``tokens`` is ``None``: weight defaults to 1 (non-campaign context)
+    """
+
+    PAV_EXACT_MAX_COMMITTEES = 5000
+    MODES = ('auto', 'sequential', 'exact')
+
+    @staticmethod
+    def _committee_score(groups: List[Tuple[int, Any]], committee_mask: int, harmonic: List[Fraction]) -> Fraction:
+        return sum((weight * harmonic[bin(mask & committee_mask).count("1")] for mask, weight in groups), Fraction(0))
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Elects a PAV committee, applying token weighting."""
+        if hyperparameters is None:
+            hyperparameters = {}
+
+        index = {opt: i for i, opt in enumerate(options)}
+        raw_approvals = [0] * len(options)
+        weighted_approvals = [0] * len(options)
+        grouped_ballots: Dict[int, Any] = {}  # approval bitset -> total weight
+        total_raw_voters = 0
+        total_weighted_voting_power = 0
+
+        for vote_record in votes:
+            vote_data_str = vote_record.get('vote_data')
+            try:
+                vote_data = json.loads(vote_data_str) if isinstance(vote_data_str, str) else vote_data_str
+            except json.JSONDecodeError:
+                print(f"WARNING: PAV: Could not decode vote_data JSON: {vote_data_str}. Vote: {vote_record}")
+                continue
+
+            if not isinstance(vote_data, dict) or not isinstance(vote_data.get('approved'), list):
+                print(f"WARNING: PAV: Invalid vote_data structure or missing approved list. Vote: {vote_record}")
+                continue
+
+            mask = 0
+            for opt in vote_data['approved']:
+                if isinstance(opt, str) and opt in index:
+                    mask |= 1 << index[opt]
+            if not mask:
+                continue
+
+            tokens = vote_record.get('tokens_invested')
+            if tokens is None:
+                vote_weight = 1
+            elif tokens > 0:
+                vote_weight = tokens
+            else:
+                vote_weight = 0
+
+            total_raw_voters += 1
+            total_weighted_voting_power += vote_weight
+            grouped_ballots[mask] = grouped_ballots.get(mask, 0) + vote_weight
+            for i in range(len(options)):
+                if mask >> i & 1:
+                    raw_approvals[i] += 1
+                    weighted_approvals[i] += vote_weight
+
+        try:
+            seats = max(0, int(hyperparameters.get('seats', 1)))
+        except (TypeError, ValueError):
+            seats = 1
+        seats = min(seats, len(options))
+        requested_mode = str(hyperparameters.get('pav_mode', 'auto')).lower()
+        if requested_mode not in ProportionalApprovalVoting.MODES:
+            requested_mode = 'auto'
+
+        results_detailed = sorted(
+            [(opt, {'raw_approvals': raw_approvals[i], 'weighted_approvals': weighted_approvals[i]}) for i, opt in enumerate(options)],
+            key=lambda item: item[1]['weighted_approvals'], reverse=True
+        )
+        groups = [(mask, weight) for mask, weight in grouped_ballots.items() if weight]
+        result = {
+            'mechanism': 'pav',
+            'pav_mode': None,
+            'seats': seats,
+            'winners': [],
+            'winner': None,
+            'reason_for_no_winner': None,
+            'committee_score': 0.0,
+            'results_detailed': results_detailed,
+            'rounds_detailed': [],
+            'top_committees': [],
+            'distinct_ballots': len(groups),
+            'total_raw_voters': total_raw_voters,
+            'total_weighted_voting_power': total_weighted_voting_power,
+        }
+        if not groups:
+            result['reason_for_no_winner'] = "No effective votes cast."
+            return result
+        if seats == 0:
+            result['reason_for_no_winner'] = "No seats to fill."
+            return result
+
+        harmonic = [Fraction(0)]
+        for n in range(1, seats + 1):
+            harmonic.append(harmonic[-1] + Fraction(1, n))
+
+        exact_fits = math.comb(len(options), seats) <= ProportionalApprovalVoting.PAV_EXACT_MAX_COMMITTEES
+        if requested_mode == 'exact' and not exact_fits:
+            print(f"WARNING: PAV: {math.comb(len(options), seats)} committees exceed the exact limit; using sequential PAV.")
+        use_exact = exact_fits and requested_mode in ('exact', 'auto')
+
+        if use_exact:
+            scored = []
+            for combo in itertools.combinations(range(len(options)), seats):
+                committee_mask = sum(1 << i for i in combo)
+                score = ProportionalApprovalVoting._committee_score(groups, committee_mask, harmonic)
+                scored.append((score, sum(weighted_approvals[i] for i in combo), combo))
+            # Stable sort keeps lexicographic (option order) precedence among equal keys.
+            scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+            best_score, _, best_combo = scored[0]
+            committee = list(best_combo)
+            result['top_committees'] = [
+                {'members': [options[i] for i in combo], 'score': float(score)} for score, _, combo in scored[:3]
+            ]
+            tied = sum(1 for score, _, _ in scored if score == best_score)
+            if tied > 1:
+                result['tied_committees'] = tied
+        else:
+            committee = []
+            committee_mask = 0
+            satisfaction = [0] * len(groups)  # approved members elected, per ballot group
+            for round_number in range(1, seats + 1):
+                gains = [Fraction(0)] * len(options)
+                for g, (mask, weight) in enumerate(groups):
+                    remaining = mask & ~committee_mask
+                    if not remaining:
+                        continue
+                    share = Fraction(weight, 1 + satisfaction[g])
+                    while remaining:
+                        lowest = remaining & -remaining
+                        gains[lowest.bit_length() - 1] += share
+                        remaining ^= lowest
+                candidates = [i for i in range(len(options)) if not committee_mask >> i & 1]
+                best = max(candidates, key=lambda i: (gains[i], weighted_approvals[i], -i))
+                committee.append(best)
+                committee_mask |= 1 << best
+                for g, (mask, _) in enumerate(groups):
+                    if mask >> best & 1:
+                        satisfaction[g] += 1
+                result['rounds_detailed'].append({
+                    'round_number': round_number,
+                    'elected': options[best],
+                    'marginal_gain': float(gains[best]),
+                    'marginal_gains': {options[i]: float(gains[i]) for i in candidates},
+                    'tied_options': [options[i] for i in candidates if gains[i] == gains[best] and i != best],
+                })
+            best_score = ProportionalApprovalVoting._committee_score(groups, committee_mask, harmonic)
+
+        result['pav_mode'] = 'exact' if use_exact else 'sequential'
+        result['winners'] = [options[i] for i in committee]
+        result['winner'] = ", ".join(result['winners'])
+        result['committee_score'] = float(best_score)
+        return result
+
+    @staticmethod
+    def get_description():
+        return "Voters approve any number of options; PAV elects the committee that best satisfies voters proportionally."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+# ========================
+# 🔹 CARDINAL (SCORE) BALLOTS
+# ========================
+# A cardinal ballot grades every option from 0 to ``max_score``. It is stored as
+# ``{'scores': '<hex>'}``: one unsigned byte per option, in proposal option order,
+# so a ballot over k options costs 2k characters regardless of option names.
+
+CARDINAL_DEFAULT_MAX_SCORE = 5
+CARDINAL_MAX_SCORE_LIMIT = 10  # Keeps the score picker within one select menu
+MAJORITY_JUDGMENT_GRADES = ["Reject", "Poor", "Fair", "Good", "Very Good", "Excellent"]
+
+
+def cardinal_max_score(hyperparameters: Optional[Dict[str, Any]]) -> int:
+    """The top of the score range for a cardinal proposal, clamped to 1..CARDINAL_MAX_SCORE_LIMIT."""
+    if not isinstance(hyperparameters, dict):
+        return CARDINAL_DEFAULT_MAX_SCORE
+    try:
+        max_score = int(hyperparameters.get('max_score', CARDINAL_DEFAULT_MAX_SCORE))
+    except (TypeError, ValueError):
+        return CARDINAL_DEFAULT_MAX_SCORE
+    return min(max(max_score, 1), CARDINAL_MAX_SCORE_LIMIT)
+
+
+def encode_score_ballot(scores: Dict[str, int], options: List[str]) -> str:
+    """Pack ``{option: score}`` into the compact hex form; unscored options get 0."""
+    return bytes(scores.get(opt, 0) for opt in options).hex()
+
+
+def score_ballot_vector(vote_data: Any, options: List[str], max_score: int) -> Optional[bytes]:
+    """Decode a cardinal ballot into one score byte per option.
+
+    Accepts the compact hex form or a readable ``{option: score}`` mapping (missing options
+    score 0). Returns None for malformed ballots, unknown options or out-of-range scores.
+    """
+    scores = vote_data.get('scores') if isinstance(vote_data, dict) else None
+    if isinstance(scores, str):
+        try:
+            vector = bytes.fromhex(scores)
+        except ValueError:
+            return None
+        if len(vector) != len(options):
+            return None
+    elif isinstance(scores, dict):
+        if any(opt not in options for opt in scores):
+            return None
+        values = [scores.get(opt, 0) for opt in options]
+        if any(isinstance(s, bool) or not isinstance(s, int) or not 0 <= s <= 255 for s in values):
+            return None
+        vector = bytes(values)
+    else:
+        return None
+    if any(s > max_score for s in vector):
+        return None
+    return vector
+
+
+def build_score_matrix(votes: List[Dict], options: List[str], max_score: int, label: str = "Score") -> Tuple[Dict[bytes, Any], int, Any]:
+    """Collapse cardinal ballots into a score matrix of distinct rows.
+
+    Returns ``(rows, total_raw_ballots, total_weighted_ballot_power)`` where ``rows`` maps each
+    distinct score vector to its summed weight, so the column reductions below cost
+    O(distinct ballots × options) however many voters submitted the same scores.
+
+    Vote weights follow these rules:
+    - ``tokens`` > 0: weight equals ``tokens``
+    - ``tokens`` == 0: weight is 0 (vote has no effect)
+    - ``tokens`` is ``None``: weight defaults to 1 (non-campaign context)
+    """
+    rows: Dict[bytes, Any] = {}
+    total_raw_ballots = 0
+    total_weighted_ballot_power = 0
+
+    for vote_record in votes:
+        vote_data_str = vote_record.get('vote_data')
+        try:
+            vote_data = json.loads(vote_data_str) if isinstance(vote_data_str, str) else vote_data_str
+        except json.JSONDecodeError:
+            print(f"WARNING: {label}: Could not decode vote_data JSON: {vote_data_str}. Vote: {vote_record}")
+            continue
+
+        vector = score_ballot_vector(vote_data, options, max_score)
+        if vector is None:
+            print(f"WARNING: {label}: Invalid or missing scores. Vote: {vote_record}")
+            continue
+
+        tokens = vote_record.get('tokens_invested')
+        if tokens is None:
+            vote_weight = 1
+        elif tokens > 0:
+            vote_weight = tokens
+        else:
+            vote_weight = 0
+
+        total_raw_ballots += 1
+        total_weighted_ballot_power += vote_weight
+        if vote_weight:
+            rows[vector] = rows.get(vector, 0) + vote_weight
+
+    return rows, total_raw_ballots, total_weighted_ballot_power
+
+
+def score_column_sums(rows: Dict[bytes, Any], num_options: int) -> List[Any]:
+    """Weighted score total per option (the column sums of the score matrix)."""
+    totals = [0] * num_options
+    for vector, weight in rows.items():
+        totals = [total + weight * s for total, s in zip(totals, vector)]
+    return totals
+
+
+def score_column_histograms(rows: Dict[bytes, Any], num_options: int, max_score: int) -> List[List[Any]]:
+    """Weighted grade histogram per option: ``histograms[i][g]`` is the weight grading option i at g."""
+    histograms = [[0] * (max_score + 1) for _ in range(num_options)]
+    for vector, weight in rows.items():
+        for histogram, s in zip(histograms, vector):
+            histogram[s] += weight
+    return histograms
+
+
+def histogram_median(histogram: List[Any]) -> int:
+    """Lower median grade of a weighted histogram (the highest grade a majority agrees on)."""
+    total = sum(histogram)
+    running = 0
+    for grade, weight in enumerate(histogram):
+        running += weight
+        if running * 2 >= total:
+            return grade
+    return 0
+
+
+class ScoreVoting:
+    """Score (range) voting: each ballot grades every option from 0 to ``max_score``.
+
+    An option's weighted score is the sum of ``weight × score`` over ballots; the highest
+    total wins and an exact tie for first leaves no winner. Unscored options count as 0.
+    """
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Sums weighted scores per option."""
+        max_score = cardinal_max_score(hyperparameters)
+        rows, total_raw_ballots, total_weight = build_score_matrix(votes, options, max_score, "Score")
+        totals = score_column_sums(rows, len(options))
+
+        results_detailed = sorted(
+            [(opt, {'weighted_score': totals[i], 'average_score': totals[i] / total_weight if total_weight else 0.0})
+             for i, opt in enumerate(options)],
+            key=lambda item: item[1]['weighted_score'], reverse=True
+        )
+
+        winner = None
+        reason_for_no_winner = None
+        if total_weight <= 0 or not options:
+            reason_for_no_winner = "No effective votes cast."
+        else:
+            top_score = results_detailed[0][1]['weighted_score']
+            top_options = [opt for opt, details in results_detailed if details['weighted_score'] == top_score]
+            if len(top_options) == 1:
+                winner = top_options[0]
+            else:
+                reason_for_no_winner = f"Tie for highest score among {len(top_options)} options."
+
+        return {
+            'mechanism': 'score',
+            'max_score': max_score,
+            'results_detailed': results_detailed,
+            'winner': winner,
+            'reason_for_no_winner': reason_for_no_winner,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': total_weight
+        }
+
+    @staticmethod
+    def get_description():
+        return "Voters score every option; the option with the highest total score wins."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+class STARVoting:
+    """STAR voting (Score Then Automatic Runoff).
+
+    The two options with the highest weighted score totals are finalists (ties for a finalist
+    slot go to option order and are reported in ``tied_finalists``). The finalist scored higher
+    by more ballot weight wins the runoff; ballots scoring both equally count for neither. A
+    runoff tie goes to the higher score total, and if that also ties there is no winner.
+    """
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Scores options, then runs off the top two on the same ballots."""
+        max_score = cardinal_max_score(hyperparameters)
+        rows, total_raw_ballots, total_weight = build_score_matrix(votes, options, max_score, "STAR")
+        totals = score_column_sums(rows, len(options))
+
+        results_detailed = sorted(
+            [(opt, {'weighted_score': totals[i], 'average_score': totals[i] / total_weight if total_weight else 0.0})
+             for i, opt in enumerate(options)],
+            key=lambda item: item[1]['weighted_score'], reverse=True
+        )
+        result = {
+            'mechanism': 'star',
+            'max_score': max_score,
+            'results_detailed': results_detailed,
+            'finalists': [],
+            'runoff': {},
+            'winner': None,
+            'reason_for_no_winner': None,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': total_weight
+        }
+
+        if total_weight <= 0 or not options:
+            result['reason_for_no_winner'] = "No effective votes cast."
+            return result
+        if len(options) == 1:
+            result['winner'] = options[0]
+            return result
+
+        ranked = sorted(range(len(options)), key=lambda i: (-totals[i], i))
+        first, second = ranked[0], ranked[1]
+        result['finalists'] = [options[first], options[second]]
+        cutoff = totals[second]
+        contenders = [options[i] for i in ranked if totals[i] == cutoff]
+        if len(contenders) > (2 if totals[first] == cutoff else 1):
+            result['tied_finalists'] = contenders
+
+        prefer_first = prefer_second = no_preference = 0
+        for vector, weight in rows.items():
+            if vector[first] > vector[second]:
+                prefer_first += weight
+            elif vector[second] > vector[first]:
+                prefer_second += weight
+            else:
+                no_preference += weight
+        result['runoff'] = {options[first]: prefer_first, options[second]: prefer_second, 'no_preference': no_preference}
+
+        if prefer_first != prefer_second:
+            result['winner'] = options[first] if prefer_first > prefer_second else options[second]
+        elif totals[first] != totals[second]:
+            result['winner'] = options[first]
+            result['runoff_tiebreak'] = 'score'
+        else:
+            result['reason_for_no_winner'] = "Finalists tied in both the runoff and total score."
+        return result
+
+    @staticmethod
+    def get_description():
+        return "Voters score every option; the two highest-scoring options go to an automatic runoff."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+class MajorityJudgment:
+    """Majority judgment: options are ranked by their median grade.
+
+    Each option's grades form a weighted histogram; its majority grade is the lower median.
+    Options sharing a median are separated by the majority gauge: an option whose weight
+    strictly above the median exceeds the weight strictly below ranks by that (larger is
+    better), otherwise by the weight below (larger is worse). Options still level are tied.
+    """
+
+    @staticmethod
+    def grade_label(grade: int, max_score: int) -> str:
+        if max_score == len(MAJORITY_JUDGMENT_GRADES) - 1:
+            return MAJORITY_JUDGMENT_GRADES[grade]
+        return f"{grade}/{max_score}"
+
+    @staticmethod
+    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
+        """Ranks options by median grade with majority-gauge tie-breaking."""
+        max_score = cardinal_max_score(hyperparameters)
+        rows, total_raw_ballots, total_weight = build_score_matrix(votes, options, max_score, "MajorityJudgment")
+        histograms = score_column_histograms(rows, len(options), max_score)
+
+        gauges = []
+        for i, histogram in enumerate(histograms):
+            median = histogram_median(histogram)
+            above = sum(histogram[median + 1:])
+            below = sum(histogram[:median])
+            gauges.append((median, above if above > below else -below))
+
+        order = sorted(range(len(options)), key=lambda i: (gauges[i], -i), reverse=True)
+        results_detailed = []
+        for i in order:
+            median = gauges[i][0]
+            results_detailed.append((options[i], {
+                'median_grade': median,
+                'median_label': MajorityJudgment.grade_label(median, max_score),
+                'above_median': sum(histograms[i][median + 1:]),
+                'below_median': sum(histograms[i][:median]),
+                'grade_distribution': histograms[i],
+            }))
+
+        winner = None
+        reason_for_no_winner = None
+        if total_weight <= 0 or not options:
+            reason_for_no_winner = "No effective votes cast."
+        else:
+            top_options = [options[i] for i in order if gauges[i] == gauges[order[0]]]
+            if len(top_options) == 1:
+                winner = top_options[0]
+            else:
+                reason_for_no_winner = f"Tie on majority grade among {len(top_options)} options."
+
+        return {
+            'mechanism': 'majority_judgment',
+            'max_score': max_score,
+            'results_detailed': results_detailed,
+            'winner': winner,
+            'reason_for_no_winner': reason_for_no_winner,
+            'total_raw_ballots': total_raw_ballots,
+            'total_weighted_ballot_power': total_weight
+        }
+
+    @staticmethod
+    def get_description():
+        return "Voters grade every option; the option with the best median grade wins."
+
+    @staticmethod
+    def get_vote_instructions():
+        # Instructions are now generated in voting.py's get_voting_instructions
+        return "Instructions defined in voting.py"
+
+
+# Mechanisms that take an approval ballot ({'approved': [...]}) and share the approval DM view.
+APPROVAL_BALLOT_MECHANISMS = ["approval", "pav"]
+
+# Mechanisms that take a single-choice ballot ({'option': ...}) and share the plurality DM view.
+PLURALITY_BALLOT_MECHANISMS = ["plurality", "dhondt"]
+
+# Mechanisms that take a ranked ballot ({'rankings': [...]}) and share the ranked DM view.
+RANKED_BALLOT_MECHANISMS = ["borda", "runoff", "condorcet", "schulze", "ranked_pairs", "copeland", "stv"]
+
+# Mechanisms that take a cardinal ballot ({'scores': '<hex>'}) and share the scoring DM view.
+CARDINAL_BALLOT_MECHANISMS = ["score", "star", "majority_judgment"]
+
+
+def get_voting_mechanism(mechanism_name: str):
+    """Returns the appropriate voting mechanism class based on name"""
+    mechanisms = {
+        "plurality": PluralityVoting,
+        "borda": BordaCount,
+        "approval": ApprovalVoting,
+        "runoff": RunoffVoting,
+        "condorcet": CondorcetMethod,
+        "schulze": SchulzeMethod,
+        "ranked_pairs": RankedPairsMethod,
+        "copeland": CopelandMethod,
+        "stv": STVVoting,
+        "dhondt": DHondtAllocation,
+        "d'hondt": DHondtAllocation,
+        "d’hondt": DHondtAllocation,
+        "quadratic": QuadraticVoting,
+        "pav": ProportionalApprovalVoting,
+        "score": ScoreVoting,
+        "star": STARVoting,
+        "majority_judgment": MajorityJudgment
+    }
+    return mechanisms.get(mechanism_name.lower())
+
+
+# ========================
+# 🔹 TALLY CACHE
+# ========================
+# Tallies are keyed on (proposal_id, vote_revision, mechanism, params_hash). The
+# revision is bumped by db on every vote write, so a key can only ever map to one
+# ballot state and entries never need explicit invalidation.
+_tally_cache: Dict[Tuple[int, int, str, str], Dict[str, Any]] = {}
+TALLY_CACHE_MAX_ENTRIES = 256
+
+
+def _tally_params_hash(hyperparameters: Optional[Dict[str, Any]], options: List[str]) -> str:
+    """Stable hash of everything besides the ballots that feeds a tally."""
+    canonical = json.dumps(
+        {"hyperparameters": hyperparameters or {}, "options": list(options)},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _remember_tally(key: Tuple[int, int, str, str], results: Dict[str, Any]) -> None:
+    """Keep one in-memory entry per proposal (latest revision) and bound the cache size."""
+    for stale_key in [k for k in _tally_cache if k[0] == key[0] and k != key]:
+        del _tally_cache[stale_key]
+    if len(_tally_cache) >= TALLY_CACHE_MAX_ENTRIES:
+        del _tally_cache[next(iter(_tally_cache))]  # Oldest insertion first
+    _tally_cache[key] = copy.deepcopy(results)
+
+
+def clear_tally_cache(proposal_id: Optional[int] = None) -> None:
+    """Drop in-memory tallies for one proposal, or all of them."""
+    if proposal_id is None:
+        _tally_cache.clear()
+        return
+    for key in [k for k in _tally_cache if k[0] == proposal_id]:
+        del _tally_cache[key]
+
+
+# ========================
+# 🔹 TALLY EXECUTOR
+# ========================
+# Large tallies are counted in a worker process so the event loop keeps serving
+# heartbeats and interactions. Both paths count the same normalized ballots with
+# the same mechanism code, so the results are identical whichever one runs.
+TALLY_PROCESS_THRESHOLD = 5000  # Ballots; smaller tallies are counted in-process
+TALLY_TIMEOUT_SECONDS = 120.0
+TALLY_MAX_WORKERS = 2
+_tally_executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_tally_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def normalize_ballots(votes: List[Dict]) -> List[Dict[str, Any]]:
+    """Reduce vote rows to the fields mechanisms read, with ``vote_data`` decoded.
+
+    vote_data strings that are not valid JSON are kept as-is so the mechanism skips
+    them exactly as it would have. The result is plain, cheaply picklable data.
+    """
+    normalized = []
+    for vote_record in votes:
+        vote_data = vote_record.get('vote_data')
+        if isinstance(vote_data, str):
+            try:
+                vote_data = json.loads(vote_data)
+            except json.JSONDecodeError:
+                pass
+        normalized.append({'vote_data': vote_data, 'tokens_invested': vote_record.get('tokens_invested')})
+    return normalized
+
+
+def _count_votes_in_worker(mechanism_name: str, ballots: List[Dict[str, Any]], options: List[str],
+                           hyperparameters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Process-pool entry point; must stay a module-level function so it can be pickled."""
+    mechanism_module = get_voting_mechanism(mechanism_name)
+    if mechanism_module is None:
+        return None
+    return mechanism_module.count_votes(ballots, options, hyperparameters)
+
+
+def _tally_slot() -> asyncio.Semaphore:
+    """Per-event-loop semaphore with one slot per pool worker.
+
+    Work queues here rather than in the pool, so a timeout only counts the time a worker
+    actually spends on it.
+    """
+    loop = asyncio.get_running_loop()
+    slot = _tally_slots.get(loop)
+    if slot is None:
+        slot = _tally_slots[loop] = asyncio.Semaphore(TALLY_MAX_WORKERS)
+    return slot
+
+
+def get_tally_executor() -> concurrent.futures.ProcessPoolExecutor:
+    """Lazily start the shared tally process pool."""
+    global _tally_executor
+    if _tally_executor is None:
+        _tally_executor = concurrent.futures.ProcessPoolExecutor(max_workers=TALLY_MAX_WORKERS)
+    return _tally_executor
+
+
+def shutdown_tally_executor(terminate: bool = False) -> None:
+    """Stop the tally process pool (it is restarted on the next large tally).
+
+    With ``terminate`` the workers are killed too; shutdown alone lets a running tally
+    finish, which a runaway tally never does.
+    """
+    global _tally_executor
+    executor, _tally_executor = _tally_executor, None
+    if executor is None:
+        return
+    processes = list((getattr(executor, '_processes', None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    if terminate:
+        for process in processes:
+            process.terminate()
+
+
+async def run_in_tally_pool(label: str, func, *args, timeout: Optional[float] = None):
+    """Run ``func(*args)`` in the tally pool, or in-process if the pool is unavailable.
+
+    At most one call per worker is in the pool at a time, and ``timeout`` starts once this
+    call has a worker. Returns None if it exceeds ``timeout`` seconds; the pool is then recycled so the runaway
+    worker does not hold a slot forever. A tally that was sharing the recycled pool is
+    resubmitted to the new one rather than counted on the event loop.
+    """
+    timeout = TALLY_TIMEOUT_SECONDS if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    async with _tally_slot():
+        executor = get_tally_executor()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(executor, func, *args), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"ERROR: {label} exceeded {timeout}s in the tally pool; recycling the pool.")
+            if _tally_executor is executor:
+                shutdown_tally_executor(terminate=True)
+            return None
+        except (concurrent.futures.process.BrokenProcessPool, OSError) as e:
+            recycled = _tally_executor is not executor
+            if not recycled:
+                print(f"WARNING: Tally pool unavailable ({e}); running {label} in-process.")
+                shutdown_tally_executor()
+    # Outside the slot: the retry queues for a new one, and in-process work needs none.
+    if recycled:
+        return await run_in_tally_pool(label, func, *args, timeout=timeout)
+    return func(*args)
+
+
+async def run_tally(mechanism_name: str, votes: List[Dict], options: List[str],
+                    hyperparameters: Optional[Dict[str, Any]] = None,
+                    threshold: Optional[int] = None, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Count ``votes`` with the named mechanism, offloading to the process pool for large ballot sets.
+
+    Returns None if the mechanism is unknown or the pooled tally exceeds ``timeout`` seconds
+    (the pool is then recycled). If the pool itself is unavailable (e.g. a worker died), the tally falls back to running in-process.
+    """
+    if hyperparameters is None: hyperparameters = {}
+    threshold = TALLY_PROCESS_THRESHOLD if threshold is None else threshold
+    timeout = TALLY_TIMEOUT_SECONDS if timeout is None else timeout
+
+    ballots = normalize_ballots(votes)
+    if len(ballots) < threshold:
+        return _count_votes_in_worker(mechanism_name, ballots, options, hyperparameters)
+
+    return await run_in_tally_pool(
+        f"{mechanism_name} tally of {len(ballots)} ballots", _count_votes_in_worker,
+        mechanism_name, ballots, list(options), hyperparameters, timeout=timeout
+    )
+
+
+# ========================
+# 🔹 STREAMING TALLY
+# ========================
+# Mechanisms whose counts are plain sums can consume ballots chunk by chunk straight
+# off a database cursor, so a proposal never has to be materialized in memory.
+STREAM_TALLY_THRESHOLD = 20000  # Votes; smaller proposals are fetched in one go
+STREAM_CHUNK_SIZE = 1000
+STREAMING_TALLY_MECHANISMS = {
+    "plurality": PluralityVoting,
+    "approval": ApprovalVoting,
+    "borda": BordaCount,
+}
+
+
+async def stream_tally(proposal_id: int, mechanism_name: str, options: List[str],
+                       hyperparameters: Optional[Dict[str, Any]] = None,
+                       chunk_size: Optional[int] = None) -> Tuple[Dict[str, Any], int, int]:
+    """Tally a proposal by folding fixed-size vote chunks into the mechanism's running totals.
+
+    Returns ``(results, num_abstain_votes, tokens_in_abstain_votes)``; results match
+    ``count_votes`` over the same ballots.
+    """
+    mechanism = STREAMING_TALLY_MECHANISMS[mechanism_name]
+    tally = mechanism.new_tally(options)
+    num_abstain_votes = 0
+    tokens_in_abstain = 0
+    async for chunk in db.iter_proposal_vote_chunks(proposal_id, chunk_size or STREAM_CHUNK_SIZE):
+        effective_votes = []
+        for vote_record in chunk:
+            if vote_record['is_abstain']:
+                num_abstain_votes += 1
+                tokens_in_abstain += vote_record['tokens_invested'] or 0
+            else:
+                effective_votes.append(vote_record)
+        mechanism.accumulate(tally, effective_votes)
+    return mechanism.finalize(tally, options, hyperparameters), num_abstain_votes, tokens_in_abstain
+
+
+# ========================
+# 🔹 SQL PUSHDOWN TALLY
+# ========================
+# Plurality and approval counts are plain grouped sums, so SQLite can compute them with
+# JSON1 without shipping or decoding a single ballot in Python. The Python path stays the
+# fallback (no JSON1, query failure) and the parity oracle in tests.
+PUSHDOWN_TALLY_THRESHOLD = 500  # Votes; smaller proposals are cheap to count in Python
+PUSHDOWN_TALLY_MECHANISMS = ("plurality", "approval")
+
+
+async def pushdown_tally(proposal_id: int, mechanism_name: str, options: List[str],
+                         hyperparameters: Optional[Dict[str, Any]] = None) -> Optional[Tuple[Dict[str, Any], int, int]]:
+    """Tally a plurality/approval proposal inside SQLite.
+
+    Returns ``(results, num_abstain_votes, tokens_in_abstain_votes)`` like ``stream_tally``,
+    or None when JSON1 is unavailable or the query fails, in which case callers count in Python.
+    """
+    if mechanism_name not in PUSHDOWN_TALLY_MECHANISMS or not await db.sqlite_json1_available():
+        return None
+
+    if mechanism_name == "plurality":
+        totals = await db.get_pushdown_plurality_totals(proposal_id, options)
+        if totals is None:
+            return None
+        tally = PluralityVoting.new_tally(options)
+        for option, (raw, weighted) in totals['option_totals'].items():
+            tally['results'][option] = {'raw_votes': raw, 'weighted_votes': weighted}
+            tally['total_raw_votes'] += raw
+            tally['total_weighted_votes'] += weighted
+        results = PluralityVoting.finalize(tally, options, hyperparameters)
+    else:
+        totals = await db.get_pushdown_approval_totals(proposal_id, options)
+        if totals is None:
+            return None
+        tally = ApprovalVoting.new_tally(options)
+        for option, (raw, weighted) in totals['option_totals'].items():
+            tally['results'][option] = {'raw_approvals': raw, 'weighted_approvals': weighted}
+        tally['total_raw_voters'] = totals['total_raw_voters']
+        tally['total_weighted_voting_power'] = totals['total_weighted_voting_power']
+        results = ApprovalVoting.finalize(tally, options, hyperparameters)
+
+    return results, totals['num_abstain_votes'], totals['tokens_in_abstain_votes']
+
+
+# ========================
+# 🔹 VOTE WEIGHT PROVIDERS
+# ========================
+# A provider turns voters into weights once per proposal, from data gathered up front
+# (member roles, join dates, ballot tokens). Tallies only ever read the resolved
+# ``{user_id: weight}`` map, which rides on each ballot as ``tokens_invested``, so no
+# mechanism touches Discord or the database per ballot. Outside campaigns the guild's
+# ``vote_weighting`` constitutional variable picks the provider.
+VOTE_WEIGHT_MEMO_MAX_ENTRIES = 256
+_vote_weight_memo: Dict[Tuple[int, str], Dict[int, int]] = {}
+
+
+class VoteWeightProvider:
+    """Equal weighting: every voter counts once. Subclasses override ``weight_for``."""
+
+    name = "equal"
+    needs_guild = False
+
+    def signature(self) -> str:
+        """Identifies the provider and its parameters; part of every cache key built on its weights."""
+        return self.name
+
+    def weight_for(self, user_id: int, member: Optional[discord.Member], vote: Optional[Dict]) -> int:
+        return 1
+
+    def resolve(self, user_ids: Any, votes_by_user: Dict[int, Dict], guild: Optional[discord.Guild]) -> Dict[int, int]:
+        """Weights for ``user_ids``; members are looked up in the guild's cache, never fetched."""
+        return {
+            user_id: self.weight_for(user_id, guild.get_member(user_id) if guild else None, votes_by_user.get(user_id))
+            for user_id in user_ids
+        }
+
+
+class RoleWeightProvider(VoteWeightProvider):
+    """A member weighs as much as their heaviest weighted role; members without one weigh 1."""
+
+    name = "role"
+    needs_guild = True
+
+    def __init__(self, role_weights: Dict[str, int]):
+        self.role_weights = {name.lower(): weight for name, weight in role_weights.items()}
+
+    def signature(self) -> str:
+        return f"role:{json.dumps(self.role_weights, sort_keys=True)}"
+
+    def weight_for(self, user_id, member, vote):
+        if member is None:
+            return 1
+        matched = [self.role_weights[role.name.lower()] for role in member.roles if role.name.lower() in self.role_weights]
+        return max(matched) if matched else 1
+
+
+class TenureWeightProvider(VoteWeightProvider):
+    """One extra vote per ``days_per_weight`` days of membership, up to ``max_weight``.
+
+    Tenure is measured at ``as_of`` (the proposal's creation time), so recounts agree.
+    """
+
+    name = "tenure"
+    needs_guild = True
+
+    def __init__(self, days_per_weight: int, max_weight: int, as_of: datetime):
+        self.days_per_weight = max(1, days_per_weight)
+        self.max_weight = max(1, max_weight)
+        self.as_of = as_of
+
+    def signature(self) -> str:
+        return f"tenure:{self.days_per_weight}:{self.max_weight}:{self.as_of.isoformat()}"
+
+    def weight_for(self, user_id, member, vote):
+        joined_at = getattr(member, 'joined_at', None)
+        if joined_at is None:
+            return 1
+        if joined_at.tzinfo is None:
+            joined_at = joined_at.replace(tzinfo=timezone.utc)
+        days = max(0, (self.as_of - joined_at).days)
+        return min(1 + days // self.days_per_weight, self.max_weight)
+
+
+class CampaignTokenWeightProvider(VoteWeightProvider):
+    """Campaign scenarios: a ballot weighs the tokens invested in it (0 if none)."""
 
-    @staticmethod
-    def count_votes(votes: List[Dict], options: List[str], hyperparameters: Optional[Dict[str, Any]] = None):
-        """Counts Condorcet votes using weighted pairwise comparisons."""
-        if hyperparameters is None:
-            hyperparameters = {}
+    name = "tokens"
 
-        pairwise_matrix = {a: {b: 0 for b in options if b != a} for a in options}
-        total_raw_ballots = 0
-        total_weighted_ballot_power = 0
+    def weight_for(self, user_id, member, vote):
+        tokens = vote.get('tokens_invested') if vote else None
+        if tokens is None:
+            return 1
+        return tokens if tokens > 0 else 0
 
-        for vote_record in votes:
-            vote_data_str = vote_record.get('vote_data')
-            try:
-                vote_data = json.loads(vote_data_str) if isinstance(vote_data_str, str) else vote_data_str
-            except json.JSONDecodeError:
-                print(f"WARNING: Condorcet: Could not decode vote_data JSON: {vote_data_str}. Vote: {vote_record}")
-                continue
 
-            if not isinstance(vote_data, dict) or not isinstance(vote_data.get('rankings'), list):
-                print(f"WARNING: Condorcet: Invalid vote_data structure or missing rankings. Vote: {vote_record}")
-                continue
+def _as_utc_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
 
-            rankings = [r for r in vote_data['rankings'] if isinstance(r, str) and r in options]
-            if not rankings:
-                continue
 
-            weight = vote_record.get('tokens_invested', 1)
-            if weight is None or weight < 0:
-                weight = 1
+async def get_weight_provider(proposal: Dict[str, Any]) -> VoteWeightProvider:
+    """Pick the provider for a proposal: campaign tokens, or the guild's ``vote_weighting`` setting."""
+    if proposal.get('campaign_id'):
+        return CampaignTokenWeightProvider()
+    if proposal.get('server_id') is None:
+        return VoteWeightProvider()
 
-            total_raw_ballots += 1
-            total_weighted_ballot_power += weight
+    const_vars = await db.get_constitutional_variables(proposal['server_id'])
+    weighting = (const_vars.get('vote_weighting', {}).get('value') or 'equal').strip().lower()
+    if weighting == 'role':
+        try:
+            role_weights = json.loads(const_vars.get('role_vote_weights', {}).get('value') or '{}')
+            role_weights = {str(name): int(weight) for name, weight in role_weights.items() if int(weight) >= 0}
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+            print(f"WARNING: Invalid role_vote_weights for server {proposal['server_id']}. Using equal weights.")
+            return VoteWeightProvider()
+        return RoleWeightProvider(role_weights)
+    if weighting == 'tenure':
+        try:
+            days_per_weight = int(const_vars.get('tenure_days_per_weight', {}).get('value', 30))
+            max_weight = int(const_vars.get('tenure_max_weight', {}).get('value', 3))
+        except (TypeError, ValueError):
+            print(f"WARNING: Invalid tenure weighting variables for server {proposal['server_id']}. Using equal weights.")
+            return VoteWeightProvider()
+        as_of = _as_utc_datetime(proposal.get('created_at')) or datetime.now(timezone.utc)
+        return TenureWeightProvider(days_per_weight, max_weight, as_of)
+    return VoteWeightProvider()
 
-            rank_order = {opt: idx for idx, opt in enumerate(rankings)}
-            default_rank = len(options)
 
-            for i in range(len(options)):
-                for j in range(i + 1, len(options)):
-                    a = options[i]
-                    b = options[j]
-                    rank_a = rank_order.get(a, default_rank)
-                    rank_b = rank_order.get(b, default_rank)
-                    if rank_a < rank_b:
-                        pairwise_matrix[a][b] += weight
-                    elif rank_b < rank_a:
-                        pairwise_matrix[b][a] += weight
-                    # Ties contribute nothing
+def weights_need_guild(provider: Optional[VoteWeightProvider], guild: Optional[discord.Guild]) -> bool:
+    """True if ``provider`` weighs members by their roles or tenure but no guild was given to look them up."""
+    return provider is not None and provider.needs_guild and guild is None
 
-        winner = None
-        for option in options:
-            beats_all = True
-            for opponent in options:
-                if option == opponent:
-                    continue
-                if pairwise_matrix[option].get(opponent, 0) <= pairwise_matrix[opponent].get(option, 0):
-                    beats_all = False
-                    break
-            if beats_all:
-                winner = option
-                break
 
-        reason_for_no_winner = None if winner else "No Condorcet winner (cycle or tie)."
+async def resolve_vote_weights(proposal: Dict[str, Any], provider: VoteWeightProvider, user_ids: Any,
+                               votes: List[Dict], guild: Optional[discord.Guild] = None) -> Dict[int, int]:
+    """Resolve and memoize weights for a proposal. Only voters not resolved before are looked up.
 
-        return {
-            'mechanism': 'condorcet',
-            'pairwise_matrix': pairwise_matrix,
-            'winner': winner,
-            'reason_for_no_winner': reason_for_no_winner if not winner else None,
-            'total_raw_ballots': total_raw_ballots,
-            'total_weighted_ballot_power': total_weighted_ballot_power
-        }
+    Without the guild a role or tenure provider counts every unresolved voter once; those
+    placeholder weights are returned but never memoized.
+    """
+    key = (proposal['proposal_id'], provider.signature())
+    weights = _vote_weight_memo.get(key, {})
+    missing = [user_id for user_id in set(user_ids) if user_id not in weights]
+    if missing:
+        weights = dict(weights)
+        weights.update(provider.resolve(missing, {v.get('user_id'): v for v in votes}, guild))
+        if weights_need_guild(provider, guild):
+            print(f"WARNING: No guild to resolve {provider.name} weights for P#{proposal['proposal_id']}; {len(missing)} voter(s) count once.")
+            return weights
+        for stale_key in [k for k in _vote_weight_memo if k[0] == key[0] and k != key]:
+            del _vote_weight_memo[stale_key]
+        if key not in _vote_weight_memo and len(_vote_weight_memo) >= VOTE_WEIGHT_MEMO_MAX_ENTRIES:
+            del _vote_weight_memo[next(iter(_vote_weight_memo))]  # Oldest insertion first
+        _vote_weight_memo[key] = weights
+    return weights
 
-    @staticmethod
-    def get_description():
-        return "Compares options head-to-head; an option that beats every other wins."
 
-    @staticmethod
-    def get_vote_instructions():
-        # Instructions are now generated in voting.py's get_voting_instructions
-        return "Instructions defined in voting.py"
-def get_voting_mechanism(mechanism_name: str):
-    """Returns the appropriate voting mechanism class based on name"""
-    mechanisms = {
-        "plurality": PluralityVoting,
-        "borda": BordaCount,
-        "approval": ApprovalVoting,
-        "runoff": RunoffVoting,
-        "condorcet": CondorcetMethod
+# ========================
+# 🔹 LIQUID DELEGATION
+# ========================
+# Members who do not vote can delegate to someone who does. At tally time every
+# member carries their own weight (1, or what the weight provider resolved), and
+# weight flows along delegations until it reaches a member who voted directly (whose
+# own delegation is ignored). Resolution is one topological pass, memoized per
+# (proposal, vote revision, delegation revision, weight provider).
+DELEGATION_MEMO_MAX_ENTRIES = 256
+_delegation_memo: Dict[Tuple[int, int, int, str], Tuple[Dict[int, int], Dict[str, Any]]] = {}
+
+
+def resolve_delegation_weights(edges: Dict[int, int], direct_voters: Any,
+                               base_weights: Optional[Dict[int, int]] = None) -> Tuple[Dict[int, int], Dict[str, Any]]:
+    """Resolve delegated weight for each direct voter in O(members + delegations).
+
+    ``edges`` maps delegator -> delegate. Edges out of direct voters are dropped, which
+    leaves a graph where every member has at most one outgoing edge. Kahn's algorithm
+    pushes each member's accumulated weight to their delegate once all of that member's
+    own delegators are done; members never reached are on (or feed into) a cycle of
+    non-voters, so the cycle is broken by discarding that weight. Weight that ends at a
+    member who did not vote is likewise unused.
+
+    Members weigh ``base_weights[member]`` (default 1). Returns ``(weights, stats)``:
+    ``weights`` maps every direct voter to their own weight plus that of the members
+    represented through them; ``stats`` counts delegated, stranded and cycle weight and
+    lists each cycle found.
+    """
+    base_weights = base_weights or {}
+    voters = set(direct_voters)
+    successor = {delegator: delegate for delegator, delegate in edges.items() if delegator not in voters}
+    pending = {}  # Unprocessed delegators pointing at each member
+    for delegate in successor.values():
+        pending[delegate] = pending.get(delegate, 0) + 1
+
+    carried = {voter: base_weights.get(voter, 1) for voter in voters}
+    for member in itertools.chain(successor, successor.values()):
+        if member not in carried:
+            carried[member] = base_weights.get(member, 1)
+
+    ready = [member for member in successor if not pending.get(member)]
+    resolved = set()
+    while ready:
+        member = ready.pop()
+        resolved.add(member)
+        delegate = successor[member]
+        carried[delegate] += carried[member]
+        pending[delegate] -= 1
+        if pending[delegate] == 0 and delegate in successor:
+            ready.append(delegate)
+
+    cycles = []
+    seen = set(resolved)
+    for start in successor:
+        if start in seen:
+            continue
+        cycle = []
+        member = start
+        while member not in seen:
+            seen.add(member)
+            cycle.append(member)
+            member = successor[member]
+        cycles.append(cycle)
+
+    weights = {voter: carried[voter] for voter in voters}
+    return weights, {
+        'delegated_weight': sum(weights[v] - base_weights.get(v, 1) for v in voters),
+        'stranded_weight': sum(carried[m] - base_weights.get(m, 1) for m in carried if m not in voters and m not in successor),
+        'cycle_weight': sum(carried[m] for cycle in cycles for m in cycle),
+        'cycles': cycles,
     }
-    return mechanisms.get(mechanism_name.lower())
 
 
-async def calculate_results(proposal_id: int) -> Optional[Dict]:
-    """Calculates the results for a given proposal, handling token weighting for campaigns."""
+async def get_delegated_weights(proposal: Dict[str, Any], votes: List[Dict], provider: Optional[VoteWeightProvider] = None,
+                                guild: Optional[discord.Guild] = None) -> Optional[Tuple[Dict[int, int], Dict[str, Any]]]:
+    """Delegation-resolved weights for a proposal's voters, or None when delegation does not apply.
+
+    Campaign scenarios are weighted by invested tokens and ignore delegations. ``votes`` must
+    include abstentions: an abstaining member voted directly and absorbs their delegators.
+    With a non-equal ``provider``, each member passes on their own resolved weight.
+    """
+    server_id = proposal.get('server_id')
+    if server_id is None or proposal.get('campaign_id'):
+        return None
+    delegation_revision = await db.get_delegation_revision(server_id)
+    if not delegation_revision:
+        return None
+
+    signature = provider.signature() if provider else VoteWeightProvider.name
+    key = (proposal['proposal_id'], int(proposal.get('vote_revision') or 0), delegation_revision, signature)
+    memoized = _delegation_memo.get(key)
+    if memoized is not None:
+        return memoized
+
+    edges = await db.get_delegation_edges(server_id, proposal.get('topic'))
+    voter_ids = [v['user_id'] for v in votes if v.get('user_id') is not None]
+    base_weights = None
+    if provider is not None and provider.name != VoteWeightProvider.name:
+        members = set(voter_ids).union(edges, edges.values())
+        base_weights = await resolve_vote_weights(proposal, provider, members, votes, guild)
+    resolved = resolve_delegation_weights(edges, voter_ids, base_weights)
+    if weights_need_guild(provider, guild):
+        return resolved  # Built on placeholder weights; see resolve_vote_weights
+    for stale_key in [k for k in _delegation_memo if k[0] == key[0]]:
+        del _delegation_memo[stale_key]
+    if len(_delegation_memo) >= DELEGATION_MEMO_MAX_ENTRIES:
+        del _delegation_memo[next(iter(_delegation_memo))]  # Oldest insertion first
+    _delegation_memo[key] = resolved
+    return resolved
+
+
+def apply_vote_weights(votes: List[Dict], weights: Dict[int, int]) -> List[Dict]:
+    """Carry resolved weight on unweighted ballots as ``tokens_invested``, which every mechanism counts."""
+    weighted_votes = []
+    for vote in votes:
+        weight = weights.get(vote.get('user_id'), 1)
+        if vote.get('tokens_invested') is None and weight != 1:
+            vote = dict(vote, tokens_invested=weight)
+        weighted_votes.append(vote)
+    return weighted_votes
+
+
+async def resolve_effective_weights(proposal: Dict[str, Any], all_votes: List[Dict], provider: Optional[VoteWeightProvider],
+                                    delegation_revision: int, guild: Optional[discord.Guild] = None
+                                    ) -> Tuple[Optional[Dict[int, int]], Optional[Dict[str, Any]]]:
+    """Per-voter weights from guild weighting and delegations as they stand now, plus delegation stats.
+
+    Either is None when it does not apply.
+    """
+    if delegation_revision:
+        # Abstainers voted directly too, so they absorb (and void) their delegators' weight.
+        delegated = await get_delegated_weights(proposal, all_votes, provider, guild)
+        if delegated is not None:
+            return delegated
+    elif provider is not None and provider.name != VoteWeightProvider.name:
+        return await resolve_vote_weights(
+            proposal, provider, [v['user_id'] for v in all_votes if v.get('user_id') is not None], all_votes, guild
+        ), None
+    return None, None
+
+
+async def weigh_effective_votes(proposal: Dict[str, Any], all_votes: List[Dict], effective_votes: List[Dict],
+                                provider: Optional[VoteWeightProvider], delegation_revision: int,
+                                guild: Optional[discord.Guild] = None,
+                                snapshot: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict], Optional[Dict[str, Any]]]:
+    """Apply guild vote weighting and delegations to the non-abstain ballots.
+
+    A ``snapshot`` (the weights frozen when the proposal closed) replaces the live lookup.
+    Returns the (possibly re-weighted) ballots and the delegation stats, if any.
+    """
+    if snapshot is not None:
+        voter_weights, delegation_stats = snapshot['voter_weights'], snapshot['delegation']
+    else:
+        voter_weights, delegation_stats = await resolve_effective_weights(
+            proposal, all_votes, provider, delegation_revision, guild
+        )
+    if voter_weights is not None:
+        effective_votes = apply_vote_weights(effective_votes, voter_weights)
+    return effective_votes, delegation_stats
+
+
+async def snapshot_vote_weights(proposal: Dict[str, Any], guild: Optional[discord.Guild] = None) -> bool:
+    """Freeze the weights a guild proposal is being closed with; recounts then reuse them.
+
+    Without this a later re-tally would weigh old ballots by today's delegations and roles.
+    Campaign scenarios are weighted by their own invested tokens and need no snapshot.
+    Returns False, storing nothing, if role or tenure weights need a guild that was not given.
+    """
+    if proposal.get('server_id') is None or proposal.get('campaign_id'):
+        return True
+    provider = await get_weight_provider(proposal)
+    if weights_need_guild(provider, guild):
+        print(f"WARNING: No guild to resolve {provider.name} weights for P#{proposal['proposal_id']}; not freezing them.")
+        return False
+    delegation_revision = await db.get_delegation_revision(proposal['server_id'])
+    all_votes = await db.get_proposal_votes(proposal['proposal_id']) or []
+    voter_weights, delegation_stats = await resolve_effective_weights(
+        proposal, all_votes, provider, delegation_revision, guild
+    )
+    weighting = provider.name if provider is not None and provider.name != VoteWeightProvider.name else None
+    await db.store_vote_weight_snapshot(proposal['proposal_id'], weighting, voter_weights, delegation_stats)
+    return True
+
+
+async def calculate_results(proposal_id: int, use_cache: bool = True, guild: Optional[discord.Guild] = None,
+                            tally_threshold: Optional[int] = None) -> Optional[Dict]:
+    """Calculates the results for a given proposal, handling token weighting for campaigns.
+
+    Results are served from the tally cache when the proposal's vote revision,
+    mechanism and hyperparameters/options are unchanged since the last count.
+    ``guild`` lets role and tenure weighting look members up in its cache; without it such a
+    tally (unless its weights were frozen at close) fails rather than count everyone once.
+    ``tally_threshold`` overrides the ballot count above which the tally runs in the pool.
+    """
     try:
         proposal = await db.get_proposal(proposal_id)
         if not proposal:
             print(f"ERROR: Proposal {proposal_id} not found for calculating results.")
             return None
 
-        all_db_votes = await db.get_proposal_votes(proposal_id) # Assumed to fetch tokens_invested
-        if all_db_votes is None: # Check if fetch failed or returned None
-            print(f"ERROR: Failed to fetch votes for proposal {proposal_id}.")
-            return None # Or handle as empty list if appropriate
-
-        # Separate abstain votes. Abstain votes have vote_record.is_abstain = True (or 1)
-        # The `vote_data` (JSON) for abstain might be empty or indicate abstain.
-        # The crucial part is the `is_abstain` column from the `votes` table.
-        abstain_votes_records = [v for v in all_db_votes if v.get('is_abstain')]
-        effective_vote_records = [v for v in all_db_votes if not v.get('is_abstain')]
-
-        num_abstain_votes = len(abstain_votes_records)
-        # Tokens invested in abstain votes might be relevant for auditing, but not for winner calculation.
-        tokens_in_abstain = sum(v.get('tokens_invested', 0) for v in abstain_votes_records if v.get('tokens_invested'))
-
         options_from_db = await db.get_proposal_options(proposal_id)
         if not options_from_db:
             # Fallback: Try to extract from description - this might be less reliable
@@ -650,28 +2526,116 @@ async def calculate_results(proposal_id: int) -> Optional[Dict]:
         options = options_from_db # Use the determined options list
 
         mechanism_name = proposal.get('voting_mechanism', 'plurality').lower()
+        if proposal.get('campaign_id'):
+            # Quadratic campaigns collect allocation ballots whatever mechanism the scenario was created with.
+            campaign = await db.get_campaign(proposal['campaign_id'])
+            if campaign and campaign.get('voting_mode') == 'quadratic':
+                mechanism_name = 'quadratic'
         hyperparameters = proposal.get('hyperparameters') # This should be a dict
         if isinstance(hyperparameters, str): # Guard against stored as string
             try: hyperparameters = json.loads(hyperparameters)
             except json.JSONDecodeError: hyperparameters = {}
         elif hyperparameters is None: hyperparameters = {}
 
-        results_summary = None
-        mechanism_module = get_voting_mechanism(mechanism_name)
-
-        if mechanism_module:
-            # Pass effective_vote_records (which include tokens_invested directly)
-            # The count_votes method of the mechanism will handle the weighting.
-            results_summary = mechanism_module.count_votes(effective_vote_records, options, hyperparameters)
-        else:
-            print(f"ERROR: Unknown voting mechanism: {mechanism_name} for P#{proposal_id}")
+        # Guild vote weighting and delegations depend on more than the ballots, so they
+        # join the cache key and the tally needs every vote row.
+        # Once a proposal is closed its frozen weights are used instead of today's.
+        provider = None
+        delegation_revision = 0
+        snapshot = None
+        if proposal.get('server_id') is not None and not proposal.get('campaign_id'):
+            snapshot = await db.get_vote_weight_snapshot(proposal_id)
+            if snapshot is None:
+                provider = await get_weight_provider(proposal)
+                delegation_revision = await db.get_delegation_revision(proposal['server_id'])
+        if weights_need_guild(provider, guild):
+            print(f"ERROR: P#{proposal_id} uses {provider.name} weighting, which needs the guild to tally.")
             return None
+        reweighted = provider is not None and provider.name != VoteWeightProvider.name
+        weighting_name = snapshot['weighting'] if snapshot else (provider.name if reweighted else None)
+        weighted = bool(delegation_revision or reweighted
+                        or (snapshot and (snapshot['voter_weights'] or snapshot['delegation'] is not None)))
+
+        # Proposals loaded without a revision (e.g. rows built outside db.get_proposal) bypass the cache.
+        vote_revision = proposal.get('vote_revision')
+        cache_key = None
+        if use_cache and vote_revision is not None:
+            params = dict(hyperparameters, _vote_weighting=provider.signature()) if reweighted else hyperparameters
+            if delegation_revision:
+                params = dict(params, _delegation_revision=delegation_revision)
+            if snapshot is not None:
+                params = dict(params, _weight_snapshot=True)
+            cache_key = (proposal_id, int(vote_revision), mechanism_name, _tally_params_hash(params, options))
+            cached = _tally_cache.get(cache_key)
+            if cached is not None:
+                print(f"DEBUG: Tally cache hit (memory) for P#{proposal_id} rev {vote_revision}")
+                return copy.deepcopy(cached)
+            cached = await db.get_cached_tally(*cache_key)
+            if cached is not None:
+                print(f"DEBUG: Tally cache hit (disk) for P#{proposal_id} rev {vote_revision}")
+                _remember_tally(cache_key, cached)
+                return cached
+
+        vote_count = None
+        delegation_stats = None
+        if not weighted and (mechanism_name in PUSHDOWN_TALLY_MECHANISMS or mechanism_name in STREAMING_TALLY_MECHANISMS):
+            vote_count = await db.count_proposal_votes(proposal_id)
+
+        pushed_down = None
+        if vote_count is not None and vote_count >= PUSHDOWN_TALLY_THRESHOLD:
+            pushed_down = await pushdown_tally(proposal_id, mechanism_name, options, hyperparameters)
+
+        if pushed_down is not None:
+            results_summary, num_abstain_votes, tokens_in_abstain = pushed_down
+        elif vote_count is not None and vote_count >= STREAM_TALLY_THRESHOLD:
+            # Large sum-based tallies stream from a cursor instead of loading every vote.
+            results_summary, num_abstain_votes, tokens_in_abstain = await stream_tally(
+                proposal_id, mechanism_name, options, hyperparameters
+            )
+        else:
+            all_db_votes = await db.get_proposal_votes(proposal_id) # Assumed to fetch tokens_invested
+            if all_db_votes is None: # Check if fetch failed or returned None
+                print(f"ERROR: Failed to fetch votes for proposal {proposal_id}.")
+                return None # Or handle as empty list if appropriate
+
+            # Separate abstain votes. Abstain votes have vote_record.is_abstain = True (or 1)
+            # The `vote_data` (JSON) for abstain might be empty or indicate abstain.
+            # The crucial part is the `is_abstain` column from the `votes` table.
+            abstain_votes_records = [v for v in all_db_votes if v.get('is_abstain')]
+            effective_vote_records = [v for v in all_db_votes if not v.get('is_abstain')]
+
+            effective_vote_records, delegation_stats = await weigh_effective_votes(
+                proposal, all_db_votes, effective_vote_records, provider, delegation_revision, guild, snapshot
+            )
+
+            num_abstain_votes = len(abstain_votes_records)
+            # Tokens invested in abstain votes might be relevant for auditing, but not for winner calculation.
+            tokens_in_abstain = sum(v.get('tokens_invested', 0) for v in abstain_votes_records if v.get('tokens_invested'))
+
+            results_summary = None
+            mechanism_module = get_voting_mechanism(mechanism_name)
+
+            if mechanism_module:
+                # Pass effective_vote_records (which include tokens_invested directly)
+                # The count_votes method of the mechanism will handle the weighting.
+                results_summary = await run_tally(mechanism_name, effective_vote_records, options, hyperparameters, threshold=tally_threshold)
+                if results_summary is None:
+                    print(f"ERROR: Tally failed for P#{proposal_id} ({mechanism_name}).")
+                    return None
+            else:
+                print(f"ERROR: Unknown voting mechanism: {mechanism_name} for P#{proposal_id}")
+                return None
 
         if results_summary:
             results_summary['proposal_id'] = proposal_id
             results_summary['num_abstain_votes'] = num_abstain_votes
             results_summary['tokens_in_abstain_votes'] = tokens_in_abstain # Add for info
             results_summary['options_used_for_tally'] = options # Record what options were used
+            if weighting_name:
+                results_summary['vote_weighting'] = weighting_name
+            if delegation_stats is not None:
+                results_summary['delegation'] = {k: v for k, v in delegation_stats.items() if k != 'cycles'}
+                results_summary['delegation']['cycles_broken'] = len(delegation_stats['cycles'])
 
             # Determine final status based on winner/reason
             final_status = "Unknown"
@@ -690,7 +2654,17 @@ async def calculate_results(proposal_id: int) -> Optional[Dict]:
                     "d'hondt": 'total_weighted_vote_power',
                     "d’hondt": 'total_weighted_vote_power',
                     'approval': 'total_weighted_voting_power',
+                    'pav': 'total_weighted_voting_power',
                     'runoff': 'total_weighted_ballot_power',
+                    'condorcet': 'total_weighted_ballot_power',
+                    'schulze': 'total_weighted_ballot_power',
+                    'ranked_pairs': 'total_weighted_ballot_power',
+                    'copeland': 'total_weighted_ballot_power',
+                    'stv': 'total_weighted_ballot_power',
+                    'quadratic': 'total_votes_cast',
+                    'score': 'total_weighted_ballot_power',
+                    'star': 'total_weighted_ballot_power',
+                    'majority_judgment': 'total_weighted_ballot_power',
                 }
                 mechanism = results_summary.get('mechanism', '').lower()
                 total_field = total_weight_field_map.get(mechanism, 'total_weighted_votes')
@@ -703,6 +2677,10 @@ async def calculate_results(proposal_id: int) -> Optional[Dict]:
 
             results_summary['final_status_derived'] = final_status
 
+            if cache_key is not None:
+                _remember_tally(cache_key, results_summary)
+                await db.store_cached_tally(*cache_key, results_summary)
+
         return results_summary
 
     except Exception as e:
@@ -712,6 +2690,29 @@ async def calculate_results(proposal_id: int) -> Optional[Dict]:
         return None
 
 
+def _format_round_details(results: Dict) -> str:
+    """Render ``rounds_detailed`` (runoff/STV) as embed text, kept within Discord's field limit."""
+    human_readable_rounds = []
+    for round_index, round_info in enumerate(results.get('rounds_detailed', []), 1):
+        option_lines = []
+        for opt in round_info.get('active_options_in_round', []):
+            w = round_info.get('weighted_votes_per_option', {}).get(opt, 0)
+            r = round_info.get('raw_ballots_per_option', {}).get(opt, 0)
+            option_lines.append(f"{opt}: {w:.2f} ({r} raw)")
+        exhausted = round_info.get('exhausted_ballots_this_round', 0)
+        round_text = "\n".join(option_lines)
+        if exhausted:
+            round_text += f"\nExhausted Ballots: {exhausted}"
+        for opt in round_info.get('elected_this_round', []):
+            transfer = round_info.get('transfer_values', {}).get(opt)
+            round_text += f"\n✅ Elected: {opt}" + (f" (surplus transfers at {transfer:.4f})" if transfer else "")
+        for opt in round_info.get('eliminated_this_round', []):
+            round_text += f"\n❌ Eliminated: {opt}"
+        human_readable_rounds.append(f"**Round {round_index}**\n{round_text}")
+    text = "\n\n".join(human_readable_rounds) if human_readable_rounds else "No rounds"
+    return text if len(text) <= 1024 else text[:1020] + "\n…"
+
+
 async def format_vote_results(results: Dict, proposal: Dict) -> discord.Embed:
     """Format vote results into a Discord embed with enhanced visuals"""
     proposal_id = proposal.get('proposal_id') or proposal.get(
@@ -732,6 +2733,16 @@ async def format_vote_results(results: Dict, proposal: Dict) -> discord.Embed:
     embed.add_field(name="Abstain Votes", value=str(results.get('num_abstain_votes', 0)), inline=True)
     embed.add_field(name="Tokens in Abstain", value=str(results.get('tokens_in_abstain_votes', 0)), inline=True)
     embed.add_field(name="Options Used", value=", ".join(results.get('options_used_for_tally', [])), inline=False)
+    if results.get('vote_weighting'):
+        embed.add_field(name="Vote Weighting", value=results['vote_weighting'].title(), inline=True)
+    delegation = results.get('delegation')
+    if delegation and (delegation.get('delegated_weight') or delegation.get('cycles_broken')):
+        delegation_text = f"{delegation['delegated_weight']} vote(s) represented by delegates"
+        if delegation.get('stranded_weight'):
+            delegation_text += f"\n{delegation['stranded_weight']} delegated to members who did not vote"
+        if delegation.get('cycles_broken'):
+            delegation_text += f"\n{delegation['cycles_broken']} delegation cycle(s) broken ({delegation['cycle_weight']} vote(s) unused)"
+        embed.add_field(name="Delegation", value=delegation_text, inline=False)
 
     # Add results
     if results.get('winner'):
@@ -759,19 +2770,53 @@ async def format_vote_results(results: Dict, proposal: Dict) -> discord.Embed:
         embed.add_field(name="Rounds Conducted", value=str(len(results.get('rounds_detailed', []))), inline=True)
         embed.add_field(name="Total Raw Ballots", value=str(results.get('total_raw_ballots', 0)), inline=True)
         embed.add_field(name="Total Weighted Ballot Power", value=str(results.get('total_weighted_ballot_power', 0)), inline=True)
-        human_readable_rounds = []
-        for round_index, round_info in enumerate(results.get('rounds_detailed', []), 1):
-            option_lines = []
-            for opt in round_info.get('active_options_in_round', []):
-                w = round_info.get('weighted_votes_per_option', {}).get(opt, 0)
-                r = round_info.get('raw_ballots_per_option', {}).get(opt, 0)
-                option_lines.append(f"{opt}: {w:.2f} ({r} raw)")
-            exhausted = round_info.get('exhausted_ballots_this_round', 0)
-            round_text = "\n".join(option_lines)
-            if exhausted:
-                round_text += f"\nExhausted Ballots: {exhausted}"
-            human_readable_rounds.append(f"**Round {round_index}**\n{round_text}")
-        embed.add_field(name="Round Details", value="\n\n".join(human_readable_rounds) if human_readable_rounds else "No rounds", inline=False)
+        embed.add_field(name="Round Details", value=_format_round_details(results), inline=False)
+    elif mechanism == 'quadratic':
+        embed.add_field(name="Total Raw Ballots", value=str(results.get('total_raw_ballots', 0)), inline=True)
+        embed.add_field(name="Total Votes Cast", value=str(results.get('total_votes_cast', 0)), inline=True)
+        embed.add_field(name="Credits Spent", value=str(results.get('total_credits_spent', 0)), inline=True)
+        embed.add_field(name="Quadratic Votes", value="\n".join([f"• {option}: {details['votes']} votes ({details['credits_spent']} credits, {details['supporters']} voters)" for option, details in results.get('results_detailed', [])]) or "No data", inline=False)
+    elif mechanism == 'stv':
+        embed.add_field(name="Seats", value=str(results.get('seats', 0)), inline=True)
+        embed.add_field(name="Droop Quota", value=f"{results.get('quota', 0):.2f}", inline=True)
+        embed.add_field(name="Total Weighted Ballot Power", value=str(results.get('total_weighted_ballot_power', 0)), inline=True)
+        embed.add_field(name="Elected", value="\n".join(f"{i}. {opt}" for i, opt in enumerate(results.get('winners', []), 1)) or "None", inline=False)
+        embed.add_field(name="Round Details", value=_format_round_details(results), inline=False)
+    elif mechanism == 'pav':
+        mode_label = "exact" if results.get('pav_mode') == 'exact' else "sequential"
+        embed.add_field(name="Seats", value=str(results.get('seats', 0)), inline=True)
+        embed.add_field(name="Method", value=f"PAV ({mode_label})", inline=True)
+        embed.add_field(name="Committee Score", value=f"{results.get('committee_score', 0):.2f}", inline=True)
+        embed.add_field(name="Approval Counts (Weighted)", value="\n".join([f"• {option}: {details['weighted_approvals']:.2f} ({details['raw_approvals']} raw)" for option, details in results.get('results_detailed', [])]) or "No data", inline=False)
+        if results.get('rounds_detailed'):
+            round_lines = [f"Round {r['round_number']}: **{r['elected']}** (gain {r['marginal_gain']:.2f})"
+                           + (f", tied with {', '.join(r['tied_options'])}" if r.get('tied_options') else "")
+                           for r in results['rounds_detailed']]
+            embed.add_field(name="Seat-by-Seat", value="\n".join(round_lines)[:1024], inline=False)
+        elif results.get('top_committees'):
+            committee_lines = [f"{', '.join(c['members'])}: {c['score']:.2f}" for c in results['top_committees']]
+            embed.add_field(name="Best Committees", value="\n".join(committee_lines)[:1024], inline=False)
+    elif mechanism in ('score', 'star'):
+        embed.add_field(name="Total Raw Ballots", value=str(results.get('total_raw_ballots', 0)), inline=True)
+        embed.add_field(name="Total Weighted Ballot Power", value=str(results.get('total_weighted_ballot_power', 0)), inline=True)
+        embed.add_field(name="Score Range", value=f"0–{results.get('max_score', CARDINAL_DEFAULT_MAX_SCORE)}", inline=True)
+        score_lines = [f"• {option}: {details['weighted_score']:g} (avg {details['average_score']:.2f})" for option, details in results.get('results_detailed', [])]
+        embed.add_field(name="Scores (Weighted)", value="\n".join(score_lines)[:1024] or "No data", inline=False)
+        if mechanism == 'star' and results.get('finalists'):
+            first, second = results['finalists']
+            runoff = results.get('runoff', {})
+            runoff_text = (f"{first}: {runoff.get(first, 0):g} preferred\n{second}: {runoff.get(second, 0):g} preferred\n"
+                           f"No preference: {runoff.get('no_preference', 0):g}")
+            if results.get('runoff_tiebreak') == 'score':
+                runoff_text += "\nRunoff tied; decided by total score."
+            if results.get('tied_finalists'):
+                runoff_text += f"\nTied for a finalist slot: {', '.join(results['tied_finalists'])} (option order used)"
+            embed.add_field(name="Automatic Runoff", value=runoff_text[:1024], inline=False)
+    elif mechanism == 'majority_judgment':
+        embed.add_field(name="Total Raw Ballots", value=str(results.get('total_raw_ballots', 0)), inline=True)
+        embed.add_field(name="Total Weighted Ballot Power", value=str(results.get('total_weighted_ballot_power', 0)), inline=True)
+        grade_lines = [f"• {option}: {details['median_label']} ({details['above_median']:g} above, {details['below_median']:g} below)" for option, details in results.get('results_detailed', [])]
+        embed.add_field(name="Majority Grades", value="\n".join(grade_lines)[:1024] or "No data", inline=False)
     elif mechanism == 'dhondt' or mechanism == "d'hondt":
         embed.add_field(name="Total Raw Ballots", value=str(results.get('total_raw_ballots', 0)), inline=True)
         embed.add_field(name="Total Weighted Ballot Power", value=str(results.get('total_weighted_ballot_power', 0)), inline=True)
@@ -788,6 +2833,9 @@ async def format_vote_results(results: Dict, proposal: Dict) -> discord.Embed:
                 line += f", {s} seats"
             party_lines.append(line)
         embed.add_field(name="Party Totals", value="\n".join(party_lines) if party_lines else "No data", inline=False)
+        if results.get('divisor_method'):
+            method_label = "Sainte-Laguë" if results['divisor_method'] == 'sainte_lague' else "D'Hondt"
+            embed.add_field(name="Allocation", value=f"{results.get('seats', 0)} seats by {method_label} divisors", inline=True)
     elif mechanism == 'condorcet':
         pairwise_matrix = results.get('pairwise_results', {}) or results.get('pairwise_matrix', {})
         pairwise_lines = []
@@ -800,16 +2848,468 @@ async def format_vote_results(results: Dict, proposal: Dict) -> discord.Embed:
             embed.add_field(name="Condorcet Verdict", value=f"Winner: {results['condorcet_winner']}", inline=True)
         else:
             embed.add_field(name="Condorcet Verdict", value="No Condorcet winner (cycle detected)", inline=True)
+    elif mechanism in ('schulze', 'ranked_pairs', 'copeland'):
+        embed.add_field(name="Total Raw Ballots", value=str(results.get('total_raw_ballots', 0)), inline=True)
+        embed.add_field(name="Total Weighted Ballot Power", value=str(results.get('total_weighted_ballot_power', 0)), inline=True)
+        pairwise_matrix = results.get('pairwise_matrix', {}) or {}
+        pairwise_lines = []
+        for option, opponents in pairwise_matrix.items():
+            matchups = ", ".join([f"{opp}:{res:g}" for opp, res in opponents.items()])
+            pairwise_lines.append(f"{option} -> {matchups}")
+        embed.add_field(name="Pairwise Matchups (Weighted)", value="\n".join(pairwise_lines)[:1024] if pairwise_lines else "No pairwise data available", inline=False)
+        if mechanism == 'schulze':
+            path_lines = [f"• {option}: beats {details['paths_won']} option(s) on strongest paths" for option, details in results.get('results_detailed', [])]
+            embed.add_field(name="Strongest Paths", value="\n".join(path_lines)[:1024] if path_lines else "No data", inline=False)
+        elif mechanism == 'ranked_pairs':
+            locked_lines = [f"🔒 {a} > {b} (margin {margin:g})" for a, b, margin in results.get('locked_pairs', [])]
+            locked_lines += [f"⏭️ {a} > {b} skipped (would form a cycle)" for a, b, _ in results.get('skipped_pairs', [])]
+            embed.add_field(name="Locked Pairs", value="\n".join(locked_lines)[:1024] if locked_lines else "No pairwise victories", inline=False)
+        else:
+            score_lines = [f"• {option}: {details['copeland_score']:g}" for option, details in results.get('results_detailed', [])]
+            embed.add_field(name="Copeland Scores", value="\n".join(score_lines)[:1024] if score_lines else "No data", inline=False)
+
 
+    merkle_tree = await db.get_merkle_root(proposal_id) if proposal_id else None
+    if merkle_tree and merkle_tree['published_root']:
+        embed.add_field(name="🧾 Ballot Tree Root",
+                        value=f"`{merkle_tree['published_root']}`\nCheck your receipt with `!verifyreceipt`.", inline=False)
 
     # Add footer
     embed.set_footer(text=f"Results for Proposal #{proposal_id} | Calculated at {datetime.now().strftime('%Y-%m-%d %H:%M UTC')}")
     return embed
 
 
-async def check_expired_proposals() -> List[Tuple[Dict, Dict]]:
-    """Check for proposals with expired deadlines, close them, and return the list of (proposal, results) pairs."""
+# ========================
+# 🔹 RECOUNT & SENSITIVITY
+# ========================
+# A recount decodes the stored ballots once, groups identical ballots and evaluates every
+# single-winner mechanism that can read that ballot type against the same grouped state:
+# ranked ballots share one weighted pairwise matrix (the whole Condorcet family reads it)
+# and one first-preference tally. Bootstrap resampling with a fixed seed then reports how
+# often each method's winner survives when the electorate is redrawn.
+
+RECOUNT_DEFAULT_RESAMPLES = 200
+RECOUNT_MAX_RESAMPLES = 1000
+RECOUNT_BOOTSTRAP_SEED = 1729  # Fixed so repeating a recount reproduces the same report
+
+RECOUNT_MECHANISMS = {
+    'plurality': ["plurality"],
+    'approval': ["approval"],
+    'ranked': ["plurality", "borda", "runoff", "condorcet", "schulze", "ranked_pairs", "copeland"],
+    'cardinal': ["score", "star", "majority_judgment"],
+}
+RECOUNT_PAIRWISE_MECHANISMS = {
+    'condorcet': CondorcetMethod,
+    'schulze': SchulzeMethod,
+    'ranked_pairs': RankedPairsMethod,
+    'copeland': CopelandMethod,
+}
+
+
+def recount_ballot_type(mechanism_name: str) -> Optional[str]:
+    """The ballot family a mechanism collects, or None if recounts do not support it (e.g. quadratic)."""
+    mechanism_name = (mechanism_name or '').lower()
+    if mechanism_name in PLURALITY_BALLOT_MECHANISMS:
+        return 'plurality'
+    if mechanism_name in APPROVAL_BALLOT_MECHANISMS:
+        return 'approval'
+    if mechanism_name in RANKED_BALLOT_MECHANISMS:
+        return 'ranked'
+    if mechanism_name in CARDINAL_BALLOT_MECHANISMS:
+        return 'cardinal'
+    return None
+
+
+def normalize_recount_ballots(votes: List[Dict], options: List[str], ballot_type: str,
+                              max_score: int = CARDINAL_DEFAULT_MAX_SCORE) -> List[Tuple[Any, Any]]:
+    """Decode each ballot once into a hashable ``(key, weight)`` pair.
+
+    Keys are the chosen option (plurality), the approved options in option order (approval),
+    the ranking with unknown and repeated options dropped (ranked) or the score vector
+    (cardinal). Malformed or empty ballots are skipped. Weights follow the usual rule:
+    ``tokens`` None counts as 1, a positive ``tokens`` as itself, anything else as 0.
+    """
+    ballots = []
+    for vote_record in normalize_ballots(votes):
+        vote_data = vote_record['vote_data']
+        if not isinstance(vote_data, dict):
+            continue
+        key = None
+        if ballot_type == 'plurality':
+            option = vote_data.get('option')
+            key = option if isinstance(option, str) and option in options else None
+        elif ballot_type == 'approval':
+            approved = vote_data.get('approved')
+            if isinstance(approved, list):
+                key = tuple(opt for opt in options if opt in approved) or None
+        elif ballot_type == 'ranked':
+            rankings = vote_data.get('rankings')
+            if isinstance(rankings, list):
+                key = tuple(dict.fromkeys(r for r in rankings if isinstance(r, str) and r in options)) or None
+        elif ballot_type == 'cardinal':
+            key = score_ballot_vector(vote_data, options, max_score)
+        if key is None:
+            continue
+
+        tokens = vote_record.get('tokens_invested')
+        if tokens is None:
+            weight = 1
+        elif tokens > 0:
+            weight = tokens
+        else:
+            weight = 0
+        ballots.append((key, weight))
+    return ballots
+
+
+def _recount_records(groups: Dict[Any, Any], ballot_type: str) -> List[Dict[str, Any]]:
+    """Turn grouped ballots back into one weighted vote record per distinct ballot."""
+    if ballot_type == 'plurality':
+        return [{'vote_data': {'option': key}, 'tokens_invested': weight} for key, weight in groups.items()]
+    if ballot_type == 'approval':
+        return [{'vote_data': {'approved': list(key)}, 'tokens_invested': weight} for key, weight in groups.items()]
+    if ballot_type == 'ranked':
+        return [{'vote_data': {'rankings': list(key)}, 'tokens_invested': weight} for key, weight in groups.items()]
+    return [{'vote_data': {'scores': key.hex()}, 'tokens_invested': weight} for key, weight in groups.items()]
+
+
+def evaluate_recount(groups: Dict[Any, Any], ballot_type: str, options: List[str],
+                     hyperparameters: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """Run every mechanism compatible with ``ballot_type`` on grouped ``{ballot: weight}`` state.
+
+    Only ballots with positive weight should be present. The pairwise matrix and the
+    first-preference tally are built once and shared between the mechanisms that read them.
+    """
+    if hyperparameters is None: hyperparameters = {}
+    records = _recount_records(groups, ballot_type)
+    results = {}
+    if ballot_type == 'ranked':
+        total_weight = sum(groups.values())
+        pairwise_matrix, _, _ = build_weighted_pairwise_matrix(records, options, "Recount")
+        first_preferences: Dict[str, Any] = {}
+        for rankings, weight in groups.items():
+            first_preferences[rankings[0]] = first_preferences.get(rankings[0], 0) + weight
+        first_records = [{'vote_data': {'option': opt}, 'tokens_invested': weight} for opt, weight in first_preferences.items()]
+        for mechanism_name in RECOUNT_MECHANISMS['ranked']:
+            if mechanism_name in RECOUNT_PAIRWISE_MECHANISMS:
+                results[mechanism_name] = RECOUNT_PAIRWISE_MECHANISMS[mechanism_name].from_pairwise(
+                    pairwise_matrix, options, hyperparameters, len(records), total_weight
+                )
+            elif mechanism_name == 'plurality':
+                results[mechanism_name] = PluralityVoting.count_votes(first_records, options, hyperparameters)
+            else:
+                results[mechanism_name] = get_voting_mechanism(mechanism_name).count_votes(records, options, hyperparameters)
+    else:
+        for mechanism_name in RECOUNT_MECHANISMS[ballot_type]:
+            results[mechanism_name] = get_voting_mechanism(mechanism_name).count_votes(records, options, hyperparameters)
+    return results
+
+
+def _group_recount_ballots(ballots: List[Tuple[Any, Any]], counts: Optional[List[int]] = None) -> Dict[Any, Any]:
+    """Sum ballot weights per distinct ballot, optionally with each ballot repeated ``counts[i]`` times."""
+    groups: Dict[Any, Any] = {}
+    for i, (key, weight) in enumerate(ballots):
+        multiplicity = 1 if counts is None else counts[i]
+        if weight and multiplicity:
+            groups[key] = groups.get(key, 0) + weight * multiplicity
+    return groups
+
+
+def compute_recount_report(ballots: List[Tuple[Any, Any]], ballot_type: str, options: List[str],
+                           hyperparameters: Optional[Dict[str, Any]] = None,
+                           resamples: int = RECOUNT_DEFAULT_RESAMPLES, seed: int = RECOUNT_BOOTSTRAP_SEED) -> Dict[str, Any]:
+    """Compare every compatible mechanism on ``ballots`` and measure how robust each winner is.
+
+    Each bootstrap resample draws as many ballots as were cast, with replacement, using a
+    ``random.Random(seed)``; identical ``(ballot, weight)`` pairs are drawn as one stratum,
+    so a resample costs O(ballots cast) draws plus one evaluation of the grouped state.
+    ``stability`` is the share of resamples in which a mechanism elects its full-count winner.
+    Must stay picklable in and out so large recounts can run in the tally pool.
+    """
+    resamples = min(max(int(resamples), 0), RECOUNT_MAX_RESAMPLES)
+    full = evaluate_recount(_group_recount_ballots(ballots), ballot_type, options, hyperparameters)
+
+    strata: Dict[Tuple[Any, Any], int] = {}
+    for ballot in ballots:
+        strata[ballot] = strata.get(ballot, 0) + 1
+    stratum_ballots = list(strata)
+    cumulative = list(itertools.accumulate(strata.values()))
+
+    frequencies = {name: {} for name in full}
+    rng = random.Random(seed)
+    for _ in range(resamples if ballots else 0):
+        counts = [0] * len(stratum_ballots)
+        for index in rng.choices(range(len(stratum_ballots)), cum_weights=cumulative, k=len(ballots)):
+            counts[index] += 1
+        resampled = evaluate_recount(_group_recount_ballots(stratum_ballots, counts), ballot_type, options, hyperparameters)
+        for name, result in resampled.items():
+            winner = result.get('winner') or "No winner"
+            frequencies[name][winner] = frequencies[name].get(winner, 0) + 1
+
+    mechanisms = {}
+    for name, result in full.items():
+        winner = result.get('winner')
+        held = frequencies[name].get(winner or "No winner", 0)
+        mechanisms[name] = {
+            'winner': winner,
+            'reason_for_no_winner': result.get('reason_for_no_winner'),
+            'stability': held / resamples if resamples and ballots else None,
+            'resample_winners': dict(sorted(frequencies[name].items(), key=lambda item: -item[1])),
+        }
+    winners = {entry['winner'] for entry in mechanisms.values()}
+    return {
+        'ballot_type': ballot_type,
+        'options': list(options),
+        'total_ballots': len(ballots),
+        'distinct_ballots': len({key for key, _ in ballots}),
+        'total_weight': sum(weight for _, weight in ballots),
+        'mechanisms': mechanisms,
+        'winners_agree': len(winners) == 1 and None not in winners,
+        'bootstrap': {'resamples': resamples if ballots else 0, 'seed': seed},
+    }
+
+
+async def recount_proposal(proposal_id: int, resamples: int = RECOUNT_DEFAULT_RESAMPLES,
+                           seed: int = RECOUNT_BOOTSTRAP_SEED, guild: Optional[discord.Guild] = None) -> Optional[Dict[str, Any]]:
+    """Build the cross-mechanism recount report for a proposal's stored ballots.
+
+    Ballots carry the same guild weighting and delegations as ``calculate_results`` (frozen at close).
+    Returns None if the proposal is missing or its ballot type cannot be recounted.
+    """
+    proposal = await db.get_proposal(proposal_id)
+    if not proposal:
+        print(f"ERROR: Proposal {proposal_id} not found for recount.")
+        return None
+    mechanism_name = (proposal.get('voting_mechanism') or 'plurality').lower()
+    ballot_type = recount_ballot_type(mechanism_name)
+    if ballot_type is None:
+        print(f"WARNING: P#{proposal_id} uses {mechanism_name}, which recounts do not support.")
+        return None
+
+    options = await db.get_proposal_options(proposal_id) or extract_options_from_description(proposal.get('description', '')) or ["Yes", "No"]
+    hyperparameters = proposal.get('hyperparameters')
+    if isinstance(hyperparameters, str):
+        try: hyperparameters = json.loads(hyperparameters)
+        except json.JSONDecodeError: hyperparameters = {}
+    elif hyperparameters is None: hyperparameters = {}
+
+    all_db_votes = await db.get_proposal_votes(proposal_id) or []
+    effective_votes = [v for v in all_db_votes if not v.get('is_abstain')]
+    if proposal.get('server_id') is not None and not proposal.get('campaign_id'):
+        snapshot = await db.get_vote_weight_snapshot(proposal_id)
+        provider = delegation_revision = None
+        if snapshot is None:
+            provider = await get_weight_provider(proposal)
+            delegation_revision = await db.get_delegation_revision(proposal['server_id'])
+        if weights_need_guild(provider, guild):
+            print(f"ERROR: P#{proposal_id} uses {provider.name} weighting, which needs the guild to recount.")
+            return None
+        effective_votes, _ = await weigh_effective_votes(
+            proposal, all_db_votes, effective_votes, provider, delegation_revision, guild, snapshot
+        )
+
+    ballots = normalize_recount_ballots(effective_votes, options, ballot_type, cardinal_max_score(hyperparameters))
+    args = (ballots, ballot_type, list(options), hyperparameters, resamples, seed)
+    # Every resample is another full pass over the ballots, so the work is ballots x (resamples + 1).
+    if len(ballots) * (resamples + 1) < TALLY_PROCESS_THRESHOLD:
+        report = compute_recount_report(*args)
+    else:
+        report = await run_in_tally_pool(
+            f"Recount of P#{proposal_id} ({len(ballots)} ballots, {resamples} resamples)", compute_recount_report, *args
+        )
+        if report is None:
+            return None
+
+    report.update({
+        'proposal_id': proposal_id,
+        'title': proposal.get('title'),
+        'mechanism': mechanism_name,
+        'num_abstain_votes': len(all_db_votes) - len(effective_votes),
+    })
+    return report
+
+
+def format_recount_embed(report: Dict[str, Any]) -> discord.Embed:
+    """Side-by-side view of a recount report: each method's winner and its bootstrap stability."""
+    own = report.get('mechanism')
+    agree = report.get('winners_agree')
+    embed = discord.Embed(
+        title=f"🔁 Recount: Proposal #{report.get('proposal_id')}",
+        description=(
+            f"**{report.get('title') or 'Untitled'}**\n"
+            f"{report['total_ballots']} {report['ballot_type']} ballot(s), {report['distinct_ballots']} distinct, "
+            f"total weight {report['total_weight']:g}.\n"
+            + ("✅ Every method elects the same winner." if agree else "⚠️ The methods disagree on the winner.")
+        ),
+        color=discord.Color.green() if agree else discord.Color.orange()
+    )
+    resamples = report['bootstrap']['resamples']
+    for name, entry in report['mechanisms'].items():
+        label = name.replace('_', ' ').title() + (" (used)" if name == own else "")
+        value = f"🏆 {entry['winner']}" if entry['winner'] else f"No winner: {entry['reason_for_no_winner'] or 'Unknown'}"
+        if entry['stability'] is not None:
+            value += f"\nStable in {entry['stability']:.0%} of {resamples} resamples"
+            runners = [f"{opt} {count}" for opt, count in entry['resample_winners'].items() if opt != (entry['winner'] or "No winner")]
+            if runners:
+                value += f"\nOtherwise: {', '.join(runners[:3])}"
+        embed.add_field(name=label, value=value[:1024], inline=True)
+    if own not in report['mechanisms']:
+        embed.add_field(name="Note", value=f"{own} elects several winners; only single-winner methods are compared.", inline=False)
+    embed.set_footer(text=f"Bootstrap seed {report['bootstrap']['seed']} | Full report attached as JSON")
+    return embed
+
+
+def recount_report_file(report: Dict[str, Any]) -> discord.File:
+    """The recount report as a JSON attachment."""
+    payload = json.dumps(report, indent=2, default=str).encode('utf-8')
+    return discord.File(io.BytesIO(payload), filename=f"recount_proposal_{report.get('proposal_id')}.json")
+
+
+# ========================
+# 🔹 BULK RE-TALLY
+# ========================
+# After a mechanism fix, stored results of closed proposals may be wrong. A re-tally job
+# walks closed proposals by keyset a chunk at a time, recounts each chunk concurrently
+# with every tally sent to the process pool, diffs the fresh results against the stored
+# ones and writes the corrections (plus the job checkpoint) in one transaction per chunk.
+
+RETALLY_CHUNK_SIZE = 50
+
+
+def diff_results(stored: Optional[Dict[str, Any]], fresh: Dict[str, Any]) -> List[str]:
+    """Top-level keys whose values differ between stored results and a fresh tally.
+
+    The fresh tally is compared as it would be stored (after a JSON round trip), so tuples
+    and integer dict keys do not show up as spurious changes.
+    """
+    fresh = json.loads(json.dumps(fresh))
+    if stored is None:
+        return sorted(fresh)
+    return sorted(key for key in set(stored) | set(fresh) if stored.get(key) != fresh.get(key))
+
+
+async def _weights_not_frozen(entry: Dict[str, Any]) -> bool:
+    """True if a closed proposal has no weight snapshot but the guild now weighs or delegates votes."""
+    if entry.get('has_weight_snapshot') or entry.get('server_id') is None or entry.get('campaign_id'):
+        return False
+    if await db.get_delegation_revision(entry['server_id']):
+        return True
+    return (await get_weight_provider(entry)).name != VoteWeightProvider.name
+
+
+async def retally_closed_proposals(server_id: Optional[int] = None, dry_run: bool = True, restart: bool = False,
+                                   chunk_size: int = RETALLY_CHUNK_SIZE, guild: Optional[discord.Guild] = None) -> Dict[str, Any]:
+    """Recount closed proposals and correct stored results that no longer match.
+
+    A dry run only reports the differences and leaves the checkpoint untouched. A real run
+    resumes from the job's checkpoint unless ``restart`` is set, and clears it once every
+    proposal has been processed. Proposals whose recount fails are reported, not rewritten.
+    Recounts use the vote weights frozen at close; proposals closed before weights were
+    frozen are skipped (and reported) while the guild has delegations or weighting, since
+    today's would not be the ones they were decided with.
+    """
+    job_name = f"retally:{server_id if server_id is not None else 'all'}"
+    after_proposal_id = 0
+    if not dry_run:
+        if restart:
+            await db.clear_retally_checkpoint(job_name)
+        checkpoint = await db.get_retally_checkpoint(job_name)
+        if checkpoint:
+            after_proposal_id = checkpoint['last_proposal_id']
+    report = {'job_name': job_name, 'dry_run': dry_run, 'resumed_after': after_proposal_id,
+              'scanned': 0, 'changes': [], 'errors': [], 'skipped': []}
+
+    while True:
+        page = await db.get_closed_proposals_page(after_proposal_id, chunk_size, server_id)
+        if not page:
+            break
+        recountable = []
+        for entry in page:
+            if await _weights_not_frozen(entry):
+                report['skipped'].append(entry['proposal_id'])
+            else:
+                recountable.append(entry)
+        # The tally pool admits one tally per worker; the rest wait without their timeout running.
+        fresh_results = await asyncio.gather(*(
+            calculate_results(entry['proposal_id'], use_cache=False, guild=guild, tally_threshold=0) for entry in recountable
+        ))
+
+        corrections = []
+        for entry, fresh in zip(recountable, fresh_results):
+            if fresh is None:
+                report['errors'].append(entry['proposal_id'])
+                continue
+            changed_keys = diff_results(entry['results'], fresh)
+            if changed_keys:
+                corrections.append((entry['proposal_id'], fresh))
+                report['changes'].append({
+                    'proposal_id': entry['proposal_id'],
+                    'changed_keys': changed_keys,
+                    'old_winner': (entry['results'] or {}).get('winner'),
+                    'new_winner': fresh.get('winner'),
+                })
+
+        after_proposal_id = page[-1]['proposal_id']
+        report['scanned'] += len(page)
+        if not dry_run:
+            await db.apply_retally_chunk(job_name, after_proposal_id, corrections)
+            for proposal_id, _ in corrections:
+                clear_tally_cache(proposal_id)
+        print(f"DEBUG: Re-tally {job_name} processed up to P#{after_proposal_id} "
+              f"({len(corrections)} {'differing' if dry_run else 'corrected'} in chunk).")
+
+    if not dry_run:
+        await db.clear_retally_checkpoint(job_name)
+    return report
+
+
+def format_retally_embed(report: Dict[str, Any]) -> discord.Embed:
+    """Summary of a re-tally job: how many proposals changed and which winners moved."""
+    changes = report['changes']
+    winner_changes = [c for c in changes if c['old_winner'] != c['new_winner']]
+    embed = discord.Embed(
+        title="🧮 Re-tally " + ("(dry run)" if report['dry_run'] else "complete"),
+        description=(
+            f"Scanned {report['scanned']} closed proposal(s)"
+            + (f", resuming after #{report['resumed_after']}" if report['resumed_after'] else "")
+            + f".\n{len(changes)} result(s) {'differ' if report['dry_run'] else 'corrected'}, "
+            f"{len(winner_changes)} with a different winner."
+        ),
+        color=discord.Color.orange() if changes else discord.Color.green()
+    )
+    if winner_changes:
+        lines = [f"#{c['proposal_id']}: {c['old_winner'] or 'No winner'} → {c['new_winner'] or 'No winner'}" for c in winner_changes]
+        embed.add_field(name="Winner Changes", value="\n".join(lines)[:1024], inline=False)
+    other_changes = [c for c in changes if c['old_winner'] == c['new_winner']]
+    if other_changes:
+        lines = [f"#{c['proposal_id']}: {', '.join(c['changed_keys'][:5])}" for c in other_changes]
+        embed.add_field(name="Other Differences", value="\n".join(lines)[:1024], inline=False)
+    if report['errors']:
+        embed.add_field(name="Could Not Recount", value=", ".join(f"#{pid}" for pid in report['errors'])[:1024], inline=False)
+    if report.get('skipped'):
+        embed.add_field(name="Skipped (weights not frozen at close)",
+                        value=", ".join(f"#{pid}" for pid in report['skipped'])[:1024], inline=False)
+    if report['dry_run'] and changes:
+        embed.set_footer(text="Nothing was written. Run !retally apply to store the corrections.")
+    return embed
+
+
+def _running_bot() -> Optional[commands.Bot]:
+    """The bot defined in main.py, whether main was imported or is running as the script."""
+    for module_name in ('__main__', 'main'):
+        bot_instance = getattr(sys.modules.get(module_name), 'bot', None)
+        if isinstance(bot_instance, commands.Bot):
+            return bot_instance
+    return None
+
+
+async def check_expired_proposals(bot_instance: Optional[commands.Bot] = None) -> List[Tuple[Dict, Dict]]:
+    """Check for proposals with expired deadlines, close them, and return the list of (proposal, results) pairs.
+
+    ``bot_instance`` supplies each proposal's guild; it defaults to the running bot.
+    """
     try:
+        bot_instance = bot_instance or _running_bot()
         # Get all active proposals with expired deadlines
         expired_proposals = await db.get_expired_proposals()
 
@@ -820,14 +3320,9 @@ async def check_expired_proposals() -> List[Tuple[Dict, Dict]]:
                     f"TASK: Closing expired proposal #{proposal['proposal_id']}: {proposal['title']}")
 
                 # Close the proposal and calculate results
-                guild_obj = None
-                try:
-                    import main
-                    bot_instance = getattr(main, 'bot', None)
-                    if bot_instance:
-                        guild_obj = bot_instance.get_guild(proposal['server_id'])
-                except Exception as e:
-                    print(f"DEBUG: Could not fetch guild for proposal {proposal['proposal_id']}: {e}")
+                guild_obj = bot_instance.get_guild(proposal['server_id']) if bot_instance else None
+                if guild_obj is None:
+                    print(f"DEBUG: Could not fetch guild for proposal {proposal['proposal_id']}")
                 results = await close_proposal(proposal['proposal_id'], guild_obj)
 
                 if results:
@@ -859,6 +3354,14 @@ async def check_expired_proposals() -> List[Tuple[Dict, Dict]]:
         return []
 
 
+async def _record_bloc_stats(proposal_id: int) -> None:
+    try:
+        from analytics import record_closed_proposal
+        await record_closed_proposal(proposal_id)
+    except Exception as e_blocs:
+        print(f"WARNING: Could not record P#{proposal_id} in voting-bloc stats: {e_blocs}")
+
+
 async def close_proposal(proposal_id: int, guild: Optional[discord.Guild] = None) -> Optional[Dict]:
     """
     Close a proposal, calculate results, update status, and store results.
@@ -884,9 +3387,6 @@ async def close_proposal(proposal_id: int, guild: Optional[discord.Guild] = None
                 except: return None
             return None  # Cannot proceed if not voting
 
-        # Get all votes for this proposal
-        votes = await db.get_proposal_votes(proposal_id)
-
         # Get voting mechanism
         mechanism_name = proposal['voting_mechanism'].lower()
         mechanism = get_voting_mechanism(mechanism_name)
@@ -899,8 +3399,15 @@ async def close_proposal(proposal_id: int, guild: Optional[discord.Guild] = None
             await db.add_proposal_note(proposal_id, "closure_error", f"Invalid mechanism: {mechanism_name}")
             return None
 
+        # Freeze the vote weights first: this tally and every later recount use them.
+        # Role and tenure weights need the guild; without it the proposal stays open for the next check.
+        if not await snapshot_vote_weights(proposal, guild):
+            print(f"WARNING: Deferring close of P#{proposal_id} until its guild is available.")
+            return None
+
         # Calculate results using the main calculate_results function in this file
-        results = await calculate_results(proposal_id)
+        results = await calculate_results(proposal_id, guild=guild)
+        discard_provisional_standings(proposal_id)
 
         # Determine if proposal passed based on winner existence
         status_determined = "Passed" if results and results.get('winner') is not None else "Failed"
@@ -932,11 +3439,26 @@ async def close_proposal(proposal_id: int, guild: Optional[discord.Guild] = None
         await db.update_proposal_status(proposal_id, db_status_to_set)
         print(f"DEBUG: Updated proposal {proposal_id} status to {db_status_to_set}")
 
+        # Voting is over, so freeze the receipt tree. The root lives in merkle_trees, not in the
+        # stored results, so a re-tally (which recomputes results) neither flags nor drops it.
+        merkle_root = await db.publish_merkle_root(proposal_id)
+
         # Store results in the database
         # Use integer 1 instead of boolean True for SQLite compatibility
         await db.store_proposal_results(proposal_id, results)
         print(f"DEBUG: Stored results for proposal {proposal_id}")
 
+        # Fold the ballots into the voting-bloc stats in the background: the pair count grows with
+        # the square of the turnout. Anything not finished is picked up by the next !blocs catch-up.
+        if proposal.get('server_id') is not None:
+            asyncio.create_task(_record_bloc_stats(proposal_id))
+
+        # The ballot set is final, so snapshot the event log; later replays start from here.
+        await db.compact_vote_events(proposal_id)
+
+        if guild is not None and merkle_root:
+            asyncio.create_task(send_vote_receipts(guild, proposal_id, merkle_root))
+
         # Clear the tracking message ID so the periodic task doesn't try to update it
         # await db.update_proposal(proposal_id, {'tracking_message_id': None}) # Or set to 0? Let's use None.
         # Update: It seems better to leave the tracking message and update it once more showing "Voting Closed".
@@ -958,13 +3480,11 @@ async def close_proposal(proposal_id: int, guild: Optional[discord.Guild] = None
             guild_obj = guild
             bot_instance = None
             if guild_obj is None and guild_id:
-                try:
-                    import main
-                    bot_instance = getattr(main, 'bot', None)
-                    if bot_instance:
-                        guild_obj = bot_instance.get_guild(guild_id)
-                except Exception as e_fetch:
-                    print(f"DEBUG: Unable to fetch guild {guild_id} for campaign {campaign_id}: {e_fetch}")
+                bot_instance = _running_bot()
+                if bot_instance:
+                    guild_obj = bot_instance.get_guild(guild_id)
+                if guild_obj is None:
+                    print(f"DEBUG: Unable to fetch guild {guild_id} for campaign {campaign_id}")
             if guild_obj:
                 try:
                     campaign_proposals = await db.get_proposals_by_campaign_id(campaign_id, guild_id=guild_obj.id)
@@ -1007,6 +3527,43 @@ async def close_proposal(proposal_id: int, guild: Optional[discord.Guild] = None
         return None
 
 
+async def send_vote_receipts(guild: discord.Guild, proposal_id: int, merkle_root: str) -> int:
+    """DM every member who voted their inclusion receipt for the closed proposal. Returns DMs sent.
+
+    Imported paper ballots (non-positive user IDs) have no member to receive one.
+    """
+    sent = 0
+    for vote in await db.get_proposal_votes(proposal_id) or []:
+        if vote['user_id'] <= 0 or vote.get('source'):
+            continue
+        receipt = await db.get_vote_receipt(proposal_id, vote['user_id'])
+        member = guild.get_member(vote['user_id'])
+        if not receipt or not member:
+            continue
+        try:
+            await member.send(format_receipt_message(proposal_id, receipt, merkle_root))
+            sent += 1
+        except discord.Forbidden:
+            print(f"WARNING: Could not DM vote receipt for P#{proposal_id} to {vote['user_id']} (DMs closed).")
+        except Exception as e:
+            print(f"ERROR sending vote receipt for P#{proposal_id} to {vote['user_id']}: {e}")
+    print(f"DEBUG: Sent {sent} vote receipts for P#{proposal_id}.")
+    return sent
+
+
+def format_receipt_message(proposal_id: int, receipt: str, merkle_root: Optional[str]) -> str:
+    """DM text for a vote receipt; ``merkle_root`` is None while voting is still open."""
+    lines = [f"🧾 **Your vote receipt for Proposal #{proposal_id}**", f"```{receipt}```"]
+    if merkle_root:
+        lines.append(f"Published root: `{merkle_root}`")
+        lines.append("Anyone can check it with `!verifyreceipt <receipt>`, or offline with "
+                     "`python receipts.py <receipt> <root>`.")
+    else:
+        lines.append("Voting is still open: this receipt proves your ballot against the current tree. "
+                     "You will get a final one when the proposal closes.")
+    return "\n".join(lines)
+
+
 async def close_and_announce_results(guild: discord.Guild, proposal: Dict, results: Dict) -> bool:
     """Announce the results of a closed proposal with enhanced visuals"""
     try:
@@ -1327,16 +3884,19 @@ def get_voting_instructions(mechanism, options):
     options_text = ", ".join(
         [f"`{opt}`" for opt in options]) if options else "No options defined."
 
-    if mechanism in ["plurality"]:
+    if mechanism in PLURALITY_BALLOT_MECHANISMS:
 
         instructions += f"Format: `!vote <proposal_id> <option>`\nChoose *one* option.\nAvailable options: {options_text}"
 
-    elif mechanism in ["borda", "runoff", "condorcet"]:
+    elif mechanism in RANKED_BALLOT_MECHANISMS:
         instructions += f"Format: `!vote <proposal_id> rank option1,option2,...`\nRank the options in order of preference, separated by commas.\nAvailable options: {options_text}"
 
-    elif mechanism == "approval":
+    elif mechanism in APPROVAL_BALLOT_MECHANISMS:
         instructions += f"Format: `!vote <proposal_id> approve option1,option2,...`\nApprove *all* options you support, separated by commas.\nAvailable options: {options_text}"
 
+    elif mechanism in CARDINAL_BALLOT_MECHANISMS:
+        instructions += f"Format: `!vote <proposal_id> score option1=5,option2=3,...`\nScore each option (unscored options count as 0).\nAvailable options: {options_text}"
+
     else:
         instructions += "Format: `!vote <proposal_id> ...`\nInstructions for this mechanism are not fully implemented. Please contact an admin."
 
@@ -1390,6 +3950,299 @@ async def get_eligible_voters(guild: discord.Guild, proposal: Dict) -> List[disc
     return eligible_members
 
 
+# ========================
+# 🔹 BALLOT IMPORT
+# ========================
+# Paper ballots from hybrid meetings arrive as a CSV with a header row. Plurality files
+# have an ``option`` column; approval, ranked and score files have one column per option
+# (a mark, a rank number or a score; blank means not approved / unranked / 0). An optional
+# ``ballot`` column carries the paper ballot's number for the audit trail. The file is
+# checked column by column against lookups built once from the options, every problem is
+# reported with its line, and nothing is imported unless every row is valid.
+
+BALLOT_IMPORT_MAX_ROWS = 5000
+BALLOT_IMPORT_REF_COLUMN = 'ballot'
+_APPROVAL_MARKS = {'1', 'x', 'y', 'yes', 'true', '✓', '✔'}
+_APPROVAL_BLANKS = {'', '0', 'n', 'no', 'false'}
+
+
+def parse_ballot_csv(text: str, options: List[str], ballot_type: str,
+                     max_score: int = CARDINAL_DEFAULT_MAX_SCORE) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]:
+    """Validate a ballot CSV; returns ``([(ballot_ref, vote_data), ...], errors)``.
+
+    ``ballot_type`` is a recount_ballot_type family. ``ballot_ref`` is the ``ballot`` cell or
+    ``line<N>``. Errors name the CSV line; callers should import nothing if any are returned.
+    """
+    rows = list(csv.reader(io.StringIO(text)))
+    while rows and not any(cell.strip() for cell in rows[-1]):
+        rows.pop()
+    if not rows:
+        return [], ["The file is empty."]
+    if len(rows) - 1 > BALLOT_IMPORT_MAX_ROWS:
+        return [], [f"Too many ballots ({len(rows) - 1}); import at most {BALLOT_IMPORT_MAX_ROWS} per file."]
+
+    option_by_name = {opt.strip().lower(): opt for opt in options}
+    header = [cell.strip().lower() for cell in rows[0]]
+    errors = []
+    ref_index = header.index(BALLOT_IMPORT_REF_COLUMN) if BALLOT_IMPORT_REF_COLUMN in header else None
+    if ballot_type == 'plurality':
+        expected = {'option'}
+    else:
+        expected = set(option_by_name)
+    unknown = [rows[0][i].strip() for i, name in enumerate(header) if name not in expected and i != ref_index]
+    if unknown:
+        errors.append(f"Line 1: unknown column(s) {', '.join(unknown)}; expected {', '.join(['ballot'] + (['option'] if ballot_type == 'plurality' else options))}.")
+    if len(set(header)) != len(header):
+        errors.append("Line 1: duplicate column names.")
+    if ballot_type == 'plurality' and 'option' not in header:
+        errors.append("Line 1: plurality ballots need an `option` column.")
+    if errors:
+        return [], errors
+
+    # Column-wise: pad every row to the header width once, then read each column in one sweep.
+    body = rows[1:]
+    width = len(header)
+    line_numbers = range(2, len(body) + 2)
+    line_errors: List[Tuple[int, str]] = []
+    for line, row in zip(line_numbers, body):
+        if len(row) > width and any(cell.strip() for cell in row[width:]):
+            line_errors.append((line, "more cells than columns"))
+    columns = {name: [(row[i].strip() if i < len(row) else '') for row in body] for i, name in enumerate(header)}
+    refs = columns.get(BALLOT_IMPORT_REF_COLUMN) or [''] * len(body)
+    refs = [ref or f"line{line}" for ref, line in zip(refs, line_numbers)]
+    seen_refs: Dict[str, int] = {}
+    for line, ref in zip(line_numbers, refs):
+        if ref in seen_refs:
+            line_errors.append((line, f"ballot `{ref}` repeats line {seen_refs[ref]}"))
+        seen_refs.setdefault(ref, line)
+
+    row_errors: Dict[int, List[str]] = {}
+    ballots = []
+    if ballot_type == 'plurality':
+        for index, cell in enumerate(columns['option']):
+            option = option_by_name.get(cell.lower())
+            if option is None:
+                row_errors.setdefault(index, []).append(f"`{cell}` is not an option" if cell else "no option chosen")
+            else:
+                ballots.append((index, {'option': option}))
+    else:
+        # One parsed column per option, in option order
+        parsed: Dict[str, List[Optional[int]]] = {}
+        for opt in options:
+            cells = columns.get(opt.strip().lower(), [''] * len(body))
+            values: List[Optional[int]] = []
+            for index, cell in enumerate(cells):
+                if ballot_type == 'approval':
+                    lowered = cell.lower()
+                    if lowered in _APPROVAL_MARKS:
+                        values.append(1)
+                        continue
+                    if lowered in _APPROVAL_BLANKS:
+                        values.append(0)
+                        continue
+                    row_errors.setdefault(index, []).append(f"`{cell}` under {opt} is not a mark (use 1/x or leave blank)")
+                elif not cell:
+                    values.append(None if ballot_type == 'ranked' else 0)
+                    continue
+                else:
+                    try:
+                        value = int(cell)
+                    except ValueError:
+                        value = -1
+                    low, high = (1, len(options)) if ballot_type == 'ranked' else (0, max_score)
+                    if low <= value <= high:
+                        values.append(value)
+                        continue
+                    kind = "rank" if ballot_type == 'ranked' else "score"
+                    row_errors.setdefault(index, []).append(f"{kind} `{cell}` under {opt} must be a whole number from {low} to {high}")
+                values.append(None)
+            parsed[opt] = values
+
+        for index in range(len(body)):
+            if index in row_errors:
+                continue
+            cells = [(opt, parsed[opt][index]) for opt in options]
+            if ballot_type == 'approval':
+                approved = [opt for opt, value in cells if value]
+                if approved:
+                    ballots.append((index, {'approved': approved}))
+                else:
+                    row_errors[index] = ["no options approved"]
+            elif ballot_type == 'ranked':
+                ranked = sorted((value, opt) for opt, value in cells if value is not None)
+                ranks = [value for value, _ in ranked]
+                if not ranked:
+                    row_errors[index] = ["no options ranked"]
+                elif len(set(ranks)) != len(ranks):
+                    row_errors[index] = ["two options share a rank"]
+                else:
+                    ballots.append((index, {'rankings': [opt for _, opt in ranked]}))
+            else:
+                ballots.append((index, {'scores': encode_score_ballot(dict(cells), options)}))
+
+    line_errors.extend((index + 2, "; ".join(messages)) for index, messages in row_errors.items())
+    errors = [f"Line {line}: {message}." for line, message in sorted(line_errors)]
+    return [(refs[index], vote_data) for index, vote_data in ballots], errors
+
+
+async def import_ballot_csv(proposal_id: int, text: str, filename: str) -> Tuple[int, List[str]]:
+    """Validate a ballot CSV for a proposal and, if every row is valid, import it in one transaction.
+
+    Each ballot is tagged ``csv:<filename>#<ballot_ref>``. Returns ``(imported, errors)``.
+    """
+    proposal = await db.get_proposal(proposal_id)
+    if not proposal:
+        return 0, [f"Proposal #{proposal_id} not found."]
+    ballot_type = recount_ballot_type(proposal.get('voting_mechanism'))
+    if ballot_type is None:
+        return 0, [f"Ballot import does not support {proposal.get('voting_mechanism')} proposals."]
+    options = await db.get_proposal_options(proposal_id) or []
+    if not options:
+        return 0, [f"Proposal #{proposal_id} has no options."]
+
+    ballots, errors = parse_ballot_csv(text, options, ballot_type, cardinal_max_score(proposal.get('hyperparameters')))
+    if errors:
+        return 0, errors
+    if not ballots:
+        return 0, ["The file has no ballots."]
+    tagged = [(f"csv:{filename}#{ref}", json.dumps(vote_data)) for ref, vote_data in ballots]
+    return await db.import_ballots(proposal_id, tagged)
+
+
+# ========================
+# 🔹 PROVISIONAL STANDINGS
+# ========================
+# Live ranked-choice standings for the vote tracker. Each proposal keeps running
+# first-preference totals and a pairwise matrix; a new or changed ballot subtracts the
+# voter's previous ballot and adds the new one, O(k²) per vote. A full pass over the
+# votes only happens when the state is missing or its vote revision falls behind the
+# database (e.g. after a restart or a write that bypassed process_vote).
+class ProvisionalStandings:
+    """Incrementally maintained first preferences and pairwise matrix for one proposal."""
+
+    def __init__(self, options: List[str], vote_revision: int = 0):
+        self.options = list(options)
+        self.index = {opt: i for i, opt in enumerate(self.options)}
+        self.first_preferences = [0] * len(self.options)
+        self.pairwise = [[0] * len(self.options) for _ in self.options]
+        self.ballots: Dict[int, Tuple[Tuple[int, ...], Any, Any]] = {}  # user_id -> (ranking, irv weight, pairwise weight)
+        self.vote_revision = vote_revision
+
+    def _parse_ballot(self, vote_data: Any, tokens: Optional[int]) -> Optional[Tuple[Tuple[int, ...], Any, Any]]:
+        if isinstance(vote_data, str):
+            try:
+                vote_data = json.loads(vote_data)
+            except json.JSONDecodeError:
+                return None
+        if not isinstance(vote_data, dict) or not isinstance(vote_data.get('rankings'), list):
+            return None
+        ranking = tuple(self.index[r] for r in vote_data['rankings'] if isinstance(r, str) and r in self.index)
+        if not ranking:
+            return None
+        # Same weight rules as RunoffVoting (first preferences) and the Condorcet family (pairwise).
+        irv_weight = 1 if tokens is None else (tokens if tokens > 0 else 0)
+        pairwise_weight = 1 if tokens is None or tokens < 0 else tokens
+        return ranking, irv_weight, pairwise_weight
+
+    def _apply(self, ballot: Tuple[Tuple[int, ...], Any, Any], sign: int) -> None:
+        ranking, irv_weight, pairwise_weight = ballot
+        self.first_preferences[ranking[0]] += sign * irv_weight
+        if not pairwise_weight:
+            return
+        unranked = len(self.options)
+        position = [unranked] * unranked
+        for rank, i in enumerate(ranking):
+            position[i] = rank
+        delta = sign * pairwise_weight
+        for a, row in enumerate(self.pairwise):
+            pos_a = position[a]
+            if pos_a == unranked:
+                continue  # Unranked options beat nobody
+            for b, pos_b in enumerate(position):
+                if pos_a < pos_b:
+                    row[b] += delta
+
+    def set_ballot(self, user_id: int, vote_data: Any, tokens: Optional[int], is_abstain: bool = False) -> None:
+        """Replace ``user_id``'s ballot (an abstention or invalid ballot just removes it)."""
+        previous = self.ballots.pop(user_id, None)
+        if previous:
+            self._apply(previous, -1)
+        ballot = None if is_abstain else self._parse_ballot(vote_data, tokens)
+        if ballot:
+            self.ballots[user_id] = ballot
+            self._apply(ballot, 1)
+
+    def summary(self) -> Dict[str, Any]:
+        """First-preference (IRV round 1) leader and Condorcet standing from the running totals."""
+        first = dict(zip(self.options, self.first_preferences))
+        top = max(self.first_preferences, default=0)
+        first_leaders = [opt for opt, w in first.items() if w == top] if top > 0 else []
+        k = len(self.options)
+        pairwise_wins = {
+            opt: sum(1 for b in range(k) if b != a and self.pairwise[a][b] > self.pairwise[b][a])
+            for a, opt in enumerate(self.options)
+        }
+        condorcet_winner = next((opt for opt, wins in pairwise_wins.items() if wins == k - 1), None) if k > 1 else None
+        return {
+            'ballots': len(self.ballots),
+            'first_preferences': first,
+            'first_preference_leaders': first_leaders,
+            'first_preference_total': sum(self.first_preferences),
+            'pairwise_wins': pairwise_wins,
+            'condorcet_winner': condorcet_winner,
+        }
+
+
+_provisional_standings: Dict[int, ProvisionalStandings] = {}
+
+
+async def get_provisional_standings(proposal_id: int, options: List[str], vote_revision: int) -> ProvisionalStandings:
+    """Standings for ``proposal_id`` at ``vote_revision``, rebuilt from the votes only if out of date."""
+    standings = _provisional_standings.get(proposal_id)
+    if standings is None or standings.vote_revision != vote_revision or standings.options != list(options):
+        standings = ProvisionalStandings(options, vote_revision)
+        for vote_record in await db.get_proposal_votes(proposal_id) or []:
+            standings.set_ballot(vote_record.get('user_id'), vote_record.get('vote_data'),
+                                 vote_record.get('tokens_invested'), bool(vote_record.get('is_abstain')))
+        _provisional_standings[proposal_id] = standings
+    return standings
+
+
+def note_vote_for_standings(proposal_id: int, user_id: int, vote_data: Any, tokens: Optional[int], is_abstain: bool) -> None:
+    """Apply one recorded vote to the live standings (a no-op until the tracker first builds them)."""
+    standings = _provisional_standings.get(proposal_id)
+    if standings is not None:
+        standings.set_ballot(user_id, vote_data, tokens, is_abstain)
+        standings.vote_revision += 1  # Mirrors the revision bump of the vote write
+
+
+def discard_provisional_standings(proposal_id: int) -> None:
+    _provisional_standings.pop(proposal_id, None)
+
+
+def format_provisional_standings(summary: Dict[str, Any]) -> str:
+    """Tracker embed text for a ``ProvisionalStandings.summary()``."""
+    if not summary['ballots']:
+        return "No ranked ballots yet."
+    lines = []
+    leaders = summary['first_preference_leaders']
+    total = summary['first_preference_total']
+    if len(leaders) == 1:
+        share = summary['first_preferences'][leaders[0]] / total * 100 if total else 0
+        lines.append(f"**IRV leader (first preferences):** {leaders[0]} ({share:.1f}%)")
+    elif leaders:
+        lines.append(f"**IRV leader (first preferences):** tie between {', '.join(leaders)}")
+    if summary['condorcet_winner']:
+        lines.append(f"**Condorcet winner so far:** {summary['condorcet_winner']}")
+    else:
+        wins = summary['pairwise_wins']
+        best = max(wins.values(), default=0)
+        front = [opt for opt, w in wins.items() if w == best]
+        lines.append(f"**Condorcet:** no winner yet; most head-to-head wins: {', '.join(front)} ({best}/{len(wins) - 1})")
+    lines.append("_Provisional: the final tally runs when voting closes._")
+    return "\n".join(lines)[:1024]
+
+
 async def update_vote_tracking(guild: discord.Guild, proposal_id: int, final_proposal_state: Optional[Dict[str, Any]] = None):
     """Updates or creates a vote tracking message for a proposal in the voting channel."""
     print(f"DEBUG: update_vote_tracking called for proposal {proposal_id}. Status: {final_proposal_state['status'] if final_proposal_state else 'Fetching...'}")
@@ -1460,6 +4313,14 @@ async def update_vote_tracking(guild: discord.Guild, proposal_id: int, final_pro
             color=discord.Color.blue()
         )
         embed.add_field(name="Current Votes", value=current_results_display, inline=False)
+        mechanism_name = (proposal.get('voting_mechanism') or '').lower()
+        if proposal.get('live_standings') and mechanism_name in RANKED_BALLOT_MECHANISMS and proposal.get('status') == 'Voting':
+            options = await db.get_proposal_options(proposal_id) or ["Yes", "No"]
+            vote_revision = proposal.get('vote_revision')
+            if vote_revision is None:
+                vote_revision = await db.get_proposal_vote_revision(proposal_id) or 0
+            standings = await get_provisional_standings(proposal_id, options, vote_revision)
+            embed.add_field(name="Provisional Standings", value=format_provisional_standings(standings.summary()), inline=False)
         embed.add_field(name="Participation", value=f"{len(votes)} / {eligible_voters_count} voters ({percentage_voted:.2f}%)\n{progress_bar}", inline=False)
         embed.set_footer(text=f"Proposal ID: {proposal_id} | Last updated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S %Z')}")
 
@@ -1835,17 +4696,10 @@ async def _calculate_campaign_token_stats(campaign_id: int) -> Dict[str, Any]:
     stats["num_enrolled_voters"] = len(enrolled_user_ids)
     stats["total_allocated_tokens"] = total_tokens_per_voter * stats["num_enrolled_voters"]
 
-    # Gather all votes across scenarios in this campaign
-    proposals = await db.get_proposals_by_campaign_id(campaign_id)
-    participant_ids = set()
-    for proposal in proposals:
-        votes = await db.get_proposal_votes(proposal["proposal_id"])
-        for vote in votes:
-            tokens = vote.get("tokens_invested") or 0
-            stats["total_invested_tokens"] += tokens
-            participant_ids.add(vote.get("user_id"))
-
-    stats["num_participants"] = len(participant_ids)
+    # One aggregate query across all scenarios instead of refetching every ballot
+    vote_totals = await db.get_campaign_vote_token_totals(campaign_id)
+    stats["total_invested_tokens"] = vote_totals["total_invested_tokens"]
+    stats["num_participants"] = vote_totals["num_participants"]
     stats["unused_tokens"] = max(stats["total_allocated_tokens"] - stats["total_invested_tokens"], 0)
     return stats
 
@@ -1866,7 +4720,8 @@ async def _generate_campaign_completion_summary(campaign: Dict[str, Any], scenar
     scenario_lines = []
     sorted_scenarios = sorted(scenarios, key=lambda s: s.get("scenario_order", 0))
     for sc in sorted_scenarios:
-        result = await db.get_proposal_results(sc["proposal_id"])
+        # Stored results for closed scenarios; otherwise a (cached) tally at the current revision
+        result = await db.get_proposal_results(sc["proposal_id"]) or await calculate_results(sc["proposal_id"])
         winner = result.get("winner") if result else None
         line = f"S#{sc.get('scenario_order')} P#{sc['proposal_id']} - {sc.get('status')}"
         if winner: